@@ -0,0 +1,186 @@
+# async_sync_runner.py - sync_products_from_sentos_api için asyncio sürücüsü
+
+import asyncio
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from connectors.shopify_api import ShopifyAPI
+from connectors.async_shopify_api import AsyncShopifyAPI
+from connectors.async_sentos_api import AsyncSentosAPI
+from connectors.sentos_snapshot import SentosCatalogSnapshot
+from operations import async_sync, delta_sync
+from operations.progress_bus import ensure_bus, product_event
+from operations.location_mapping import LocationMapping
+from operations.sync_pipeline import SyncChanges
+from sync_runner import (
+    _find_shopify_product, _build_product_set_input, _product_set_result, _product_set_changes,
+    PRODUCT_SET_MUTATION, PRODUCT_SET_OPERATION_QUERY,
+    PRODUCT_SET_POLL_INTERVAL, PRODUCT_SET_MAX_POLL_INTERVAL, PRODUCT_SET_TIMEOUT
+)
+
+# Aynı anda işlenen ürün sayısı yalnızca bellek için sınırlanır; istek hızını
+# mağazanın paylaşılan GraphQL maliyet bütçesi belirler.
+DEFAULT_MAX_IN_FLIGHT = 200
+FULL_SYNC_MODE = "Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)"
+
+
+async def _update_product(shopify_api, sentos_api, sentos_product, existing_product, sync_mode):
+    shopify_gid = existing_product['gid']
+    all_changes = SyncChanges()
+    if sync_mode in [FULL_SYNC_MODE, "Sadece Açıklamalar"]:
+        all_changes.merge(await async_sync.sync_details(shopify_api, shopify_gid, sentos_product))
+    if sync_mode in [FULL_SYNC_MODE, "Sadece Stok ve Varyantlar"]:
+        all_changes.merge(await async_sync.sync_stock_and_variants(shopify_api, shopify_gid, sentos_product))
+    if sync_mode in [FULL_SYNC_MODE, "Sadece Resimler", "SEO Alt Metinli Resimler"]:
+        set_alt = sync_mode in [FULL_SYNC_MODE, "SEO Alt Metinli Resimler"]
+        all_changes.merge(await async_sync.sync_media(shopify_api, sentos_api, shopify_gid, sentos_product, set_alt_text=set_alt))
+    return all_changes
+
+
+async def _wait_for_product_set(shopify_api, operation_id):
+    # Bekleme yalnızca bu coroutine'i durdurur, diğer ürünler işlenmeye devam eder
+    interval, waited = PRODUCT_SET_POLL_INTERVAL, 0.0
+    while waited < PRODUCT_SET_TIMEOUT:
+        await asyncio.sleep(interval)
+        waited += interval
+        operation = (await shopify_api.execute_graphql(PRODUCT_SET_OPERATION_QUERY, {'id': operation_id})).get('productOperation') or {}
+        if operation.get('status') == 'COMPLETE':
+            return _product_set_result(operation_id, operation)
+        interval = min(interval * 2, PRODUCT_SET_MAX_POLL_INTERVAL)
+    raise Exception(f"Ürün oluşturma işlemi {PRODUCT_SET_TIMEOUT} sn içinde tamamlanmadı: {operation_id}")
+
+
+async def _create_product(shopify_api, sentos_api, sentos_product):
+    product_name = sentos_product.get('name', 'Bilinmeyen Ürün').strip()
+    media_urls = await sentos_api.get_ordered_image_urls(sentos_product.get('id'))
+    location_mapping = shopify_api.location_mapping
+    location_id = None if location_mapping else await shopify_api.get_default_location_id()
+    product_input, stocked = _build_product_set_input(sentos_product, location_id, media_urls, location_mapping=location_mapping)
+
+    result = (await shopify_api.execute_graphql(PRODUCT_SET_MUTATION, {'input': product_input})).get('productSet', {})
+    operation = result.get('productSetOperation')
+    errors = result.get('userErrors') or (operation or {}).get('userErrors')
+    if errors or not operation:
+        raise Exception(f"Ürün oluşturulamadı (productSet): {errors}")
+    product = await _wait_for_product_set(shopify_api, operation['id'])
+
+    if shopify_api.product_index is not None:
+        shopify_api.product_index.upsert_product(product)
+    return _product_set_changes(product_name, product, stocked, media_urls)
+
+
+async def _process_single_product(shopify_api, sentos_api, sentos_product, sync_mode, progress_callback, stats, details, semaphore):
+    name = sentos_product.get('name', 'Bilinmeyen Ürün')
+    sku = sentos_product.get('sku', 'SKU Yok')
+    log_entry = {'name': name, 'sku': sku}
+    async with semaphore:
+        try:
+            if not name.strip():
+                stats['skipped'] += 1
+                return
+
+            # Ürün dizini SQLite'tan senkron okunur; olay döngüsü bloklanmasın diye thread'de çalışır
+            existing_product = await asyncio.to_thread(_find_shopify_product, shopify_api, sentos_product)
+            changes_made = []
+            if existing_product:
+                if "Sadece Eksik" not in sync_mode:
+                    changes_made = await _update_product(shopify_api, sentos_api, sentos_product, existing_product, sync_mode)
+                    status = 'updated'
+                    stats['updated'] += 1
+                else:
+                    status = 'skipped'
+                    stats['skipped'] += 1
+            elif "Tam Senkronizasyon" in sync_mode or "Sadece Eksik" in sync_mode:
+                changes_made = await _create_product(shopify_api, sentos_api, sentos_product)
+                status = 'created'
+                stats['created'] += 1
+            else:
+                stats['skipped'] += 1
+                return
+
+            progress_callback({'product': product_event(status, name, sku, changes_made)})
+            details.append(log_entry)
+
+        except Exception as e:
+            progress_callback({'product': product_event('failed', name, sku, [str(e)])})
+            stats['failed'] += 1
+            log_entry.update({'status': 'failed', 'reason': str(e)})
+            details.append(log_entry)
+        finally:
+            stats['processed'] += 1
+
+
+async def _run_core_sync_logic(shopify_config, sentos_config, sync_mode, test_mode, progress_callback, stop_event,
+                               find_missing_only=False, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    start_time = time.monotonic()
+    stats = {'total': 0, 'created': 0, 'updated': 0, 'failed': 0, 'skipped': 0, 'processed': 0}
+    details = []
+
+    try:
+        # Ürün dizini yenilemesi bulk işlemle yapılır; senkron istemci ayrı bir thread'de çalışır
+        index_api = ShopifyAPI(shopify_config['store_url'], shopify_config['access_token'])
+        product_index = index_api.get_product_index()
+        await asyncio.to_thread(product_index.refresh, index_api, progress_callback)
+
+        async with AsyncShopifyAPI(shopify_config['store_url'], shopify_config['access_token']) as shopify_api, \
+                AsyncSentosAPI(sentos_config['api_url'], sentos_config['api_key'], sentos_config['api_secret'], sentos_config.get('cookie')) as sentos_api:
+            shopify_api.product_index = product_index
+            shopify_api.location_mapping = LocationMapping.load(shopify_config['store_url'])
+            # Taze katalog anlık görüntüsü varsa Sentos'a tekrar gidilmez. Anlık görüntü yalnızca
+            # diskten okunur; indirme her zaman asenkron istemciyle yapılır (get_products senkron
+            # istemci bekler ve TTL iki kontrol arasında dolabilir)
+            catalog = SentosCatalogSnapshot(sentos_api, ttl_seconds=delta_sync.catalog_ttl_for_mode(sync_mode))
+            sentos_products = await asyncio.to_thread(catalog.load_fresh)
+            if sentos_products is None:
+                sentos_products = await sentos_api.get_all_products(progress_callback)
+                await asyncio.to_thread(catalog.save, sentos_products)
+            if test_mode: sentos_products = sentos_products[:20]
+
+            products_to_process = sentos_products
+            if find_missing_only:
+                products_to_process = await asyncio.to_thread(
+                    lambda: [p for p in sentos_products if not _find_shopify_product(shopify_api, p)]
+                )
+                logging.info(f"{len(products_to_process)} adet eksik ürün bulundu.")
+            stats['total'] = len(products_to_process)
+
+            semaphore = asyncio.Semaphore(max_in_flight)
+            tasks = [
+                asyncio.create_task(_process_single_product(shopify_api, sentos_api, p, sync_mode, progress_callback, stats, details, semaphore))
+                for p in products_to_process
+            ]
+            for finished in asyncio.as_completed(tasks):
+                await finished
+                if stop_event.is_set():
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    break
+                processed, total = stats['processed'], stats['total']
+                progress = 55 + int((processed / total) * 45) if total > 0 else 100
+                progress_callback({'progress': progress, 'message': f"İşlenen: {processed}/{total}", 'stats': stats.copy()})
+
+            throttle_stats = shopify_api.get_throttle_stats()
+
+        duration = time.monotonic() - start_time
+        logging.info(f"GraphQL bütçe istatistikleri: {throttle_stats}")
+        results = {'stats': stats, 'details': details, 'duration': str(timedelta(seconds=duration)), 'throttle': throttle_stats}
+        progress_callback({'status': 'done', 'results': results})
+
+    except Exception as e:
+        logging.critical(f"Senkronizasyon görevi kritik bir hata oluştu: {e}\n{traceback.format_exc()}")
+        progress_callback({'status': 'error', 'message': str(e)})
+
+
+def sync_products_from_sentos_api_async(store_url, access_token, sentos_api_url, sentos_api_key, sentos_api_secret, sentos_cookie, test_mode, progress_callback, stop_event, max_in_flight=DEFAULT_MAX_IN_FLIGHT, sync_mode=FULL_SYNC_MODE):
+    """sync_runner.sync_products_from_sentos_api ile aynı sözleşme; worker thread'leri yerine coroutine kullanır."""
+    shopify_config = {'store_url': store_url, 'access_token': access_token}
+    sentos_config = {'api_url': sentos_api_url, 'api_key': sentos_api_key, 'api_secret': sentos_api_secret, 'cookie': sentos_cookie}
+    bus, owns_bus = ensure_bus(progress_callback)
+    try:
+        asyncio.run(_run_core_sync_logic(shopify_config, sentos_config, sync_mode, test_mode, bus, stop_event, max_in_flight=max_in_flight))
+    finally:
+        if owns_bus:
+            bus.close()
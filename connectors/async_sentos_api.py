@@ -0,0 +1,156 @@
+# connectors/async_sentos_api.py - asyncio tabanlı Sentos istemcisi
+
+import asyncio
+import re
+import logging
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+from .sentos_api import DEFAULT_PAGE_CONCURRENCY, PAGE_RETRIES, PAGE_PREFETCH_FACTOR
+
+DEFAULT_MAX_CONNECTIONS = 10
+# Aynı anda açık sayfa isteği sayısı; senkron istemcinin önden çekme penceresiyle aynı
+PAGE_WINDOW = DEFAULT_PAGE_CONCURRENCY * PAGE_PREFETCH_FACTOR
+DEFAULT_TIMEOUT_SECONDS = 90
+
+
+class AsyncSentosAPI:
+    """SentosAPI'nin asyncio karşılığı; yeniden deneme ve hata davranışı aynıdır."""
+    def __init__(self, api_url, api_key, api_secret, api_cookie=None,
+                 max_connections=DEFAULT_MAX_CONNECTIONS, timeout=DEFAULT_TIMEOUT_SECONDS):
+        self.api_url = api_url.strip().rstrip('/')
+        self.auth = aiohttp.BasicAuth(api_key, api_secret)
+        self.api_cookie = api_cookie
+        self.headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        self.max_retries = 5
+        self.base_delay = 15  # saniye cinsinden
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        if self.session is None:
+            # Sentos tek bir host; aynı anda açık bağlantı sayısı host başına sınırlanır
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_connections)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _request_json(self, method, endpoint, auth_type='basic', data=None, params=None, is_internal_call=False):
+        """İsteği gönderir ve JSON gövdesini döndürür (500/429 hatalarında üstel geri çekilme)."""
+        await self.open()
+        if is_internal_call:
+            parsed_url = urlparse(self.api_url)
+            url = f"{parsed_url.scheme}://{parsed_url.netloc}{endpoint}"
+        else:
+            url = urljoin(self.api_url + '/', endpoint.lstrip('/'))
+
+        headers = self.headers.copy()
+        auth = None
+        if auth_type == 'cookie':
+            if not self.api_cookie:
+                raise ValueError("Cookie ile istek için Sentos API Cookie ayarı gereklidir.")
+            headers['Cookie'] = self.api_cookie
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        else:
+            auth = self.auth
+
+        for attempt in range(self.max_retries):
+            try:
+                async with self.session.request(method, url, headers=headers, auth=auth, data=data, params=params) as response:
+                    if response.status in (500, 429) and attempt < self.max_retries - 1:
+                        wait_time = self.base_delay * (2 ** attempt)
+                        logging.warning(f"Sentos API'den {response.status} hatası alındı. {wait_time} saniye beklenip tekrar denenecek... (Deneme {attempt + 1}/{self.max_retries})")
+                        await asyncio.sleep(wait_time)
+                        continue
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+            except aiohttp.ClientResponseError as e:
+                logging.error(f"Sentos API Hatası ({url}): {e}")
+                raise Exception(f"Sentos API Hatası ({url}): {e}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.error(f"Sentos API Bağlantı Hatası ({url}): {e}")
+                raise Exception(f"Sentos API Bağlantı Hatası ({url}): {e}")
+
+    async def get_products_page(self, page, page_size=100):
+        return await self._request_json("GET", f"/products?page={page}&size={page_size}")
+
+    async def _get_page_with_retry(self, page, page_size, semaphore):
+        """Sayfayı pencere sınırı içinde çeker; başarısız olan yalnızca bu sayfa yeniden denenir."""
+        for attempt in range(PAGE_RETRIES):
+            try:
+                async with semaphore:
+                    return await self.get_products_page(page, page_size)
+            except Exception as e:
+                if attempt == PAGE_RETRIES - 1:
+                    raise
+                logging.warning(f"Sentos sayfa {page} tekrar deneniyor ({attempt + 1}/{PAGE_RETRIES}): {e}")
+                await asyncio.sleep(2 ** attempt)
+
+    async def get_all_products(self, progress_callback=None, page_size=100):
+        """
+        İlk sayfadan toplam sayıyı öğrenir, kalan sayfaları en fazla PAGE_WINDOW eşzamanlı
+        istekle çeker ve sırayla birleştirir. Hata veren sayfa tek başına yeniden denenir.
+        """
+        first = await self.get_products_page(1, page_size)
+        all_products = list(first.get('data', []))
+        total_elements = first.get('total_elements')
+        if isinstance(total_elements, int) and total_elements > len(all_products) and len(all_products) >= page_size:
+            last_page = -(-total_elements // page_size)
+            semaphore = asyncio.Semaphore(PAGE_WINDOW)
+            pages = await asyncio.gather(*(self._get_page_with_retry(p, page_size, semaphore) for p in range(2, last_page + 1)))
+            for response in pages:
+                all_products.extend(response.get('data', []))
+        if progress_callback:
+            progress_callback({'message': f"Sentos'tan {len(all_products)} ürün çekildi.", 'progress': 100})
+        logging.info(f"Sentos'tan toplam {len(all_products)} ürün çekildi.")
+        return all_products
+
+    async def get_ordered_image_urls(self, product_id):
+        """Cookie eksikse None, hata durumunda boş liste döner (SentosAPI ile aynı sözleşme)."""
+        if not self.api_cookie:
+            logging.warning(f"Sentos Cookie ayarlanmadığı için sıralı resimler alınamıyor (Ürün ID: {product_id}).")
+            return None
+        try:
+            payload = {
+                'draw': '1', 'start': '0', 'length': '100',
+                'search[value]': '', 'search[regex]': 'false',
+                'urun': product_id, 'model': '0', 'renk': '0',
+                'order[0][column]': '0', 'order[0][dir]': 'desc'
+            }
+            response_json = await self._request_json(
+                "POST", "/urun_sayfalari/include/ajax/fetch_urunresimler.php",
+                auth_type='cookie', data=payload, is_internal_call=True
+            )
+            ordered_urls = []
+            for item in response_json.get('data', []):
+                if len(item) > 2:
+                    match = re.search(r'href="(https?://[^"]+/o_[^"]+)"', item[2])
+                    if match:
+                        ordered_urls.append(match.group(1))
+            logging.info(f"Ürün ID {product_id} için {len(ordered_urls)} adet sıralı resim URL'si bulundu.")
+            return ordered_urls
+        except ValueError as ve:
+            logging.error(f"Resim sırası alınamadı: {ve}")
+            return None
+        except Exception as e:
+            logging.error(f"Sıralı resimler çekilirken hata oluştu (Ürün ID: {product_id}): {e}")
+            return []
+
+    async def get_product_by_sku(self, sku):
+        if not sku:
+            raise ValueError("Aranacak SKU boş olamaz.")
+        response = await self._request_json("GET", f"/products?sku={sku.strip()}")
+        products = response.get('data', [])
+        return products[0] if products else None
@@ -0,0 +1,338 @@
+# connectors/async_shopify_api.py - asyncio tabanlı Shopify GraphQL istemcisi
+
+import asyncio
+import json
+import logging
+
+import aiohttp
+
+from .shopify_throttle import get_store_throttle
+from .product_index import ProductIndex, description_hash
+
+# Eşzamanlılığı maliyet bütçesi belirler; bu sınır yalnızca açık soket sayısını korur
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_TIMEOUT_SECONDS = 90
+
+
+class AsyncShopifyAPI:
+    """
+    ShopifyAPI'nin asyncio karşılığı. Aynı mağaza için senkron istemciyle aynı
+    GraphQLCostThrottle'ı paylaşır: her istek bütçeden maliyet ayırır, yetersizse
+    thread yerine coroutine `asyncio.sleep` ile bekler. Yüzlerce istek aynı anda
+    beklemede olabilir; gerçek hız throttleStatus ile belirlenir.
+
+    Kullanım:
+        async with AsyncShopifyAPI(store_url, token) as shopify_api:
+            data = await shopify_api.execute_graphql(query, variables)
+    """
+    def __init__(self, store_url, access_token, api_version='2024-10',
+                 max_connections=DEFAULT_MAX_CONNECTIONS, timeout=DEFAULT_TIMEOUT_SECONDS):
+        if not store_url: raise ValueError("Shopify Mağaza URL'si boş olamaz.")
+        if not access_token: raise ValueError("Shopify Erişim Token'ı boş olamaz.")
+
+        self.store_url = store_url if store_url.startswith('http') else f"https://{store_url.strip()}"
+        self.access_token = access_token
+        self.api_version = api_version
+        self.graphql_url = f"{self.store_url}/admin/api/{self.api_version}/graphql.json"
+        self.headers = {
+            'X-Shopify-Access-Token': access_token,
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'User-Agent': 'Sentos-Sync-Python/Async-1.0'
+        }
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.throttle = get_store_throttle(self.store_url)
+        self.product_index = None
+        # Sentos deposu → Shopify lokasyonu eşleştirmesi (LocationMapping); yoksa varsayılan lokasyon kullanılır
+        self.location_mapping = None
+        self.location_id = None
+        self.session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_connections)
+            self.session = aiohttp.ClientSession(
+                connector=connector, headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def get_product_index(self):
+        """Senkron istemciyle aynı kalıcı ürün dizinini (SQLite) açar."""
+        if self.product_index is None:
+            self.product_index = ProductIndex(self.store_url)
+        return self.product_index
+
+    def get_throttle_stats(self):
+        return self.throttle.get_stats()
+
+    async def _reserve(self, cost):
+        while True:
+            reserved, wait_time = self.throttle.try_reserve(cost)
+            if reserved is not None:
+                return reserved
+            await asyncio.sleep(wait_time)
+
+    async def execute_graphql(self, query, variables=None, cost_hint=None):
+        """GraphQL sorgusunu çalıştırır; hata yönetimi ve cost_hint ShopifyAPI.execute_graphql ile aynıdır."""
+        await self.open()
+        payload = {'query': query, 'variables': variables or {}}
+        max_retries = 8
+        retry_delay = 2
+        estimated_cost = self.throttle.estimate_cost(query, cost_hint)
+
+        for attempt in range(max_retries):
+            reserved = await self._reserve(estimated_cost)
+            try:
+                async with self.session.post(self.graphql_url, json=payload) as response:
+                    if response.status == 429 and attempt < max_retries - 1:
+                        self.throttle.release(reserved)
+                        wait_time = float(response.headers.get('Retry-After') or retry_delay)
+                        logging.warning(f"HTTP 429 Rate Limit! {wait_time} saniye beklenip tekrar denenecek...")
+                        await asyncio.sleep(wait_time)
+                        continue
+                    response.raise_for_status()
+                    response_data = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.throttle.release(reserved)
+                logging.error(f"API bağlantı hatası: {e}")
+                raise
+
+            cost_info = response_data.get('extensions', {}).get('cost')
+            self.throttle.settle(reserved, cost_info, query)
+
+            if "errors" in response_data:
+                errors = response_data.get("errors", [])
+                is_throttled = any(err.get('extensions', {}).get('code') == 'THROTTLED' for err in errors)
+                if is_throttled and attempt < max_retries - 1:
+                    estimated_cost = self.throttle.record_throttled(cost_info)
+                    logging.warning(f"GraphQL Throttled! {estimated_cost:.0f} puanlık bütçe yenilenince tekrar denenecek... (Deneme {attempt + 1}/{max_retries})")
+                    continue
+
+                logging.error(f"GraphQL Hatası - Query: {query[:200]}")
+                if variables:
+                    logging.error(f"Variables: {json.dumps(variables)[:500]}")
+                error_messages = [err.get('message', 'Bilinmeyen GraphQL hatası') for err in errors]
+                raise Exception(f"GraphQL Error: {'; '.join(error_messages)}")
+
+            return response_data.get("data", {})
+
+        raise Exception(f"API isteği {max_retries} denemenin ardından başarısız oldu.")
+
+    async def paginate(self, query, variables, connection_path):
+        """
+        Cursor tabanlı sayfalama: her sayfadaki düğümleri yield eder.
+        Sorgu `$cursor` değişkeni almalı; connection_path örn. ('products',) veya ('product', 'variants').
+        """
+        variables = dict(variables or {}, cursor=None)
+        while True:
+            data = await self.execute_graphql(query, variables)
+            connection = data
+            for key in connection_path:
+                connection = (connection or {}).get(key) or {}
+            for edge in connection.get('edges', []):
+                yield edge['node']
+            page_info = connection.get('pageInfo', {})
+            if not page_info.get('hasNextPage'):
+                break
+            variables['cursor'] = page_info['endCursor']
+
+    # --- Lokasyon ve envanter ---
+
+    async def get_default_location_id(self):
+        if self.location_id: return self.location_id
+        query = "query { locations(first: 1, query: \"status:active\") { edges { node { id } } } }"
+        data = await self.execute_graphql(query)
+        locations = data.get("locations", {}).get("edges", [])
+        if not locations: raise Exception("Shopify mağazasında aktif bir envanter lokasyonu bulunamadı.")
+        self.location_id = locations[0]['node']['id']
+        logging.info(f"Shopify Lokasyon ID'si bulundu: {self.location_id}")
+        return self.location_id
+
+    async def get_product_details(self, product_gid):
+        """ShopifyAPI.get_product_details karşılığı: önce dizin, yoksa tek ürün okuması."""
+        if self.product_index is not None and self.product_index.is_current() and (details := self.product_index.get_details(product_gid)):
+            return details
+        query = "query getProductDetails($id: ID!) { product(id: $id) { title descriptionHtml productType } }"
+        try:
+            product = (await self.execute_graphql(query, {"id": product_gid})).get("product")
+        except Exception as e:
+            logging.error(f"Ürün detayları alınırken hata: {e}")
+            return None
+        if not product:
+            return None
+        details = {'title': (product.get('title') or '').strip(), 'description_hash': description_hash(product.get('descriptionHtml')),
+                   'product_type': product.get('productType') or ''}
+        if self.product_index is not None:
+            self.product_index.update_details(product_gid, details['title'], details['description_hash'], details['product_type'])
+        return details
+
+    async def get_product_variants(self, product_gid):
+        """stock_sync._get_shopify_variants ile aynı biçimde varyantları döndürür."""
+        query = """
+        query getProductVariants($id: ID!) {
+            product(id: $id) {
+                variants(first: 250) {
+                    edges { node { id inventoryItem { id sku } selectedOptions { name value } } }
+                }
+            }
+        }
+        """
+        try:
+            data = await self.execute_graphql(query, {"id": product_gid})
+            return [e['node'] for e in data.get("product", {}).get("variants", {}).get("edges", [])]
+        except Exception as e:
+            logging.error(f"Varyant bilgileri alınırken hata: {e}")
+            return []
+
+    async def set_on_hand_quantities(self, adjustments, batch_size=50):
+        """
+        [{'inventoryItemId', 'availableQuantity'}] listesini satırın 'locationId' değerine, yoksa
+        varsayılan lokasyona yazar. Yazılamayan partilerin inventoryItemId kümesini döndürür.
+        """
+        failed = set()
+        if not adjustments:
+            return failed
+        location_id = await self.get_default_location_id()
+        mutation = """
+        mutation inventorySetOnHandQuantities($input: InventorySetOnHandQuantitiesInput!) {
+            inventorySetOnHandQuantities(input: $input) {
+                inventoryAdjustmentGroup { id }
+                userErrors { field message code }
+            }
+        }
+        """
+        for i in range(0, len(adjustments), batch_size):
+            set_quantities = [
+                {"inventoryItemId": adj["inventoryItemId"], "locationId": adj.get("locationId") or location_id, "quantity": adj["availableQuantity"]}
+                for adj in adjustments[i:i + batch_size]
+            ]
+            try:
+                result = await self.execute_graphql(mutation, {"input": {"reason": "correction", "setQuantities": set_quantities}})
+            except Exception as e:
+                logging.error(f"Bulk stok güncelleme batch {i//batch_size + 1} gönderilemedi: {e}")
+                failed.update(q["inventoryItemId"] for q in set_quantities)
+                continue
+            if errors := result.get('inventorySetOnHandQuantities', {}).get('userErrors', []):
+                logging.error(f"Bulk stok güncelleme batch {i//batch_size + 1} hataları: {errors}")
+                failed.update(q["inventoryItemId"] for q in set_quantities)
+            else:
+                logging.info(f"✅ Batch {i//batch_size + 1}: {len(set_quantities)} varyant stoğu güncellendi")
+        return failed
+
+    async def activate_inventory_items(self, variants):
+        """Varyantların inventoryItem'larını eşlenen lokasyonlarda (eşleştirme yoksa varsayılan lokasyonda) aktif eder."""
+        inventory_item_ids = [v['inventoryItem']['id'] for v in variants if v.get('inventoryItem', {}).get('id')]
+        if not inventory_item_ids:
+            return
+        location_ids = self.location_mapping.locations() if self.location_mapping else [await self.get_default_location_id()]
+        mutation = """
+        mutation inventoryBulkToggleActivation($inventoryItemUpdates: [InventoryBulkToggleActivationInput!]!) {
+            inventoryBulkToggleActivation(inventoryItemUpdates: $inventoryItemUpdates) {
+                inventoryLevels { id }
+                userErrors { field message }
+            }
+        }
+        """
+        updates = [
+            {"inventoryItemId": item_id, "locationId": location_id, "activate": True}
+            for item_id in inventory_item_ids for location_id in location_ids
+        ]
+        await self.execute_graphql(mutation, {"inventoryItemUpdates": updates})
+        logging.info(f"✅ {len(inventory_item_ids)} varyant inventory aktivasyonu tamamlandı")
+
+    # --- Medya ---
+
+    async def get_product_media_details(self, product_gid):
+        try:
+            query = """
+            query getProductMedia($id: ID!) {
+                product(id: $id) {
+                    media(first: 250) {
+                        edges { node { id alt ... on MediaImage { image { originalSrc } } } }
+                    }
+                }
+            }
+            """
+            result = await self.execute_graphql(query, {"id": product_gid})
+            media_edges = result.get("product", {}).get("media", {}).get("edges", [])
+            media_details = [{'id': n['id'], 'alt': n.get('alt'), 'originalSrc': n.get('image', {}).get('originalSrc')} for n in [e.get('node') for e in media_edges] if n]
+            logging.info(f"Ürün {product_gid} için {len(media_details)} mevcut medya bulundu.")
+            return media_details
+        except Exception as e:
+            logging.error(f"Mevcut medya detayları alınırken hata: {e}")
+            return []
+
+    async def create_product_media(self, product_gid, media_input, batch_size=5):
+        """CreateMediaInput listesini gruplar halinde ürüne ekler."""
+        query = """
+        mutation productCreateMedia($productId: ID!, $media: [CreateMediaInput!]!) {
+            productCreateMedia(productId: $productId, media: $media) {
+                media { id }
+                mediaUserErrors { field message }
+            }
+        }
+        """
+        for i in range(0, len(media_input), batch_size):
+            batch = media_input[i:i + batch_size]
+            try:
+                result = await self.execute_graphql(query, {'productId': product_gid, 'media': batch})
+                if errors := result.get('productCreateMedia', {}).get('mediaUserErrors', []):
+                    logging.error(f"Medya batch {i//batch_size + 1} ekleme hataları: {errors}")
+                else:
+                    logging.info(f"✅ Batch {i//batch_size + 1}: {len(batch)} medya başarıyla eklendi")
+            except Exception as e:
+                logging.error(f"Medya batch {i//batch_size + 1} eklenirken hata: {e}")
+
+    async def delete_product_media(self, product_id, media_ids):
+        if not media_ids:
+            return
+        logging.info(f"Ürün GID: {product_id} için {len(media_ids)} medya siliniyor...")
+        query = """
+        mutation productDeleteMedia($productId: ID!, $mediaIds: [ID!]!) {
+            productDeleteMedia(productId: $productId, mediaIds: $mediaIds) {
+                deletedMediaIds
+                userErrors { field message }
+            }
+        }
+        """
+        try:
+            result = await self.execute_graphql(query, {'productId': product_id, 'mediaIds': media_ids})
+            if errors := result.get('productDeleteMedia', {}).get('userErrors', []):
+                logging.warning(f"Medya silme hataları: {errors}")
+            logging.info(f"{len(result.get('productDeleteMedia', {}).get('deletedMediaIds', []))} medya başarıyla silindi.")
+        except Exception as e:
+            logging.error(f"Medya silinirken kritik hata oluştu: {e}")
+
+    async def reorder_product_media(self, product_id, media_ids):
+        if not media_ids or len(media_ids) < 2:
+            logging.info("Yeniden sıralama için yeterli medya bulunmuyor (1 veya daha az).")
+            return
+        moves = [{"id": media_id, "newPosition": str(i)} for i, media_id in enumerate(media_ids)]
+        query = """
+        mutation productReorderMedia($id: ID!, $moves: [MoveInput!]!) {
+          productReorderMedia(id: $id, moves: $moves) {
+            userErrors { field message }
+          }
+        }
+        """
+        try:
+            result = await self.execute_graphql(query, {'id': product_id, 'moves': moves})
+            if errors := result.get('productReorderMedia', {}).get('userErrors', []):
+                logging.warning(f"Medya yeniden sıralama hataları: {errors}")
+            else:
+                logging.info("✅ Medya yeniden sıralama işlemi başarıyla gönderildi.")
+        except Exception as e:
+            logging.error(f"Medya yeniden sıralanırken kritik hata: {e}")
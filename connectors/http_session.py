@@ -0,0 +1,120 @@
+# connectors/http_session.py - Bağlayıcılar için ortak keep-alive HTTP havuzu
+
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 90
+
+
+class ConnectionStats:
+    """Havuzdaki yeni ve yeniden kullanılan bağlantı sayaçları (thread-safe)."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self.lock:
+            self.new_connections += 1
+
+    @property
+    def reused_connections(self):
+        with self.lock:
+            return max(0, self.requests - self.new_connections)
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'reused_connections': max(0, self.requests - self.new_connections),
+            }
+
+
+def _counting_pool_class(base_class, stats):
+    """urllib3 havuz sınıfını, açılan her yeni TCP/TLS bağlantısını sayacak şekilde sarar."""
+    class _CountingPool(base_class):
+        def _new_conn(self):
+            stats.record_new_connection()
+            return super()._new_conn()
+    _CountingPool.__name__ = f"Counting{base_class.__name__}"
+    return _CountingPool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """Bağlantı sayaçlı, boyutu çalışan sayısına göre ayarlanmış HTTPAdapter."""
+    def __init__(self, pool_size, stats, **kwargs):
+        # HTTPAdapter.__init__ içinde init_poolmanager çağrıldığı için stats önce atanmalı
+        self.stats = stats
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size, **kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool_class(HTTPConnectionPool, self.stats),
+            'https': _counting_pool_class(HTTPSConnectionPool, self.stats),
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.record_request()
+        return super().send(request, **kwargs)
+
+
+class PooledHTTPClient:
+    """
+    Thread-safe keep-alive HTTP istemcisi.
+    Her thread kendi requests.Session nesnesini kullanır, ancak hepsi aynı
+    bağlantı havuzunu (adapter) paylaşır; böylece çerez/başlık durumu thread'ler
+    arasında karışmaz ve TCP+TLS el sıkışması yalnızca havuz dolarken yapılır.
+    """
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT):
+        self.pool_size = max(1, int(pool_size or DEFAULT_POOL_SIZE))
+        self.timeout = (connect_timeout, read_timeout)
+        self.stats = ConnectionStats()
+        self.adapter = PooledHTTPAdapter(self.pool_size, self.stats)
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+
+    def _get_session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', self.adapter)
+            session.mount('http://', self.adapter)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self._get_session().request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get_stats(self):
+        stats = self.stats.as_dict()
+        stats['pool_size'] = self.pool_size
+        return stats
+
+    def close(self):
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+        self.adapter.close()
+        logging.debug(f"HTTP havuzu kapatıldı: {self.get_stats()}")
@@ -0,0 +1,506 @@
+# connectors/product_index.py - Shopify ürünleri için kalıcı (SQLite) SKU/başlık dizini
+
+import os
+import re
+import hashlib
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+DATA_CACHE_DIR = "data_cache"
+
+INDEX_PRODUCT_FIELDS = """
+        id
+        title
+        updatedAt
+        descriptionHtml
+        productType
+"""
+
+INDEX_VARIANT_FIELDS = """
+              id
+              sku
+              inventoryItem { id }
+"""
+
+BULK_INDEX_QUERY = """
+{
+  products {
+    edges {
+      node {%s
+        variants {
+          edges {
+            node {%s
+            }
+          }
+        }
+      }
+    }
+  }
+}
+""" % (INDEX_PRODUCT_FIELDS, INDEX_VARIANT_FIELDS)
+
+INCREMENTAL_INDEX_QUERY = """
+query productIndexDelta($cursor: String, $query: String) {
+  products(first: 50, after: $cursor, query: $query) {
+    pageInfo { hasNextPage endCursor }
+    edges {
+      node {%s
+        variants(first: 100) {
+          pageInfo { hasNextPage endCursor }
+          edges {
+            node {%s
+            }
+          }
+        }
+      }
+    }
+  }
+}
+""" % (INDEX_PRODUCT_FIELDS, INDEX_VARIANT_FIELDS)
+
+# 100'den fazla varyantı olan ürünün kalan varyantları; kesik liste dizine yazılmaz
+PRODUCT_VARIANTS_PAGE_QUERY = """
+query productIndexVariants($id: ID!, $cursor: String) {
+  product(id: $id) {
+    variants(first: 250, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      edges {
+        node {%s
+        }
+      }
+    }
+  }
+}
+""" % INDEX_VARIANT_FIELDS
+
+DELETED_PRODUCTS_QUERY = """
+query productIndexDeletions($cursor: String, $query: String) {
+  deletionEvents(first: 250, after: $cursor, subjectTypes: [PRODUCT], query: $query) {
+    pageInfo { hasNextPage endCursor }
+    edges { node { subjectId occurredAt } }
+  }
+}
+"""
+
+
+def forget_deleted_product(shopify_api, product_gid):
+    """Shopify'da artık bulunmayan ürünü (okuma/mutation 'yok' dediğinde) dizinden siler."""
+    index = getattr(shopify_api, 'product_index', None)
+    if index is not None and product_gid:
+        logging.warning(f"Ürün Shopify'da bulunamadı, dizinden siliniyor: {product_gid}")
+        index.remove_product(product_gid)
+
+
+def description_hash(html):
+    """Açıklamanın boşluk farklarından etkilenmeyen özeti (dizinde tam HTML yerine saklanır)."""
+    normalized = re.sub(r'\s+', ' ', html or '').strip()
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def _store_slug(store_url):
+    host = (store_url or '').lower().replace('https://', '').replace('http://', '').strip('/')
+    return re.sub(r'[^a-z0-9]+', '_', host).strip('_') or 'default'
+
+
+class ProductIndex:
+    """
+    SKU ve başlıktan ürün GID, varyant GID ve inventoryItem GID'ine giden kalıcı dizin.
+
+    İlk çalıştırmada tüm katalog tek bir bulk işlemle yüklenir; sonraki çalıştırmalarda
+    yalnızca son filigrandan (watermark) sonra güncellenen ürünler `updated_at:>`
+    filtresiyle okunur. Silinen ürünler `deletionEvents` ile her artımlı güncellemede,
+    ayrıca okuma/mutation ürünün olmadığını bildirdiğinde dizinden çıkarılır; dizin yine de
+    `full_refresh_days` günde bir baştan kurulur (bulk başarısızsa sayfalı okumayla).
+    """
+    def __init__(self, store_url, db_path=None, full_refresh_days=7):
+        self.db_path = db_path or os.path.join(DATA_CACHE_DIR, f"product_index_{_store_slug(store_url)}.db")
+        self.full_refresh_days = full_refresh_days
+        self.lock = threading.Lock()
+        # Bu nesne üzerinden yapılan son başarılı yenilemenin başlangıcı (None: bu çalıştırmada yenilenmedi)
+        self.refreshed_at = None
+        self._ensure_db_exists()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_db_exists(self):
+        """Veritabanı ve tabloları yoksa oluşturur"""
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS products (
+                    gid TEXT PRIMARY KEY,
+                    title TEXT,
+                    updated_at TEXT,
+                    description_hash TEXT,
+                    product_type TEXT
+                )
+            """)
+            # Detay sütunları sonradan eklendi; eski dizinlerde satırlar bir sonraki okumada dolar
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(products)")}
+            for column in ('description_hash', 'product_type'):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE products ADD COLUMN {column} TEXT")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS variants (
+                    variant_gid TEXT PRIMARY KEY,
+                    product_gid TEXT NOT NULL,
+                    sku TEXT,
+                    inventory_item_gid TEXT
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_products_title ON products(title)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_variants_sku ON variants(sku)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_variants_product ON variants(product_gid)")
+
+    # --- Meta ---
+
+    def _get_meta(self, conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def get_watermark(self):
+        with self._connect() as conn:
+            return self._get_meta(conn, 'watermark')
+
+    # --- Yazma ---
+
+    @staticmethod
+    def _rows_for_product(product):
+        title = (product.get('title') or '').strip()
+        # Yanıtta açıklama yoksa özet bilinmiyor sayılır (None)
+        desc_hash = description_hash(product['descriptionHtml']) if 'descriptionHtml' in product else None
+        product_row = (product['id'], title, product.get('updatedAt'), desc_hash, product.get('productType'))
+        variants = [edge.get('node') or {} for edge in product.get('variants', {}).get('edges', [])]
+        return product_row, ProductIndex._variant_rows(product['id'], variants)
+
+    @staticmethod
+    def _variant_rows(product_gid, variants):
+        rows = []
+        for variant in variants:
+            if not variant.get('id'):
+                continue
+            inventory_item = variant.get('inventoryItem') or {}
+            sku = (variant.get('sku') or inventory_item.get('sku') or '').strip() or None
+            rows.append((variant['id'], product_gid, sku, inventory_item.get('id')))
+        return rows
+
+    def _write_products(self, conn, products):
+        self._write_rows(conn, [self._rows_for_product(product) for product in products])
+
+    def _write_rows(self, conn, rows):
+        watermark = self._get_meta(conn, 'watermark')
+        for product_row, variant_rows in rows:
+            conn.execute(
+                "INSERT OR REPLACE INTO products (gid, title, updated_at, description_hash, product_type) VALUES (?, ?, ?, ?, ?)",
+                product_row
+            )
+            conn.execute("DELETE FROM variants WHERE product_gid = ?", (product_row[0],))
+            conn.executemany(
+                "INSERT OR REPLACE INTO variants (variant_gid, product_gid, sku, inventory_item_gid) VALUES (?, ?, ?, ?)",
+                variant_rows
+            )
+            if product_row[2] and (watermark is None or product_row[2] > watermark):
+                watermark = product_row[2]
+        if watermark:
+            self._set_meta(conn, 'watermark', watermark)
+
+    def upsert_product(self, product):
+        """
+        Tek bir ürünü (id, title, updatedAt ve variants bağlantısıyla) dizine yazar.
+        Yeni oluşturulan ürünler bu sayede aynı çalıştırmadaki sonraki aramalarda bulunur.
+        """
+        with self.lock:
+            with self._connect() as conn:
+                self._write_products(conn, [product])
+
+    def replace_variants(self, product_gid, variants):
+        """Ürünün varyant satırlarını verilen listeyle değiştirir (varyant ekleme sonrası)."""
+        with self.lock:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM variants WHERE product_gid = ?", (product_gid,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO variants (variant_gid, product_gid, sku, inventory_item_gid) VALUES (?, ?, ?, ?)",
+                    self._variant_rows(product_gid, variants)
+                )
+
+    def update_details(self, product_gid, title=None, description_hash=None, product_type=None):
+        """Başarılı productUpdate sonrası dizindeki detayları yazılan değerlerle günceller."""
+        fields = {'title': title, 'description_hash': description_hash, 'product_type': product_type}
+        fields = {k: v for k, v in fields.items() if v is not None}
+        if not fields:
+            return
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        with self.lock:
+            with self._connect() as conn:
+                conn.execute(f"UPDATE products SET {assignments} WHERE gid = ?", (*fields.values(), product_gid))
+
+    def remove_product(self, product_gid):
+        with self.lock:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM variants WHERE product_gid = ?", (product_gid,))
+                conn.execute("DELETE FROM products WHERE gid = ?", (product_gid,))
+
+    # --- Yenileme ---
+
+    def _needs_full_refresh(self):
+        with self._connect() as conn:
+            last_full = self._get_meta(conn, 'last_full_refresh')
+            watermark = self._get_meta(conn, 'watermark')
+        if not last_full or not watermark:
+            return True
+        try:
+            return datetime.fromisoformat(last_full) < datetime.now(timezone.utc) - timedelta(days=self.full_refresh_days)
+        except ValueError:
+            return True
+
+    def is_ready(self):
+        """Dizin kurulmuş ve tam yenileme zamanı gelmemişse True (artımlı güncelleme yeterli)."""
+        return not self._needs_full_refresh()
+
+    def refresh(self, shopify_api, progress_callback=None, full=False):
+        """Dizini günceller: gerekiyorsa tam yükleme, aksi halde filigrandan sonraki değişiklikler."""
+        started_at = datetime.now(timezone.utc)
+        if full or self._needs_full_refresh():
+            total = self._full_refresh(shopify_api, progress_callback)
+        else:
+            total = self._incremental_refresh(shopify_api, progress_callback)
+        self.refreshed_at = started_at
+        return total
+
+    def is_current(self):
+        """
+        Dizin bu çalıştırmada Shopify'dan yenilendiyse True. Yenilenmemiş dizindeki detaylar
+        Shopify admininde sonradan yapılan değişiklikleri içermeyebilir.
+        """
+        return self.refreshed_at is not None
+
+    def _iter_catalog(self, shopify_api, progress_callback=None):
+        """Tüm katalog: önce tek bulk işlem, başarısız olursa (örn. başka bulk işlem sürüyor) sayfalı okuma."""
+        try:
+            yield from shopify_api.bulk.run_tree(BULK_INDEX_QUERY, {'ProductVariant': 'variants'}, progress_callback)
+            return
+        except Exception as e:
+            logging.warning(f"Ürün dizini bulk ile okunamadı, sayfalı okumaya geçiliyor: {e}")
+        yield from self._iter_product_pages(shopify_api, None, progress_callback)
+
+    def _iter_product_pages(self, shopify_api, query, progress_callback=None):
+        variables = {'cursor': None, 'query': query}
+        total = 0
+        while True:
+            if progress_callback:
+                progress_callback({'message': f"Shopify ürün dizini okunuyor... {total} ürün."})
+            products_data = shopify_api.execute_graphql(INCREMENTAL_INDEX_QUERY, variables).get('products', {})
+            for edge in products_data.get('edges', []):
+                total += 1
+                yield self._with_all_variants(shopify_api, edge['node'])
+            page_info = products_data.get('pageInfo', {})
+            if not page_info.get('hasNextPage'):
+                return
+            variables['cursor'] = page_info['endCursor']
+
+    @staticmethod
+    def _with_all_variants(shopify_api, product):
+        """
+        Sayfadaki varyant bağlantısı kesikse (hasNextPage) kalan varyantları ürün bazında okur.
+        Dizin ürünün varyant satırlarını silip yeniden yazdığı için liste eksiksiz olmalıdır.
+        """
+        connection = product.get('variants') or {}
+        page_info = connection.get('pageInfo') or {}
+        if not page_info.get('hasNextPage'):
+            return product
+        edges = list(connection.get('edges', []))
+        variables = {'id': product['id'], 'cursor': page_info.get('endCursor')}
+        while True:
+            page = (shopify_api.execute_graphql(PRODUCT_VARIANTS_PAGE_QUERY, variables).get('product') or {}).get('variants') or {}
+            edges.extend(page.get('edges', []))
+            page_info = page.get('pageInfo') or {}
+            if not page_info.get('hasNextPage'):
+                break
+            variables['cursor'] = page_info['endCursor']
+        return {**product, 'variants': {'edges': edges}}
+
+    def _full_refresh(self, shopify_api, progress_callback=None):
+        started_at = datetime.now(timezone.utc).isoformat()
+        # Satırlar önce bellekte toplanır; okuma sürerken yazma kilidi ve işlem açık tutulmaz
+        try:
+            rows = []
+            for product in self._iter_catalog(shopify_api, progress_callback):
+                rows.append(self._rows_for_product(product))
+                if progress_callback and len(rows) % 500 == 0:
+                    progress_callback({'message': f"Shopify ürün dizini oluşturuluyor... {len(rows)} ürün okundu."})
+        except Exception as e:
+            if self.get_watermark() is None:
+                raise
+            logging.warning(f"Ürün dizini baştan kurulamadı, mevcut dizin artımlı güncellenecek: {e}")
+            try:
+                return self._incremental_refresh(shopify_api, progress_callback)
+            except Exception as incremental_error:
+                logging.warning(f"Ürün dizini güncellenemedi, mevcut dizinle devam ediliyor: {incremental_error}")
+                return 0
+
+        with self.lock:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM variants")
+                conn.execute("DELETE FROM products")
+                conn.execute("DELETE FROM meta WHERE key = 'watermark'")
+                self._write_rows(conn, rows)
+                self._set_meta(conn, 'last_full_refresh', started_at)
+                self._set_meta(conn, 'deletions_checked_at', started_at)
+        logging.info(f"Ürün dizini baştan oluşturuldu: {len(rows)} ürün ({self.db_path}).")
+        return len(rows)
+
+    def _incremental_refresh(self, shopify_api, progress_callback=None):
+        watermark = self.get_watermark()
+        total, batch = 0, []
+        for product in self._iter_product_pages(shopify_api, f"updated_at:>'{watermark}'", progress_callback):
+            batch.append(product)
+            total += 1
+            if len(batch) >= 50:
+                self._write_batch(batch)
+                batch = []
+        self._write_batch(batch)
+        logging.info(f"Ürün dizini artımlı güncellendi: {total} ürün ('{watermark}' sonrası).")
+        self._remove_deleted(shopify_api)
+        return total
+
+    def _write_batch(self, products):
+        if products:
+            with self.lock:
+                with self._connect() as conn:
+                    self._write_products(conn, products)
+
+    def _remove_deleted(self, shopify_api):
+        """
+        Son kontrolden sonra Shopify'da silinen ürünleri (deletionEvents) dizinden çıkarır;
+        filigran tabanlı artımlı okuma silinen ürünleri göremez.
+        """
+        with self._connect() as conn:
+            since = self._get_meta(conn, 'deletions_checked_at') or self._get_meta(conn, 'last_full_refresh')
+        checked_at = datetime.now(timezone.utc).isoformat()
+        variables = {'cursor': None, 'query': f"occurred_at:>'{since}'" if since else None}
+        deleted = []
+        try:
+            while True:
+                events = shopify_api.execute_graphql(DELETED_PRODUCTS_QUERY, variables).get('deletionEvents', {})
+                deleted.extend(edge['node']['subjectId'] for edge in events.get('edges', []))
+                page_info = events.get('pageInfo', {})
+                if not page_info.get('hasNextPage'):
+                    break
+                variables['cursor'] = page_info['endCursor']
+        except Exception as e:
+            logging.warning(f"Silinen ürünler okunamadı, bir sonraki güncellemede tekrar denenecek: {e}")
+            return 0
+        gids = [subject if str(subject).startswith('gid://') else f"gid://shopify/Product/{subject}" for subject in deleted]
+        with self.lock:
+            with self._connect() as conn:
+                conn.executemany("DELETE FROM variants WHERE product_gid = ?", [(gid,) for gid in gids])
+                conn.executemany("DELETE FROM products WHERE gid = ?", [(gid,) for gid in gids])
+                self._set_meta(conn, 'deletions_checked_at', checked_at)
+        if gids:
+            logging.info(f"Ürün dizini: Shopify'da silinen {len(gids)} ürün dizinden çıkarıldı.")
+        return len(gids)
+
+    # --- Okuma ---
+
+    @staticmethod
+    def _product_ref(product_gid):
+        return {'id': int(product_gid.split('/')[-1]), 'gid': product_gid}
+
+    def find_by_sku(self, sku):
+        """SKU'ya sahip varyantın ürününü product_cache ile aynı biçimde ({'id', 'gid'}) döndürür."""
+        if not sku:
+            return None
+        with self._connect() as conn:
+            row = conn.execute("SELECT product_gid FROM variants WHERE sku = ? LIMIT 1", (str(sku).strip(),)).fetchone()
+        return self._product_ref(row[0]) if row else None
+
+    def find_by_title(self, title):
+        if not title:
+            return None
+        with self._connect() as conn:
+            row = conn.execute("SELECT gid FROM products WHERE title = ? LIMIT 1", (str(title).strip(),)).fetchone()
+        return self._product_ref(row[0]) if row else None
+
+    def find_product(self, sentos_product):
+        """Sentos ürününü önce SKU, sonra başlık ile eşleştirir."""
+        if product := self.find_by_sku((sentos_product.get('sku') or '').strip()):
+            return product
+        return self.find_by_title((sentos_product.get('name') or '').strip())
+
+    def get_details(self, product_gid):
+        """Ürünün {'title', 'description_hash', 'product_type'} bilgisi; açıklama özeti yoksa None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT title, description_hash, product_type FROM products WHERE gid = ?", (product_gid,)
+            ).fetchone()
+        if not row or row[1] is None:
+            return None
+        return {'title': row[0] or '', 'description_hash': row[1], 'product_type': row[2] or ''}
+
+    def get_variant(self, sku):
+        """SKU için {'variant_id', 'product_id', 'inventory_item_id'} döndürür."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT variant_gid, product_gid, inventory_item_gid FROM variants WHERE sku = ? LIMIT 1",
+                (str(sku).strip(),)
+            ).fetchone()
+        if not row:
+            return None
+        return {'variant_id': row[0], 'product_id': row[1], 'inventory_item_id': row[2]}
+
+    def get_product_variants(self, product_gid):
+        """Ürünün varyantlarını stock_sync._get_shopify_variants ile aynı biçimde döndürür."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT variant_gid, sku, inventory_item_gid FROM variants WHERE product_gid = ?", (product_gid,)
+            ).fetchall()
+        return [{'id': r[0], 'inventoryItem': {'id': r[2], 'sku': r[1]}} for r in rows]
+
+    def get_inventory_item_map(self):
+        """Tüm katalog için {sku: (inventory_item_gid, product_gid)} eşlemesini tek sorguda döndürür."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT sku, inventory_item_gid, product_gid FROM variants WHERE sku IS NOT NULL AND inventory_item_gid IS NOT NULL"
+            ).fetchall()
+        return {sku: (inventory_item_gid, product_gid) for sku, inventory_item_gid, product_gid in rows}
+
+    def get_variant_skus(self):
+        """Tüm katalogdaki SKU'lu varyantları [(product_gid, variant_gid, sku)] olarak tek sorguda döndürür."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT product_gid, variant_gid, sku FROM variants WHERE sku IS NOT NULL AND sku != ''"
+            ).fetchall()
+
+    def find_variants_by_sku_prefix(self, prefix):
+        """Ana model koduyla başlayan varyantları ürünlerine göre gruplar: {product_gid: [{'id', 'sku'}]}"""
+        escaped = str(prefix).strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT product_gid, variant_gid, sku FROM variants WHERE sku LIKE ? ESCAPE '\\'", (escaped + '%',)
+            ).fetchall()
+        grouped = {}
+        for product_gid, variant_gid, sku in rows:
+            # LIKE büyük/küçük harf duyarsız olduğu için kesin önek kontrolü
+            if not sku.startswith(str(prefix).strip()):
+                continue
+            grouped.setdefault(product_gid, []).append({'id': variant_gid, 'sku': sku})
+        return grouped
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
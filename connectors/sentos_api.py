@@ -5,12 +5,28 @@ import time
 import logging
 import re
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin, urlparse
 from requests.auth import HTTPBasicAuth
 
+from .http_session import PooledHTTPClient, DEFAULT_POOL_SIZE, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from .sentos_snapshot import SentosCatalogSnapshot, DEFAULT_SNAPSHOT_TTL
+
+# Ürün sayfalarının eşzamanlı çekilmesi: Sentos tek host olduğu için aynı anda
+# en fazla DEFAULT_PAGE_CONCURRENCY sayfa isteği açık tutulur.
+DEFAULT_PAGE_CONCURRENCY = 4
+PAGE_RETRIES = 3
+PAGE_PREFETCH_FACTOR = 2
+TARGET_PAGE_SECONDS = 2.0
+MIN_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 400
+
 class SentosAPI:
     """Sentos API ile iletişimi yöneten sınıf."""
-    def __init__(self, api_url, api_key, api_secret, api_cookie=None):
+    def __init__(self, api_url, api_key, api_secret, api_cookie=None, pool_size=DEFAULT_POOL_SIZE,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 max_concurrent_pages=DEFAULT_PAGE_CONCURRENCY, catalog_ttl=DEFAULT_SNAPSHOT_TTL):
         self.api_url = api_url.strip().rstrip('/')
         self.auth = HTTPBasicAuth(api_key, api_secret)
         self.api_cookie = api_cookie
@@ -18,6 +34,12 @@ class SentosAPI:
         # Yeniden deneme ayarları
         self.max_retries = 5
         self.base_delay = 15 # saniye cinsinden
+        # Keep-alive bağlantı havuzu - her istek için yeni TCP+TLS el sıkışması yapılmaz
+        self.http = PooledHTTPClient(pool_size=max(pool_size, max_concurrent_pages), connect_timeout=connect_timeout, read_timeout=read_timeout)
+        self.max_concurrent_pages = max_concurrent_pages
+        self.page_semaphore = threading.BoundedSemaphore(max_concurrent_pages)
+        # Tüm giriş noktalarının paylaştığı katalog anlık görüntüsü (TTL içinde tek indirme)
+        self.catalog = SentosCatalogSnapshot(self, ttl_seconds=catalog_ttl)
 
     def _make_request(self, method, endpoint, auth_type='basic', data=None, params=None, is_internal_call=False):
         if is_internal_call:
@@ -40,7 +62,7 @@ class SentosAPI:
 
         for attempt in range(self.max_retries):
             try:
-                response = requests.request(method, url, headers=headers, auth=auth, data=data, params=params, timeout=90)
+                response = self.http.request(method, url, headers=headers, auth=auth, data=data, params=params)
                 response.raise_for_status()
                 return response
             except requests.exceptions.HTTPError as e:
@@ -59,39 +81,125 @@ class SentosAPI:
                 logging.error(f"Sentos API Bağlantı Hatası ({url}): {e}")
                 raise Exception(f"Sentos API Bağlantı Hatası ({url}): {e}")
     
-    def get_all_products(self, progress_callback=None, page_size=100):
-        all_products, page = [], 1
-        total_elements = None
-        start_time = time.monotonic()
+    def get_connection_stats(self):
+        """HTTP havuzunun yeni/yeniden kullanılan bağlantı sayaçlarını döndürür."""
+        return self.http.get_stats()
+
+    def _fetch_page(self, page, page_size):
+        """Tek bir ürün sayfasını çeker; (yanıt, süre_saniye) döndürür. Host başına eşzamanlılık sınırlıdır."""
+        with self.page_semaphore:
+            start = time.monotonic()
+            response = self._make_request("GET", f"/products?page={page}&size={page_size}").json()
+            return response, time.monotonic() - start
+
+    def _adapt_page_size(self, page_size, elapsed):
+        """
+        İlk sayfanın yanıt süresine göre sonraki sayfaların boyutunu seçer. Yeni boyut
+        eskisinin katı veya böleni olur ki sayfa sınırları ilk sayfayla hizalı kalsın.
+        """
+        if elapsed < TARGET_PAGE_SECONDS / 2 and page_size * 2 <= MAX_PAGE_SIZE:
+            return page_size * 2
+        if elapsed > TARGET_PAGE_SECONDS * 2 and page_size % 2 == 0 and page_size // 2 >= MIN_PAGE_SIZE:
+            return page_size // 2
+        return page_size
 
-        while True:
-            endpoint = f"/products?page={page}&size={page_size}"
+    def _fetch_page_with_retry(self, page, page_size):
+        """Fan-out sırasında başarısız olan sayfayı (yalnızca o sayfayı) yeniden dener."""
+        for attempt in range(PAGE_RETRIES):
             try:
-                response = self._make_request("GET", endpoint).json()
+                return self._fetch_page(page, page_size)[0]
+            except Exception as e:
+                if attempt == PAGE_RETRIES - 1:
+                    raise
+                logging.warning(f"Sentos sayfa {page} tekrar deneniyor ({attempt + 1}/{PAGE_RETRIES}): {e}")
+                time.sleep(2 ** attempt)
+
+    def iter_product_pages(self, page_size=100):
+        """
+        Ürün sayfalarını sırayla yield eder (ürün listesi, toplam ürün sayısı).
+
+        İlk yanıttaki total_elements ile kalan sayfalar sınırlı bir havuzda eşzamanlı
+        çekilir ve sayfa sırasına göre yeniden dizilir. Önden en fazla
+        PAGE_PREFETCH_FACTOR × max_concurrent_pages sayfa çekilir; tüketici yavaşsa
+        yeni sayfa istenmez (backpressure). Toplam bilinmiyorsa sayfalar eski
+        davranışla sırayla çekilir.
+        """
+        first_response, elapsed = self._fetch_page(1, page_size)
+        first_products = first_response.get('data', [])
+        total_elements = first_response.get('total_elements')
+        yield first_products, total_elements
+
+        if len(first_products) < page_size:
+            return
+
+        if not isinstance(total_elements, int):
+            page = 2
+            while True:
+                products_on_page = self._fetch_page_with_retry(page, page_size).get('data', [])
+                if not products_on_page:
+                    break
+                yield products_on_page, total_elements
+                if len(products_on_page) < page_size:
+                    break
+                page += 1
+            return
+
+        new_size = self._adapt_page_size(page_size, elapsed)
+        if new_size != page_size:
+            logging.info(f"Sentos ilk sayfa {elapsed:.2f}s sürdü, sayfa boyutu {page_size} -> {new_size} olarak ayarlandı.")
+        # Yeni boyutta ilk sayfanın kapsadığı ürünler atlanır (katı ise kısmi örtüşme kesilir)
+        fetched = len(first_products)
+        first_page = fetched // new_size + 1
+        skip_in_first = fetched - (first_page - 1) * new_size
+        last_page = -(-total_elements // new_size)
+        pages = list(range(first_page, last_page + 1))
+        if not pages:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrent_pages, thread_name_prefix="SentosPage")
+        window = self.max_concurrent_pages * PAGE_PREFETCH_FACTOR
+        futures, next_to_submit = {}, 0
+        try:
+            for index, page in enumerate(pages):
+                while next_to_submit < len(pages) and next_to_submit < index + window:
+                    futures[pages[next_to_submit]] = executor.submit(self._fetch_page, pages[next_to_submit], new_size)
+                    next_to_submit += 1
+                try:
+                    response = futures.pop(page).result()[0]
+                except Exception as e:
+                    logging.warning(f"Sentos sayfa {page} çekilemedi, yalnızca bu sayfa tekrar denenecek: {e}")
+                    response = self._fetch_page_with_retry(page, new_size)
                 products_on_page = response.get('data', [])
-                
-                if not products_on_page and page > 1: break
-                all_products.extend(products_on_page)
-                
-                if total_elements is None: 
-                    total_elements = response.get('total_elements', 'Bilinmiyor')
+                if page == first_page and skip_in_first:
+                    products_on_page = products_on_page[skip_in_first:]
+                yield products_on_page, total_elements
+        finally:
+            # Tüketici erken bıraktıysa (durdurma, test modu) bekleyen sayfalar iptal edilir
+            executor.shutdown(wait=False, cancel_futures=True)
 
+    def iter_products(self, progress_callback=None, page_size=100):
+        """Ürünleri her sayfa geldiğinde tek tek yield eder; tüm katalog belleğe alınmaz."""
+        fetched = 0
+        start_time = time.monotonic()
+
+        try:
+            for products_on_page, total_elements in self.iter_product_pages(page_size):
+                fetched += len(products_on_page)
                 if progress_callback:
+                    total = total_elements if total_elements is not None else 'Bilinmiyor'
                     elapsed_time = time.monotonic() - start_time
-                    message = f"Sentos'tan ürünler çekiliyor ({len(all_products)} / {total_elements})... Geçen süre: {int(elapsed_time)}s"
-                    progress = int((len(all_products) / total_elements) * 100) if isinstance(total_elements, int) and total_elements > 0 else 0
+                    message = f"Sentos'tan ürünler çekiliyor ({fetched} / {total})... Geçen süre: {int(elapsed_time)}s"
+                    progress = int((fetched / total) * 100) if isinstance(total, int) and total > 0 else 0
                     progress_callback({'message': message, 'progress': progress})
-                
-                if len(products_on_page) < page_size: break
-                page += 1
-                time.sleep(0.5)
-            except Exception as e:
-                logging.error(f"Sayfa {page} çekilirken hata: {e}")
-                # Hata durumunda işlemi sonlandır. _make_request zaten tekrar denemeyi yönetiyor.
-                raise Exception(f"Sentos API'den ürünler çekilemedi: {e}")
-            
-        logging.info(f"Sentos'tan toplam {len(all_products)} ürün çekildi.")
-        return all_products
+                yield from products_on_page
+        except Exception as e:
+            logging.error(f"Sentos ürün sayfaları çekilirken hata: {e}")
+            raise Exception(f"Sentos API'den ürünler çekilemedi: {e}")
+
+        logging.info(f"Sentos'tan toplam {fetched} ürün çekildi.")
+
+    def get_all_products(self, progress_callback=None, page_size=100):
+        return list(self.iter_products(progress_callback, page_size))
 
     def get_ordered_image_urls(self, product_id):
         """
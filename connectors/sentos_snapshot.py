@@ -0,0 +1,202 @@
+# connectors/sentos_snapshot.py - Sentos kataloğu için paylaşılan, sıkıştırılmış disk anlık görüntüsü
+
+import os
+import re
+import gzip
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+
+DATA_CACHE_DIR = "data_cache"
+DEFAULT_SNAPSHOT_TTL = 600  # saniye
+SNAPSHOT_PAGE_SIZE = 100
+# Başka bir süreç indirme yaparken kilit dosyası bu süreden eskiyse sahipsiz sayılır
+STALE_LOCK_SECONDS = 1800
+
+# Yalnızca son okunan anlık görüntü bellekte tutulur (yol → girdi)
+_memory_cache = {}
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+
+def _api_slug(api_url):
+    host = (api_url or '').lower().replace('https://', '').replace('http://', '').strip('/')
+    return re.sub(r'[^a-z0-9]+', '_', host).strip('_') or 'default'
+
+
+def _path_lock(path):
+    with _path_locks_guard:
+        return _path_locks.setdefault(path, threading.Lock())
+
+
+class SentosCatalogSnapshot:
+    """
+    Sentos ürün kataloğunun zaman damgalı, gzip'li JSON kopyası.
+
+    Senkronizasyon, fiyat sayfası, medya betiği ve dışa aktarma aynı dosyayı
+    kullanır; TTL içinde katalog yalnızca bir kez indirilir. Aynı anda iki
+    indirme başlamasın diye süreç içinde kilit, süreçler arasında kilit dosyası
+    kullanılır. Bellekteki kopya ve SKU dizini dosyanın mtime değeriyle geçerlidir.
+    """
+    def __init__(self, sentos_api, ttl_seconds=DEFAULT_SNAPSHOT_TTL, cache_dir=DATA_CACHE_DIR):
+        self.sentos_api = sentos_api
+        self.ttl_seconds = ttl_seconds
+        self.path = os.path.join(cache_dir, f"sentos_catalog_{_api_slug(sentos_api.api_url)}.json.gz")
+        self.lock_path = self.path + ".lock"
+
+    # --- Durum ---
+
+    def _mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def age_seconds(self):
+        mtime = self._mtime()
+        return None if mtime is None else time.time() - mtime
+
+    def is_fresh(self):
+        age = self.age_seconds()
+        return age is not None and age < self.ttl_seconds
+
+    # --- Okuma / yazma ---
+
+    def _load(self):
+        """Dosyayı okur; aynı mtime için bellekteki kopyayı döndürür."""
+        mtime = self._mtime()
+        if mtime is None:
+            return None
+        cached = _memory_cache.get(self.path)
+        if cached and cached['mtime'] == mtime:
+            return cached
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        entry = {'mtime': mtime, 'created_at': payload.get('created_at'), 'products': payload.get('products', []), 'sku_index': None}
+        # Eski mtime'ın ya da başka bir kataloğun kopyası süreç boyunca bellekte kalmasın
+        _memory_cache.clear()
+        _memory_cache[self.path] = entry
+        return entry
+
+    def load_fresh(self):
+        """Taze anlık görüntünün ürünlerini döndürür; taze değilse None (Sentos'a gidilmez)."""
+        if not self.is_fresh():
+            return None
+        entry = self._load()
+        return entry['products'] if entry else None
+
+    def save(self, products):
+        """Kataloğu geçici dosyaya yazar ve atomik olarak yerine taşır."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        payload = {'created_at': datetime.now(timezone.utc).isoformat(), 'products': products}
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        logging.info(f"Sentos katalog anlık görüntüsü kaydedildi: {len(products)} ürün ({self.path}).")
+
+    def _acquire_file_lock(self):
+        """Süreçler arası indirme kilidi; başka süreç indiriyorsa bitene kadar bekler."""
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.close(fd)
+                return
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.lock_path) > STALE_LOCK_SECONDS:
+                        os.remove(self.lock_path)
+                        continue
+                except OSError:
+                    continue
+                time.sleep(1)
+
+    def _release_file_lock(self):
+        try:
+            os.remove(self.lock_path)
+        except OSError:
+            pass
+
+    def _wait_for_other_download(self):
+        """Başka bir işlem kataloğu indiriyorsa bitmesini bekler; beklediyse True döndürür."""
+        waited = False
+        while os.path.exists(self.lock_path):
+            try:
+                if time.time() - os.path.getmtime(self.lock_path) > STALE_LOCK_SECONDS:
+                    break
+            except OSError:
+                break
+            waited = True
+            time.sleep(1)
+        return waited
+
+    # --- Tüketiciler ---
+
+    def get_products(self, progress_callback=None, force_refresh=False):
+        """Taze anlık görüntü varsa onu, yoksa Sentos'tan indirip kaydettiği listeyi döndürür."""
+        if not force_refresh and self.is_fresh():
+            return self._load()['products']
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with _path_lock(self.path):
+            self._acquire_file_lock()
+            try:
+                # Beklerken başka bir çağıran indirmiş olabilir
+                if not force_refresh and self.is_fresh():
+                    logging.info("Sentos kataloğu başka bir işlem tarafından yenilendi, anlık görüntü kullanılıyor.")
+                    return self._load()['products']
+                products = self.sentos_api.get_all_products(progress_callback)
+                self.save(products)
+                return products
+            finally:
+                self._release_file_lock()
+
+    def iter_product_pages(self, progress_callback=None):
+        """
+        SentosAPI.iter_product_pages ile aynı biçimde (ürünler, toplam) yield eder.
+        Anlık görüntü tazeyse diskten okunur; değilse API'den akıtılır ve katalog
+        sonuna kadar okunduysa anlık görüntü olarak kaydedilir. Akış uzun sürebileceği
+        için (tüketici backpressure uygular) indirme kilidi tutulmaz; yalnızca başka
+        bir indirme sürüyorsa onun bitmesi beklenir.
+        """
+        if self.is_fresh():
+            products = self._load()['products']
+            logging.info(f"Sentos kataloğu anlık görüntüden okunuyor ({len(products)} ürün, {int(self.age_seconds())} sn önce).")
+            if progress_callback:
+                progress_callback({'message': f"Sentos kataloğu anlık görüntüden yüklendi ({len(products)} ürün).", 'progress': 100})
+            for start in range(0, len(products), SNAPSHOT_PAGE_SIZE):
+                yield products[start:start + SNAPSHOT_PAGE_SIZE], len(products)
+            return
+
+        if self._wait_for_other_download() and self.is_fresh():
+            yield from self.iter_product_pages(progress_callback)
+            return
+
+        collected = []
+        for products_on_page, total_elements in self.sentos_api.iter_product_pages():
+            collected.extend(products_on_page)
+            yield products_on_page, total_elements
+        self.save(collected)
+
+    def iter_products(self, progress_callback=None):
+        for products_on_page, _ in self.iter_product_pages(progress_callback):
+            yield from products_on_page
+
+    def find_by_sku(self, sku, progress_callback=None):
+        """Ana ürün veya varyant SKU'suna göre Sentos ürününü döndürür (get_product_by_sku karşılığı)."""
+        self.get_products(progress_callback)
+        entry = self._load()
+        if entry['sku_index'] is None:
+            sku_index = {}
+            for product in entry['products']:
+                for variant in product.get('variants') or []:
+                    if variant_sku := str(variant.get('sku') or '').strip():
+                        sku_index.setdefault(variant_sku, product)
+            # Ana ürün SKU'su varyant SKU'larından önceliklidir
+            for product in entry['products']:
+                if main_sku := str(product.get('sku') or '').strip():
+                    sku_index[main_sku] = product
+            entry['sku_index'] = sku_index
+        return entry['sku_index'].get(str(sku).strip())
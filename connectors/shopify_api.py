@@ -3,12 +3,101 @@
 import requests
 import time
 import json
+import threading
 import logging
 from datetime import datetime, timedelta
 
+from .http_session import PooledHTTPClient, DEFAULT_POOL_SIZE, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from .shopify_throttle import get_store_throttle
+from .shopify_bulk import ShopifyBulkReader
+from .product_index import ProductIndex, description_hash
+from .shopify_batcher import GraphQLReadBatcher, GraphQLWriteBatcher, GraphQLLookup, GraphQLMutation
+
+# Bulk işlem sorguları: sayfalama argümanı almaz, iç içe bağlantılar JSONL'de
+# __parentId ile düzleştirilir ve ShopifyBulkReader.run_tree ile tekrar birleştirilir.
+# get_variant_ids_by_skus: tek okumada OR ile aranan SKU sayısı ve dönen en fazla ürün sayısı
+SKU_LOOKUP_CHUNK = 5
+SKU_LOOKUP_PRODUCTS = 10
+
+BULK_CACHE_QUERY = """
+{
+  products {
+    edges {
+      node {
+        id
+        title
+        variants {
+          edges {
+            node {
+              id
+              sku
+              inventoryItem { id }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+BULK_EXPORT_QUERY = """
+{
+  products {
+    edges {
+      node {
+        id
+        title
+        handle
+        featuredImage { url }
+        collections {
+          edges { node { id title } }
+        }
+        variants {
+          edges {
+            node {
+              id
+              sku
+              displayName
+              inventoryQuantity
+              selectedOptions { name value }
+              inventoryItem { unitCost { amount } }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+BULK_COLLECTION_PRODUCTS_QUERY = """
+{
+  collections(query: "id:__COLLECTION_ID__") {
+    edges {
+      node {
+        id
+        products {
+          edges {
+            node {
+              id
+              title
+              handle
+              totalInventory
+              featuredImage { url(transform: {maxWidth: 100, maxHeight: 100}) }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
 class ShopifyAPI:
     """Shopify Admin API ile iletişimi yöneten sınıf."""
-    def __init__(self, store_url, access_token, api_version='2024-10'): # api_version parametresi burada ekli olmalı
+    def __init__(self, store_url, access_token, api_version='2024-10', pool_size=DEFAULT_POOL_SIZE,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT): # api_version parametresi burada ekli olmalı
         if not store_url: raise ValueError("Shopify Mağaza URL'si boş olamaz.")
         if not access_token: raise ValueError("Shopify Erişim Token'ı boş olamaz.")
         
@@ -23,7 +112,27 @@ class ShopifyAPI:
             'User-Agent': 'Sentos-Sync-Python/Modular-v1.0'
         }
         self.product_cache = {}
+        self.product_index = None
+        # Açık bir senkronizasyon çalıştırması varsa stok yazımları WAL'a kaydedilir
+        self.checkpoint = None
+        # Sentos deposu → Shopify lokasyonu eşleştirmesi (LocationMapping); yoksa varsayılan lokasyon kullanılır
+        self.location_mapping = None
+        # Senkronizasyon çalıştırması sırasında stok satırlarını toplayan ortak yazıcı (InventoryWriteAggregator)
+        self.inventory_writer = None
         self.location_id = None
+        # Keep-alive bağlantı havuzu - boyutu eşzamanlı çalışan sayısına göre ayarlanır
+        self.http = PooledHTTPClient(pool_size=pool_size, connect_timeout=connect_timeout, read_timeout=read_timeout)
+        # Aynı mağazaya giden tüm thread'lerin paylaştığı GraphQL maliyet bütçesi
+        self.throttle = get_store_throttle(self.store_url)
+        # Tüm katalog okumaları için bulk işlem motoru
+        self.bulk = ShopifyBulkReader(self)
+        # Tekil SKU/e-posta aramalarını takma adlı tek sorguda birleştirir
+        self.read_batcher = GraphQLReadBatcher(self)
+        # Farklı ürünlerin yazımlarını takma adlı tek mutation belgesinde birleştirir
+        self.write_batcher = GraphQLWriteBatcher(self)
+        # Stok yazımı sayaçları: gönderilen ve Shopify'da zaten aynı olduğu için atlanan satırlar
+        self.inventory_write_stats = {'written': 0, 'noop_skipped': 0}
+        self.inventory_stats_lock = threading.Lock()
         
         # Geri kalan kodlar aynı
         self.last_request_time = 0
@@ -33,9 +142,17 @@ class ShopifyAPI:
         self.max_requests_per_minute = 40
         self.burst_tokens = 10
         self.current_tokens = 10
+        self.rest_rate_lock = threading.Lock()
 
     def _rate_limit_wait(self):
-        """10-worker için optimize edilmiş rate limiter"""
+        """
+        REST istekleri (_make_request) için istek sayısı tabanlı rate limiter.
+        GraphQL istekleri bunun yerine maliyet tabanlı self.throttle kullanır.
+        """
+        with self.rest_rate_lock:
+            self._rest_token_wait()
+
+    def _rest_token_wait(self):
         current_time = time.time()
     
         # Token bucket sistemi
@@ -65,10 +182,10 @@ class ShopifyAPI:
             else:
                 url = endpoint if endpoint.startswith('http') else self.graphql_url
             
-            response = requests.request(method, url, headers=req_headers, 
-                                        json=data if isinstance(data, dict) else None, 
-                                        data=data if isinstance(data, bytes) else None,
-                                        files=files, timeout=90)
+            response = self.http.request(method, url, headers=req_headers, 
+                                         json=data if isinstance(data, dict) else None, 
+                                         data=data if isinstance(data, bytes) else None,
+                                         files=files)
             response.raise_for_status()
             if response.content and 'application/json' in response.headers.get('Content-Type', ''):
                 return response.json()
@@ -78,11 +195,17 @@ class ShopifyAPI:
             logging.error(f"Shopify API Bağlantı Hatası ({url}): {e} - Response: {error_content}")
             raise e
 
-    def execute_graphql(self, query, variables=None):
-        """GraphQL sorgusunu çalıştırır - gelişmiş hata yönetimi ile."""
+    def execute_graphql(self, query, variables=None, cost_hint=None):
+        """
+        GraphQL sorgusunu çalıştırır - gelişmiş hata yönetimi ile.
+        Her istek, mağazanın paylaşılan maliyet bütçesinden (self.throttle) tahmini
+        sorgu maliyetini ayırır ve yanıttaki throttleStatus ile bütçeyi eşitler.
+        cost_hint, maliyeti önceden bilinen belgelerin (toplu okuma/yazım) ilk gönderiminde ayrılır.
+        """
         payload = {'query': query, 'variables': variables or {}}
         max_retries = 8
         retry_delay = 2
+        estimated_cost = self.throttle.estimate_cost(query, cost_hint)
         
         # Debug için sorgu bilgilerini logla
         logging.debug(f"GraphQL Query: {query[:100]}...")
@@ -90,53 +213,15 @@ class ShopifyAPI:
             logging.debug(f"GraphQL Variables: {json.dumps(variables, indent=2)[:200]}...")
             
         for attempt in range(max_retries):
+            reserved = self.throttle.reserve(estimated_cost)
             try:
-                response = requests.post(self.graphql_url, headers=self.headers, json=payload, timeout=90)
+                response = self.http.post(self.graphql_url, headers=self.headers, json=payload)
                 response.raise_for_status()
                 response_data = response.json()
-                
-                if "errors" in response_data:
-                    errors = response_data.get("errors", [])
-                    
-                    # Throttling kontrolü
-                    is_throttled = any(
-                        err.get('extensions', {}).get('code') == 'THROTTLED' 
-                        for err in errors
-                    )
-                    if is_throttled and attempt < max_retries - 1:
-                        wait_time = retry_delay * (2 ** attempt)
-                        logging.warning(f"GraphQL Throttled! {wait_time} saniye beklenip tekrar denenecek... (Deneme {attempt + 1}/{max_retries})")
-                        time.sleep(wait_time)
-                        continue
-                    
-                    # Hata detaylarını logla
-                    logging.error("GraphQL Hatası Detayları:")
-                    logging.error(f"Query: {query}")
-                    if variables:
-                        logging.error(f"Variables: {json.dumps(variables, indent=2)}")
-                    logging.error(f"Errors: {json.dumps(errors, indent=2)}")
-                    
-                    # Hata mesajlarını topla
-                    error_messages = []
-                    for err in errors:
-                        msg = err.get('message', 'Bilinmeyen GraphQL hatası')
-                        locations = err.get('locations', [])
-                        path = err.get('path', [])
-                        
-                        error_detail = msg
-                        if locations:
-                            error_detail += f" (Satır: {locations[0].get('line', '?')})"
-                        if path:
-                            error_detail += f" (Alan: {'.'.join(map(str, path))})"
-                            
-                        error_messages.append(error_detail)
-                    
-                    raise Exception(f"GraphQL Error: {'; '.join(error_messages)}")
-
-                return response_data.get("data", {})
             except requests.exceptions.HTTPError as e:
-                if e.response and e.response.status_code == 429 and attempt < max_retries - 1:
-                    wait_time = retry_delay * (2 ** attempt)
+                self.throttle.release(reserved)
+                if e.response is not None and e.response.status_code == 429 and attempt < max_retries - 1:
+                    wait_time = float(e.response.headers.get('Retry-After') or retry_delay)
                     logging.warning(f"HTTP 429 Rate Limit! {wait_time} saniye beklenip tekrar denenecek...")
                     time.sleep(wait_time)
                     continue
@@ -144,27 +229,205 @@ class ShopifyAPI:
                     logging.error(f"API bağlantı hatası: {e}")
                     raise e
             except requests.exceptions.RequestException as e:
-                 logging.error(f"API bağlantı hatası: {e}. Bu hata için tekrar deneme yapılmıyor.")
-                 raise e
+                self.throttle.release(reserved)
+                logging.error(f"API bağlantı hatası: {e}. Bu hata için tekrar deneme yapılmıyor.")
+                raise e
+
+            cost_info = response_data.get('extensions', {}).get('cost')
+            self.throttle.settle(reserved, cost_info, query)
+                
+            if "errors" in response_data:
+                errors = response_data.get("errors", [])
+                
+                # Throttling kontrolü: bir sonraki deneme, sorgunun istediği maliyet
+                # kadar puan birikene kadar throttle.reserve içinde bekler.
+                is_throttled = any(
+                    err.get('extensions', {}).get('code') == 'THROTTLED' 
+                    for err in errors
+                )
+                if is_throttled and attempt < max_retries - 1:
+                    estimated_cost = self.throttle.record_throttled(cost_info)
+                    logging.warning(f"GraphQL Throttled! {estimated_cost:.0f} puanlık bütçe yenilenince tekrar denenecek... (Deneme {attempt + 1}/{max_retries})")
+                    continue
+                
+                # Hata detaylarını logla
+                logging.error("GraphQL Hatası Detayları:")
+                logging.error(f"Query: {query}")
+                if variables:
+                    logging.error(f"Variables: {json.dumps(variables, indent=2)}")
+                logging.error(f"Errors: {json.dumps(errors, indent=2)}")
+                
+                # Hata mesajlarını topla
+                error_messages = []
+                for err in errors:
+                    msg = err.get('message', 'Bilinmeyen GraphQL hatası')
+                    locations = err.get('locations', [])
+                    path = err.get('path', [])
+                    
+                    error_detail = msg
+                    if locations:
+                        error_detail += f" (Satır: {locations[0].get('line', '?')})"
+                    if path:
+                        error_detail += f" (Alan: {'.'.join(map(str, path))})"
+                        
+                    error_messages.append(error_detail)
+                
+                raise Exception(f"GraphQL Error: {'; '.join(error_messages)}")
+
+            return response_data.get("data", {})
         raise Exception(f"API isteği {max_retries} denemenin ardından başarısız oldu.")
 
-    def find_customer_by_email(self, email):
-        """YENİ: Verilen e-posta ile müşteri arar."""
-        query = """
-        query($email: String!) {
-          customers(first: 1, query: $email) {
-            edges {
-              node {
-                id
-              }
-            }
-          }
-        }
-        """
-        result = self.execute_graphql(query, {"email": f"email:{email}"})
-        edges = result.get('customers', {}).get('edges', [])
+    def get_connection_stats(self):
+        """HTTP havuzunun yeni/yeniden kullanılan bağlantı sayaçlarını döndürür."""
+        return self.http.get_stats()
+
+    def get_product_index(self):
+        """Mağazaya ait kalıcı ürün dizinini (SQLite) ilk ihtiyaçta açar ve döndürür."""
+        if self.product_index is None:
+            self.product_index = ProductIndex(self.store_url)
+        return self.product_index
+
+    def get_throttle_stats(self):
+        """Paylaşılan GraphQL maliyet bütçesinin anlık durumunu döndürür."""
+        return self.throttle.get_stats()
+
+    def get_batcher_stats(self):
+        """Birleştirilmiş okuma sayısı ve gönderilen istek sayısını döndürür."""
+        return self.read_batcher.get_stats()
+
+    def get_write_batcher_stats(self):
+        """Birleştirilmiş yazım (mutation) sayısı ve gönderilen istek sayısını döndürür."""
+        return self.write_batcher.get_stats()
+
+    def record_inventory_writes(self, written, noop_skipped):
+        with self.inventory_stats_lock:
+            self.inventory_write_stats['written'] += written
+            self.inventory_write_stats['noop_skipped'] += noop_skipped
+
+    def get_inventory_write_stats(self):
+        """Yazılan ve değişmediği için atlanan stok satırı sayılarını döndürür."""
+        with self.inventory_stats_lock:
+            return dict(self.inventory_write_stats)
+
+    # --- Birleştirilebilir okumalar (GraphQLReadBatcher) ---
+    # Maliyetler Shopify kuralına göre: nesne = 1, bağlantı = 2 + first × alt maliyet
+
+    @staticmethod
+    def _first_node_id(data):
+        edges = (data or {}).get('edges', [])
         return edges[0]['node']['id'] if edges else None
 
+    def _customer_by_email_lookup(self, email):
+        return GraphQLLookup(
+            "customers(first: 1, query: $q) { edges { node { id } } }",
+            {'q': ('String!', f"email:{email}")}, cost=3, extract=self._first_node_id
+        )
+
+    def _variant_by_sku_lookup(self, sku):
+        return GraphQLLookup(
+            "productVariants(first: 1, query: $q) { edges { node { id } } }",
+            {'q': ('String!', f"sku:{sku}")}, cost=3, extract=self._first_node_id
+        )
+
+    @staticmethod
+    def _product_variants_lookup(query_filter):
+        """İlk eşleşen ürünün ID'sini ve varyantlarını ({'id', 'sku'}) döndüren okuma."""
+        def extract(data):
+            edges = (data or {}).get('edges', [])
+            if not edges:
+                return None, []
+            product = edges[0]['node']
+            return product['id'], [v['node'] for v in product.get('variants', {}).get('edges', [])]
+        return GraphQLLookup(
+            "products(first: 1, query: $q) { edges { node { id variants(first: 100) { edges { node { id sku } } } } } }",
+            {'q': ('String!', query_filter)}, cost=105, extract=extract
+        )
+
+    @staticmethod
+    def _products_by_skus_lookup(skus):
+        """
+        SKU'lardan herhangi birini taşıyan ilk SKU_LOOKUP_PRODUCTS ürünü [(ürün ID, varyantlar)] ve
+        sonucun kesilip kesilmediğini döndüren okuma.
+        """
+        def extract(data):
+            data = data or {}
+            products = [(e['node']['id'], [v['node'] for v in e['node'].get('variants', {}).get('edges', [])])
+                        for e in data.get('edges', [])]
+            return products, bool(data.get('pageInfo', {}).get('hasNextPage'))
+        query_filter = " OR ".join(f"sku:{json.dumps(sku)}" for sku in skus)
+        return GraphQLLookup(
+            f"products(first: {SKU_LOOKUP_PRODUCTS}, query: $q) {{ pageInfo {{ hasNextPage }} "
+            "edges { node { id variants(first: 50) { edges { node { id sku } } } } } }",
+            {'q': ('String!', query_filter)}, cost=2 + SKU_LOOKUP_PRODUCTS * 53, extract=extract
+        )
+
+    @staticmethod
+    def _product_ref(gid):
+        return {'id': int(gid.split('/')[-1]), 'gid': gid}
+
+    def find_product_by_sku(self, sku):
+        """Varyant SKU'su ile ürünü doğrudan arar (katalog yüklemeden); product_cache biçiminde döndürür."""
+        def extract(data):
+            edges = (data or {}).get('edges', [])
+            return self._product_ref(edges[0]['node']['product']['id']) if edges else None
+        return self.read_batcher.lookup(GraphQLLookup(
+            "productVariants(first: 1, query: $q) { edges { node { product { id } } } }",
+            {'q': ('String!', f"sku:{sku}")}, cost=4, extract=extract
+        ))
+
+    def find_product_by_title(self, title):
+        """Başlığı birebir eşleşen ürünü doğrudan arar (Shopify araması kelime bazlı olduğu için sonuçlar süzülür)."""
+        title = str(title).strip()
+        def extract(data):
+            for edge in (data or {}).get('edges', []):
+                if (edge['node'].get('title') or '').strip() == title:
+                    return self._product_ref(edge['node']['id'])
+            return None
+        escaped = title.replace('\\', '\\\\').replace('"', '\\"')
+        return self.read_batcher.lookup(GraphQLLookup(
+            "products(first: 5, query: $q) { edges { node { id title } } }",
+            {'q': ('String!', f'title:"{escaped}"')}, cost=7, extract=extract
+        ))
+
+    @staticmethod
+    def _product_details_lookup(product_gid):
+        """Ürünün başlık, açıklama özeti ve ürün tipini ProductIndex.get_details biçiminde döndüren okuma."""
+        def extract(data):
+            if not data:
+                return None
+            return {'title': (data.get('title') or '').strip(), 'description_hash': description_hash(data.get('descriptionHtml')),
+                    'product_type': data.get('productType') or ''}
+        return GraphQLLookup(
+            "product(id: $id) { title descriptionHtml productType }",
+            {'id': ('ID!', product_gid)}, cost=1, extract=extract
+        )
+
+    def get_product_details(self, product_gid):
+        """
+        Ürünün mevcut detaylarını önce dizinden okur; dizinde yoksa ya da dizin bu çalıştırmada
+        yenilenmediyse birleştirilmiş bir okuma yapar ve sonucu dizine yazar.
+        """
+        if self.product_index is not None and self.product_index.is_current() and (details := self.product_index.get_details(product_gid)):
+            return details
+        details = self.read_batcher.lookup(self._product_details_lookup(product_gid))
+        if details and self.product_index is not None:
+            self.product_index.update_details(product_gid, details['title'], details['description_hash'], details['product_type'])
+        return details
+
+    def find_product_variants_by_sku_prefix(self, base_sku):
+        """Ana model koduyla başlayan ilk ürünü arar: (product_gid, [{'id', 'sku'}]) veya (None, [])."""
+        return self.read_batcher.lookup(self._product_variants_lookup(f"sku:{base_sku}*"))
+
+    def find_variant_ids_by_sku_list(self, skus):
+        """SKU listesindeki her SKU için varyant ID'sini ({sku: variant_gid}) birkaç birleşik istekle bulur."""
+        unique_skus = list(dict.fromkeys(str(sku).strip() for sku in skus if sku))
+        results = self.read_batcher.run_many([self._variant_by_sku_lookup(sku) for sku in unique_skus])
+        return {sku: variant_id for sku, variant_id in zip(unique_skus, results) if variant_id}
+
+    def find_customer_by_email(self, email):
+        """YENİ: Verilen e-posta ile müşteri arar (eşzamanlı aramalar tek istekte birleştirilir)."""
+        return self.read_batcher.lookup(self._customer_by_email_lookup(email))
+
     def create_customer(self, customer_data):
         """YENİ: Yeni bir müşteri oluşturur."""
         mutation = """
@@ -192,21 +455,8 @@ class ShopifyAPI:
         return result.get('customerCreate', {}).get('customer', {}).get('id')
 
     def find_variant_id_by_sku(self, sku):
-        """YENİ: Verilen SKU ile ürün varyantı arar."""
-        query = """
-        query($sku: String!) {
-          productVariants(first: 1, query: $sku) {
-            edges {
-              node {
-                id
-              }
-            }
-          }
-        }
-        """
-        result = self.execute_graphql(query, {"sku": f"sku:{sku}"})
-        edges = result.get('productVariants', {}).get('edges', [])
-        return edges[0]['node']['id'] if edges else None
+        """YENİ: Verilen SKU ile ürün varyantı arar (eşzamanlı aramalar tek istekte birleştirilir)."""
+        return self.read_batcher.lookup(self._variant_by_sku_lookup(sku))
 
     def get_orders_by_date_range(self, start_date_iso, end_date_iso):
         all_orders = []
@@ -299,7 +549,6 @@ class ShopifyAPI:
             if not page_info.get("hasNextPage"): break
             
             variables["cursor"] = page_info["endCursor"]
-            time.sleep(1)
 
         return all_orders
 
@@ -389,7 +638,22 @@ class ShopifyAPI:
         logging.info(f"{len(all_collections)} adet koleksiyon bulundu.")
         return all_collections
 
-    def get_all_products_for_export(self, progress_callback=None):
+    def get_all_products_for_export(self, progress_callback=None, use_bulk=True):
+        """
+        Export için ürünleri koleksiyon ve varyantlarıyla birlikte çeker.
+        Varsayılan olarak bulk işlem kullanılır, hata durumunda sayfalı okumaya dönülür.
+        """
+        if use_bulk:
+            try:
+                bulk_callback = (lambda update: progress_callback(update.get('message', ''))) if progress_callback else None
+                all_products = list(self.bulk.run_tree(
+                    BULK_EXPORT_QUERY, {'Collection': 'collections', 'ProductVariant': 'variants'}, bulk_callback
+                ))
+                logging.info(f"Export için bulk işlem ile toplam {len(all_products)} ürün çekildi.")
+                return all_products
+            except Exception as e:
+                logging.warning(f"Bulk export başarısız, sayfalı okumaya geçiliyor: {e}")
+
         all_products = []
         query = """
         query getProductsForExport($cursor: String) {
@@ -432,68 +696,42 @@ class ShopifyAPI:
 
     def get_variant_ids_by_skus(self, skus: list, search_by_product_sku=False) -> dict:
         """
-        RATE LIMIT KORUMASIZ GELIŞTIRILMIŞ VERSİYON
+        SKU'ları içeren ürünlerin tüm varyantlarını {sku: {'variant_id', 'product_id'}} olarak döndürür.
+        Her SKU takma adlı bir kök alan olur; maliyet tavanına sığan SKU'lar tek istekte sorgulanır.
         """
         if not skus: return {}
-        sanitized_skus = [str(sku).strip() for sku in skus if sku]
+        sanitized_skus = list(dict.fromkeys(str(sku).strip() for sku in skus if sku))
         if not sanitized_skus: return {}
         
         logging.info(f"{len(sanitized_skus)} adet SKU için varyant ID'leri aranıyor (Mod: {'Ürün Bazlı' if search_by_product_sku else 'Varyant Bazlı'})...")
         sku_map = {}
         
-        # KRITIK: Batch boyutunu 2'ye düşür
-        batch_size = 2
-        
-        for i in range(0, len(sanitized_skus), batch_size):
-            sku_chunk = sanitized_skus[i:i + batch_size]
-            query_filter = " OR ".join([f"sku:{json.dumps(sku)}" for sku in sku_chunk])
-            
-            query = """
-            query getProductsBySku($query: String!) {
-              products(first: 10, query: $query) {
-                edges {
-                  node {
-                    id
-                    variants(first: 50) {
-                      edges {
-                        node { 
-                          id
-                          sku 
-                        }
-                      }
-                    }
-                  }
-                }
-              }
-            }
-            """
+        chunks = [sanitized_skus[i:i + SKU_LOOKUP_CHUNK] for i in range(0, len(sanitized_skus), SKU_LOOKUP_CHUNK)]
+        try:
+            results = self.read_batcher.run_many([self._products_by_skus_lookup(chunk) for chunk in chunks])
+            # Ürün sınırına takılan gruplar, SKU başına ayrı okumayla tekrar aranır
+            truncated = [sku for chunk, (_, more) in zip(chunks, results) if more and len(chunk) > 1 for sku in chunk]
+            if truncated:
+                results += self.read_batcher.run_many([self._products_by_skus_lookup([sku]) for sku in truncated])
+            if any(more for _, more in results[len(chunks):]) or any(more for chunk, (_, more) in zip(chunks, results) if len(chunk) == 1):
+                logging.warning(f"Bazı SKU'lar {SKU_LOOKUP_PRODUCTS}'dan fazla üründe bulundu; yalnızca ilk {SKU_LOOKUP_PRODUCTS} ürün eşlendi.")
+        except Exception as e:
+            logging.error(f"SKU'lar için varyant ID'leri alınırken hata: {e}")
+            raise e
 
-            try:
-                logging.info(f"SKU batch {i//batch_size+1}/{len(range(0, len(sanitized_skus), batch_size))} işleniyor: {sku_chunk}")
-                result = self.execute_graphql(query, {"query": query_filter})
-                product_edges = result.get("products", {}).get("edges", [])
-                for p_edge in product_edges:
-                    product_node = p_edge.get("node", {})
-                    product_id = product_node.get("id")
-                    variant_edges = product_node.get("variants", {}).get("edges", [])
-                    for v_edge in variant_edges:
-                        node = v_edge.get("node", {})
-                        if node.get("sku") and node.get("id") and product_id:
-                            sku_map[node["sku"]] = {
-                                "variant_id": node["id"],
-                                "product_id": product_id
-                            }
-                
-                # KRITIK: Her batch sonrası uzun bekleme
-                if i + batch_size < len(sanitized_skus):
-                    logging.info(f"Batch {i//batch_size+1} tamamlandı, rate limit için 3 saniye bekleniyor...")
-                    time.sleep(3)
-            
-            except Exception as e:
-                logging.error(f"SKU grubu {i//batch_size+1} için varyant ID'leri alınırken hata: {e}")
-                # Hata durumunda da biraz bekle
-                time.sleep(5)
-                raise e
+        seen_products = set()
+        for products, _ in results:
+            for product_id, variants in products:
+                # Aynı ürün birden fazla grupta dönebilir; varyantları bir kez işlenir
+                if product_id in seen_products:
+                    continue
+                seen_products.add(product_id)
+                for node in variants:
+                    if node.get("sku") and node.get("id"):
+                        sku_map[node["sku"]] = {
+                            "variant_id": node["id"],
+                            "product_id": product_id
+                        }
 
         logging.info(f"Toplam {len(sku_map)} eşleşen varyant detayı bulundu.")
         return sku_map
@@ -528,8 +766,46 @@ class ShopifyAPI:
         logging.info(f"Shopify Lokasyon ID'si bulundu: {self.location_id}")
         return self.location_id
 
-    def load_all_products_for_cache(self, progress_callback=None):
-        """GraphQL ile tüm ürünleri önbelleğe al"""
+    def _cache_product(self, product):
+        """Tek bir ürün düğümünü (variants bağlantısıyla) product_cache'e yazar."""
+        # GID'den sadece ID'yi çıkar
+        product_id = product["id"].split("/")[-1]
+        product_data = {
+            'id': int(product_id), 
+            'gid': product["id"]
+        }
+        
+        # Title ile önbelleğe al
+        if title := product.get('title'): 
+            self.product_cache[f"title:{title.strip()}"] = product_data
+        
+        # Variants ile önbelleğe al
+        for variant_edge in product.get('variants', {}).get('edges', []):
+            variant = variant_edge['node']
+            if sku := variant.get('sku'): 
+                self.product_cache[f"sku:{sku.strip()}"] = product_data
+
+    def load_all_products_for_cache(self, progress_callback=None, use_bulk=True):
+        """
+        Tüm ürünleri önbelleğe al. Varsayılan olarak tek bir sunucu tarafı bulk
+        işlemi kullanılır; bulk başarısız olursa sayfalı okumaya geri dönülür.
+        """
+        if use_bulk:
+            try:
+                total_loaded = 0
+                for product in self.bulk.run_tree(BULK_CACHE_QUERY, {'ProductVariant': 'variants'}, progress_callback):
+                    self._cache_product(product)
+                    total_loaded += 1
+                    if progress_callback and total_loaded % 500 == 0:
+                        progress_callback({'message': f"Shopify ürünleri önbelleğe alınıyor... {total_loaded} ürün bulundu."})
+                logging.info(f"Shopify'dan bulk işlem ile toplam {total_loaded} ürün önbelleğe alındı.")
+                return total_loaded
+            except Exception as e:
+                logging.warning(f"Bulk önbellekleme başarısız, sayfalı okumaya geçiliyor: {e}")
+        return self._load_products_for_cache_paginated(progress_callback)
+
+    def _load_products_for_cache_paginated(self, progress_callback=None):
+        """GraphQL sayfalama ile tüm ürünleri önbelleğe al"""
         total_loaded = 0
         
         query = """
@@ -567,23 +843,7 @@ class ShopifyAPI:
                 products_data = data.get("products", {})
                 
                 for edge in products_data.get("edges", []):
-                    product = edge["node"]
-                    # GID'den sadece ID'yi çıkar
-                    product_id = product["id"].split("/")[-1]
-                    product_data = {
-                        'id': int(product_id), 
-                        'gid': product["id"]
-                    }
-                    
-                    # Title ile önbelleğe al
-                    if title := product.get('title'): 
-                        self.product_cache[f"title:{title.strip()}"] = product_data
-                    
-                    # Variants ile önbelleğe al
-                    for variant_edge in product.get('variants', {}).get('edges', []):
-                        variant = variant_edge['node']
-                        if sku := variant.get('sku'): 
-                            self.product_cache[f"sku:{sku.strip()}"] = product_data
+                    self._cache_product(edge["node"])
                 
                 total_loaded += len(products_data.get("edges", []))
                 
@@ -593,7 +853,6 @@ class ShopifyAPI:
                     break
                 
                 variables["cursor"] = page_info["endCursor"]
-                time.sleep(0.5)  # Rate limit koruması
                 
             except Exception as e:
                 logging.error(f"Ürünler önbelleğe alınırken hata: {e}")
@@ -698,11 +957,24 @@ class ShopifyAPI:
         except Exception as e:
             return {'success': False, 'message': f'GraphQL API failed: {e}'}
 
-    def get_products_in_collection_with_inventory(self, collection_id):
+    def get_products_in_collection_with_inventory(self, collection_id, use_bulk=False):
         """
         Belirli bir koleksiyondaki tüm ürünleri, toplam stok bilgileriyle birlikte çeker.
-        Sayfalama yaparak tüm ürünlerin alınmasını sağlar.
+        Sayfalama yaparak tüm ürünlerin alınmasını sağlar; use_bulk=True ile büyük
+        koleksiyonlar tek bir bulk işlemle okunur.
         """
+        if use_bulk:
+            try:
+                numeric_id = str(collection_id).split('/')[-1]
+                query = BULK_COLLECTION_PRODUCTS_QUERY.replace('__COLLECTION_ID__', numeric_id)
+                all_products = []
+                for collection in self.bulk.run_tree(query, {'Product': 'products'}):
+                    all_products.extend(edge['node'] for edge in collection.get('products', {}).get('edges', []))
+                logging.info(f"Koleksiyon için bulk işlem ile toplam {len(all_products)} ürün ve stok bilgisi çekildi.")
+                return all_products
+            except Exception as e:
+                logging.warning(f"Koleksiyon bulk okuması başarısız, sayfalı okumaya geçiliyor: {e}")
+
         all_products = []
         query = """
         query getCollectionProducts($id: ID!, $cursor: String) {
@@ -748,7 +1020,6 @@ class ShopifyAPI:
                 break
             
             variables["cursor"] = page_info["endCursor"]
-            time.sleep(0.5) # Rate limit için küçük bir bekleme
 
         logging.info(f"Koleksiyon için toplam {len(all_products)} ürün ve stok bilgisi çekildi.")
         return all_products        
@@ -759,43 +1030,28 @@ class ShopifyAPI:
         """
         logging.info(f"Metafield güncelleniyor: Ürün GID: {product_gid}, {namespace}.{key} = {value}")
         
-        # Hatanın olduğu sorgu bu kısımdadır.
-        mutation = """
-        # Değişkenler burada da tanımlanmalı: $namespace: String!, $key: String!
-        mutation productUpdate($input: ProductInput!, $namespace: String!, $key: String!) {
-          productUpdate(input: $input) {
-            product {
-              id
-              metafield(namespace: $namespace, key: $key) {
-                value
-              }
-            }
-            userErrors {
-              field
-              message
+        # Metafield değeri aynı yanıtta okunur; takma adlı belgede de çakışmasın diye değişkenlerle verilir
+        mutation = GraphQLMutation(
+            "productUpdate(input: $input) { product { id metafield(namespace: $namespace, key: $key) { value } } userErrors { field message } }",
+            {
+                'input': ('ProductInput!', {
+                    "id": product_gid,
+                    "metafields": [
+                        {
+                            "namespace": namespace,
+                            "key": key,
+                            "value": str(value),
+                            "type": "number_integer"
+                        }
+                    ]
+                }),
+                'namespace': ('String!', namespace),
+                'key': ('String!', key),
             }
-          }
-        }
-        """
-        
-        variables = {
-          "input": {
-            "id": product_gid,
-            "metafields": [
-              {
-                "namespace": namespace,
-                "key": key,
-                "value": str(value),
-                "type": "number_integer"
-              }
-            ]
-          },
-          "namespace": namespace,
-          "key": key
-        }
+        )
 
         try:
-            result = self.execute_graphql(mutation, variables)
+            result = self.write_batcher.mutate(mutation)
             if errors := result.get('productUpdate', {}).get('userErrors', []):
                 error_message = f"Metafield güncelleme hatası: {errors}"
                 logging.error(error_message)
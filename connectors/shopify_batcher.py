@@ -0,0 +1,233 @@
+# connectors/shopify_batcher.py - Takma adlı (aliased) GraphQL okuma ve yazım birleştiricileri
+
+import re
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Shopify tek bir sorgunun maliyetini 1000 puanla sınırlar
+MAX_QUERY_COST = 1000
+DEFAULT_MAX_ALIASES = 50
+DEFAULT_LINGER_SECONDS = 0.02
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_LOOKUP_COST = 10
+# Shopify mutation kök alanlarını girdi boyutundan bağımsız 10 puan sayar
+DEFAULT_MUTATION_COST = 10
+# Yazım belgeleri daha küçük tutulur: tek belgede hata çıkarsa tekrar gönderilen iş az olur
+DEFAULT_MAX_MUTATION_ALIASES = 25
+
+
+class GraphQLLookup:
+    """
+    Tek bir okuma: kök alan metni, değişkenleri ve sonucu ayıklayan fonksiyon.
+
+    field: '$değişken' kullanan kök alan, örn. 'productVariants(first: 1, query: $q) { edges { node { id } } }'
+    variables: {'q': ('String!', 'sku:ABC')}
+    cost: Shopify maliyet kuralına göre tahmini requestedQueryCost
+        (nesne = 1, bağlantı = 2 + first × alt maliyet)
+    extract: kök alanın verisini alıp çağırana dönecek değeri üretir
+    """
+    def __init__(self, field, variables=None, cost=DEFAULT_LOOKUP_COST, extract=None):
+        self.field = field
+        self.variables = variables or {}
+        self.cost = cost
+        self.extract = extract or (lambda data: data)
+
+
+class GraphQLMutation(GraphQLLookup):
+    """
+    Tek bir yazım niyeti: kök mutation alanı ve değişkenleri.
+
+    Sonuç, mutation tek başına gönderilmiş gibi {kök alan: yük} biçiminde döner; çağıran
+    userErrors'ı yine result['productUpdate']['userErrors'] gibi okur. Toplu belge hata
+    verdiğinde mutation'lar tek tek tekrar gönderildiği için yalnızca mutlak değer yazan
+    (tekrar uygulanması sonucu değiştirmeyen) mutation'lar için kullanılmalıdır.
+    """
+    def __init__(self, field, variables=None, cost=DEFAULT_MUTATION_COST):
+        self.root = field.split('(', 1)[0].strip()
+        super().__init__(field, variables, cost, extract=lambda data: {self.root: data or {}})
+
+    def as_document(self):
+        """Mutation'ı takma adsız, özgün değişken adlarıyla tek başına gönderilecek belgeye çevirir."""
+        declarations = ", ".join(f"${name}: {var_type}" for name, (var_type, _) in self.variables.items())
+        header = f"mutation {self.root}({declarations})" if declarations else f"mutation {self.root}"
+        variables = {name: value for name, (_, value) in self.variables.items()}
+        return header + " {\n  " + self.field + "\n}", variables
+
+
+def build_batched_document(lookups, operation='query', operation_name='batchedLookups'):
+    """
+    Okumaları (veya operation='mutation' ile yazımları) tek belgede birleştirir: her kök alan
+    l0, l1, ... takma adıyla, değişkenleri ise çakışmasın diye l0_q, l1_q, ... adlarıyla yazılır.
+    """
+    declarations, fields, variables = [], [], {}
+    for i, lookup in enumerate(lookups):
+        field = lookup.field
+        for name, (var_type, value) in lookup.variables.items():
+            new_name = f"l{i}_{name}"
+            field = re.sub(r'\$' + re.escape(name) + r'\b', '$' + new_name, field)
+            declarations.append(f"${new_name}: {var_type}")
+            variables[new_name] = value
+        fields.append(f"  l{i}: {field}")
+    header = f"{operation} {operation_name}({', '.join(declarations)})" if declarations else f"{operation} {operation_name}"
+    return header + " {\n" + "\n".join(fields) + "\n}", variables
+
+
+def split_by_cost(items, cost_of, max_query_cost=MAX_QUERY_COST, max_aliases=DEFAULT_MAX_ALIASES):
+    """Öğeleri toplam maliyeti tavanı aşmayan ve en fazla max_aliases uzunluğunda gruplara böler."""
+    chunk, chunk_cost = [], 0
+    for item in items:
+        cost = cost_of(item)
+        if chunk and (chunk_cost + cost > max_query_cost or len(chunk) >= max_aliases):
+            yield chunk
+            chunk, chunk_cost = [], 0
+        chunk.append(item)
+        chunk_cost += cost
+    if chunk:
+        yield chunk
+
+
+class GraphQLReadBatcher:
+    """
+    Birçok worker'ın tekil okumalarını toplar ve maliyet tavanını aşmayan
+    takma adlı tek bir GraphQL belgesi olarak gönderir; her takma adın sonucu
+    onu isteyen çağırana (Future) geri yönlendirilir.
+
+    Toplu belge hata verirse okumalar tek tek tekrar denenir, böylece hatalı
+    bir okuma aynı gruptaki diğer okumaları düşürmez.
+    """
+    kind = "okuma"
+
+    def __init__(self, shopify_api, max_query_cost=MAX_QUERY_COST, max_aliases=DEFAULT_MAX_ALIASES,
+                 linger=DEFAULT_LINGER_SECONDS, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self.shopify_api = shopify_api
+        self.max_query_cost = max_query_cost
+        self.max_aliases = max_aliases
+        self.linger = linger
+        self.max_in_flight = max_in_flight
+        self.pending = []
+        self.condition = threading.Condition()
+        self.dispatcher = None
+        self.executor = None
+        self.stats = {'lookups': 0, 'requests': 0, 'fallbacks': 0}
+
+    # --- Eşzamanlı worker'lar için ---
+
+    def submit(self, lookup):
+        """Okumayı kuyruğa ekler ve sonucu taşıyacak Future döndürür."""
+        future = Future()
+        with self.condition:
+            self.pending.append((lookup, future))
+            if self.dispatcher is None:
+                if self.executor is None:
+                    self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="graphql-batch")
+                self.dispatcher = threading.Thread(target=self._dispatch_loop, name="graphql-batcher", daemon=True)
+                self.dispatcher.start()
+            self.condition.notify()
+        return future
+
+    def lookup(self, lookup):
+        """Okumayı kuyruğa ekler ve sonucunu bekler."""
+        return self.submit(lookup).result()
+
+    def _dispatch_loop(self):
+        while True:
+            with self.condition:
+                if not self.pending:
+                    # Bekleyen iş yoksa thread kapanır; yeni okuma geldiğinde tekrar başlatılır
+                    self.condition.wait(timeout=1.0)
+                    if not self.pending:
+                        self.dispatcher = None
+                        return
+            # Diğer worker'ların okumaları da aynı belgeye girsin diye kısa süre beklenir
+            time.sleep(self.linger)
+            with self.condition:
+                batch, self.pending = self.pending, []
+            for chunk in split_by_cost(batch, lambda item: item[0].cost, self.max_query_cost, self.max_aliases):
+                self.executor.submit(self._execute_chunk, chunk)
+
+    def _execute_chunk(self, chunk):
+        lookups = [lookup for lookup, _ in chunk]
+        try:
+            results = self._execute(lookups)
+        except Exception as e:
+            if len(chunk) == 1:
+                chunk[0][1].set_exception(e)
+                return
+            logging.warning(f"Toplu {self.kind} ({len(chunk)} alan) başarısız, tek tek deneniyor: {e}")
+            with self.condition:
+                self.stats['fallbacks'] += 1
+            for item in chunk:
+                self._execute_chunk([item])
+            return
+        for (lookup, future), result in zip(chunk, results):
+            future.set_result(result)
+
+    # --- Tüm okumaları önceden bilinen çağıranlar için ---
+
+    def run_many(self, lookups):
+        """Okumaları maliyet tavanına göre gruplayıp sırayla çalıştırır; sonuçları aynı sırayla döndürür."""
+        results = []
+        for chunk in split_by_cost(lookups, lambda lookup: lookup.cost, self.max_query_cost, self.max_aliases):
+            try:
+                results.extend(self._execute(chunk))
+            except Exception as e:
+                if len(chunk) == 1:
+                    raise
+                logging.warning(f"Toplu {self.kind} ({len(chunk)} alan) başarısız, tek tek deneniyor: {e}")
+                with self.condition:
+                    self.stats['fallbacks'] += 1
+                results.extend(self._execute([lookup])[0] for lookup in chunk)
+        return results
+
+    def _execute(self, lookups):
+        query, variables = build_batched_document(lookups)
+        with self.condition:
+            self.stats['requests'] += 1
+            self.stats['lookups'] += len(lookups)
+        data = self.shopify_api.execute_graphql(query, variables, cost_hint=sum(lookup.cost for lookup in lookups))
+        return [lookup.extract(data.get(f"l{i}")) for i, lookup in enumerate(lookups)]
+
+    def get_stats(self):
+        with self.condition:
+            return dict(self.stats)
+
+
+class GraphQLWriteBatcher(GraphQLReadBatcher):
+    """
+    Birçok worker'ın ürün başına yazımlarını (GraphQLMutation) toplar ve maliyet tavanını
+    aşmayan takma adlı tek bir mutation belgesi olarak gönderir; her takma adın yükü
+    (userErrors dahil) yalnızca o yazımı gönderen çağırana döner.
+
+    Tek yazımlık gruplar takma adsız gönderilir. Toplu belge hata verirse yazımlar tek
+    tek tekrar gönderilir; bu yüzden yalnızca mutlak değer yazan mutation'lar kabul edilir.
+    """
+    kind = "yazım"
+
+    def __init__(self, shopify_api, max_query_cost=MAX_QUERY_COST, max_aliases=DEFAULT_MAX_MUTATION_ALIASES,
+                 linger=DEFAULT_LINGER_SECONDS, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        super().__init__(shopify_api, max_query_cost, max_aliases, linger, max_in_flight)
+        self.stats = {'mutations': 0, 'requests': 0, 'fallbacks': 0}
+
+    def mutate(self, mutation):
+        """Yazımı kuyruğa ekler ve kendi sonucunu ({kök alan: yük}) bekler."""
+        return self.submit(mutation).result()
+
+    def _execute(self, mutations):
+        with self.condition:
+            self.stats['requests'] += 1
+            self.stats['mutations'] += len(mutations)
+        if len(mutations) == 1:
+            return [self.shopify_api.execute_graphql(*mutations[0].as_document(), cost_hint=mutations[0].cost)]
+        query, variables = build_batched_document(mutations, operation='mutation', operation_name='batchedMutations')
+        data = self.shopify_api.execute_graphql(query, variables, cost_hint=sum(mutation.cost for mutation in mutations))
+        return [mutation.extract(data.get(f"l{i}")) for i, mutation in enumerate(mutations)]
+
+
+def run_mutation(shopify_api, mutation):
+    """Yazımı istemcinin yazım birleştiricisi üzerinden, birleştirici yoksa tek başına gönderir."""
+    batcher = getattr(shopify_api, 'write_batcher', None)
+    if batcher is None:
+        return shopify_api.execute_graphql(*mutation.as_document())
+    return batcher.mutate(mutation)
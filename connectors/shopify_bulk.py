@@ -0,0 +1,149 @@
+# connectors/shopify_bulk.py - Tüm katalog okumaları için Bulk Operations motoru
+
+import json
+import time
+import logging
+
+BULK_RUN_MUTATION = """
+mutation bulkOperationRunQuery($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+BULK_STATUS_QUERY = """
+query bulkOperationStatus($id: ID!) {
+  node(id: $id) {
+    ... on BulkOperation {
+      id
+      status
+      errorCode
+      objectCount
+      url
+      partialDataUrl
+    }
+  }
+}
+"""
+
+FINISHED_STATUSES = {'COMPLETED', 'FAILED', 'CANCELED', 'EXPIRED'}
+
+
+class BulkOperationError(Exception):
+    """Bulk işlem başlatılamadığında veya başarısız bittiğinde fırlatılır."""
+
+
+def gid_type(gid):
+    """'gid://shopify/ProductVariant/123' -> 'ProductVariant'"""
+    parts = str(gid or '').split('/')
+    return parts[-2] if len(parts) >= 2 else None
+
+
+def iter_bulk_tree(objects, child_keys):
+    """
+    Bulk JSONL satırlarını (__parentId ile düzleştirilmiş) tekrar ağaç yapısına çevirir.
+
+    Shopify dosyada her alt nesneyi ebeveyninden sonra yazdığı için bellekte
+    yalnızca o anki kök nesne ve alt ağacı tutulur; yeni bir kök geldiğinde
+    önceki kök tamamlanmış olarak yield edilir. Alt nesneler GraphQL bağlantı
+    biçiminde ({'edges': [{'node': ...}]}) eklenir, böylece sayfalı sorgularla
+    aynı yapıyı bekleyen kodlar değişmeden çalışır.
+
+    child_keys: {'ProductVariant': 'variants', 'Collection': 'collections', ...}
+    """
+    current_root = None
+    index = {}
+    orphan_count = 0
+
+    for obj in objects:
+        parent_id = obj.pop('__parentId', None)
+        if parent_id is None:
+            if current_root is not None:
+                yield current_root
+            current_root = obj
+            index = {obj['id']: obj} if obj.get('id') else {}
+            continue
+
+        parent = index.get(parent_id)
+        if parent is None:
+            orphan_count += 1
+            continue
+
+        key = child_keys.get(gid_type(obj.get('id'))) or child_keys.get('*', 'children')
+        parent.setdefault(key, {'edges': []})['edges'].append({'node': obj})
+        if obj.get('id'):
+            index[obj['id']] = obj
+
+    if current_root is not None:
+        yield current_root
+    if orphan_count:
+        logging.warning(f"Bulk çıktısında ebeveyni bulunamayan {orphan_count} satır atlandı.")
+
+
+class ShopifyBulkReader:
+    """bulkOperationRunQuery gönderir, tamamlanmasını bekler ve sonucu satır satır okur."""
+    def __init__(self, shopify_api, poll_interval=2.0, max_poll_interval=10.0, timeout=3600):
+        self.shopify_api = shopify_api
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+
+    def submit(self, query):
+        result = self.shopify_api.execute_graphql(BULK_RUN_MUTATION, {'query': query})
+        data = result.get('bulkOperationRunQuery', {})
+        if errors := data.get('userErrors', []):
+            raise BulkOperationError(f"Bulk işlem başlatılamadı: {errors}")
+        operation = data.get('bulkOperation') or {}
+        if not operation.get('id'):
+            raise BulkOperationError("Bulk işlem başlatıldı ancak işlem ID'si alınamadı.")
+        logging.info(f"Bulk işlem başlatıldı: {operation['id']}")
+        return operation['id']
+
+    def wait(self, operation_id, progress_callback=None):
+        """İşlem bitene kadar sorgular; tamamlandığında JSONL URL'sini (veya None) döndürür."""
+        start_time = time.monotonic()
+        interval = self.poll_interval
+        while True:
+            result = self.shopify_api.execute_graphql(BULK_STATUS_QUERY, {'id': operation_id})
+            operation = result.get('node') or {}
+            status = operation.get('status')
+            object_count = int(operation.get('objectCount') or 0)
+
+            if progress_callback:
+                progress_callback({'message': f"Shopify bulk işlemi: {status} ({object_count} nesne hazırlandı)..."})
+
+            if status in FINISHED_STATUSES:
+                if status != 'COMPLETED':
+                    raise BulkOperationError(f"Bulk işlem {status} durumunda bitti (Hata: {operation.get('errorCode')}).")
+                logging.info(f"Bulk işlem tamamlandı: {object_count} nesne.")
+                return operation.get('url')
+
+            if time.monotonic() - start_time > self.timeout:
+                raise BulkOperationError(f"Bulk işlem {self.timeout} saniye içinde tamamlanmadı.")
+            time.sleep(interval)
+            interval = min(self.max_poll_interval, interval * 1.5)
+
+    def iter_objects(self, url):
+        """JSONL dosyasını tamamını belleğe almadan satır satır okur."""
+        if not url:
+            return
+        response = self.shopify_api.http.get(url, stream=True)
+        response.raise_for_status()
+        try:
+            for raw_line in response.iter_lines():
+                if raw_line:
+                    yield json.loads(raw_line.decode('utf-8'))
+        finally:
+            response.close()
+
+    def run(self, query, progress_callback=None):
+        """Sorguyu bulk olarak çalıştırır ve sonuç nesnelerini düz olarak yield eder."""
+        operation_id = self.submit(query)
+        url = self.wait(operation_id, progress_callback)
+        yield from self.iter_objects(url)
+
+    def run_tree(self, query, child_keys, progress_callback=None):
+        """Sorguyu bulk olarak çalıştırır ve kök nesneleri alt bağlantılarıyla birlikte yield eder."""
+        yield from iter_bulk_tree(self.run(query, progress_callback), child_keys)
@@ -0,0 +1,168 @@
+# connectors/shopify_throttle.py - Mağaza başına paylaşılan GraphQL maliyet bütçesi
+
+import threading
+import time
+import logging
+
+# Shopify standart planı için varsayılan leaky-bucket değerleri; ilk yanıttan sonra
+# sunucunun bildirdiği throttleStatus değerleri ile güncellenir.
+DEFAULT_MAXIMUM_AVAILABLE = 1000.0
+DEFAULT_RESTORE_RATE = 50.0
+DEFAULT_QUERY_COST = 10.0
+
+
+class GraphQLCostThrottle:
+    """
+    Shopify GraphQL maliyet tabanlı hız sınırlayıcı (thread-safe).
+
+    İstek gönderilmeden önce sorgunun tahmini maliyeti bütçeden ayrılır (reserve),
+    yanıt geldiğinde ayrılan miktar gerçek maliyetle kapatılır (settle) ve kova
+    seviyesi `extensions.cost.throttleStatus` değerlerine eşitlenir. Böylece tüm
+    worker'lar sabit beklemeler yerine gerçek yenilenme hızına yakın çalışır.
+    """
+    def __init__(self, maximum_available=DEFAULT_MAXIMUM_AVAILABLE, restore_rate=DEFAULT_RESTORE_RATE):
+        self.maximum_available = float(maximum_available)
+        self.restore_rate = float(restore_rate)
+        self.available = float(maximum_available)
+        self.in_flight = 0.0
+        self.last_update = time.monotonic()
+        self.condition = threading.Condition()
+        self.cost_estimates = {}
+        self.stats = {'requests': 0, 'throttled': 0, 'actual_cost': 0.0, 'wait_seconds': 0.0}
+
+    def _refill(self, now):
+        elapsed = now - self.last_update
+        if elapsed > 0:
+            self.available = min(self.maximum_available, self.available + elapsed * self.restore_rate)
+        self.last_update = now
+
+    def estimate_cost(self, query, cost_hint=None):
+        """
+        Aynı sorgu metni için en son bildirilen requestedQueryCost değerini döndürür. Sorgu
+        ilk kez gönderiliyorsa çağıranın bildirdiği maliyet (cost_hint), o da yoksa varsayılan kullanılır.
+        """
+        with self.condition:
+            known = self.cost_estimates.get(query)
+        if known is not None:
+            return known
+        return float(cost_hint) if cost_hint else DEFAULT_QUERY_COST
+
+    def _wait_until_available(self, cost):
+        """Kilit tutulurken çağrılır; kovada `cost` kadar puan oluşana kadar bekler."""
+        cost = min(float(cost), self.maximum_available)
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            if self.available >= cost:
+                break
+            wait_time = (cost - self.available) / self.restore_rate
+            self.condition.wait(timeout=wait_time)
+            waited += time.monotonic() - now
+        self.stats['wait_seconds'] += waited
+        return cost
+
+    def reserve(self, cost):
+        """Tahmini maliyeti bütçeden ayırır, gerekirse yeterli puan birikene kadar bekler."""
+        with self.condition:
+            cost = self._wait_until_available(cost)
+            self.available -= cost
+            self.in_flight += cost
+            self.stats['requests'] += 1
+            return cost
+
+    def try_reserve(self, cost):
+        """
+        Beklemeden rezervasyon dener (asyncio istemcisi için): başarılıysa
+        (ayrılan_maliyet, 0.0), değilse (None, tahmini_bekleme_saniyesi) döndürür.
+        """
+        with self.condition:
+            cost = min(float(cost), self.maximum_available)
+            self._refill(time.monotonic())
+            if self.available >= cost:
+                self.available -= cost
+                self.in_flight += cost
+                self.stats['requests'] += 1
+                return cost, 0.0
+            wait_time = (cost - self.available) / self.restore_rate
+            self.stats['wait_seconds'] += wait_time
+            return None, wait_time
+
+    def wait_for_capacity(self, cost=DEFAULT_QUERY_COST):
+        """Rezervasyon yapmadan, bütçede `cost` kadar yer açılana kadar bekler."""
+        with self.condition:
+            self._wait_until_available(cost)
+
+    def release(self, reserved):
+        """İstek hiç tamamlanamadığında (bağlantı hatası vb.) rezervasyonu iade eder."""
+        with self.condition:
+            self.in_flight = max(0.0, self.in_flight - reserved)
+            self.available = min(self.maximum_available, self.available + reserved)
+            self.condition.notify_all()
+
+    def settle(self, reserved, cost_info, query=None):
+        """
+        Rezervasyonu yanıttaki gerçek maliyetle kapatır ve kova seviyesini sunucu
+        değerleriyle eşitler. Henüz yanıtı gelmemiş diğer rezervasyonlar sunucu
+        tarafında düşülmediği için yerel seviyeden ayrıca çıkarılır.
+        """
+        cost_info = cost_info or {}
+        throttle_status = cost_info.get('throttleStatus') or {}
+        requested = cost_info.get('requestedQueryCost')
+        actual = cost_info.get('actualQueryCost')
+
+        with self.condition:
+            self.in_flight = max(0.0, self.in_flight - reserved)
+            now = time.monotonic()
+            self._refill(now)
+
+            if query is not None and requested is not None:
+                self.cost_estimates[query] = float(requested)
+            if actual is not None:
+                self.stats['actual_cost'] += float(actual)
+
+            if throttle_status:
+                self.maximum_available = float(throttle_status.get('maximumAvailable', self.maximum_available))
+                self.restore_rate = float(throttle_status.get('restoreRate', self.restore_rate)) or DEFAULT_RESTORE_RATE
+                server_available = float(throttle_status.get('currentlyAvailable', self.available))
+                self.available = min(self.maximum_available, server_available) - self.in_flight
+            elif actual is not None:
+                # Sunucu durumu yoksa fazla ayrılan kısmı iade et
+                self.available = min(self.maximum_available, self.available + reserved - float(actual))
+            else:
+                self.available = min(self.maximum_available, self.available + reserved)
+
+            self.condition.notify_all()
+
+    def record_throttled(self, cost_info):
+        """THROTTLED yanıtında bir sonraki denemenin tahmini maliyetini döndürür."""
+        with self.condition:
+            self.stats['throttled'] += 1
+        requested = (cost_info or {}).get('requestedQueryCost')
+        return float(requested) if requested is not None else DEFAULT_QUERY_COST
+
+    def get_stats(self):
+        with self.condition:
+            self._refill(time.monotonic())
+            stats = dict(self.stats)
+            stats.update({
+                'currently_available': round(self.available, 1),
+                'maximum_available': self.maximum_available,
+                'restore_rate': self.restore_rate,
+                'in_flight': self.in_flight,
+            })
+            return stats
+
+
+_store_throttles = {}
+_store_throttles_lock = threading.Lock()
+
+
+def get_store_throttle(store_url):
+    """Aynı mağaza için süreç içindeki tüm ShopifyAPI örneklerinin paylaştığı sınırlayıcıyı döndürür."""
+    key = (store_url or '').strip().lower().replace('https://', '').replace('http://', '').rstrip('/')
+    with _store_throttles_lock:
+        if key not in _store_throttles:
+            _store_throttles[key] = GraphQLCostThrottle()
+            logging.info(f"'{key}' mağazası için paylaşılan GraphQL maliyet sınırlayıcısı oluşturuldu.")
+        return _store_throttles[key]
@@ -0,0 +1,134 @@
+# operations/async_sync.py - core_sync, stock_sync ve media_sync işlemlerinin asyncio karşılıkları
+
+import asyncio
+import logging
+
+from connectors.product_index import description_hash
+from .core_sync import PRODUCT_UPDATE_MUTATION, plan_details_update
+from .stock_sync import ADD_VARIANTS_MUTATION, _new_variant_input, _prepare_inventory_adjustments
+from .media_sync import _plan_media_changes, _ordered_media_ids, _build_media_input
+from .sync_pipeline import SyncChanges
+
+# Eklenen medyanın Shopify'da işlenmesi için beklenen süre (media_sync ile aynı)
+MEDIA_PROCESSING_WAIT = 10
+
+
+async def sync_details(shopify_api, product_gid, sentos_product, force_update=False):
+    changes = SyncChanges()
+    try:
+        current = None if force_update else await shopify_api.get_product_details(product_gid)
+        update_input, planned = plan_details_update(product_gid, sentos_product, current)
+        if update_input is None:
+            return SyncChanges(["Başlık, açıklama ve kategori zaten güncel."])
+        result = await shopify_api.execute_graphql(PRODUCT_UPDATE_MUTATION, {'input': update_input})
+        if errors := result.get('productUpdate', {}).get('userErrors', []):
+            logging.error(f"Ürün detay güncelleme hataları: {errors}")
+            changes.fail(f"Hata: {errors[0].get('message', 'Bilinmeyen güncelleme hatası')}")
+        else:
+            changes.extend(planned)
+            if shopify_api.product_index is not None:
+                shopify_api.product_index.update_details(
+                    product_gid, update_input.get('title'),
+                    description_hash(update_input['descriptionHtml']) if 'descriptionHtml' in update_input else None,
+                    update_input.get('productType')
+                )
+    except Exception as e:
+        error_msg = f"Ürün detay güncelleme sırasında kritik hata: {e}"
+        logging.error(error_msg)
+        changes.fail(error_msg)
+    return changes
+
+
+async def _add_variants_bulk(shopify_api, product_gid, new_variants, batch_size=50):
+    """Tüm partiler hatasız eklendiyse True döndürür (stock_sync._add_variants_bulk gibi)."""
+    success = True
+    for batch_start in range(0, len(new_variants), batch_size):
+        variants_input = [_new_variant_input(v) for v in new_variants[batch_start:batch_start + batch_size]]
+        try:
+            result = await shopify_api.execute_graphql(ADD_VARIANTS_MUTATION, {"productId": product_gid, "variants": variants_input})
+            created_variants = result.get('productVariantsBulkCreate', {}).get('productVariants', [])
+            if errors := result.get('productVariantsBulkCreate', {}).get('userErrors', []):
+                logging.error(f"Varyant batch {batch_start//batch_size + 1} ekleme hataları: {errors}")
+                success = False
+            if created_variants:
+                await shopify_api.activate_inventory_items(created_variants)
+        except Exception as e:
+            logging.error(f"Bulk varyant batch {batch_start//batch_size + 1} ekleme hatası: {e}")
+            success = False
+    return success
+
+
+async def sync_stock_and_variants(shopify_api, product_gid, sentos_product):
+    changes = SyncChanges()
+    index = shopify_api.product_index
+    ex_vars = index.get_product_variants(product_gid) if index is not None else []
+    if not ex_vars:
+        ex_vars = await shopify_api.get_product_variants(product_gid)
+    ex_skus = {str(v.get('inventoryItem', {}).get('sku', '')).strip() for v in ex_vars if v.get('inventoryItem', {}).get('sku')}
+    s_vars = sentos_product.get('variants', []) or [sentos_product]
+
+    new_vars = [v for v in s_vars if str(v.get('sku', '')).strip() not in ex_skus]
+    all_now_variants = ex_vars
+    if new_vars:
+        changes.append(f"{len(new_vars)} yeni varyant eklendi.")
+        if not await _add_variants_bulk(shopify_api, product_gid, new_vars):
+            changes.fail("Varyant ekleme hatası: bazı varyantlar eklenemedi.")
+        await asyncio.sleep(1)
+        all_now_variants = await shopify_api.get_product_variants(product_gid)
+        if index is not None and all_now_variants:
+            index.replace_variants(product_gid, all_now_variants)
+
+    if adjustments := _prepare_inventory_adjustments(s_vars, all_now_variants, shopify_api.location_mapping):
+        changes.append(f"{len(adjustments)} varyantın stok seviyesi güncellendi.")
+        try:
+            if failed := await shopify_api.set_on_hand_quantities(adjustments):
+                changes.fail(f"Stok güncelleme hatası: {len(failed)} varyantın stoğu yazılamadı.")
+        except Exception as e:
+            logging.error(f"Bulk stok güncelleme sırasında hata: {e}")
+            changes.fail(f"Stok güncelleme hatası: {e}")
+
+    if not new_vars and not adjustments:
+        changes.append("Stok ve varyantlar kontrol edildi (Değişiklik yok).")
+    return changes
+
+
+async def sync_media(shopify_api, sentos_api, product_gid, sentos_product, set_alt_text=False):
+    changes = SyncChanges()
+    product_title = sentos_product.get('name', '').strip()
+    sentos_ordered_urls = await sentos_api.get_ordered_image_urls(sentos_product.get('id'))
+
+    if sentos_ordered_urls is None:
+        changes.fail("Medya senkronizasyonu atlandı (Cookie eksik).")
+        return changes
+
+    initial_shopify_media = await shopify_api.get_product_media_details(product_gid)
+
+    if not sentos_ordered_urls:
+        if media_ids_to_delete := [m['id'] for m in initial_shopify_media]:
+            await shopify_api.delete_product_media(product_gid, media_ids_to_delete)
+            changes.append(f"{len(media_ids_to_delete)} Shopify görseli silindi.")
+        return changes
+
+    media_ids_to_delete, urls_to_add = _plan_media_changes(initial_shopify_media, sentos_ordered_urls)
+    media_changed = False
+
+    if urls_to_add:
+        changes.append(f"{len(urls_to_add)} yeni görsel eklendi.")
+        await shopify_api.create_product_media(product_gid, _build_media_input(urls_to_add, product_title, set_alt_text))
+        media_changed = True
+
+    if media_ids_to_delete:
+        changes.append(f"{len(media_ids_to_delete)} eski görsel silindi.")
+        await shopify_api.delete_product_media(product_gid, media_ids_to_delete)
+        media_changed = True
+
+    if media_changed:
+        changes.append("Görsel sırası güncellendi.")
+        # Bekleme yalnızca bu coroutine'i durdurur, diğer ürünler işlenmeye devam eder
+        await asyncio.sleep(MEDIA_PROCESSING_WAIT)
+        final_shopify_media = await shopify_api.get_product_media_details(product_gid)
+        await shopify_api.reorder_product_media(product_gid, _ordered_media_ids(final_shopify_media, sentos_ordered_urls))
+
+    if not changes:
+        changes.append("Resimler kontrol edildi (Değişiklik yok).")
+    return changes
@@ -2,73 +2,86 @@
 
 import logging
 
-def sync_details(shopify_api, product_gid, sentos_product):
-    """Ürün başlığı ve açıklamasını doğru input tipiyle günceller."""
-    changes = []
+from connectors.product_index import description_hash, forget_deleted_product
+from connectors.shopify_batcher import GraphQLMutation, run_mutation
+from operations.sync_pipeline import SyncChanges
+
+PRODUCT_UPDATE_FIELD = "productUpdate(input: $input) { product { id } userErrors { field message } }"
+# DÜZELTME: GraphQL sorgusundaki input tipi 'ProductUpdateInput!' olarak güncellendi.
+PRODUCT_UPDATE_MUTATION = f"""
+mutation productUpdate($input: ProductUpdateInput!) {{
+    {PRODUCT_UPDATE_FIELD}
+}}
+"""
+
+def _details_input(product_gid, sentos_product):
+    return {
+        "id": product_gid, 
+        "title": sentos_product.get('name', '').strip(), 
+        "descriptionHtml": sentos_product.get('description_detail') or sentos_product.get('description', '')
+    }
+
+def plan_details_update(product_gid, sentos_product, current):
+    """
+    Sentos'taki başlık, açıklama ve kategoriyi Shopify'daki mevcut değerlerle karşılaştırır.
+    (productUpdate input'u veya None, değişiklik mesajları) döndürür. Mevcut değerler
+    bilinmiyorsa (current None) tüm alanlar gönderilir.
+    """
+    desired = _details_input(product_gid, sentos_product)
+    category = str(sentos_product.get('category') or '')
+    if category:
+        desired["productType"] = category
+    if current is None:
+        return desired, ["Başlık ve açıklama güncellendi."] + ([f"Kategori '{category}' olarak ayarlandı."] if category else [])
+
+    update_input, changes = {"id": product_gid}, []
+    if desired["title"] != current.get('title'):
+        update_input["title"] = desired["title"]
+        changes.append("Başlık güncellendi.")
+    if description_hash(desired["descriptionHtml"]) != current.get('description_hash'):
+        update_input["descriptionHtml"] = desired["descriptionHtml"]
+        changes.append("Açıklama güncellendi.")
+    if category and category != current.get('product_type'):
+        update_input["productType"] = category
+        changes.append(f"Kategori '{category}' olarak ayarlandı.")
+    return (update_input if changes else None), changes
+
+def sync_details(shopify_api, product_gid, sentos_product, force_update=False):
+    """
+    Başlık, açıklama ve kategoriyi (productType) tek bir productUpdate ile günceller;
+    yalnızca Shopify'daki değerden farklı olan alanlar gönderilir, hiçbiri farklı değilse
+    istek atılmaz. force_update verilirse karşılaştırma yapılmadan tüm alanlar yazılır.
+    Güncelleme başarısızsa dönen SyncChanges `failed` olarak işaretlenir.
+    """
+    changes = SyncChanges()
     
     try:
-        # DÜZELTME: GraphQL sorgusundaki input tipi 'ProductUpdateInput!' olarak güncellendi.
-        query = """
-        mutation productUpdate($input: ProductUpdateInput!) {
-            productUpdate(input: $input) {
-                product { id }
-                userErrors { field message }
-            }
-        }
-        """
-        
-        input_data = {
-            "id": product_gid, 
-            "title": sentos_product.get('name', '').strip(), 
-            "descriptionHtml": sentos_product.get('description_detail') or sentos_product.get('description', '')
-        }
-        
-        result = shopify_api.execute_graphql(query, {'input': input_data})
+        current = None if force_update else shopify_api.get_product_details(product_gid)
+        update_input, planned = plan_details_update(product_gid, sentos_product, current)
+        if update_input is None:
+            return SyncChanges(["Başlık, açıklama ve kategori zaten güncel."])
+
+        # Diğer worker'ların ürün güncellemeleriyle aynı mutation belgesinde gönderilir
+        result = run_mutation(shopify_api, GraphQLMutation(PRODUCT_UPDATE_FIELD, {'input': ('ProductUpdateInput!', update_input)}))
         
         if errors := result.get('productUpdate', {}).get('userErrors', []):
             logging.error(f"Ürün detay güncelleme hataları: {errors}")
-            changes.append(f"Hata: {errors[0].get('message', 'Bilinmeyen güncelleme hatası')}")
+            if any('does not exist' in (err.get('message') or '') for err in errors):
+                forget_deleted_product(shopify_api, product_gid)
+            changes.fail(f"Hata: {errors[0].get('message', 'Bilinmeyen güncelleme hatası')}")
         else:
-            changes.append("Başlık ve açıklama güncellendi.")
-            logging.info(f"Ürün {product_gid} için temel detaylar güncellendi.")
+            changes.extend(planned)
+            logging.info(f"Ürün {product_gid} için değişen detaylar güncellendi: {', '.join(k for k in update_input if k != 'id')}")
+            if shopify_api.product_index is not None:
+                shopify_api.product_index.update_details(
+                    product_gid, update_input.get('title'),
+                    description_hash(update_input['descriptionHtml']) if 'descriptionHtml' in update_input else None,
+                    update_input.get('productType')
+                )
             
     except Exception as e:
         error_msg = f"Ürün detay güncelleme sırasında kritik hata: {e}"
         logging.error(error_msg)
-        changes.append(error_msg)
+        changes.fail(error_msg)
     
     return changes
-
-def sync_product_type(shopify_api, product_gid, sentos_product):
-    """Ürün kategorisini (productType) doğru input tipiyle günceller."""
-    changes = []
-    
-    try:
-        if category := sentos_product.get('category'):
-            # DÜZELTME: GraphQL sorgusundaki input tipi 'ProductUpdateInput!' olarak güncellendi.
-            query = """
-            mutation productUpdate($input: ProductUpdateInput!) {
-                productUpdate(input: $input) {
-                    product { id }
-                    userErrors { field message }
-                }
-            }
-            """
-            
-            input_data = {"id": product_gid, "productType": str(category)}
-            
-            result = shopify_api.execute_graphql(query, {'input': input_data})
-            
-            if errors := result.get('productUpdate', {}).get('userErrors', []):
-                logging.error(f"Kategori güncelleme hataları: {errors}")
-                changes.append(f"Kategori güncelleme hatası: {errors[0].get('message', 'Bilinmeyen güncelleme hatası')}")
-            else:
-                changes.append(f"Kategori '{category}' olarak ayarlandı.")
-                logging.info(f"Ürün {product_gid} için kategori '{category}' olarak ayarlandı.")
-                
-    except Exception as e:
-        error_msg = f"Kategori güncelleme sırasında kritik hata: {e}"
-        logging.error(error_msg)
-        changes.append(error_msg)
-    
-    return changes
\ No newline at end of file
@@ -0,0 +1,248 @@
+# operations/delta_sync.py - İçerik parmak izi ile değişmeyen ürünleri atlayan delta senkronizasyon
+
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from connectors.product_index import DATA_CACHE_DIR, _store_slug
+from connectors.sentos_snapshot import DEFAULT_SNAPSHOT_TTL
+from operations.stock_sync import _sentos_variant_quantity
+from operations.location_mapping import stock_warehouse_id
+
+FULL_SYNC_MODE = "Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)"
+STOCK_FAST_MODE = "Sadece Stok (Katalog Geneli Hızlı)"
+
+# Her senkronizasyon modunun Shopify'a yazdığı içerik parçaları. Parmak izleri parça
+# bazında saklandığı için tam senkronizasyonun yazdığı stok, sonraki "Sadece Stok"
+# çalıştırmasında da değişmemiş sayılır.
+MODE_COMPONENTS = {
+    FULL_SYNC_MODE: ('details', 'stock', 'images_seo'),
+    "Sadece Stok ve Varyantlar": ('stock',),
+    STOCK_FAST_MODE: ('stock',),
+    "Sadece Açıklamalar": ('details',),
+    "Sadece Resimler": ('images',),
+    "SEO Alt Metinli Resimler": ('images_seo',),
+}
+# Bu modlar Shopify'da bulunmayan ürünü oluşturur; değişmemiş ama Shopify'dan
+# silinmiş ürünler yine gönderilmelidir.
+CREATING_MODES = {FULL_SYNC_MODE}
+# Yalnızca stok yazan modlar; Sentos kataloğu bu modlarda varsayılan olarak her çalıştırmada yeniden çekilir
+STOCK_ONLY_MODES = {mode for mode, components in MODE_COMPONENTS.items() if components == ('stock',)}
+
+# Kayıtlar bu sayıya ulaşınca diske yazılır
+RECORD_FLUSH_SIZE = 100
+
+
+def catalog_ttl_for_mode(sync_mode, catalog_ttl=None):
+    """
+    Sentos katalog anlık görüntüsünün bu çalıştırmada kabul edilen en büyük yaşı (saniye).
+    Çağıran TTL verdiyse o kullanılır; stok modlarında eski veriden stok yazılmasın diye 0 (her zaman yeniden çek).
+    """
+    if catalog_ttl is not None:
+        return catalog_ttl
+    return 0 if sync_mode in STOCK_ONLY_MODES else DEFAULT_SNAPSHOT_TTL
+
+
+def product_key(sentos_product):
+    """Sentos ürününü çalıştırmalar arasında tanımlayan anahtar."""
+    return str(sentos_product.get('id') or sentos_product.get('sku') or sentos_product.get('name', '')).strip()
+
+
+def _warehouse_stocks(sentos_variant):
+    """Varyantın depo bazlı stokları [(depo_id, miktar)] (lokasyon eşleştirmesinde depolar arası taşımalar için)."""
+    return sorted(
+        (stock_warehouse_id(entry) or '', entry.get('stock') or 0)
+        for entry in sentos_variant.get('stocks', []) if isinstance(entry, dict)
+    )
+
+
+def _component_payload(sentos_product, component, stock_locations=None):
+    """
+    Parçanın Shopify'a yazılan hâlini belirleyen alanlar; bilinemiyorsa None.
+    stock_locations: etkin depo → lokasyon eşleştirmesi; değişirse tüm stok parmak izleri değişir.
+    """
+    if component == 'stock':
+        variants = sentos_product.get('variants', []) or [sentos_product]
+        return {
+            'variants': sorted(
+                (str(v.get('sku', '')).strip(), str(v.get('barcode') or ''), _sentos_variant_quantity(v), _warehouse_stocks(v))
+                for v in variants
+            ),
+            'locations': stock_locations or {},
+        }
+    if component == 'details':
+        return [
+            sentos_product.get('name', '').strip(),
+            sentos_product.get('description_detail') or sentos_product.get('description', ''),
+            str(sentos_product.get('category') or ''),
+        ]
+    if component in ('images', 'images_seo'):
+        # Sıralı görsel listesi ürün yanıtında yoksa parmak izi çıkarılamaz
+        images = sentos_product.get('images')
+        if images is None:
+            return None
+        if component == 'images_seo':
+            return [sentos_product.get('name', '').strip(), images]
+        return images
+    return None
+
+
+def compute_fingerprints(sentos_product, components, stock_locations=None):
+    """Her parça için kararlı bir SHA-1 parmak izi döndürür ({parça: hex veya None})."""
+    fingerprints = {}
+    for component in components:
+        payload = _component_payload(sentos_product, component, stock_locations)
+        if payload is None:
+            fingerprints[component] = None
+            continue
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str, separators=(',', ':'))
+        fingerprints[component] = hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+    return fingerprints
+
+
+class FingerprintStore:
+    """Başarıyla gönderilmiş son parmak izlerini mağaza başına SQLite'ta tutar."""
+    def __init__(self, store_url, db_path=None):
+        self.db_path = db_path or os.path.join(DATA_CACHE_DIR, f"sync_fingerprints_{_store_slug(store_url)}.db")
+        self.lock = threading.Lock()
+        self.pending = []
+        self._ensure_db_exists()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_db_exists(self):
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    product_key TEXT NOT NULL,
+                    component TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    synced_at TEXT,
+                    PRIMARY KEY (product_key, component)
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def load(self, components):
+        """Verilen parçaların kayıtlı parmak izlerini {(anahtar, parça): parmak izi} olarak okur."""
+        placeholders = ','.join('?' * len(components))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT product_key, component, fingerprint FROM fingerprints WHERE component IN ({placeholders})",
+                tuple(components)
+            ).fetchall()
+        return {(key, component): fingerprint for key, component, fingerprint in rows}
+
+    def record(self, key, fingerprints):
+        """Başarılı gönderimi tampona yazar; tampon dolunca diske aktarılır."""
+        synced_at = datetime.now(timezone.utc).isoformat()
+        with self.lock:
+            self.pending.extend((key, c, fp, synced_at) for c, fp in fingerprints.items() if fp)
+            should_flush = len(self.pending) >= RECORD_FLUSH_SIZE
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            rows, self.pending = self.pending, []
+            if not rows:
+                return
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO fingerprints (product_key, component, fingerprint, synced_at) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+
+    def get_last_full_pass(self, sync_mode):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (f"full_pass:{sync_mode}",)).fetchone()
+        try:
+            return datetime.fromisoformat(row[0]) if row else None
+        except ValueError:
+            return None
+
+    def mark_full_pass(self, sync_mode):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                         (f"full_pass:{sync_mode}", datetime.now(timezone.utc).isoformat()))
+
+
+def push_succeeded(changes):
+    """Adım başarısızlığını SyncChanges.failed ile açıkça bildirmediyse gönderim tamamlanmış sayılır."""
+    return not getattr(changes, 'failed', False)
+
+
+class DeltaPlanner:
+    """
+    Sentos ürünlerinin mod parçalarına göre parmak izini çıkarır ve yalnızca son
+    başarılı gönderimden beri değişen ürünlerin işlenmesine izin verir.
+
+    Ürün, en az bir parçasının parmak izi değiştiyse (veya hiç kaydı yoksa) gönderilir.
+    `force_full` verildiğinde tüm ürünler gönderilir; parmak izleri yine de güncellenir.
+    `full_pass_interval_hours` verilirse (isteğe bağlı) son tam geçişin üzerinden bu kadar
+    saat geçtiğinde de tam geçiş yapılır; Shopify'da elle yapılan değişiklikler bu geçişte düzelir.
+
+    Stok parmak izi depo bazlı stokları ve etkin depo-lokasyon eşleştirmesini içerir;
+    eşleştirme değişince tüm ürünlerin stoğu yeniden yazılır.
+    """
+    def __init__(self, store_url, sync_mode, force_full=False, store=None, location_mapping=None, full_pass_interval_hours=None):
+        self.sync_mode = sync_mode
+        self.stock_locations = dict(sorted(location_mapping.warehouses.items())) if location_mapping else None
+        self.components = MODE_COMPONENTS.get(sync_mode, ())
+        self.enabled = bool(self.components)
+        self.store = store or (FingerprintStore(store_url) if self.enabled else None)
+        self.known = {}
+        self.full_pass = bool(force_full)
+        if self.enabled and full_pass_interval_hours and not self.full_pass:
+            last_full = self.store.get_last_full_pass(sync_mode)
+            if last_full is None or last_full < datetime.now(timezone.utc) - timedelta(hours=full_pass_interval_hours):
+                self.full_pass = True
+        if self.enabled:
+            self.known = self.store.load(self.components)
+            logging.info(f"Delta senkronizasyon: {len(self.known)} kayıtlı parmak izi, tam geçiş: {self.full_pass}")
+
+    def split_page(self, products):
+        """Sayfayı ([(ürün, parmak izleri)] değişenler, [(ürün, parmak izleri)] değişmeyenler) olarak ayırır."""
+        if not self.enabled:
+            return [(p, {}) for p in products], []
+        changed, unchanged = [], []
+        for product in products:
+            key = product_key(product)
+            fingerprints = compute_fingerprints(product, self.components, self.stock_locations)
+            is_unchanged = not self.full_pass and all(
+                fp is not None and self.known.get((key, component)) == fp
+                for component, fp in fingerprints.items()
+            )
+            (unchanged if is_unchanged else changed).append((product, fingerprints))
+        return changed, unchanged
+
+    def changed_components(self, sentos_product, fingerprints):
+        """Kayıtlı parmak izinden farklı (veya hiç kaydı olmayan) parçalar; tam geçişten bağımsızdır."""
+        key = product_key(sentos_product)
+        return {c for c, fp in fingerprints.items() if fp is None or self.known.get((key, c)) != fp}
+
+    def record_success(self, sentos_product, fingerprints):
+        if self.enabled and fingerprints:
+            self.store.record(product_key(sentos_product), fingerprints)
+
+    def close(self, completed):
+        """Bekleyen kayıtları yazar; tam geçiş kesintisiz bittiyse zamanını kaydeder."""
+        if not self.enabled:
+            return
+        self.store.flush()
+        if completed and self.full_pass:
+            self.store.mark_full_pass(self.sync_mode)
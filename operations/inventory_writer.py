@@ -0,0 +1,139 @@
+# operations/inventory_writer.py - Tüm senkronizasyon worker'larının paylaştığı stok yazıcısı
+
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from operations.stock_sync import INVENTORY_SET_BATCH_MAX, drop_noop_adjustments, _write_on_hand_batch
+
+# İlk satır geldikten sonra parti dolmasa da en geç bu kadar beklenip gönderilir
+DEFAULT_LINGER_SECONDS = 0.25
+DEFAULT_MAX_IN_FLIGHT = 2
+
+STATUS_WRITTEN = 'written'
+STATUS_NOOP = 'noop'
+STATUS_FAILED = 'failed'
+
+
+class _WriteRequest:
+    """Tek bir ürünün gönderdiği satırların sonuçlarını toplar; hepsi bitince Future tamamlanır."""
+    def __init__(self, future, size):
+        self.future = future
+        self.results = [None] * size
+        self.remaining = size
+        self.lock = threading.Lock()
+
+    def set(self, index, status):
+        with self.lock:
+            self.results[index] = status
+            self.remaining -= 1
+            done = self.remaining == 0
+        if done:
+            self.future.set_result(self.results)
+
+
+class InventoryWriteAggregator:
+    """
+    Ürün worker'larının stok satırlarını tek kuyrukta toplar ve tam boy setQuantities
+    partileri (INVENTORY_SET_BATCH_MAX satır) olarak yazar. Parti dolmazsa ilk satırdan
+    `linger` saniye sonra elde olanlar gönderilir.
+
+    Her partide önce Shopify'daki mevcut miktarlar toplu okunur, yalnızca farklı satırlar
+    yazılır. Her satırın sonucu (written / noop / failed) onu gönderen ürüne, gönderdiği
+    sırayla döner; hatalı satırlar parti ikiye bölünerek ayıklanır.
+    """
+    def __init__(self, shopify_api, batch_size=INVENTORY_SET_BATCH_MAX, linger=DEFAULT_LINGER_SECONDS,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, clock=time.monotonic):
+        self.shopify_api = shopify_api
+        self.batch_size = batch_size
+        self.linger = linger
+        self.clock = clock
+        self.pending = []
+        self.first_pending_at = None
+        self.condition = threading.Condition()
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="InventoryWrite")
+        self.thread = None
+        self.closed = False
+        self.stats = {'rows': 0, 'batches': 0}
+
+    def submit(self, adjustments):
+        """Satırları kuyruğa ekler; satır sırasıyla durum listesini taşıyan Future döndürür."""
+        future = Future()
+        if not adjustments:
+            future.set_result([])
+            return future
+        request = _WriteRequest(future, len(adjustments))
+        with self.condition:
+            if self.closed:
+                raise Exception("Stok yazıcısı kapatıldı, yeni satır kabul edilmiyor.")
+            if not self.pending:
+                self.first_pending_at = self.clock()
+            self.pending.extend((i, adj, request) for i, adj in enumerate(adjustments))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="InventoryWriter", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return future
+
+    def write(self, adjustments):
+        """Satırları kuyruğa ekler ve her satırın durumunu bekler."""
+        return self.submit(adjustments).result()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.closed and len(self.pending) < self.batch_size:
+                    if not self.pending:
+                        self.condition.wait()
+                        continue
+                    remaining = self.linger - (self.clock() - self.first_pending_at)
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(timeout=remaining)
+                if not self.pending:
+                    return
+                batch, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+                self.first_pending_at = self.clock() if self.pending else None
+                self.stats['rows'] += len(batch)
+                self.stats['batches'] += 1
+            self.executor.submit(self._flush, batch)
+
+    def _flush(self, batch):
+        adjustments = [adj for _, adj, _ in batch]
+        try:
+            changed, _ = drop_noop_adjustments(self.shopify_api, adjustments, max_workers=1)
+            changed_ids = {id(adj) for adj in changed}
+            location_id = self.shopify_api.get_default_location_id()
+            failed = set()
+            if changed:
+                # Hata satır bazında (ürün kalemi + lokasyon) işaretlenir; aynı kalemin diğer lokasyonları etkilenmez
+                failed = set(_write_on_hand_batch(self.shopify_api, location_id, changed))
+            statuses = [
+                STATUS_NOOP if id(adj) not in changed_ids
+                else STATUS_FAILED if (adj["inventoryItemId"], adj.get("locationId") or location_id) in failed
+                else STATUS_WRITTEN
+                for adj in adjustments
+            ]
+        except Exception as e:
+            logging.error(f"Stok partisi ({len(batch)} satır) yazılamadı: {e}")
+            statuses = [STATUS_FAILED] * len(batch)
+        for (index, _, request), status in zip(batch, statuses):
+            request.set(index, status)
+
+    def get_stats(self):
+        with self.condition:
+            return dict(self.stats)
+
+    def close(self):
+        """Kuyruktaki satırları gönderir, bekleyen partilerin bitmesini bekler ve yazıcıyı durdurur."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+            thread = self.thread
+        if thread is not None:
+            thread.join()
+        self.executor.shutdown(wait=True)
+        stats = self.get_stats()
+        if stats['rows']:
+            logging.info(f"Stok yazıcısı: {stats['rows']} satır {stats['batches']} partide gönderildi.")
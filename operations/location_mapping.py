@@ -0,0 +1,85 @@
+# operations/location_mapping.py - Sentos deposu → Shopify lokasyonu eşleştirmesi
+
+import os
+import json
+import logging
+
+from connectors.product_index import DATA_CACHE_DIR, _store_slug
+
+# Arayüzde kaydedilmiş eşleştirme yoksa (örn. zamanlanmış çalıştırma) bu ortam değişkeni
+# okunur: {"depo_id": "gid://shopify/Location/..."}
+LOCATION_MAPPING_ENV = "LOCATION_MAPPING"
+
+
+def stock_warehouse_id(stock_entry):
+    """Sentos stok satırının depo ID'si (warehouse_id veya warehouse.id) metin olarak; yoksa None."""
+    warehouse = stock_entry.get('warehouse')
+    warehouse_id = stock_entry.get('warehouse_id', warehouse.get('id') if isinstance(warehouse, dict) else warehouse)
+    return None if warehouse_id is None else str(warehouse_id)
+
+
+class LocationMapping:
+    """
+    Sentos deposu → Shopify lokasyonu eşleştirmesi (data_cache altında JSON).
+
+    Birden çok depo aynı lokasyona eşlenebilir; lokasyonun stoğu bu depoların toplamıdır.
+    Eşlenmemiş depoların stoğu Shopify'a yazılmaz. Eşleştirme boşsa stok yazımları eskisi
+    gibi tüm depoların toplamını varsayılan lokasyona yazar.
+    """
+    def __init__(self, store_url, warehouses=None, path=None):
+        self.store_url = store_url
+        self.path = path or os.path.join(DATA_CACHE_DIR, f"location_map_{_store_slug(store_url)}.json")
+        self.warehouses = {str(k): v for k, v in (warehouses or {}).items()}
+
+    @classmethod
+    def load(cls, store_url, path=None):
+        mapping = cls(store_url, path=path)
+        try:
+            if os.path.exists(mapping.path):
+                with open(mapping.path, encoding='utf-8') as f:
+                    mapping.warehouses = json.load(f).get('warehouses', {})
+            elif env_value := os.environ.get(LOCATION_MAPPING_ENV):
+                mapping.warehouses = {str(k): v for k, v in json.loads(env_value).items()}
+        except (OSError, ValueError) as e:
+            logging.error(f"Depo-lokasyon eşleştirmesi okunamadı, varsayılan lokasyon kullanılacak: {e}")
+            mapping.warehouses = {}
+        if mapping:
+            logging.info(f"Depo-lokasyon eşleştirmesi: {len(mapping.warehouses)} depo → {len(mapping.locations())} lokasyon.")
+        return mapping
+
+    def __bool__(self):
+        return bool(self.warehouses)
+
+    def save(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'warehouses': self.warehouses}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        logging.info(f"Depo-lokasyon eşleştirmesi kaydedildi: {self.warehouses}")
+
+    def set_location(self, location_id, warehouse_ids):
+        """Lokasyonun eşleştiği depoları verilen listeyle değiştirir (boş liste eşleştirmeyi kaldırır)."""
+        self.warehouses = {wh: loc for wh, loc in self.warehouses.items() if loc != location_id}
+        for warehouse_id in warehouse_ids:
+            self.warehouses[str(warehouse_id)] = location_id
+
+    def warehouses_for(self, location_id):
+        return [wh for wh, loc in self.warehouses.items() if loc == location_id]
+
+    def locations(self):
+        return sorted(set(self.warehouses.values()))
+
+    def location_quantities(self, sentos_variant):
+        """
+        Varyantın stoklarını eşlenen lokasyonlara göre toplar: {lokasyon_gid: miktar}.
+        Eşlenen her lokasyon, ilgili depolarda stok olmasa da 0 ile yer alır.
+        """
+        quantities = {location_id: 0 for location_id in self.locations()}
+        for entry in sentos_variant.get('stocks', []):
+            if not isinstance(entry, dict) or not entry.get('stock'):
+                continue
+            if location_id := self.warehouses.get(stock_warehouse_id(entry)):
+                quantities[location_id] += entry['stock']
+        return {location_id: int(qty) for location_id, qty in quantities.items()}
@@ -3,12 +3,14 @@
 import logging
 import time
 
+from operations.sync_pipeline import SyncChanges
+
 def sync_media(shopify_api, sentos_api, product_gid, sentos_product, set_alt_text=False, force_update=False):
     """
     ESKİ KODDAN UYARLANMIŞ ÇALIŞAN VERSİYON
     Eski _sync_product_media fonksiyonunun aynısı
     """
-    changes = []
+    changes = SyncChanges()
     product_title = sentos_product.get('name', '').strip()
     product_id = sentos_product.get('id')
     
@@ -19,7 +21,7 @@ def sync_media(shopify_api, sentos_api, product_gid, sentos_product, set_alt_tex
     
     # KRİTİK: Eski kodda None dönerse cookie eksik anlamına gelir
     if sentos_ordered_urls is None:
-        changes.append("Medya senkronizasyonu atlandı (Cookie eksik).")
+        changes.fail("Medya senkronizasyonu atlandı (Cookie eksik).")
         logging.warning(f"Cookie eksikliği nedeniyle medya sync atlandı - Ürün ID: {product_id}")
         return changes
     
@@ -29,7 +31,7 @@ def sync_media(shopify_api, sentos_api, product_gid, sentos_product, set_alt_tex
         logging.info(f"Shopify'da {len(initial_shopify_media)} mevcut medya bulundu")
     except Exception as e:
         logging.error(f"Shopify medya bilgileri alınamadı: {e}")
-        changes.append(f"Hata: Shopify medya bilgileri alınamadı - {e}")
+        changes.fail(f"Hata: Shopify medya bilgileri alınamadı - {e}")
         return changes
     
     # Eğer Sentos'tan hiç görsel gelmezse, Shopify'daki tüm görselleri sil
@@ -40,12 +42,8 @@ def sync_media(shopify_api, sentos_api, product_gid, sentos_product, set_alt_tex
             changes.append(f"{len(media_ids_to_delete)} Shopify görseli silindi.")
         return changes
     
-    # Mevcut Shopify görsellerini URL'lere göre haritala
-    shopify_src_map = {m['originalSrc']: m for m in initial_shopify_media if m.get('originalSrc')}
-    
     # Hangi görsellerin silinmesi ve eklenmesi gerektiğini hesapla
-    media_ids_to_delete = [media['id'] for src, media in shopify_src_map.items() if src not in sentos_ordered_urls]
-    urls_to_add = [url for url in sentos_ordered_urls if url not in shopify_src_map]
+    media_ids_to_delete, urls_to_add = _plan_media_changes(initial_shopify_media, sentos_ordered_urls)
     
     logging.info(f"Medya karşılaştırması: {len(urls_to_add)} eklenecek, {len(media_ids_to_delete)} silinecek")
     
@@ -70,12 +68,7 @@ def sync_media(shopify_api, sentos_api, product_gid, sentos_product, set_alt_tex
         
         # Yeniden düzenlenmiş medya listesini al
         final_shopify_media = shopify_api.get_product_media_details(product_gid)
-        final_alt_map = {m['alt']: m['id'] for m in final_shopify_media if m.get('alt')}
-        ordered_media_ids = [final_alt_map.get(url) for url in sentos_ordered_urls if final_alt_map.get(url)]
-
-        if len(ordered_media_ids) < len(sentos_ordered_urls):
-            logging.warning(f"Alt etiketi eşleştirme sorunu: {len(sentos_ordered_urls)} resim beklenirken {len(ordered_media_ids)} ID bulundu. Sıralama eksik olabilir.")
-
+        ordered_media_ids = _ordered_media_ids(final_shopify_media, sentos_ordered_urls)
         shopify_api.reorder_product_media(product_gid, ordered_media_ids)
     
     # Hiç değişiklik olmadıysa
@@ -86,6 +79,30 @@ def sync_media(shopify_api, sentos_api, product_gid, sentos_product, set_alt_tex
     return changes
 
 
+def _plan_media_changes(shopify_media, sentos_ordered_urls):
+    """Silinecek Shopify medya ID'lerini ve eklenecek Sentos URL'lerini döndürür."""
+    shopify_src_map = {m['originalSrc']: m for m in shopify_media if m.get('originalSrc')}
+    media_ids_to_delete = [media['id'] for src, media in shopify_src_map.items() if src not in sentos_ordered_urls]
+    urls_to_add = [url for url in sentos_ordered_urls if url not in shopify_src_map]
+    return media_ids_to_delete, urls_to_add
+
+
+def _ordered_media_ids(final_shopify_media, sentos_ordered_urls):
+    """Medya ID'lerini Sentos sırasına göre dizer (eşleştirme alt etiketi üzerinden)."""
+    final_alt_map = {m['alt']: m['id'] for m in final_shopify_media if m.get('alt')}
+    ordered_media_ids = [final_alt_map.get(url) for url in sentos_ordered_urls if final_alt_map.get(url)]
+    if len(ordered_media_ids) < len(sentos_ordered_urls):
+        logging.warning(f"Alt etiketi eşleştirme sorunu: {len(sentos_ordered_urls)} resim beklenirken {len(ordered_media_ids)} ID bulundu. Sıralama eksik olabilir.")
+    return ordered_media_ids
+
+
+def _build_media_input(urls_to_add, product_title, set_alt_text=False):
+    return [
+        {"originalSource": url, "alt": product_title if set_alt_text else url, "mediaContentType": "IMAGE"}
+        for url in urls_to_add
+    ]
+
+
 def _add_new_media_to_product(shopify_api, product_gid, urls_to_add, product_title, set_alt_text=False):
     """10-worker için optimize edilmiş medya ekleme"""
     if not urls_to_add: 
@@ -93,14 +110,7 @@ def _add_new_media_to_product(shopify_api, product_gid, urls_to_add, product_tit
         
     logging.info(f"{len(urls_to_add)} yeni medya ekleniyor...")
     
-    media_input = []
-    for url in urls_to_add:
-        alt_text = product_title if set_alt_text else url
-        media_input.append({
-            "originalSource": url, 
-            "alt": alt_text, 
-            "mediaContentType": "IMAGE"
-        })
+    media_input = _build_media_input(urls_to_add, product_title, set_alt_text)
     
     # 10-worker için daha küçük batch boyutu (5'li gruplar)
     batch_size = 5
@@ -121,10 +131,6 @@ def _add_new_media_to_product(shopify_api, product_gid, urls_to_add, product_tit
                 logging.error(f"Medya batch {i//batch_size + 1} ekleme hataları: {errors}")
             else:
                 logging.info(f"✅ Batch {i//batch_size + 1}: {len(batch)} medya başarıyla eklendi")
-            
-            # 10-worker için batch arası kısa bekleme    
-            if i + batch_size < len(media_input):
-                time.sleep(1)
                 
         except Exception as e:
             logging.error(f"Medya batch {i//batch_size + 1} eklenirken hata: {e}")
@@ -0,0 +1,92 @@
+# operations/price_ledger.py - Shopify'a son gönderilen varyant fiyatlarının yerel defteri
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from connectors.product_index import DATA_CACHE_DIR, _store_slug
+
+
+def normalize_price(value):
+    """Fiyatı karşılaştırma için iki ondalıklı metne çevirir; boş/geçersiz ise None."""
+    if value is None or value == '':
+        return None
+    try:
+        return f"{float(value):.2f}"
+    except (TypeError, ValueError):
+        return None
+
+
+class PriceLedger:
+    """
+    Her varyant için Shopify'a en son başarıyla yazılan price / compareAtPrice (SQLite).
+
+    Fiyat gönderiminde Shopify'daki güncel fiyatlar okunamayan varyantlar için bu değerler
+    kullanılır; böylece okuma hatasında bile aynı fiyat tekrar yazılmaz.
+    """
+    def __init__(self, store_url, db_path=None):
+        self.db_path = db_path or os.path.join(DATA_CACHE_DIR, f"price_ledger_{_store_slug(store_url)}.db")
+        self.lock = threading.Lock()
+        self._ensure_db_exists()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ensure_db_exists(self):
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS prices (
+                    variant_gid TEXT PRIMARY KEY,
+                    price TEXT,
+                    compare_at_price TEXT,
+                    pushed_at TEXT
+                )
+            """)
+
+    def get_prices(self, variant_gids):
+        """{variant_gid: (price, compare_at_price)} — defterde olmayan varyantlar sonuçta yer almaz."""
+        gids = list(variant_gids)
+        prices = {}
+        with self._connect() as conn:
+            for i in range(0, len(gids), 500):
+                chunk = gids[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT variant_gid, price, compare_at_price FROM prices WHERE variant_gid IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                prices.update({gid: (price, compare) for gid, price, compare in rows})
+        return prices
+
+    def record(self, payloads):
+        """Başarıyla yazılan productVariantsBulkUpdate girdilerini deftere işler."""
+        pushed_at = datetime.now(timezone.utc).isoformat()
+        rows = [
+            (p['id'], normalize_price(p.get('price')), normalize_price(p.get('compareAtPrice')), pushed_at)
+            for p in payloads
+        ]
+        if not rows:
+            return
+        with self.lock:
+            with self._connect() as conn:
+                # compareAtPrice gönderilmediyse defterdeki önceki değer korunur
+                conn.executemany("""
+                    INSERT INTO prices (variant_gid, price, compare_at_price, pushed_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(variant_gid) DO UPDATE SET
+                        price = excluded.price,
+                        compare_at_price = COALESCE(excluded.compare_at_price, prices.compare_at_price),
+                        pushed_at = excluded.pushed_at
+                """, rows)
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
@@ -2,68 +2,36 @@
 
 import pandas as pd
 import logging
-import requests
-import time
-import random
-import threading
-from collections import deque
-
-class SmartRateLimiter:
-    """10 worker için optimize edilmiş akıllı rate limiter"""
-    def __init__(self, max_requests_per_second=2.5, burst_capacity=15):
-        self.max_rate = max_requests_per_second
-        self.burst_capacity = burst_capacity
-        self.tokens = burst_capacity
-        self.last_refill = time.time()
-        self.lock = threading.Lock()
-        self.backoff_until = 0
-        self.throttle_count = 0
-        
-    def wait(self):
-        with self.lock:
-            now = time.time()
-            
-            # Backoff durumu
-            if now < self.backoff_until:
-                wait_time = self.backoff_until - now
-                time.sleep(wait_time)
-                now = time.time()
-            
-            # Token yenileme (burst capacity'ye kadar)
-            elapsed = now - self.last_refill
-            new_tokens = elapsed * self.max_rate
-            self.tokens = min(self.burst_capacity, self.tokens + new_tokens)
-            self.last_refill = now
-            
-            # Token kontrolü
-            if self.tokens >= 1:
-                self.tokens -= 1
-                return
-            
-            # Token yetersiz, hesaplanmış bekleme
-            wait_time = 1.0 / self.max_rate
-            time.sleep(wait_time)
-    
-    def handle_throttle_error(self):
-        """429 hatası geldiğinde adaptif throttle"""
-        with self.lock:
-            self.throttle_count += 1
-            
-            # Progressive backoff - her throttle'da daha uzun bekle
-            backoff_time = min(30, 5 * (1.5 ** min(self.throttle_count, 5)))
-            self.backoff_until = time.time() + backoff_time
-            
-            # Hızı düşür ama çok fazla değil
-            self.max_rate = max(0.8, self.max_rate * 0.85)
-            
-            logging.warning(f"Rate limit! Backoff: {backoff_time:.1f}s, Yeni hız: {self.max_rate:.2f} req/sec")
-    
-    def handle_success(self):
-        """Başarılı istekten sonra yavaşça hızı artır"""
-        if self.throttle_count > 0:
-            self.throttle_count = max(0, self.throttle_count - 1)
-            if self.throttle_count == 0:
-                self.max_rate = min(2.5, self.max_rate * 1.05)
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Tek sınırlayıcı: mağaza başına paylaşılan GraphQL maliyet bütçesi.
+# SmartRateLimiter adı sayfalardaki mevcut import'lar için buradan da sunulur.
+from .smart_rate_limiter import SmartRateLimiter
+from connectors.shopify_batcher import GraphQLMutation, run_mutation
+from connectors.product_index import forget_deleted_product
+from .price_ledger import normalize_price
+
+VARIANT_PRICES_QUERY = """
+query variantPrices($ids: [ID!]!) {
+    nodes(ids: $ids) {
+        ... on ProductVariant { id price compareAtPrice }
+    }
+}
+"""
+
+BULK_VARIANT_PRICES_QUERY = """
+{
+  productVariants {
+    edges {
+      node { id price compareAtPrice }
+    }
+  }
+}
+"""
+
+PRICE_READ_BATCH = 250
+# Bu sayıdan fazla varyantın fiyatı okunacaksa sayfalı sorgular yerine tek bir bulk işlem kullanılır
+BULK_PRICE_MIN_VARIANTS = 2000
 
 def update_prices_for_single_product(shopify_api, product_id, variants_to_update, rate_limiter):
     """
@@ -84,32 +52,21 @@ def update_prices_for_single_product(shopify_api, product_id, variants_to_update
             
         variants_input.append(variant_input)
 
-    bulk_mutation = """
-    mutation productVariantsBulkUpdate($productId: ID!, $variants: [ProductVariantsBulkInput!]!) {
-        productVariantsBulkUpdate(productId: $productId, variants: $variants) {
-            productVariants {
-                id
-                price
-                compareAtPrice
-            }
-            userErrors {
-                field
-                message
-                code
-            }
-        }
-    }
-    """
+    # Diğer ürünlerin fiyat yazımlarıyla aynı mutation belgesinde (takma adlı) gönderilir
+    bulk_mutation = GraphQLMutation(
+        "productVariantsBulkUpdate(productId: $productId, variants: $variants) { "
+        "productVariants { id price compareAtPrice } userErrors { field message code } }",
+        {'productId': ('ID!', product_id), 'variants': ('[ProductVariantsBulkInput!]!', variants_input)}
+    )
     
-    max_retries = 5  # 10 worker için daha fazla retry
+    max_retries = 5
     for attempt in range(max_retries):
         try:
+            # Bütçe beklemesi ve THROTTLED tekrarları execute_graphql içindeki
+            # paylaşılan maliyet sınırlayıcısı tarafından yapılır.
             rate_limiter.wait()
             
-            result = shopify_api.execute_graphql(bulk_mutation, {
-                "productId": product_id,
-                "variants": variants_input
-            })
+            result = run_mutation(shopify_api, bulk_mutation)
             
             updated_variants = result.get('productVariantsBulkUpdate', {}).get('productVariants', [])
             errors = result.get('productVariantsBulkUpdate', {}).get('userErrors', [])
@@ -119,100 +76,224 @@ def update_prices_for_single_product(shopify_api, product_id, variants_to_update
                 
                 if is_throttled and attempt < max_retries - 1:
                     rate_limiter.handle_throttle_error()
-                    # Progressive wait - her denemede daha uzun bekle
-                    wait_time = (1.5 ** attempt) + random.uniform(0.5, 2.0)
-                    time.sleep(wait_time)
                     continue
+                if any(err.get('code') == 'PRODUCT_DOES_NOT_EXIST' for err in errors):
+                    forget_deleted_product(shopify_api, product_id)
                 
                 return {"status": "failed", "reason": f"Bulk update errors: {errors[:3]}"}  # İlk 3 hatayı göster
             
-            rate_limiter.handle_success()
             success_count = len(updated_variants)
             return {"status": "success", "updated_count": success_count}
             
         except Exception as e:
-            if "THROTTLED" in str(e) or "429" in str(e):
-                if attempt < max_retries - 1:
-                    rate_limiter.handle_throttle_error()
-                    time.sleep((2 ** attempt) + random.uniform(1, 3))
-                    continue
-            
             if attempt == max_retries - 1:
                 return {"status": "failed", "reason": f"Max retries exceeded: {str(e)}"}
+            if "THROTTLED" in str(e) or "429" in str(e):
+                rate_limiter.handle_throttle_error()
 
     return {"status": "failed", "reason": "All retries failed"}
 
-def _process_one_product_for_price_sync(shopify_api, product_base_sku, all_variants_df, price_data_df, price_col, compare_col, rate_limiter):
+def build_price_index(price_data_df, price_col, compare_col=None):
     """
-    10-Worker için optimize edilmiş tek ürün işleme
-    Tek GraphQL call ile hem ürün hem varyantları al
+    Fiyat tablosundan {ana_model_kodu: (fiyat, karşılaştırma_fiyatı)} hash indeksini tek geçişte kurar.
+    Aynı model kodu birden çok satırda geçiyorsa ilk satır kullanılır.
     """
-    try:
-        # İlk önce fiyat verisini kontrol et
-        price_row = price_data_df.loc[price_data_df['MODEL KODU'] == product_base_sku]
-        if price_row.empty:
-            return {"status": "skipped", "reason": f"Fiyat bulunamadı: {product_base_sku}"}
-        
-        price_to_set = price_row.iloc[0][price_col]
-        compare_price_to_set = price_row.iloc[0].get(compare_col)
-
-        # OPTIMIZE: Tek GraphQL ile ürün ve tüm varyantlarını al
-        query = """
-        query getProductWithVariants($query: String!) {
-            products(first: 1, query: $query) {
-                edges {
-                    node {
-                        id
-                        variants(first: 100) {
-                            edges {
-                                node {
-                                    id
-                                    sku
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }
-        """
-        
-        rate_limiter.wait()
-        result = shopify_api.execute_graphql(query, {"query": f"sku:{product_base_sku}*"})
-        
-        product_edges = result.get("products", {}).get("edges", [])
-        if not product_edges:
-            return {"status": "failed", "reason": f"Shopify'da ürün bulunamadı: {product_base_sku}"}
-        
-        product = product_edges[0]['node']
-        product_id = product['id']
-        
-        # Base SKU ile başlayan varyantları filtrele ve updates hazırla
-        updates = []
-        for v_edge in product.get('variants', {}).get('edges', []):
-            variant = v_edge['node']
-            variant_sku = variant.get('sku', '')
-            
-            if variant_sku.startswith(product_base_sku):
-                payload = {
-                    "id": variant['id'],
-                    "price": f"{price_to_set:.2f}"
-                }
-                if compare_price_to_set is not None and pd.notna(compare_price_to_set):
-                    payload["compareAtPrice"] = f"{compare_price_to_set:.2f}"
-                updates.append(payload)
-
-        if not updates:
-            return {"status": "skipped", "reason": "Eşleşen varyant bulunamadı"}
-
-        # Bulk update çalıştır
+    if price_data_df is None or price_data_df.empty:
+        return {}
+    rows = price_data_df.drop_duplicates(subset=['MODEL KODU'], keep='first')
+    compares = rows[compare_col] if compare_col and compare_col in rows.columns else [None] * len(rows)
+    return {
+        str(sku).strip(): (price, compare if compare is not None and pd.notna(compare) else None)
+        for sku, price, compare in zip(rows['MODEL KODU'], rows[price_col], compares)
+    }
+
+# Önekle eşleşmede ana model kodundan sonra gelmesi gereken ayraçlar (ABC1 → ABC1-S, ABC10-S değil)
+SKU_SEPARATORS = ('-', '_', ' ', '.', '/')
+
+def match_variants_to_base_skus(variant_rows, base_skus, variant_bases=None):
+    """
+    Katalog varyantlarını [(product_gid, variant_gid, sku)] ana model kodlarına eşler:
+    {ana_model_kodu: {product_gid: [{'id', 'sku'}]}}.
+
+    Önce Sentos varyant SKU'su → ana model kodu eşlemesi (variant_bases) kesin eşleşme
+    olarak kullanılır. Orada olmayan SKU'lar yalnızca ana model kodundan sonra bir ayraç
+    geliyorsa (veya SKU ana model koduna eşitse) önekle eşlenir; birden çok aday varsa en
+    uzunu seçilir.
+    """
+    bases = {str(sku).strip() for sku in base_skus if sku}
+    exact = {str(sku).strip(): str(base).strip() for sku, base in (variant_bases or {}).items() if sku and base}
+    lengths = sorted({len(sku) for sku in bases}, reverse=True)
+    targets = {}
+    for product_gid, variant_gid, sku in variant_rows:
+        base = exact.get(sku)
+        if base not in bases:
+            base = next((
+                sku[:length] for length in lengths
+                if length <= len(sku) and sku[:length] in bases and (length == len(sku) or sku[length] in SKU_SEPARATORS)
+            ), None)
+        if base is not None:
+            targets.setdefault(base, {}).setdefault(product_gid, []).append({'id': variant_gid, 'sku': sku})
+    return targets
+
+def plan_price_updates(price_index, targets, base_skus):
+    """
+    Her ana model kodu için gönderilecek productVariantsBulkUpdate girdilerini hazırlar.
+    Döner: (plans, skipped) — plans: [(base_sku, [(product_gid, payloads)])],
+    skipped: {base_sku: sonuç} (fiyatı veya Shopify eşleşmesi olmayanlar).
+    """
+    plans, skipped = [], {}
+    for base_sku in dict.fromkeys(str(sku).strip() for sku in base_skus if sku):
+        price, compare_price = price_index.get(base_sku, (None, None))
+        if price is None or pd.isna(price):
+            skipped[base_sku] = {"status": "skipped", "reason": f"Fiyat bulunamadı: {base_sku}"}
+            continue
+        products = targets.get(base_sku)
+        if not products:
+            skipped[base_sku] = {"status": "failed", "reason": f"Shopify'da ürün bulunamadı: {base_sku}"}
+            continue
+        payload = {"price": f"{price:.2f}"}
+        if compare_price is not None:
+            payload["compareAtPrice"] = f"{compare_price:.2f}"
+        plans.append((base_sku, [
+            (product_gid, [{"id": variant['id'], **payload} for variant in variants])
+            for product_gid, variants in products.items()
+        ]))
+    return plans, skipped
+
+def read_variant_prices(shopify_api, variant_ids, max_workers=4):
+    """
+    Varyantların Shopify'daki güncel fiyatlarını {variant_gid: (price, compareAtPrice)} olarak
+    toplu okur (değerler normalize_price biçiminde). Okunamayan varyantlar sonuçta yer almaz.
+    """
+    wanted = set(variant_ids)
+    if not wanted:
+        return {}
+    prices = {}
+    if len(wanted) >= BULK_PRICE_MIN_VARIANTS:
+        try:
+            for node in shopify_api.bulk.run(BULK_VARIANT_PRICES_QUERY):
+                if node.get('id') in wanted:
+                    prices[node['id']] = (normalize_price(node.get('price')), normalize_price(node.get('compareAtPrice')))
+            return prices
+        except Exception as e:
+            logging.warning(f"Bulk fiyat okuması başarısız, sayfalı okumaya geçiliyor: {e}")
+
+    ids = list(wanted)
+    batches = [ids[i:i + PRICE_READ_BATCH] for i in range(0, len(ids), PRICE_READ_BATCH)]
+
+    def read_batch(batch):
+        try:
+            return shopify_api.execute_graphql(VARIANT_PRICES_QUERY, {'ids': batch}).get('nodes') or []
+        except Exception as e:
+            logging.warning(f"Varyant fiyatları okunamadı ({len(batch)} varyant), fiyat defteri kullanılacak: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="PriceRead") as executor:
+        for nodes in executor.map(read_batch, batches):
+            for node in nodes:
+                if node and node.get('id'):
+                    prices[node['id']] = (normalize_price(node.get('price')), normalize_price(node.get('compareAtPrice')))
+    return prices
+
+def _price_changed(payload, current):
+    if current is None:
+        return True
+    price, compare_price = current
+    if normalize_price(payload.get('price')) != price:
+        return True
+    # compareAtPrice gönderilmiyorsa Shopify'daki değer olduğu gibi kalır
+    return 'compareAtPrice' in payload and normalize_price(payload['compareAtPrice']) != compare_price
+
+def drop_unchanged_prices(shopify_api, plans, ledger=None, max_workers=4):
+    """
+    Shopify'daki güncel fiyatları okuyup plandan fiyatı zaten aynı olan varyantları çıkarır.
+    Okunamayan varyantlar için fiyat defterindeki son gönderilen değer kullanılır; ikisi de
+    yoksa varyant yazılır. Dönüş: (değişen planlar, {base_sku: atlanan varyant sayısı}).
+    """
+    variant_ids = [p['id'] for _, products in plans for _, payloads in products for p in payloads]
+    current = read_variant_prices(shopify_api, variant_ids, max_workers)
+    if ledger is not None:
+        current.update(ledger.get_prices([gid for gid in variant_ids if gid not in current]))
+
+    changed_plans, unchanged = [], {}
+    for base_sku, products in plans:
+        changed_products = []
+        for product_id, payloads in products:
+            changed = [p for p in payloads if _price_changed(p, current.get(p['id']))]
+            if len(changed) < len(payloads):
+                unchanged[base_sku] = unchanged.get(base_sku, 0) + len(payloads) - len(changed)
+            if changed:
+                changed_products.append((product_id, changed))
+        if changed_products:
+            changed_plans.append((base_sku, changed_products))
+    return changed_plans, unchanged
+
+def push_price_plan(shopify_api, product_updates, rate_limiter, ledger=None):
+    """
+    Bir ana model kodunun ürünlerine fiyatları yazar; sonuçları tek sonuçta birleştirir.
+    Başarıyla yazılan ürünlerin fiyatları deftere işlenir.
+    """
+    results = []
+    for product_id, updates in product_updates:
         result = update_prices_for_single_product(shopify_api, product_id, updates, rate_limiter)
-        
-        if result.get('status') == 'success':
-            rate_limiter.handle_success()
-            
-        return result
+        if ledger is not None and result.get('status') == 'success':
+            ledger.record(updates)
+        results.append(result)
+    reasons = [r.get('reason', 'Bilinmeyen hata') for r in results if r.get('status') != 'success']
+    if reasons:
+        return {"status": "failed", "reason": "; ".join(reasons)}
+    return {"status": "success", "updated_count": sum(r.get('updated_count', 0) for r in results)}
 
-    except Exception as e:
-        logging.error(f"Ürün {product_base_sku} işlenirken hata: {str(e)}")
-        return {"status": "failed", "reason": str(e)}
\ No newline at end of file
+def iter_price_pushes(shopify_api, price_data_df, price_col, compare_col, base_skus, rate_limiter,
+                      max_workers=10, ledger=None, dry_run=False, variant_bases=None):
+    """
+    Dizin tabanlı fiyat gönderimi. Fiyatlar ana model koduna göre hash indeksine, varyant
+    ID'leri ürün dizininden tek okumayla eşlenir; ürün başına arama yapılmaz, Shopify'a
+    yalnızca productVariantsBulkUpdate gönderilir (yazım birleştiricisiyle partilenir).
+    Ürün dizini çağırmadan önce güncellenmiş olmalıdır.
+
+    Fiyatı Shopify'da (okunamazsa defterde) zaten aynı olan varyantlar gönderilmez; sayıları
+    sonuçtaki 'skipped_count' alanındadır. dry_run=True ise hiçbir şey yazılmaz, sonuçlar
+    'would_update' ile kaç varyantın yazılacağını gösterir.
+
+    variant_bases: {varyant_sku: ana_model_kodu} (Sentos varyant tablosundan) kesin eşleşme için.
+
+    Her ana model kodu için (base_sku, sonuç) çiftlerini tamamlandıkça üretir.
+    """
+    price_index = build_price_index(price_data_df, price_col, compare_col)
+    targets = match_variants_to_base_skus(shopify_api.get_product_index().get_variant_skus(), base_skus, variant_bases)
+    plans, skipped = plan_price_updates(price_index, targets, base_skus)
+    plans, unchanged = drop_unchanged_prices(shopify_api, plans, ledger)
+    logging.info(
+        f"Fiyat gönderimi: {len(plans)} ürün grubu gönderilecek, {sum(unchanged.values())} varyantın fiyatı "
+        f"zaten güncel, {len(skipped)} ürün eşleşmedi." + (" (deneme çalıştırması)" if dry_run else "")
+    )
+
+    yield from skipped.items()
+    planned = {base_sku for base_sku, _ in plans}
+    for base_sku, count in unchanged.items():
+        if base_sku not in planned:
+            yield base_sku, {"status": "success", "updated_count": 0, "skipped_count": count}
+    if dry_run:
+        for base_sku, product_updates in plans:
+            yield base_sku, {
+                "status": "success", "updated_count": 0, "dry_run": True,
+                "would_update": sum(len(updates) for _, updates in product_updates),
+                "skipped_count": unchanged.get(base_sku, 0),
+            }
+        return
+    if not plans:
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(push_price_plan, shopify_api, product_updates, rate_limiter, ledger): base_sku
+            for base_sku, product_updates in plans
+        }
+        for future in as_completed(futures):
+            base_sku = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Ürün {base_sku} fiyatı gönderilirken hata: {e}")
+                result = {"status": "failed", "reason": f"Worker hatası: {e}"}
+            yield base_sku, {**result, "skipped_count": unchanged.get(base_sku, 0)}
@@ -0,0 +1,159 @@
+# operations/pricing_engine.py - Fiyat hesaplayıcının kural tablosu ve vektörel hesaplama motoru
+
+import numpy as np
+import pandas as pd
+
+COST_COL = 'ALIŞ FİYATI'
+CATEGORY_COL = 'KATEGORİ'
+NET_PRICE_COL = 'SATIS_FIYATI_KDVSIZ'
+GROSS_PRICE_COL = 'SATIS_FIYATI_KDVLI'
+FINAL_PRICE_COL = 'NIHAI_SATIS_FIYATI'
+
+ROUNDING_NONE = "Yok"
+ROUNDING_UP = "Yukarı Yuvarla"
+ROUNDING_DOWN = "Aşağı Yuvarla"
+
+RULE_MARKUP = 'markup'
+RULE_CATEGORY_MULTIPLIER = 'category_multiplier'
+RULE_VAT = 'vat'
+RULE_ROUNDING = 'rounding'
+RULE_DISCOUNT = 'discount'
+RULE_WHOLESALE = 'wholesale'
+
+
+def round_prices(prices, method):
+    """
+    X9.99 yuvarlamasını tüm fiyat dizisine tek seferde uygular.
+    Yukarı: onluğun 9.99'una çıkar (tam X9 ise X8.99 olur); Aşağı: bir alt onluğun 9.99'una iner.
+    """
+    prices = np.asarray(prices, dtype=float)
+    if method == ROUNDING_UP:
+        tens = np.floor(prices / 10) * 10
+        remainder = prices % 10
+        already_nine = (remainder == 9.99) | (remainder == 9)
+        return np.where(~already_nine, tens + 9.99, np.where(prices % 1 == 0, prices - 0.01, prices))
+    if method == ROUNDING_DOWN:
+        return np.where(prices > 10, np.floor(prices / 10) * 10 - 0.01, 9.99)
+    return prices
+
+
+def apply_rounding(price, method):
+    """Tek fiyat için round_prices."""
+    return float(round_prices([price], method)[0])
+
+
+def category_factors(categories, multipliers):
+    """Kategori sütununu {kategori: çarpan} tablosuna göre satır çarpanlarına çevirir (eşleşmeyen 1.0)."""
+    codes, uniques = pd.factorize(pd.Series(categories, dtype=object).fillna('').astype(str).str.strip())
+    lookup = np.array([float(multipliers.get(u, 1.0)) for u in uniques] + [1.0])
+    return lookup[codes]
+
+
+def profit_ratio(profit, cost):
+    """Kârın alış fiyatına oranı (%); alış fiyatı 0 olan satırlarda 0."""
+    return np.divide(profit, cost, out=np.zeros_like(profit), where=cost != 0) * 100
+
+
+def _vat_factor(vat_rate):
+    return 1 + vat_rate / 100
+
+
+def discount_columns(final_prices, cost, rate, vat_rate):
+    """Perakende indirim senaryosunun sütunları (nihai fiyattan türetilir)."""
+    discounted = np.asarray(final_prices, dtype=float) * (1 - rate / 100)
+    profit = discounted / _vat_factor(vat_rate) - cost
+    return {
+        'İNDİRİM ORANI (%)': np.full(len(discounted), rate),
+        'İNDİRİMLİ SATIŞ FİYATI': discounted,
+        'İNDİRİM SONRASI KÂR': profit,
+        'İNDİRİM SONRASI KÂR ORANI (%)': profit_ratio(profit, cost),
+    }
+
+
+def wholesale_columns(final_prices, cost, mode, value, vat_rate):
+    """
+    Toptan fiyat sütunları. mode='multiplier': alış fiyatı × değer;
+    mode='discount': KDV'siz nihai fiyattan % değer indirim.
+    """
+    if mode == 'multiplier':
+        net = cost * value
+    else:
+        net = np.asarray(final_prices, dtype=float) / _vat_factor(vat_rate) * (1 - value / 100)
+    return {
+        "TOPTAN FİYAT (KDV'siz)": net,
+        "TOPTAN FİYAT (KDV'li)": net * _vat_factor(vat_rate),
+        'TOPTAN KÂR': net - cost,
+    }
+
+
+class PricingEngine:
+    """
+    Sıralı fiyat kuralı tablosunu tüm katalog üzerinde NumPy dizi işlemleriyle tek geçişte uygular.
+
+    Kurallar verildiği sırayla çalışan sözlüklerdir:
+        {'type': 'markup', 'mode': 'percent' | 'multiplier', 'value': 100}
+        {'type': 'category_multiplier', 'multipliers': {'Gömlek': 1.1}}
+        {'type': 'vat', 'rate': 10}
+        {'type': 'rounding', 'method': 'Yukarı Yuvarla' | 'Aşağı Yuvarla' | 'Yok'}
+        {'type': 'discount', 'rate': 10}
+        {'type': 'wholesale', 'mode': 'multiplier' | 'discount', 'value': 1.8}
+
+    İlk dört kural satış fiyatını şekillendirir; discount ve wholesale o ana kadarki fiyattan
+    ve uygulanan KDV oranından senaryo sütunları türetir. Sonuçta SATIS_FIYATI_KDVSIZ,
+    SATIS_FIYATI_KDVLI, NIHAI_SATIS_FIYATI, KÂR ve KÂR ORANI (%) her zaman bulunur.
+    """
+    RULE_TYPES = (RULE_MARKUP, RULE_CATEGORY_MULTIPLIER, RULE_VAT, RULE_ROUNDING, RULE_DISCOUNT, RULE_WHOLESALE)
+
+    def __init__(self, rules):
+        for rule in rules:
+            if rule.get('type') not in self.RULE_TYPES:
+                raise ValueError(f"Bilinmeyen fiyat kuralı: {rule.get('type')}")
+        self.rules = list(rules)
+
+    @classmethod
+    def from_settings(cls, markup_type, markup_value, add_vat, vat_rate, rounding_method, category_multipliers=None):
+        """Fiyat hesaplayıcı sayfasındaki ayarlardan kural tablosunu kurar."""
+        rules = [{'type': RULE_MARKUP, 'mode': markup_type, 'value': markup_value}]
+        if category_multipliers:
+            rules.append({'type': RULE_CATEGORY_MULTIPLIER, 'multipliers': category_multipliers})
+        if add_vat:
+            rules.append({'type': RULE_VAT, 'rate': vat_rate})
+        rules.append({'type': RULE_ROUNDING, 'method': rounding_method})
+        return cls(rules)
+
+    def evaluate(self, df):
+        """Kuralları df üzerinde çalıştırır; hesaplanan sütunları eklenmiş yeni bir DataFrame döndürür."""
+        cost = pd.to_numeric(df[COST_COL], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+        price = cost.copy()
+        vat_rate = 0.0
+        columns = {}
+
+        for rule in self.rules:
+            kind = rule['type']
+            if kind == RULE_MARKUP:
+                value = float(rule['value'])
+                price = price * (1 + value / 100) if rule.get('mode', 'percent') == 'percent' else price * value
+            elif kind == RULE_CATEGORY_MULTIPLIER:
+                if CATEGORY_COL in df.columns:
+                    price = price * category_factors(df[CATEGORY_COL], rule.get('multipliers', {}))
+            elif kind == RULE_VAT:
+                vat_rate = float(rule['rate'])
+                columns[NET_PRICE_COL] = price
+                price = price * _vat_factor(vat_rate)
+                columns[GROSS_PRICE_COL] = price
+            elif kind == RULE_ROUNDING:
+                columns.setdefault(NET_PRICE_COL, price)
+                columns.setdefault(GROSS_PRICE_COL, price)
+                price = round_prices(price, rule.get('method', ROUNDING_NONE))
+            elif kind == RULE_DISCOUNT:
+                columns.update(discount_columns(price, cost, float(rule['rate']), vat_rate))
+            elif kind == RULE_WHOLESALE:
+                columns.update(wholesale_columns(price, cost, rule.get('mode', 'multiplier'), float(rule['value']), vat_rate))
+
+        columns.setdefault(NET_PRICE_COL, price)
+        columns.setdefault(GROSS_PRICE_COL, price)
+        columns[FINAL_PRICE_COL] = price
+        profit = price / _vat_factor(vat_rate) - cost
+        columns['KÂR'] = profit
+        columns['KÂR ORANI (%)'] = profit_ratio(profit, cost)
+        return df.assign(**columns)
@@ -0,0 +1,164 @@
+# operations/progress_bus.py - Senkronizasyon ilerlemesi için birleştirilmiş (coalesced) olay yolu
+
+import time
+import logging
+import threading
+
+DEFAULT_INTERVAL = 0.25  # saniye
+# Bir anlık görüntüde taşınan en fazla ürün olayı; fazlası yalnızca sayılır
+MAX_PRODUCT_EVENTS = 200
+
+CHANNEL_STATS = 'stats'        # progress, message, stats, run_id: son değer geçerlidir
+CHANNEL_PRODUCTS = 'products'  # ürün başına olaylar: anlık görüntüye kadar birikir
+ALL_CHANNELS = (CHANNEL_STATS, CHANNEL_PRODUCTS)
+STATS_KEYS = ('progress', 'message', 'stats', 'run_id')
+
+STATUS_ICONS = {'created': "✅", 'updated': "🔄", 'skipped': "⏭️", 'failed': "❌", 'info': "ℹ️"}
+
+
+def product_event(status, name, sku, changes=None):
+    """Ürün kanalına gönderilen yapılandırılmış olay (HTML içermez)."""
+    return {'status': status, 'name': name, 'sku': sku, 'changes': list(changes or [])}
+
+
+def render_event_html(event):
+    """Ürün olayını arayüz günlüğü için HTML'e çevirir (eski 'log_detail' olayları olduğu gibi döner)."""
+    if 'html' in event:
+        return event['html']
+    status, changes = event.get('status', 'info'), event.get('changes') or []
+    if status == 'failed':
+        reason = "; ".join(changes) or "Bilinmeyen hata"
+        return f"<div style='color: #f48a94;'>❌ Hata: {event.get('name')} (SKU: {event.get('sku')}) - {reason}</div>"
+    changes_html = "".join(f'<li><small>{change}</small></li>' for change in changes)
+    return f"""
+        <div style='border-bottom: 1px solid #444; padding-bottom: 8px; margin-bottom: 8px;'>
+            <strong>{STATUS_ICONS.get(status, '')} {status.capitalize()}:</strong> {event.get('name')} (SKU: {event.get('sku')})
+            <ul style='margin-top: 5px; margin-bottom: 0; padding-left: 20px;'>
+                {changes_html or "<li><small>Değişiklik bulunamadı.</small></li>"}
+            </ul>
+        </div>
+        """
+
+
+class _Subscriber:
+    def __init__(self, callback, channels, interval):
+        self.callback = callback
+        self.channels = set(channels)
+        self.interval = interval
+        self.last_emit = 0.0
+        self.latest = {}
+        self.products = []
+        self.dropped = 0
+
+    def has_pending(self):
+        return bool(self.latest or self.products or self.dropped)
+
+    def take_snapshot(self):
+        snapshot = dict(self.latest)
+        if self.products or self.dropped:
+            snapshot['products'] = self.products
+            snapshot['dropped_products'] = self.dropped
+        self.latest, self.products, self.dropped = {}, [], 0
+        return snapshot
+
+
+class ProgressBus:
+    """
+    progress_callback ile aynı sözleşmeyi kabul eden olay yolu; aboneleri her olayda değil,
+    kendi aralıklarında birleştirilmiş anlık görüntülerle çağırır.
+
+    - 'stats' kanalı: progress / message / stats / run_id alanlarının yalnızca son değeri
+    - 'products' kanalı: 'product' olayları (ve eski 'log_detail' HTML'leri) liste olarak
+    - 'status' (done / error) olayları bekleyen veriden hemen sonra, gecikmeden iletilir
+
+    Olay sayısı ürün sayısıyla artsa da abonelere giden mesaj sayısı süreyle sınırlıdır.
+    Kuyruk üreticilerinin yerine geçebilmesi için `put` da `publish` ile aynıdır.
+    """
+    def __init__(self, tick=DEFAULT_INTERVAL, clock=time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self.lock = threading.Lock()
+        # Anlık görüntüler ile son durum olayının sırası korunur
+        self.emit_lock = threading.RLock()
+        self.subscribers = []
+        self.wake = threading.Event()
+        self.closed = False
+        self.thread = None
+
+    def subscribe(self, callback, channels=ALL_CHANNELS, interval=DEFAULT_INTERVAL):
+        with self.lock:
+            self.subscribers.append(_Subscriber(callback, channels, interval))
+        return self
+
+    def publish(self, update):
+        status = update.get('status')
+        with self.lock:
+            for sub in self.subscribers:
+                if CHANNEL_STATS in sub.channels:
+                    sub.latest.update({k: update[k] for k in STATS_KEYS if k in update})
+                if CHANNEL_PRODUCTS in sub.channels:
+                    events = [update['product']] if 'product' in update else []
+                    if 'log_detail' in update:
+                        events.append({'status': 'info', 'html': update['log_detail']})
+                    for event in events:
+                        if len(sub.products) < MAX_PRODUCT_EVENTS:
+                            sub.products.append(event)
+                        else:
+                            sub.dropped += 1
+            self._ensure_thread()
+        if status in ('done', 'error'):
+            final = {k: v for k, v in update.items() if k not in ('product', 'log_detail')}
+            with self.emit_lock:
+                self.flush()
+                for sub in list(self.subscribers):
+                    self._deliver(sub, final)
+            # Çalıştırma bitti; arka plan iş parçacığı durur
+            self.closed = True
+            self.wake.set()
+
+    put = publish
+    __call__ = publish
+
+    def _ensure_thread(self):
+        if self.thread is None and not self.closed:
+            self.thread = threading.Thread(target=self._run, name="ProgressBus", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while not self.wake.wait(self.tick):
+            self.flush(only_due=True)
+
+    def flush(self, only_due=False):
+        """Bekleyen anlık görüntüleri (only_due ise yalnızca aralığı dolan abonelere) iletir."""
+        with self.emit_lock:
+            now = self.clock()
+            due = []
+            with self.lock:
+                for sub in self.subscribers:
+                    if sub.has_pending() and (not only_due or now - sub.last_emit >= sub.interval):
+                        sub.last_emit = now
+                        due.append((sub, sub.take_snapshot()))
+            for sub, snapshot in due:
+                self._deliver(sub, snapshot)
+
+    @staticmethod
+    def _deliver(sub, snapshot):
+        try:
+            sub.callback(snapshot)
+        except Exception as e:
+            logging.error(f"İlerleme abonesi hata verdi: {e}")
+
+    def close(self):
+        """Bekleyen olayları iletir ve arka plan iş parçacığını durdurur."""
+        self.closed = True
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+        self.flush()
+
+
+def ensure_bus(progress_callback):
+    """Çağıran bir ProgressBus verdiyse onu, aksi hâlde callback'i abone eden yeni bir yol döndürür: (yol, sahiplik)."""
+    if isinstance(progress_callback, ProgressBus):
+        return progress_callback, False
+    return ProgressBus().subscribe(progress_callback), True
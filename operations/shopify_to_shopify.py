@@ -24,13 +24,17 @@ def map_line_items(destination_api, source_line_items):
     line_items_for_creation = []
     logs = []
     
+    # Tüm satırların SKU'ları tek (veya maliyet tavanına göre birkaç) birleşik sorguda aranır
+    all_skus = [(item.get('variant') or {}).get('sku') for item in source_line_items]
+    variant_ids = destination_api.find_variant_ids_by_sku_list(all_skus)
+    
     for item in source_line_items:
         sku = (item.get('variant') or {}).get('sku')
         if not sku:
             logs.append(f"UYARI: '{item.get('title')}' ürününde SKU bulunamadı, siparişe eklenemiyor.")
             continue
         
-        variant_id = destination_api.find_variant_id_by_sku(sku)
+        variant_id = variant_ids.get(str(sku).strip())
         if variant_id:
             # İndirimli fiyatı hesapla
             # discountedTotal = originalUnitPrice - discountAllocations
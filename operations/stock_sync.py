@@ -2,31 +2,75 @@
 
 import logging
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from utils import get_variant_color, get_variant_size, get_apparel_sort_key
 import json 
+from connectors.shopify_batcher import GraphQLMutation, run_mutation
+from connectors.product_index import forget_deleted_product
+from operations.sync_pipeline import SyncChanges
+
+# inventorySetOnHandQuantities tek çağrıda en fazla bu kadar satır kabul eder. Mutation
+# maliyeti satır sayısından bağımsız olduğu için maliyet bütçesi açısından en büyük
+# parti en ucuzudur; sınırı Shopify'ın girdi üst sınırı belirler.
+INVENTORY_SET_BATCH_MAX = 250
+
+INVENTORY_SET_ON_HAND_FIELD = (
+    "inventorySetOnHandQuantities(input: $input) { "
+    "inventoryAdjustmentGroup { id } userErrors { field message code } }"
+)
 
 def sync_stock_and_variants(shopify_api, product_gid, sentos_product):
     """10-worker sistemi için optimize edilmiş stok ve varyant sync"""
-    changes = []
+    changes = SyncChanges()
     logging.info(f"Ürün {product_gid} için varyantlar ve stoklar senkronize ediliyor...")
     
-    ex_vars = _get_shopify_variants(shopify_api, product_gid)
+    # Varyant/inventoryItem eşleşmeleri önce kalıcı ürün dizininden okunur
+    index = shopify_api.product_index
+    ex_vars = index.get_product_variants(product_gid) if index is not None else []
+    if not ex_vars:
+        ex_vars = _get_shopify_variants(shopify_api, product_gid)
     ex_skus = {str(v.get('inventoryItem',{}).get('sku','')).strip() for v in ex_vars if v.get('inventoryItem',{}).get('sku')}
     s_vars = sentos_product.get('variants', []) or [sentos_product]
     
     new_vars = [v for v in s_vars if str(v.get('sku','')).strip() not in ex_skus]
+    all_now_variants = ex_vars
     if new_vars:
         msg = f"{len(new_vars)} yeni varyant eklendi."
         changes.append(msg)
-        _add_variants_bulk(shopify_api, product_gid, new_vars, sentos_product)
+        if not _add_variants_bulk(shopify_api, product_gid, new_vars, sentos_product):
+            changes.fail("Varyant ekleme hatası: bazı varyantlar eklenemedi.")
         time.sleep(1)  # 10-worker için daha kısa bekleme
+        # Yeni varyantların inventoryItem ID'leri için güncel listeyi çek ve dizine yaz
+        all_now_variants = _get_shopify_variants(shopify_api, product_gid)
+        if index is not None and all_now_variants:
+            index.replace_variants(product_gid, all_now_variants)
     
-    # Stok güncelleme - 10-worker için optimize edilmiş
-    all_now_variants = _get_shopify_variants(shopify_api, product_gid)
-    if adjustments := _prepare_inventory_adjustments(s_vars, all_now_variants):
+    # Stok güncelleme: yalnızca Shopify'daki miktardan farklı olan satırlar yazılır
+    adjustments = _prepare_inventory_adjustments(s_vars, all_now_variants, getattr(shopify_api, 'location_mapping', None))
+    writer = getattr(shopify_api, 'inventory_writer', None)
+    if writer is not None:
+        # Satırlar diğer worker'larınkilerle aynı partide yazılır; sonuçlar satır bazında döner
+        statuses = writer.write(adjustments)
+        sku_of = {v.get('inventoryItem', {}).get('id'): v.get('inventoryItem', {}).get('sku') for v in all_now_variants}
+        failed_skus = sorted({
+            str(sku_of.get(a["inventoryItemId"]) or a["inventoryItemId"])
+            for a, status in zip(adjustments, statuses) if status == 'failed'
+        })
+        noop_count = statuses.count('noop')
+        adjustments = [a for a, status in zip(adjustments, statuses) if status != 'noop']
+    else:
+        adjustments, noop_count = drop_noop_adjustments(shopify_api, adjustments, max_workers=1)
+        failed_skus = [] if not adjustments or _adjust_inventory_bulk(shopify_api, adjustments) else None
+    if adjustments:
         msg = f"{len(adjustments)} varyantın stok seviyesi güncellendi."
         changes.append(msg)
-        _adjust_inventory_bulk(shopify_api, adjustments)
+        if failed_skus is None:
+            changes.fail("Stok güncelleme hatası: bazı varyantların stoğu yazılamadı.")
+        elif failed_skus:
+            changes.fail(f"Stok güncelleme hatası: {', '.join(failed_skus)} SKU'larının stoğu yazılamadı.")
+    if noop_count:
+        changes.append(f"{noop_count} varyantın stoğu zaten güncel (yazılmadı).")
         
     if not new_vars and not adjustments:
         changes.append("Stok ve varyantlar kontrol edildi (Değişiklik yok).")
@@ -60,12 +104,57 @@ def _get_shopify_variants(shopify_api, product_gid):
     
     try:
         data = shopify_api.execute_graphql(query, {"id": product_gid})
-        return [e['node'] for e in data.get("product", {}).get("variants", {}).get("edges", [])]
+        if data.get("product") is None:
+            forget_deleted_product(shopify_api, product_gid)
+            return []
+        return [e['node'] for e in data["product"].get("variants", {}).get("edges", [])]
     except Exception as e:
         logging.error(f"Varyant bilgileri alınırken hata: {e}")
         return []
 
-def _prepare_inventory_adjustments(sentos_variants, shopify_variants):
+def _send_set_quantities(shopify_api, set_quantities):
+    """
+    inventorySetOnHandQuantities gönderir. Açık bir senkronizasyon çalıştırması varsa
+    satırlar gönderilmeden önce WAL'a yazılır ve yanıt gelince kayıt kapatılır; süreç
+    arada ölürse kayıt açık kalır ve devam eden çalıştırma onu mutabakatla kapatır.
+    """
+    checkpoint = getattr(shopify_api, 'checkpoint', None)
+    entry_id = checkpoint.wal_begin(set_quantities) if checkpoint is not None else None
+    # İstek hata ile biterse yazımın uygulanıp uygulanmadığı bilinemez; kayıt açık bırakılır
+    # Farklı ürünlerin stok yazımları yazım birleştiricisinde tek mutation belgesine girer
+    result = run_mutation(shopify_api, GraphQLMutation(INVENTORY_SET_ON_HAND_FIELD, {
+        'input': ('InventorySetOnHandQuantitiesInput!', {"reason": "correction", "setQuantities": set_quantities})
+    }))
+    if entry_id is not None:
+        checkpoint.wal_end(entry_id, not result.get('inventorySetOnHandQuantities', {}).get('userErrors', []))
+    return result
+
+def _sentos_variant_quantity(variant):
+    """Sentos varyantının tüm depolardaki stok toplamı."""
+    return int(sum(s.get('stock', 0) for s in variant.get('stocks', []) if isinstance(s, dict) and s.get('stock')))
+
+def _variant_adjustments(inventory_item_id, sentos_variant, location_mapping=None):
+    """
+    Varyantın stok satırları: depo-lokasyon eşleştirmesi varsa eşlenen her lokasyon için
+    'locationId' taşıyan bir satır, yoksa tüm depoların toplamıyla tek satır (varsayılan lokasyon).
+    Negatif stoklar Shopify'a yazılmaz; tüm stok yolları (ürün bazlı, katalog geneli,
+    productSet) bu filtreyi buradan alır.
+    """
+    if not location_mapping:
+        quantities = {None: _sentos_variant_quantity(sentos_variant)}
+    else:
+        quantities = location_mapping.location_quantities(sentos_variant)
+    adjustments = []
+    for location_id, qty in quantities.items():
+        if qty < 0:
+            continue
+        adjustment = {"inventoryItemId": inventory_item_id, "availableQuantity": qty}
+        if location_id is not None:
+            adjustment["locationId"] = location_id
+        adjustments.append(adjustment)
+    return adjustments
+
+def _prepare_inventory_adjustments(sentos_variants, shopify_variants, location_mapping=None):
     """10-worker için optimize edilmiş stok hazırlama"""
     sku_map = {
         str(v.get('inventoryItem', {}).get('sku', '')).strip(): v.get('inventoryItem', {}).get('id') 
@@ -77,40 +166,20 @@ def _prepare_inventory_adjustments(sentos_variants, shopify_variants):
     for v in sentos_variants:
         sku = str(v.get('sku', '')).strip()
         if sku and (inventory_item_id := sku_map.get(sku)):
-            # Stok hesaplama optimizasyonu
-            qty = sum(s.get('stock', 0) for s in v.get('stocks', []) if isinstance(s, dict) and s.get('stock'))
-            if qty >= 0:  # Negatif stok kontrolü
-                adjustments.append({
-                    "inventoryItemId": inventory_item_id, 
-                    "availableQuantity": int(qty)
-                })
+            adjustments.extend(_variant_adjustments(inventory_item_id, v, location_mapping))
     return adjustments
 
 def _adjust_inventory_bulk(shopify_api, adjustments):
-    """10-worker için optimize edilmiş bulk inventory güncelleme"""
+    """10-worker için optimize edilmiş bulk inventory güncelleme; tüm batch'ler başarılıysa True döndürür"""
     if not adjustments: 
-        return
+        return True
+    
+    success = True
     
     try:
         location_id = shopify_api.get_default_location_id()
         
-        # 2024-10 API - Doğru bulk inventory mutation
-        mutation = """
-        mutation inventorySetOnHandQuantities($input: InventorySetOnHandQuantitiesInput!) {
-            inventorySetOnHandQuantities(input: $input) {
-                inventoryAdjustmentGroup {
-                    id
-                }
-                userErrors {
-                    field
-                    message
-                    code
-                }
-            }
-        }
-        """
-        
-        # Batch halinde işle (10-worker için optimize)
+        # Batch halinde işle (10-worker için optimize); eşlenen lokasyonların satırları aynı partide gider
         batch_size = 50  # Shopify limitleri için
         for i in range(0, len(adjustments), batch_size):
             batch = adjustments[i:i + batch_size]
@@ -119,37 +188,289 @@ def _adjust_inventory_bulk(shopify_api, adjustments):
             for adj in batch:
                 set_quantities.append({
                     "inventoryItemId": adj["inventoryItemId"],
-                    "locationId": location_id,
+                    "locationId": adj.get("locationId") or location_id,
                     "quantity": adj["availableQuantity"]
                 })
             
-            variables = {
-                "input": {
-                    "reason": "correction",
-                    "setQuantities": set_quantities
-                }
-            }
-            
-            result = shopify_api.execute_graphql(mutation, variables)
+            result = _send_set_quantities(shopify_api, set_quantities)
             
             if errors := result.get('inventorySetOnHandQuantities', {}).get('userErrors', []):
                 logging.error(f"Bulk stok güncelleme batch {i//batch_size + 1} hataları: {errors}")
+                success = False
             else:
                 adjustment_group = result.get('inventorySetOnHandQuantities', {}).get('inventoryAdjustmentGroup')
                 if adjustment_group:
                     logging.info(f"✅ Batch {i//batch_size + 1}: {len(set_quantities)} varyant stoğu güncellendi")
-            
-            # 10-worker için kısa bekleme
-            if i + batch_size < len(adjustments):
-                time.sleep(0.5)
                 
     except Exception as e:
         logging.error(f"Bulk stok güncelleme sırasında hata: {e}")
+        success = False
+    return success
+
+INVENTORY_ON_HAND_QUERY = """
+query inventoryOnHand($ids: [ID!]!, $locationId: ID!) {
+    nodes(ids: $ids) {
+        ... on InventoryItem {
+            id
+            inventoryLevel(locationId: $locationId) {
+                quantities(names: ["on_hand"]) { name quantity }
+            }
+        }
+    }
+}
+"""
+
+# Bulk işlemlerde değişken kullanılamadığı için lokasyon sorguya gömülür
+BULK_INVENTORY_ON_HAND_QUERY = """
+{
+  inventoryItems {
+    edges {
+      node {
+        id
+        inventoryLevel(locationId: "%s") {
+          quantities(names: ["on_hand"]) { name quantity }
+        }
+      }
+    }
+  }
+}
+"""
+
+# nodes sorgusu başına okunan inventoryItem sayısı (maliyet ~3/öğe)
+ON_HAND_READ_BATCH = 100
+# Bu sayıdan fazla satır okunacaksa sayfalı sorgular yerine tek bir bulk işlem kullanılır
+BULK_ON_HAND_MIN_ITEMS = 2000
+
+def _on_hand_from_node(node):
+    level = (node or {}).get('inventoryLevel')
+    if not level:
+        return None
+    for quantity in level.get('quantities') or []:
+        if quantity.get('name') == 'on_hand':
+            return quantity.get('quantity')
+    return None
+
+def read_on_hand_quantities(shopify_api, inventory_item_ids, max_workers=4, location_id=None):
+    """
+    Lokasyondaki (verilmezse varsayılan lokasyon) on_hand miktarlarını {inventory_item_id: miktar}
+    olarak okur. Lokasyonda stoklanmayan veya okunamayan öğeler sonuçta yer almaz.
+    """
+    wanted = set(inventory_item_ids)
+    if not wanted:
+        return {}
+    location_id = location_id or shopify_api.get_default_location_id()
+    quantities = {}
+    if len(wanted) >= BULK_ON_HAND_MIN_ITEMS:
+        try:
+            for node in shopify_api.bulk.run(BULK_INVENTORY_ON_HAND_QUERY % location_id):
+                if node.get('id') in wanted and (qty := _on_hand_from_node(node)) is not None:
+                    quantities[node['id']] = qty
+            return quantities
+        except Exception as e:
+            logging.warning(f"Bulk stok okuması başarısız, sayfalı okumaya geçiliyor: {e}")
+
+    ids = list(wanted)
+    batches = [ids[i:i + ON_HAND_READ_BATCH] for i in range(0, len(ids), ON_HAND_READ_BATCH)]
+
+    def read_batch(batch):
+        try:
+            data = shopify_api.execute_graphql(INVENTORY_ON_HAND_QUERY, {'ids': batch, 'locationId': location_id})
+            return data.get('nodes') or []
+        except Exception as e:
+            logging.warning(f"Stok seviyeleri okunamadı ({len(batch)} öğe), bu öğeler koşulsuz yazılacak: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="StockRead") as executor:
+        for nodes in executor.map(read_batch, batches):
+            for node in nodes:
+                if node and (qty := _on_hand_from_node(node)) is not None:
+                    quantities[node['id']] = qty
+    return quantities
+
+def drop_noop_adjustments(shopify_api, adjustments, max_workers=4):
+    """
+    Shopify'daki mevcut on_hand miktarını okuyup yalnızca farklı olan satırları döndürür.
+    Dönüş: (yazılacak satırlar, atlanan satır sayısı). Mevcut miktarı okunamayan satırlar yazılır.
+    """
+    if not adjustments:
+        return [], 0
+    by_location = {}
+    for a in adjustments:
+        by_location.setdefault(a.get("locationId"), []).append(a["inventoryItemId"])
+    current = {}
+    for location_id, item_ids in by_location.items():
+        for item_id, qty in read_on_hand_quantities(shopify_api, item_ids, max_workers=max_workers, location_id=location_id).items():
+            current[(item_id, location_id)] = qty
+    changed = [a for a in adjustments if current.get((a["inventoryItemId"], a.get("locationId"))) != a["availableQuantity"]]
+    skipped = len(adjustments) - len(changed)
+    shopify_api.record_inventory_writes(len(changed), skipped)
+    if skipped:
+        logging.info(f"Stok karşılaştırması: {skipped}/{len(adjustments)} satır Shopify'da zaten güncel, yazılmayacak.")
+    return changed, skipped
+
+def plan_catalog_stock(sentos_products, inventory_item_map, find_product, location_mapping=None):
+    """
+    Katalog geneli stok yazımı için Sentos ürünlerini sınıflandırır.
+
+    Dönüş: (writes, needs_variant_sync, not_found)
+      writes: [(sentos_product, [{'inventoryItemId', 'availableQuantity'} (+ eşleştirme varsa 'locationId')])]
+      needs_variant_sync: Shopify'da olup yeni varyantı olan ürünler (ürün bazlı yola düşer)
+      not_found: Shopify'da karşılığı olmayan ürünler
+    """
+    writes, needs_variant_sync, not_found = [], [], []
+    for product in sentos_products:
+        adjustments, missing = [], False
+        for v in product.get('variants', []) or [product]:
+            sku = str(v.get('sku', '')).strip()
+            if not sku:
+                continue
+            if entry := inventory_item_map.get(sku):
+                adjustments.extend(_variant_adjustments(entry[0], v, location_mapping))
+            else:
+                missing = True
+        if missing and find_product(product):
+            needs_variant_sync.append(product)
+        elif adjustments:
+            writes.append((product, adjustments))
+        else:
+            not_found.append(product)
+    return writes, needs_variant_sync, not_found
+
+def _write_on_hand_batch(shopify_api, location_id, batch):
+    """
+    Tek bir setQuantities çağrısı gönderir (satırın lokasyonu yoksa location_id kullanılır);
+    hata olursa partiyi ikiye bölerek tekrar dener. Yazılamayan satırların
+    (inventoryItemId, locationId) çiftlerini döndürür.
+    """
+    set_quantities = [
+        {"inventoryItemId": adj["inventoryItemId"], "locationId": adj.get("locationId") or location_id, "quantity": adj["availableQuantity"]}
+        for adj in batch
+    ]
+    try:
+        result = _send_set_quantities(shopify_api, set_quantities)
+        errors = result.get('inventorySetOnHandQuantities', {}).get('userErrors', [])
+    except Exception as e:
+        errors = [{'message': str(e)}]
+    if not errors:
+        return []
+    if len(batch) == 1:
+        row = set_quantities[0]
+        logging.error(f"Stok yazılamadı ({row['inventoryItemId']} @ {row['locationId']}): {errors}")
+        return [(row["inventoryItemId"], row["locationId"])]
+    middle = len(batch) // 2
+    return _write_on_hand_batch(shopify_api, location_id, batch[:middle]) + _write_on_hand_batch(shopify_api, location_id, batch[middle:])
+
+def set_on_hand_catalog_wide(shopify_api, adjustments, max_workers=4, batch_size=INVENTORY_SET_BATCH_MAX, progress_callback=None, can_dispatch=None):
+    """
+    Ürün sınırlarını gözetmeden tüm stok satırlarını en büyük partilerle yazar.
+    Partiler paylaşılan GraphQL maliyet bütçesiyle eşzamanlı (en fazla max_workers) gönderilir.
+    can_dispatch verilirse her parti gönderilmeden önce yoldaki parti sayısıyla çağrılır;
+    False dönerse kalan partiler gönderilmez.
+    (yazılamayan, gönderilmeyen) inventoryItem ID kümelerini döndürür.
+    """
+    failed, deferred = set(), set()
+    if not adjustments:
+        return failed, deferred
+    location_id = shopify_api.get_default_location_id()
+    batches = [adjustments[i:i + batch_size] for i in range(0, len(adjustments), batch_size)]
+    written, sent = 0, 0
+    in_flight = deque()
+
+    def collect():
+        nonlocal written
+        batch, future = in_flight.popleft()
+        failed.update(item_id for item_id, _ in future.result())
+        written += len(batch)
+        if progress_callback:
+            progress_callback({'message': f"Stoklar yazılıyor... {written}/{len(adjustments)} varyant", 'progress': 55 + int(written / len(adjustments) * 40)})
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="StockBatch") as executor:
+        for index, batch in enumerate(batches):
+            while len(in_flight) >= max_workers:
+                collect()
+            if can_dispatch is not None and not can_dispatch(len(in_flight)):
+                deferred.update(a["inventoryItemId"] for b in batches[index:] for a in b)
+                break
+            in_flight.append((batch, executor.submit(_write_on_hand_batch, shopify_api, location_id, batch)))
+            sent += 1
+        while in_flight:
+            collect()
+    logging.info(f"Katalog geneli stok yazımı: {written} varyant, {sent} istek, {len(failed)} hata, {len(deferred)} varyant ertelendi.")
+    return failed, deferred
+
+def reconcile_pending_writes(shopify_api, checkpoint, max_workers=4):
+    """
+    Yarım kalan çalıştırmanın yanıtı kaydedilmemiş stok yazımlarını kapatır: her satır
+    Shopify'daki mevcut miktarla karşılaştırılır ve yalnızca uygulanmamış olanlar
+    tekrar gönderilir. Tekrar gönderilen satır sayısını döndürür.
+    """
+    pending = checkpoint.pending_writes()
+    if not pending:
+        return 0
+    latest = {}
+    for _, set_quantities in pending:
+        for row in set_quantities:
+            latest[(row["inventoryItemId"], row["locationId"])] = row["quantity"]
+    adjustments = [
+        {"inventoryItemId": item_id, "locationId": location_id, "availableQuantity": qty}
+        for (item_id, location_id), qty in latest.items()
+    ]
+    changed, skipped = drop_noop_adjustments(shopify_api, adjustments, max_workers=max_workers)
+    failed, _ = set_on_hand_catalog_wide(shopify_api, changed, max_workers=max_workers)
+    if not failed:
+        checkpoint.resolve_pending([entry_id for entry_id, _ in pending])
+    logging.info(f"Yarım kalan {len(pending)} stok yazımı kapatıldı: {skipped} satır zaten uygulanmıştı, {len(changed)} satır tekrar gönderildi.")
+    return len(changed)
+
+# 2024-10 API bulk mutation
+ADD_VARIANTS_MUTATION = """
+mutation productVariantsBulkCreate($productId: ID!, $variants: [ProductVariantsBulkInput!]!) {
+    productVariantsBulkCreate(productId: $productId, variants: $variants) {
+        productVariants {
+            id
+            inventoryItem {
+                id
+                sku
+            }
+        }
+        userErrors {
+            field
+            message
+        }
+    }
+}
+"""
+
+def _new_variant_input(v):
+    """Mevcut ürüne eklenecek Sentos varyantı için ProductVariantsBulkInput hazırlar."""
+    variant_input = {
+        "price": "0.00",
+        "inventoryItem": {
+            "tracked": True,
+            "sku": v.get('sku', '')
+        }
+    }
+    
+    if barcode := v.get('barcode'):
+        variant_input['barcode'] = barcode
+        
+    # Variant seçeneklerini hazırla
+    options = []
+    if color := get_variant_color(v):
+        options.append(color)
+    if size := get_variant_size(v):
+        options.append(size)
+        
+    if options:
+        variant_input['options'] = options
+    return variant_input
 
 def _add_variants_bulk(shopify_api, product_gid, new_variants, main_product):
-    """10-worker için optimize edilmiş bulk varyant ekleme"""
+    """10-worker için optimize edilmiş bulk varyant ekleme; tüm batch'ler başarılıysa True döndürür"""
     if not new_variants:
-        return
+        return True
+    
+    success = True
         
     # Batch halinde işle
     batch_size = 50
@@ -157,52 +478,10 @@ def _add_variants_bulk(shopify_api, product_gid, new_variants, main_product):
     for batch_start in range(0, len(new_variants), batch_size):
         batch = new_variants[batch_start:batch_start + batch_size]
         
-        variants_input = []
-        for v in batch:
-            variant_input = {
-                "price": "0.00",
-                "inventoryItem": {
-                    "tracked": True,
-                    "sku": v.get('sku', '')
-                }
-            }
-            
-            if barcode := v.get('barcode'):
-                variant_input['barcode'] = barcode
-                
-            # Variant seçeneklerini hazırla
-            options = []
-            if color := get_variant_color(v):
-                options.append(color)
-            if size := get_variant_size(v):
-                options.append(size)
-                
-            if options:
-                variant_input['options'] = options
-                
-            variants_input.append(variant_input)
+        variants_input = [_new_variant_input(v) for v in batch]
 
-        # 2024-10 API bulk mutation
-        bulk_mutation = """
-        mutation productVariantsBulkCreate($productId: ID!, $variants: [ProductVariantsBulkInput!]!) {
-            productVariantsBulkCreate(productId: $productId, variants: $variants) {
-                productVariants {
-                    id
-                    inventoryItem {
-                        id
-                        sku
-                    }
-                }
-                userErrors {
-                    field
-                    message
-                }
-            }
-        }
-        """
-        
         try:
-            result = shopify_api.execute_graphql(bulk_mutation, {
+            result = shopify_api.execute_graphql(ADD_VARIANTS_MUTATION, {
                 "productId": product_gid,
                 "variants": variants_input
             })
@@ -212,6 +491,7 @@ def _add_variants_bulk(shopify_api, product_gid, new_variants, main_product):
             
             if errors:
                 logging.error(f"Varyant batch {batch_start//batch_size + 1} ekleme hataları: {errors}")
+                success = False
             else:
                 logging.info(f"✅ Batch {batch_start//batch_size + 1}: {len(created_variants)} varyant başarıyla eklendi")
                 
@@ -219,12 +499,10 @@ def _add_variants_bulk(shopify_api, product_gid, new_variants, main_product):
             if created_variants:
                 _activate_variants_at_location(shopify_api, created_variants)
                 
-            # 10-worker için kısa bekleme
-            if batch_start + batch_size < len(new_variants):
-                time.sleep(0.5)
-                
         except Exception as e:
             logging.error(f"Bulk varyant batch {batch_start//batch_size + 1} ekleme hatası: {e}")
+            success = False
+    return success
 
 def _activate_variants_at_location(shopify_api, variants):
     """10-worker için optimize edilmiş inventory aktivasyonu"""
@@ -233,7 +511,9 @@ def _activate_variants_at_location(shopify_api, variants):
         return
         
     try:
-        location_id = shopify_api.get_default_location_id()
+        # Eşleştirme varsa varyant eşlenen tüm lokasyonlarda, yoksa varsayılan lokasyonda aktif edilir
+        location_mapping = getattr(shopify_api, 'location_mapping', None)
+        location_ids = location_mapping.locations() if location_mapping else [shopify_api.get_default_location_id()]
         
         activation_mutation = """
         mutation inventoryBulkToggleActivation($inventoryItemUpdates: [InventoryBulkToggleActivationInput!]!) {
@@ -251,6 +531,7 @@ def _activate_variants_at_location(shopify_api, variants):
                 "activate": True
             }
             for item_id in inventory_item_ids
+            for location_id in location_ids
         ]
         
         shopify_api.execute_graphql(activation_mutation, {"inventoryItemUpdates": updates})
@@ -0,0 +1,278 @@
+# operations/sync_checkpoint.py - Uzun senkronizasyonlar için kontrol noktası ve kaldığı yerden devam
+
+import os
+import json
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from connectors.product_index import DATA_CACHE_DIR, _store_slug
+
+# Tamamlanan aşama kayıtları bu sayıya ulaşınca diske yazılır; çökme durumunda en
+# fazla bu kadar aşama tekrar çalışır (stok yazımları WAL ile ayrıca korunur).
+STAGE_FLUSH_SIZE = 25
+# Yeni çalıştırma başlarken bu süreden eski kayıtlar silinir (data_cache her zamanlanmış
+# çalıştırmada geri yüklenip kaydedildiği için dosya sınırsız büyümemeli). Yarım kalan
+# çalıştırmalar devam ettirilebilsin diye daha uzun tutulur; kapanmış WAL kayıtları ise
+# yanıtı alındıktan sonra yalnızca kısa süre saklanır.
+COMPLETED_RUN_RETENTION_DAYS = 7
+INCOMPLETE_RUN_RETENTION_DAYS = 30
+CLOSED_WAL_RETENTION_DAYS = 1
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class SyncCheckpoint:
+    """
+    Bir senkronizasyon çalıştırmasının kalıcı durumu (SQLite).
+
+    - runs: çalıştırma kimliği, mod, parametreler ve durum (running/completed/stopped/failed)
+    - product_stages: her ürün için başarıyla tamamlanan aşamalar (create, details, inventory, media)
+    - inventory_wal: gönderilmeden önce yazılan, yanıt gelince kapatılan stok yazımı kayıtları
+
+    Devam edilen çalıştırmada tamamlanmış aşamalar atlanır. Yanıtı alınamamış (açık kalmış)
+    WAL kayıtları tekrar gönderilmeden önce Shopify'daki mevcut miktarla karşılaştırılır;
+    böylece aynı yazım iki kez uygulanmaz.
+    """
+    def __init__(self, store_url, run_id, db_path=None):
+        self.store_url = store_url
+        self.run_id = run_id
+        self.db_path = db_path or os.path.join(DATA_CACHE_DIR, f"sync_runs_{_store_slug(store_url)}.db")
+        self.lock = threading.Lock()
+        self.pending_stages = []
+        self.completed = {}
+        self.sync_mode = None
+        self.params = {}
+        _ensure_db_exists(self.db_path)
+
+    # --- Oluşturma ---
+
+    @classmethod
+    def start(cls, store_url, sync_mode, params=None, db_path=None):
+        run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        checkpoint = cls(store_url, run_id, db_path)
+        checkpoint.prune()
+        with checkpoint._connect() as conn:
+            conn.execute(
+                "INSERT INTO runs (run_id, sync_mode, params, status, started_at, updated_at) VALUES (?, ?, ?, 'running', ?, ?)",
+                (run_id, sync_mode, json.dumps(params or {}, ensure_ascii=False), _now(), _now())
+            )
+        checkpoint.sync_mode, checkpoint.params = sync_mode, params or {}
+        logging.info(f"Senkronizasyon çalıştırması başlatıldı: {run_id}")
+        return checkpoint
+
+    @classmethod
+    def resume(cls, store_url, run_id, db_path=None):
+        checkpoint = cls(store_url, run_id, db_path)
+        with checkpoint._connect() as conn:
+            row = conn.execute("SELECT sync_mode, params, status FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if not row:
+                raise Exception(f"Devam edilecek çalıştırma bulunamadı: {run_id}")
+            stage_rows = conn.execute("SELECT product_key, stage FROM product_stages WHERE run_id = ?", (run_id,)).fetchall()
+            conn.execute("UPDATE runs SET status = 'running', updated_at = ? WHERE run_id = ?", (_now(), run_id))
+        checkpoint.sync_mode, checkpoint.params = row[0], json.loads(row[1] or '{}')
+        for product_key, stage in stage_rows:
+            checkpoint.completed.setdefault(product_key, set()).add(stage)
+        logging.info(f"'{run_id}' çalıştırmasına devam ediliyor ({row[2]}): {len(checkpoint.completed)} ürünün aşamaları tamamlanmış.")
+        return checkpoint
+
+    @staticmethod
+    def list_runs(store_url, only_incomplete=True, limit=10, db_path=None):
+        """Son çalıştırmaları [{'run_id', 'sync_mode', 'status', 'started_at', 'updated_at', 'products'}] olarak döndürür."""
+        db_path = db_path or os.path.join(DATA_CACHE_DIR, f"sync_runs_{_store_slug(store_url)}.db")
+        if not os.path.exists(db_path):
+            return []
+        _ensure_db_exists(db_path)
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            rows = conn.execute(f"""
+                SELECT r.run_id, r.sync_mode, r.status, r.started_at, r.updated_at,
+                       (SELECT COUNT(DISTINCT product_key) FROM product_stages s WHERE s.run_id = r.run_id)
+                FROM runs r {"WHERE r.status != 'completed'" if only_incomplete else ""}
+                ORDER BY r.started_at DESC LIMIT ?
+            """, (limit,)).fetchall()
+        finally:
+            conn.close()
+        keys = ('run_id', 'sync_mode', 'status', 'started_at', 'updated_at', 'products')
+        return [dict(zip(keys, row)) for row in rows]
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- Aşamalar ---
+
+    def completed_stages(self, product_key):
+        with self.lock:
+            return set(self.completed.get(product_key, ()))
+
+    def mark_stage(self, product_key, stage):
+        with self.lock:
+            self.completed.setdefault(product_key, set()).add(stage)
+            self.pending_stages.append((self.run_id, product_key, stage, _now()))
+            should_flush = len(self.pending_stages) >= STAGE_FLUSH_SIZE
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            rows, self.pending_stages = self.pending_stages, []
+            if not rows:
+                return
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO product_stages (run_id, product_key, stage, completed_at) VALUES (?, ?, ?, ?)", rows
+                )
+                conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (_now(), self.run_id))
+
+    # --- Stok yazımı WAL ---
+
+    def wal_begin(self, set_quantities):
+        """Gönderilecek setQuantities satırlarını açık kayıt olarak yazar ve kayıt ID'sini döndürür."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO inventory_wal (run_id, payload, status, created_at) VALUES (?, ?, 'pending', ?)",
+                (self.run_id, json.dumps(set_quantities), _now())
+            )
+            return cursor.lastrowid
+
+    def wal_end(self, entry_id, applied):
+        with self._connect() as conn:
+            conn.execute("UPDATE inventory_wal SET status = ? WHERE id = ?", ('applied' if applied else 'failed', entry_id))
+
+    def pending_writes(self):
+        """Yanıtı kaydedilmemiş stok yazımlarını [(kayıt ID, setQuantities satırları)] olarak döndürür."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, payload FROM inventory_wal WHERE run_id = ? AND status = 'pending' ORDER BY id", (self.run_id,)
+            ).fetchall()
+        return [(entry_id, json.loads(payload)) for entry_id, payload in rows]
+
+    def resolve_pending(self, entry_ids):
+        with self._connect() as conn:
+            conn.executemany("UPDATE inventory_wal SET status = 'reconciled' WHERE id = ?", [(i,) for i in entry_ids])
+
+    # --- Süre geçmişi ---
+
+    def record_cost(self, products, worker_seconds):
+        """Çalıştırmanın işlediği ürün sayısını ve harcanan çalışan-saniyeyi kaydeder."""
+        if products <= 0:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO run_costs (run_id, sync_mode, products, worker_seconds, finished_at) VALUES (?, ?, ?, ?, ?)",
+                (self.run_id, self.sync_mode, products, worker_seconds, _now())
+            )
+
+    @staticmethod
+    def recent_product_cost(store_url, sync_mode, limit=5, db_path=None):
+        """Aynı moddaki son çalıştırmalara göre ürün başına çalışan-saniye; geçmiş yoksa None."""
+        db_path = db_path or os.path.join(DATA_CACHE_DIR, f"sync_runs_{_store_slug(store_url)}.db")
+        if not os.path.exists(db_path):
+            return None
+        _ensure_db_exists(db_path)
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            rows = conn.execute(
+                "SELECT products, worker_seconds FROM run_costs WHERE sync_mode = ? ORDER BY finished_at DESC LIMIT ?",
+                (sync_mode, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        products = sum(r[0] for r in rows)
+        return sum(r[1] for r in rows) / products if products else None
+
+    # --- Saklama ---
+
+    def prune(self, now=None):
+        """Saklama süresi dolan çalıştırmaları, aşamalarını ve WAL kayıtlarını siler; silinen çalıştırma sayısını döndürür."""
+        now = now or datetime.now(timezone.utc)
+        cutoff = lambda days: (now - timedelta(days=days)).isoformat()
+        with self._connect() as conn:
+            expired = [row[0] for row in conn.execute(
+                "SELECT run_id FROM runs WHERE (status = 'completed' AND updated_at < ?) OR updated_at < ?",
+                (cutoff(COMPLETED_RUN_RETENTION_DAYS), cutoff(INCOMPLETE_RUN_RETENTION_DAYS))
+            )]
+            for table in ('product_stages', 'inventory_wal', 'runs'):
+                conn.executemany(f"DELETE FROM {table} WHERE run_id = ?", [(run_id,) for run_id in expired])
+            closed = conn.execute(
+                "DELETE FROM inventory_wal WHERE status != 'pending' AND created_at < ?", (cutoff(CLOSED_WAL_RETENTION_DAYS),)
+            ).rowcount
+            conn.execute("DELETE FROM run_costs WHERE finished_at < ?", (cutoff(INCOMPLETE_RUN_RETENTION_DAYS),))
+        if expired or closed:
+            # Silinen sayfaların diske geri verilmesi için (işlem dışında çalışmalı)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            try:
+                conn.execute("VACUUM")
+            finally:
+                conn.close()
+            logging.info(f"Kontrol noktası veritabanı temizlendi: {len(expired)} eski çalıştırma, {closed} kapanmış WAL kaydı silindi.")
+        return len(expired)
+
+    # --- Bitiş ---
+
+    def finish(self, status):
+        self.flush()
+        with self._connect() as conn:
+            conn.execute("UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?", (status, _now(), self.run_id))
+        logging.info(f"Senkronizasyon çalıştırması '{self.run_id}' durumu: {status}")
+
+
+def _ensure_db_exists(db_path):
+    if os.path.dirname(db_path):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            # Çalışanlar aynı anda yazarken okuyucuların beklememesi için
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    sync_mode TEXT,
+                    params TEXT,
+                    status TEXT,
+                    started_at TEXT,
+                    updated_at TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS product_stages (
+                    run_id TEXT NOT NULL,
+                    product_key TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    completed_at TEXT,
+                    PRIMARY KEY (run_id, product_key, stage)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS inventory_wal (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_wal_run_status ON inventory_wal(run_id, status)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS run_costs (
+                    run_id TEXT PRIMARY KEY,
+                    sync_mode TEXT,
+                    products INTEGER,
+                    worker_seconds REAL,
+                    finished_at TEXT
+                )
+            """)
+    finally:
+        conn.close()
@@ -0,0 +1,189 @@
+# operations/sync_pipeline.py - Sınırlı kuyruklarla bağlanmış aşamalı senkronizasyon hattı
+
+import time
+import queue
+import logging
+import threading
+
+_STOP = object()
+
+
+class SyncChanges(list):
+    """
+    Bir senkronizasyon adımının değişiklik mesajları. Adım Shopify'a yazamadıysa ya da
+    atlandıysa `failed` açıkça işaretlenir; parmak izi ve kontrol noktası kaydı mesaj
+    metnine değil bu bayrağa bakar.
+    """
+    def __init__(self, changes=()):
+        super().__init__(changes)
+        self.failed = False
+
+    def fail(self, message):
+        self.append(message)
+        self.failed = True
+
+    def merge(self, other):
+        self.extend(other)
+        self.failed = self.failed or getattr(other, 'failed', False)
+
+
+class SyncJob:
+    """Hattan geçen tek bir Sentos ürünü ve aşamaların biriktirdiği sonuçlar."""
+    def __init__(self, product, fingerprints=None):
+        self.product = product
+        self.fingerprints = fingerprints or {}
+        self.existing = None
+        self.action = None
+        self.changes = []
+        self.errors = []
+        self.failed = False
+        self.cancelled = False
+        self.branches = ()
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self.product.get('name', 'Bilinmeyen Ürün')
+
+    @property
+    def sku(self):
+        return self.product.get('sku', 'SKU Yok')
+
+
+class PipelineStage:
+    """
+    Kendi iş parçacığı havuzu ve sınırlı kuyruğu olan tek bir aşama.
+
+    Kuyruk doluyken put() bekler; böylece yavaş bir aşama yalnızca kendisini
+    besleyen tarafı yavaşlatır, diğer aşamaların çalışanlarını meşgul etmez.
+    """
+    def __init__(self, name, handler, workers, queue_size, stop_event, on_job_done):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.stop_event = stop_event
+        self.on_job_done = on_job_done
+        self.threads = []
+        self.metrics_lock = threading.Lock()
+        self.metrics = {'processed': 0, 'failed': 0, 'cancelled': 0, 'busy_seconds': 0.0,
+                        'blocked_put_seconds': 0.0, 'max_queue_depth': 0}
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self.name.capitalize()}Stage-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def put(self, job):
+        started = time.monotonic()
+        self.queue.put(job)
+        with self.metrics_lock:
+            self.metrics['blocked_put_seconds'] += time.monotonic() - started
+            self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self.queue.qsize())
+
+    def close(self):
+        """Her çalışana bir durdurma işareti gönderir ve bitmelerini bekler."""
+        for _ in self.threads:
+            self.queue.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            if job is _STOP:
+                return
+            if self.stop_event.is_set():
+                # İş çalıştırılmaz ama sonuçlanır; aksi hâlde ürün istatistik ve raporda görünmez
+                with self.metrics_lock: self.metrics['cancelled'] += 1
+                job.cancelled = True
+                self.on_job_done(self, job, None, None)
+                continue
+            started = time.monotonic()
+            error = None
+            result = None
+            try:
+                result = self.handler(job)
+            except Exception as e:
+                error = e
+            with self.metrics_lock:
+                self.metrics['busy_seconds'] += time.monotonic() - started
+                self.metrics['processed' if error is None else 'failed'] += 1
+            self.on_job_done(self, job, result, error)
+
+    def get_metrics(self):
+        with self.metrics_lock:
+            metrics = dict(self.metrics)
+        metrics.update({'workers': self.workers, 'queue_depth': self.queue.qsize()})
+        metrics['busy_seconds'] = round(metrics['busy_seconds'], 2)
+        metrics['blocked_put_seconds'] = round(metrics['blocked_put_seconds'], 2)
+        return metrics
+
+
+class StagedPipeline:
+    """
+    plan → (detaylar | stok | medya ...) biçiminde aşamalı hat.
+
+    Plan aşamasının işleyicisi işin gideceği dal aşamalarının adlarını döndürür; iş
+    bu aşamaların kuyruklarına aynı anda konur ve her dal kendi çalışanlarıyla
+    bağımsız ilerler. Tüm dallar bitince (veya plan hiç dal döndürmezse) on_complete
+    çağrılır. Bir dalda oluşan hata job.errors listesine eklenir; diğer dallar sürer.
+    Durdurma isteğiyle çalıştırılmayan işler job.cancelled ile yine on_complete'e ulaşır.
+    """
+    def __init__(self, plan_handler, branch_handlers, on_complete, stop_event, workers, queue_size):
+        self.on_complete = on_complete
+        self.stop_event = stop_event
+        self.plan = PipelineStage('plan', plan_handler, workers.get('plan', 1), queue_size, stop_event, self._planned)
+        self.branches = {
+            name: PipelineStage(name, handler, workers.get(name, 1), queue_size, stop_event, self._branch_done)
+            for name, handler in branch_handlers.items()
+        }
+
+    def start(self):
+        for stage in self.branches.values():
+            stage.start()
+        self.plan.start()
+
+    def submit(self, job):
+        """İşi plan kuyruğuna koyar; kuyruk doluysa bekler (Sentos çekimi bu noktada durur)."""
+        self.plan.put(job)
+
+    def close(self):
+        """Kuyruktaki tüm işlerin bitmesini bekler ve çalışanları kapatır."""
+        self.plan.close()
+        for stage in self.branches.values():
+            stage.close()
+
+    def _planned(self, stage, job, branches, error):
+        if error is not None:
+            job.errors.append(error)
+            branches = ()
+        if job.cancelled:
+            branches = ()
+        job.branches = tuple(branches or ())
+        job.pending = len(job.branches)
+        if not job.branches:
+            self.on_complete(job)
+            return
+        for name in job.branches:
+            self.branches[name].put(job)
+
+    def _branch_done(self, stage, job, result, error):
+        with job.lock:
+            if error is not None:
+                logging.error(f"'{job.name}' ürünü {stage.name} aşamasında hata verdi: {error}")
+                job.errors.append(error)
+            elif result:
+                job.changes.extend(result)
+                job.failed = job.failed or getattr(result, 'failed', False)
+            job.pending -= 1
+            finished = job.pending == 0
+        if finished:
+            self.on_complete(job)
+
+    def get_metrics(self):
+        metrics = {'plan': self.plan.get_metrics()}
+        metrics.update({name: stage.get_metrics() for name, stage in self.branches.items()})
+        return metrics
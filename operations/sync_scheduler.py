@@ -0,0 +1,115 @@
+# operations/sync_scheduler.py - Süre bütçeli senkronizasyon için öncelik sıralama ve gönderim kontrolü
+
+import time
+import heapq
+import logging
+
+from operations.stock_sync import _sentos_variant_quantity
+
+# Öncelik sırası: stoğu değişen ürünler, stoğu sıfır olan ürünler, diğer (detay / medya) yenilemeleri
+PRIORITY_STOCK = 0
+PRIORITY_ZERO_STOCK = 1
+PRIORITY_REFRESH = 2
+
+# Geçmiş yokken ürün başına varsayılan çalışan-saniye
+DEFAULT_WORKER_SECONDS_PER_PRODUCT = 4.0
+# Canlı ölçüm bu kadar ürün bittikten sonra geçmişin yerini alır
+LIVE_ESTIMATE_MIN_SAMPLES = 10
+# Kuyruktaki işler bittikten sonra çıkış için bırakılan pay (kontrol noktası, sonuç raporu)
+DRAIN_MARGIN_SECONDS = 60
+# Akış sıralanırken önceliğe göre seçim yapılan tampon (ürün); katalog belleğe alınmaz
+PRIORITY_LOOKAHEAD = 1000
+
+
+def product_priority(sentos_product, changed_components):
+    """Ürünün gönderim önceliği (küçük olan önce gönderilir)."""
+    if 'stock' in changed_components:
+        return PRIORITY_STOCK
+    variants = sentos_product.get('variants') or [sentos_product]
+    if sum(_sentos_variant_quantity(v) for v in variants) == 0:
+        return PRIORITY_ZERO_STOCK
+    return PRIORITY_REFRESH
+
+
+class PriorityBuffer:
+    """
+    (ürün, parmak izleri) akışını en fazla `lookahead` ürünlük bir tampon içinde önceliğe
+    göre (aynı öncelikte Sentos sırasıyla) yeniden dizer. Tampon dolunca en öncelikli ürün
+    verilir; böylece gönderim ilk sayfalar gelir gelmez başlar.
+    """
+    def __init__(self, items, delta, lookahead=PRIORITY_LOOKAHEAD):
+        self.items = items
+        self.delta = delta
+        self.lookahead = max(1, lookahead)
+        self.heap = []
+
+    def __iter__(self):
+        for seq, item in enumerate(self.items):
+            heapq.heappush(self.heap, (product_priority(item[0], self.delta.changed_components(*item)), seq, item))
+            if len(self.heap) >= self.lookahead:
+                yield heapq.heappop(self.heap)[2]
+        while self.heap:
+            yield heapq.heappop(self.heap)[2]
+
+    def buffered(self):
+        """Akıştan okunmuş ama henüz verilmemiş ürün sayısı."""
+        return len(self.heap)
+
+
+class DeadlineScheduler:
+    """
+    Süre bütçesi verilen çalıştırmada işleri öncelik sırasına koyar ve kalan süre,
+    yoldaki işlerin bitmesine yetmeyecek hâle geldiğinde yeni iş gönderimini durdurur.
+
+    Ürün başına maliyet çalışan-saniye olarak tutulur: başlangıçta son çalıştırmaların
+    ortalaması (yoksa varsayılan), yeterli ürün bittikten sonra bu çalıştırmanın ölçülen
+    hızı kullanılır. Gönderilmeyen ürünler kontrol noktası üzerinden sonraki çalıştırmada
+    devam ettirilebilir.
+    """
+    def __init__(self, budget_seconds, max_workers, history_cost=None, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.dispatch_started = self.started
+        self.deadline = self.started + budget_seconds if budget_seconds else None
+        self.max_workers = max(1, int(max_workers))
+        self.history_cost = history_cost or DEFAULT_WORKER_SECONDS_PER_PRODUCT
+        self.done = 0
+        self.stopped = False
+        if self.deadline:
+            logging.info(f"Süre bütçesi: {int(budget_seconds)} sn, tahmini ürün maliyeti: {self.history_cost:.2f} çalışan-sn.")
+
+    @staticmethod
+    def order(items, delta):
+        """[(ürün, parmak izleri)] listesini önceliğe göre (aynı öncelikte Sentos sırasıyla) sıralar."""
+        return sorted(items, key=lambda item: product_priority(item[0], delta.changed_components(*item)))
+
+    def begin_dispatch(self):
+        """Ürün gönderimi başladığında çağrılır; ölçülen hıza katalog okuma süresi karışmaz."""
+        self.dispatch_started = self.clock()
+
+    def record_done(self, count=1):
+        self.done += count
+
+    def worker_seconds_per_product(self):
+        if self.done >= LIVE_ESTIMATE_MIN_SAMPLES:
+            return (self.clock() - self.dispatch_started) * self.max_workers / self.done
+        return self.history_cost
+
+    def remaining_seconds(self):
+        return None if self.deadline is None else self.deadline - self.clock()
+
+    def can_dispatch(self, in_flight):
+        """Yoldaki işler ve bir yeni ürün bütçe içinde bitebiliyorsa True döndürür."""
+        if self.deadline is None:
+            return True
+        if self.stopped:
+            return False
+        drain_seconds = (in_flight + 1) * self.worker_seconds_per_product() / self.max_workers
+        if self.remaining_seconds() > drain_seconds + DRAIN_MARGIN_SECONDS:
+            return True
+        self.stopped = True
+        logging.warning(f"Süre bütçesi doluyor: yeni ürün gönderilmiyor, yoldaki {in_flight} ürünün bitmesi bekleniyor.")
+        return False
+
+    def worker_seconds_spent(self):
+        return (self.clock() - self.dispatch_started) * self.max_workers
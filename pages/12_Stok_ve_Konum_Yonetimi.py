@@ -13,6 +13,7 @@ if project_root not in sys.path:
 
 from connectors.shopify_api import ShopifyAPI
 from connectors.sentos_api import SentosAPI
+from operations.location_mapping import LocationMapping
 
 st.set_page_config(layout="wide")
 st.title("📦 Stok ve Konum Yönetimi")
@@ -60,9 +61,11 @@ if not sentos_warehouses:
 
 # --- Eşleştirme Arayüzü ---
 st.header("Konum-Depo Eşleştirmesi")
+st.caption("Senkronizasyon, her Shopify konumunun stoğunu eşlenen Sentos depolarının toplamı olarak yazar. Hiç eşleştirme yoksa tüm depoların toplamı varsayılan konuma yazılır; eşlenmemiş depoların stoğu Shopify'a aktarılmaz.")
 
-sentos_warehouse_options = {wh['id']: wh['name'] for wh in sentos_warehouses}
-sentos_warehouse_options_list = list(sentos_warehouse_options.values())
+location_mapping = LocationMapping.load(st.session_state['shopify_store'])
+sentos_warehouse_options = {str(wh['id']): wh['name'] for wh in sentos_warehouses}
+selections = {}
 
 for loc in shopify_locations:
     st.markdown("---")
@@ -75,28 +78,27 @@ for loc in shopify_locations:
         st.write(f"Adres: {address.get('city', 'N/A')}, {address.get('country', 'N/A')}")
 
     with col2:
-        st.write("**Bu konumu hangi Sentos deposu ile eşleştirmek istersiniz?**")
+        st.write("**Bu konumun stoğu hangi Sentos depolarından gelsin?**")
         
-        selected_warehouse_name = st.selectbox(
-            label="Sentos Deposu Seçin",
-            options=sentos_warehouse_options_list,
-            key=f"warehouse_for_{loc['id']}",
-            help="Bu Shopify konumundan gelen siparişlerin stokları, seçtiğiniz bu Sentos deposundan düşülecektir."
+        selections[loc['id']] = st.multiselect(
+            label="Sentos Depoları",
+            options=list(sentos_warehouse_options),
+            default=[wh for wh in location_mapping.warehouses_for(loc['id']) if wh in sentos_warehouse_options],
+            format_func=lambda wh_id: sentos_warehouse_options[wh_id],
+            key=f"warehouses_for_{loc['id']}",
+            help="Seçilen depoların stok toplamı bu Shopify konumuna yazılır. Boş bırakılırsa bu konuma stok yazılmaz."
         )
-        
-        if st.button("Eşleştirmeyi Kaydet", key=f"save_{loc['id']}", type="primary"):
-            selected_warehouse_id = [wh_id for wh_id, wh_name in sentos_warehouse_options.items() if wh_name == selected_warehouse_name][0]
-            
-            if selected_warehouse_id:
-                with st.spinner("Eşleştirme güncelleniyor..."):
-                    # Bu fonksiyonun Sentos API'sinde gerçek bir karşılığı olmalı.
-                    # Örnek: result = sentos_api.update_shopify_location_mapping(1, loc['id'], selected_warehouse_id)
-                    # if result.get('success'):
-                    #     st.success(f"`{loc['name']}` konumu, `{selected_warehouse_name}` deposu ile başarıyla eşleştirildi!")
-                    # else:
-                    #     st.error(f"Eşleştirme başarısız: {result.get('message')}")
-                    st.warning("Bu özellik henüz aktif değil. `sentos_api.py` içindeki ilgili fonksiyonun, Sentos panelinin kullandığı gerçek iç API isteği ile güncellenmesi gerekmektedir.")
-
 
 st.markdown("---")
-st.success("Tüm eşleştirmeler tamamlandığında, Sentos'un Shopify siparişlerindeki stokları doğru bir şekilde yönetmesi sağlanacaktır.")
\ No newline at end of file
+if st.button("Eşleştirmeleri Kaydet", type="primary"):
+    chosen = [wh for warehouses in selections.values() for wh in warehouses]
+    if duplicates := sorted({sentos_warehouse_options[wh] for wh in chosen if chosen.count(wh) > 1}):
+        st.error(f"Bir depo yalnızca bir konuma eşlenebilir: {', '.join(duplicates)}")
+    else:
+        for location_id, warehouses in selections.items():
+            location_mapping.set_location(location_id, warehouses)
+        try:
+            location_mapping.save()
+            st.success(f"{len(chosen)} depo, {len(location_mapping.locations())} Shopify konumu ile eşleştirildi. Sonraki senkronizasyonlar stokları bu konumlara yazacak.")
+        except OSError as e:
+            st.error(f"Eşleştirme kaydedilemedi: {e}")
@@ -22,6 +22,9 @@ from sync_runner import (
     sync_missing_products_only,
     sync_single_product_by_sku
 )
+from async_sync_runner import sync_products_from_sentos_api_async
+from operations.sync_checkpoint import SyncCheckpoint
+from operations.progress_bus import ProgressBus, render_event_html
 
 # --- Session State Başlatma ---
 if 'sync_running' not in st.session_state:
@@ -112,11 +115,14 @@ def display_progress(title, results_key, log_key):
                     cols[1].metric("✅ Oluşturuldu", stats.get('created', 0))
                     cols[2].metric("🔄 Güncellendi", stats.get('updated', 0))
                     cols[3].metric("❌ Hatalı", stats.get('failed', 0))
-                    cols[4].metric("⏭️ Atlandı", stats.get('skipped', 0))
+                    cols[4].metric("⏭️ Atlandı", stats.get('skipped', 0) + stats.get('unchanged', 0), help=f"{stats.get('unchanged', 0)} ürün içeriği değişmediği için atlandı.")
 
-            if 'log_detail' in update:
-                st.session_state[log_key].insert(0, update['log_detail'])
-                log_html = "".join(st.session_state[log_key][:50])
+            # Ürün olayları 250 ms'lik anlık görüntülerde toplu gelir; günlük her görüntüde bir kez çizilir
+            if update.get('products'):
+                for event in update['products']:
+                    st.session_state[log_key].insert(0, render_event_html(event))
+                del st.session_state[log_key][50:]
+                log_html = "".join(st.session_state[log_key])
                 log_placeholder.markdown(f'<div style="height:300px;overflow-y:scroll;border:1px solid #333;padding:10px;border-radius:5px;font-family:monospace;">{log_html}</div>', unsafe_allow_html=True)
             
             if update.get('status') in ['done', 'error']:
@@ -148,7 +154,19 @@ def display_results(title, results):
     cols[1].metric("✅ Oluşturuldu", stats.get('created', 0))
     cols[2].metric("🔄 Güncellendi", stats.get('updated', 0))
     cols[3].metric("❌ Hatalı", stats.get('failed', 0))
-    cols[4].metric("⏭️ Atlandı", stats.get('skipped', 0))
+    cols[4].metric("⏭️ Atlandı", stats.get('skipped', 0) + stats.get('unchanged', 0), help=f"{stats.get('unchanged', 0)} ürün içeriği değişmediği için atlandı.")
+    if run_id := results.get('run_id'):
+        st.caption(f"🆔 Çalıştırma kimliği: `{run_id}` (yarıda kalırsa bu kimlikle devam ettirilebilir)")
+    if stats.get('deferred'):
+        st.warning(f"⏱️ Süre bütçesi dolduğu için {stats['deferred']} ürün gönderilmedi. Yukarıdaki çalıştırma kimliğiyle devam ettirebilirsiniz.")
+    if stats.get('resumed'):
+        st.caption(f"⏯️ {stats['resumed']} ürünün aşamaları önceki denemede tamamlandığı için tekrar çalıştırılmadı.")
+    if inventory := results.get('inventory'):
+        st.caption(f"📦 Stok yazımı: {inventory.get('written', 0)} varyant gönderildi, {inventory.get('noop_skipped', 0)} varyant Shopify'da zaten güncel olduğu için atlandı.")
+
+    if stages := results.get('stages'):
+        with st.expander("Aşama Metrikleri (Kuyruk Derinliği ve Süreler)"):
+            st.dataframe(pd.DataFrame.from_dict(stages, orient='index'), use_container_width=True)
 
     with st.expander("Detaylı Raporu Görüntüle"):
         details = results.get('details', [])
@@ -182,6 +200,7 @@ else:
         [
             "Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", 
             "Sadece Stok ve Varyantlar", 
+            "Sadece Stok (Katalog Geneli Hızlı)", 
             "Sadece Resimler", 
             "SEO Alt Metinli Resimler", 
             "Sadece Açıklamalar", 
@@ -193,6 +212,33 @@ else:
     col1, col2 = st.columns(2)
     test_mode = col1.checkbox("Test Modu (İlk 20 ürünü senkronize et)", value=True, help="Tam bir senkronizasyon çalıştırmadan bağlantıyı ve mantığı test etmek için yalnızca Sentos'taki ilk 20 ürünü işler.")
     max_workers = col2.number_input("Eş Zamanlı Çalışan Sayısı", 1, 50, 2, help="Aynı anda işlenecek ürün sayısı. API limitlerine takılmamak için dikkatli artırın.")
+    use_async = col1.checkbox("Asenkron Mod (asyncio)", value=False, help="Ürünler thread'ler yerine coroutine'lerle işlenir; eşzamanlılığı çalışan sayısı değil Shopify'ın GraphQL maliyet bütçesi belirler.")
+    # Katalog geneli hızlı stok yolu yalnızca thread tabanlı çalıştırıcıda vardır
+    async_selected = use_async and sync_mode != "Sadece Stok (Katalog Geneli Hızlı)"
+    # Asenkron çalıştırıcı delta filtresini ve süre bütçesini desteklemez; bu seçenekler kapatılır
+    force_full = col2.checkbox("Tam Geçiş (Değişmeyenleri de Gönder)", value=False, disabled=async_selected, help="Varsayılan olarak son başarılı senkronizasyondan beri içeriği değişmeyen ürünler atlanır. Bu seçenek tüm ürünleri Shopify'a tekrar gönderir.") and not async_selected
+    time_budget_minutes = col1.number_input("Süre Bütçesi (dakika, 0 = sınırsız)", 0, 600, 0, disabled=async_selected, help="Verilirse ürünler öncelik sırasıyla gönderilir (stoğu değişenler, stoğu sıfır olanlar, sonra detay/medya) ve süre dolmadan yeni ürün gönderimi durur. Kalanlar çalıştırma kimliğiyle devam ettirilebilir.")
+    if async_selected:
+        time_budget_minutes = 0
+        st.info("ℹ️ Asenkron modda her ürün Shopify'a gönderilir (Tam Geçiş) ve süre bütçesi uygulanmaz. Bu seçenekler için asenkron modu kapatın.")
+    elif use_async:
+        st.warning("⚠️ Katalog geneli hızlı stok modu asenkron çalıştırıcıda yoktur; görev thread tabanlı çalıştırıcıyla başlatılacak.")
+
+    # Yarıda kalan (durdurulan / hata veren) çalıştırmalar kaldığı yerden sürdürülebilir
+    resume_run_id = None
+    incomplete_runs = SyncCheckpoint.list_runs(st.session_state.shopify_store) if st.session_state.get('shopify_store') else []
+    if incomplete_runs:
+        run_labels = {"": "Yeni çalıştırma başlat"}
+        run_labels.update({
+            r['run_id']: f"{r['run_id']} · {r['sync_mode']} · {r['status']} · {r['products']} ürün tamamlanmış"
+            for r in incomplete_runs
+        })
+        resume_run_id = st.selectbox(
+            "Yarım Kalan Çalıştırmaya Devam Et", list(run_labels), format_func=run_labels.get,
+            help="Seçilirse çalıştırmanın kendi modu ve ayarları kullanılır; tamamlanmış ürün aşamaları tekrar çalıştırılmaz."
+        ) or None
+        if resume_run_id and async_selected:
+            st.warning("⚠️ Yarım kalan çalıştırmalar yalnızca thread tabanlı çalıştırıcıyla devam ettirilebilir; asenkron mod bu görevde kullanılmayacak.")
 
     if st.button("🚀 Genel Senkronizasyonu Başlat", type="primary", use_container_width=True, disabled=not sync_ready):
         st.session_state.sync_running = True
@@ -209,12 +255,23 @@ else:
             'test_mode': test_mode, 
             'max_workers': max_workers, 
             'sync_mode': sync_mode,
-            'progress_callback': st.session_state.progress_queue.put,
+            'force_full': force_full,
+            'resume_run_id': resume_run_id,
+            'time_budget_seconds': time_budget_minutes * 60 or None,
+            'progress_callback': ProgressBus().subscribe(st.session_state.progress_queue.put),
             'stop_event': st.session_state.stop_sync_event
         }
         
+        sync_target = sync_products_from_sentos_api
+        if async_selected and not resume_run_id:
+            sync_target = sync_products_from_sentos_api_async
+            thread_kwargs.pop('max_workers')
+            thread_kwargs.pop('force_full')
+            thread_kwargs.pop('resume_run_id')
+            thread_kwargs.pop('time_budget_seconds')
+        
         thread = threading.Thread(
-            target=sync_products_from_sentos_api, 
+            target=sync_target, 
             kwargs=thread_kwargs, 
             daemon=True
         )
@@ -241,7 +298,7 @@ else:
                 'sentos_cookie': st.session_state.sentos_cookie,
                 'test_mode': missing_test_mode, 
                 'max_workers': max_workers,
-                'progress_callback': st.session_state.progress_queue.put,
+                'progress_callback': ProgressBus().subscribe(st.session_state.progress_queue.put),
                 'stop_event': st.session_state.stop_sync_event
             }
             
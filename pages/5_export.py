@@ -42,6 +42,9 @@ def _get_apparel_sort_key(size_str):
 def get_collections(_shopify_api):
     return _shopify_api.get_all_collections()
 
+# Bu sayıdan fazla model kodu için katalog anlık görüntüsü tek tek SKU isteklerinden ucuzdur
+SNAPSHOT_MIN_CODES = 50
+
 def get_sentos_data_by_base_code(sentos_api, model_codes_to_fetch):
     """
     # GÜNCELLENDİ:
@@ -57,10 +60,16 @@ def get_sentos_data_by_base_code(sentos_api, model_codes_to_fetch):
     # GÜNCELLENDİ: Progress bar metni güncellendi.
     progress_bar = st.progress(0, "Sentos'tan alış ve satış fiyatları çekiliyor...")
     
+    # Çok sayıda kod için tek tek istek atmak yerine paylaşılan katalog anlık görüntüsü kullanılır
+    use_snapshot = sentos_api.catalog.is_fresh() or total_codes >= SNAPSHOT_MIN_CODES
+    if use_snapshot and not sentos_api.catalog.is_fresh():
+        progress_bar.progress(0, "Sentos kataloğu indiriliyor (anlık görüntü)...")
+        sentos_api.catalog.get_products()
+    
     for i, code in enumerate(unique_model_codes):
         if not code: continue
         try:
-            sentos_product = sentos_api.get_product_by_sku(code)
+            sentos_product = sentos_api.catalog.find_by_sku(code) if use_snapshot else sentos_api.get_product_by_sku(code)
             if sentos_product:
                 # Alış Fiyatı (purchase_price) bulma mantığı
                 purchase_price = None
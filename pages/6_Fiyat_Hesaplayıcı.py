@@ -22,9 +22,14 @@ logging.basicConfig(
 
 # gsheets_manager.py'den gerekli fonksiyonları içe aktar
 from operations.price_sync import SmartRateLimiter, update_prices_for_single_product
+from operations.price_ledger import PriceLedger
+from operations.pricing_engine import (
+    PricingEngine, CATEGORY_COL, ROUNDING_NONE, ROUNDING_UP, ROUNDING_DOWN, discount_columns, wholesale_columns
+)
 from gsheets_manager import load_pricing_data_from_gsheets, save_pricing_data_to_gsheets
 from connectors.shopify_api import ShopifyAPI
 from connectors.sentos_api import SentosAPI
+from operations.progress_bus import ProgressBus, product_event
 from data_manager import load_user_data
 from config_manager import load_all_user_keys
 
@@ -120,7 +125,8 @@ def process_sentos_data(product_list):
         except (ValueError, TypeError):
             main_purchase_price = 0.0
         main_products_rows.append({
-            'MODEL KODU': main_sku, 'ÜRÜN ADI': main_name, 'ALIŞ FİYATI': main_purchase_price
+            'MODEL KODU': main_sku, 'ÜRÜN ADI': main_name, 'ALIŞ FİYATI': main_purchase_price,
+            'KATEGORİ': str(p.get('category') or '').strip()
         })
         variants = p.get('variants', [])
         if not variants:
@@ -161,17 +167,6 @@ def process_sentos_data(product_list):
 
     return df_variants, df_main_products
 
-def apply_rounding(price, method):
-    if method == "Yukarı Yuvarla":
-        if price % 10 != 9.99 and price % 10 != 9: 
-            return math.floor(price / 10) * 10 + 9.99
-        elif price % 1 == 0: 
-            return price - 0.01
-        return price
-    elif method == "Aşağı Yuvarla":
-        return math.floor(price / 10) * 10 - 0.01 if price > 10 else 9.99
-    return price
-
 # --- Session State Başlatma ---
 st.session_state.setdefault('calculated_df', None)
 st.session_state.setdefault('df_for_display', None)
@@ -184,81 +179,10 @@ st.session_state.setdefault('sync_results', None)
 st.session_state.setdefault('last_failed_skus', [])
 st.session_state.setdefault('last_update_results', {})
 
-def _process_one_product_for_price_sync(shopify_api, product_base_sku, all_variants_df, price_data_df, price_col, compare_col, rate_limiter):
-    """
-    GraphQL ile optimize edilmiş tek ürün işleme fonksiyonu.
-    Tek GraphQL call ile hem ürün hem varyantları al ve güncelle.
-    """
-    try:
-        # İlk önce fiyat verisini kontrol et
-        price_row = price_data_df.loc[price_data_df['MODEL KODU'] == product_base_sku]
-        if price_row.empty:
-            return {"status": "skipped", "reason": f"Fiyat bulunamadı: {product_base_sku}"}
-        
-        price_to_set = price_row.iloc[0][price_col]
-        compare_price_to_set = price_row.iloc[0].get(compare_col)
-
-        # GraphQL ile ürün ve tüm varyantlarını al
-        query = """
-        query getProductWithVariants($query: String!) {
-            products(first: 1, query: $query) {
-                edges {
-                    node {
-                        id
-                        variants(first: 100) {
-                            edges {
-                                node {
-                                    id
-                                    sku
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }
-        """
-        
-        rate_limiter.wait()
-        result = shopify_api.execute_graphql(query, {"query": f"sku:{product_base_sku}*"})
-        
-        product_edges = result.get("products", {}).get("edges", [])
-        if not product_edges:
-            return {"status": "failed", "reason": f"Shopify'da ürün bulunamadı: {product_base_sku}"}
-        
-        product = product_edges[0]['node']
-        product_id = product['id']
-        
-        # Base SKU ile başlayan varyantları filtrele ve updates hazırla
-        updates = []
-        for v_edge in product.get('variants', {}).get('edges', []):
-            variant = v_edge['node']
-            variant_sku = variant.get('sku', '')
-            
-            if variant_sku.startswith(product_base_sku):
-                payload = {
-                    "id": variant['id'],
-                    "price": f"{price_to_set:.2f}"
-                }
-                if compare_price_to_set is not None and pd.notna(compare_price_to_set):
-                    payload["compareAtPrice"] = f"{compare_price_to_set:.2f}"
-                updates.append(payload)
-
-        if not updates:
-            return {"status": "skipped", "reason": "Eşleşen varyant bulunamadı."}
-
-        # GraphQL bulk mutation ile fiyatları güncelle
-        from operations.price_sync import update_prices_for_single_product
-        return update_prices_for_single_product(shopify_api, product_id, updates, rate_limiter)
-
-    except Exception as e:
-        return {"status": "failed", "reason": str(e)}
-
-
 def _run_price_sync(
     shopify_store, shopify_token, 
     calculated_df, retail_df, variants_df, 
-    update_choice, worker_count, queue, **kwargs
+    update_choice, worker_count, queue, dry_run=False, **kwargs
 ):
     """
     10 WORKER OPTİMİZE EDİLMİŞ: Hızlı ve throttle-safe
@@ -273,7 +197,8 @@ def _run_price_sync(
         
         import pandas as pd
         
-        shopify_api = ShopifyAPI(shopify_store, shopify_token)
+        # Bağlantı havuzu worker sayısı kadar keep-alive bağlantı tutar
+        shopify_api = ShopifyAPI(shopify_store, shopify_token, pool_size=actual_worker_count)
         
         price_data_df = retail_df if update_choice == "İndirimli Fiyatlar" else calculated_df
         price_col = 'İNDİRİMLİ SATIŞ FİYATI' if update_choice == "İndirimli Fiyatlar" else 'NIHAI_SATIS_FIYATI'
@@ -288,84 +213,74 @@ def _run_price_sync(
         if total_products == 0:
             raise ValueError("Güncellenecek ürün bulunamadı.")
             
+        # Ürün/varyant eşleşmeleri kalıcı dizinden okunur; dizin yalnızca değişikliklerle güncellenir
+        queue.put({'progress': 3, 'message': 'Shopify ürün dizini güncelleniyor...'})
+        shopify_api.get_product_index().refresh(shopify_api)
+
         queue.put({'progress': 5, 'message': f'{total_products} ürün için 10-Worker sistemi başlatılıyor...'})
-        
+
         processed_products, success_count, failed_count = 0, 0, 0
+        skipped_writes, planned_writes = 0, 0
         failed_details = []
         start_time = time.time()
         
-        # Smart rate limiter - 10 worker için optimize edilmiş
+        # Mağaza başına paylaşılan GraphQL maliyet bütçesi (tüm worker'lar ortak kullanır)
         from operations.price_sync import SmartRateLimiter
-        rate_limiter = SmartRateLimiter(max_requests_per_second=2.5, burst_capacity=15)
+        rate_limiter = SmartRateLimiter(shopify_api=shopify_api)
         
-        with ThreadPoolExecutor(max_workers=actual_worker_count) as executor:
-            from operations.price_sync import _process_one_product_for_price_sync
-            
-            futures = {
-                executor.submit(
-                    _process_one_product_for_price_sync, 
-                    shopify_api, row['base_sku'], variants_df, 
-                    price_data_df, price_col, compare_col, rate_limiter
-                ): row['base_sku'] 
-                for index, row in products_to_update_df.iterrows()
-            }
-            
-            for future in as_completed(futures):
-                processed_products += 1
-                base_sku = futures[future]
-                
-                try:
-                    result = future.result()
-                    
-                    if result.get('status') == 'success':
-                        success_count += 1
-                        queue.put({
-                            'log_detail': f"✅ {base_sku}: {result.get('updated_count', 0)} varyant güncellendi"
-                        })
-                    else:
-                        failed_count += 1
-                        failed_details.append({
-                            "sku": base_sku,
-                            "status": "failed",
-                            "reason": result.get('reason', 'Bilinmeyen hata')
-                        })
-                        queue.put({
-                            'log_detail': f"❌ {base_sku}: {result.get('reason', 'Bilinmeyen hata')}"
-                        })
-                        
-                except Exception as e:
-                    failed_count += 1
-                    failed_details.append({
-                        "sku": base_sku,
-                        "status": "failed", 
-                        "reason": f"Worker hatası: {str(e)}"
-                    })
-                    queue.put({
-                        'log_detail': f"❌ {base_sku}: Worker hatası - {str(e)}"
-                    })
-                
-                # Gerçek zamanlı istatistikler
-                elapsed_time = time.time() - start_time
-                if elapsed_time > 0:
-                    rate = processed_products / elapsed_time
-                    eta_minutes = (total_products - processed_products) / max(rate, 0.1) / 60
+        # Fiyatlar ve varyant ID'leri tek seferde eşlenir; worker'lar yalnızca mutation gönderir
+        from operations.price_sync import iter_price_pushes
+        pushes = iter_price_pushes(
+            shopify_api, price_data_df, price_col, compare_col,
+            products_to_update_df['base_sku'].tolist(), rate_limiter, max_workers=actual_worker_count,
+            ledger=PriceLedger(shopify_store), dry_run=dry_run,
+            variant_bases=dict(zip(variants_df['MODEL KODU'], variants_df['base_sku']))
+        )
+        for base_sku, result in pushes:
+            processed_products += 1
+            skipped_writes += result.get('skipped_count', 0)
+            planned_writes += result.get('would_update', 0)
+
+            if result.get('status') == 'success':
+                success_count += 1
+                if result.get('dry_run'):
+                    message = f"{result['would_update']} varyant güncellenecek (deneme)"
+                elif result.get('updated_count'):
+                    message = f"{result['updated_count']} varyant güncellendi"
                 else:
-                    rate = 0
-                    eta_minutes = 0
-                
-                progress_percent = 10 + int((processed_products / total_products) * 85)
-                queue.put({
-                    'progress': progress_percent,
-                    'message': f'10-Worker: {processed_products}/{total_products} (✅{success_count} ❌{failed_count})',
-                    'stats': {
-                        'processed': processed_products,
-                        'total': total_products,
-                        'success': success_count,
-                        'failed': failed_count,
-                        'rate': rate,
-                        'eta': eta_minutes
-                    }
+                    message = "Fiyat zaten güncel"
+                queue.put({'product': product_event('updated', base_sku, base_sku, [message])})
+            else:
+                failed_count += 1
+                failed_details.append({
+                    "sku": base_sku,
+                    "status": "failed",
+                    "reason": result.get('reason', 'Bilinmeyen hata')
                 })
+                queue.put({'product': product_event('failed', base_sku, base_sku, [result.get('reason', 'Bilinmeyen hata')])})
+            
+            # Gerçek zamanlı istatistikler
+            elapsed_time = time.time() - start_time
+            if elapsed_time > 0:
+                rate = processed_products / elapsed_time
+                eta_minutes = (total_products - processed_products) / max(rate, 0.1) / 60
+            else:
+                rate = 0
+                eta_minutes = 0
+            
+            progress_percent = 10 + int((processed_products / total_products) * 85)
+            queue.put({
+                'progress': progress_percent,
+                'message': f'10-Worker: {processed_products}/{total_products} (✅{success_count} ❌{failed_count})',
+                'stats': {
+                    'processed': processed_products,
+                    'total': total_products,
+                    'success': success_count,
+                    'failed': failed_count,
+                    'rate': rate,
+                    'eta': eta_minutes
+                }
+            })
 
         # Final sonuçlar
         total_time = time.time() - start_time
@@ -378,7 +293,12 @@ def _run_price_sync(
                 "failed": failed_count, 
                 "details": failed_details,
                 "avg_rate": f"{avg_rate:.2f} ürün/sn",
-                "total_time": f"{total_time:.1f} saniye"
+                "total_time": f"{total_time:.1f} saniye",
+                "connections": shopify_api.get_connection_stats(),
+                "mutations": shopify_api.get_write_batcher_stats(),
+                "skipped_writes": skipped_writes,
+                "planned_writes": planned_writes,
+                "dry_run": dry_run
             }
         })
 
@@ -412,7 +332,8 @@ if st.session_state.df_for_display is None:
                     st.session_state.sentos_api_secret, 
                     st.session_state.sentos_cookie
                 )
-                all_products = sentos_api.get_all_products(progress_callback=progress_callback)
+                # Paylaşılan katalog anlık görüntüsü taze ise Sentos'tan tekrar indirilmez
+                all_products = sentos_api.catalog.get_products(progress_callback=progress_callback)
                 progress_bar.progress(100, text="Veriler işleniyor ve gruplanıyor...")
                 if not all_products:
                     st.error("❌ Sentos API'den hiç ürün verisi gelmedi.")
@@ -471,17 +392,30 @@ if st.session_state.df_for_display is not None and not st.session_state.update_i
         markup_value = c1.number_input("Değer", min_value=0.0, value=100.0 if markup_type == "Yüzde Ekle (%)" else 2.5, step=0.1, key="markup_value")
         add_vat = c2.checkbox("Satışa KDV Dahil Et", value=True, key="add_vat")
         vat_rate = c2.number_input("KDV Oranı (%)", 0, 100, 10, disabled=not add_vat, key="vat_rate")
-        rounding_method_text = c3.radio("Fiyat Yuvarlama", ["Yok", "Yukarı (X9.99)", "Aşağı (X9.99)"], index=1, key="rounding")
+        rounding_options = {"Yok": ROUNDING_NONE, "Yukarı (X9.99)": ROUNDING_UP, "Aşağı (X9.99)": ROUNDING_DOWN}
+        rounding_method_text = c3.radio("Fiyat Yuvarlama", list(rounding_options), index=1, key="rounding")
+
+        # Kategori bazlı çarpanlar (Sentos kategorisi olan ürünlerde); 1.0 dışındakiler uygulanır
+        category_multipliers = {}
+        source_df = st.session_state.df_for_display
+        if CATEGORY_COL in source_df.columns:
+            categories = sorted(c for c in source_df[CATEGORY_COL].dropna().astype(str).unique() if c)
+            if categories:
+                with st.expander("Kategori Çarpanları", expanded=False):
+                    edited = st.data_editor(
+                        pd.DataFrame({'Kategori': categories, 'Çarpan': [1.0] * len(categories)}),
+                        disabled=['Kategori'], hide_index=True, use_container_width=True, key="category_multipliers"
+                    )
+                    category_multipliers = {
+                        row['Kategori']: float(row['Çarpan']) for _, row in edited.iterrows() if row['Çarpan'] != 1.0
+                    }
+
         if c4.button("💰 Fiyatları Hesapla", type="primary", use_container_width=True):
-            df = st.session_state.df_for_display.copy()
-            df['SATIS_FIYATI_KDVSIZ'] = df['ALIŞ FİYATI'] * (1 + markup_value / 100) if markup_type == "Yüzde Ekle (%)" else df['ALIŞ FİYATI'] * markup_value
-            df['SATIS_FIYATI_KDVLI'] = df['SATIS_FIYATI_KDVSIZ'] * (1 + vat_rate / 100) if add_vat else df['SATIS_FIYATI_KDVSIZ']
-            rounding_method_arg = rounding_method_text.replace(" (X9.99)", "").replace("Aşağı", "Aşağı Yuvarla").replace("Yukarı", "Yukarı Yuvarla")
-            df['NIHAI_SATIS_FIYATI'] = df['SATIS_FIYATI_KDVLI'].apply(lambda p: apply_rounding(p, rounding_method_arg))
-            revenue = df['NIHAI_SATIS_FIYATI'] / (1 + vat_rate / 100) if add_vat else df['NIHAI_SATIS_FIYATI']
-            df['KÂR'] = revenue - df['ALIŞ FİYATI']
-            df['KÂR ORANI (%)'] = np.divide(df['KÂR'], df['ALIŞ FİYATI'], out=np.zeros_like(df['KÂR']), where=df['ALIŞ FİYATI']!=0) * 100
-            st.session_state.calculated_df = df
+            engine = PricingEngine.from_settings(
+                'percent' if markup_type == "Yüzde Ekle (%)" else 'multiplier', markup_value,
+                add_vat, vat_rate, rounding_options[rounding_method_text], category_multipliers
+            )
+            st.session_state.calculated_df = engine.evaluate(source_df)
             st.toast("Fiyatlar hesaplandı.")
             st.rerun()
 
@@ -500,12 +434,9 @@ if st.session_state.calculated_df is not None:
     
     with st.expander("Tablo 2: Perakende İndirim Analizi", expanded=True):
         retail_discount = st.slider("İndirim Oranı (%)", 0, 50, 10, 5, key="retail_slider")
-        retail_df = df.copy()
-        retail_df['İNDİRİM ORANI (%)'] = retail_discount
-        retail_df['İNDİRİMLİ SATIŞ FİYATI'] = retail_df['NIHAI_SATIS_FIYATI'] * (1 - retail_discount / 100)
-        revenue_after_discount = retail_df['İNDİRİMLİ SATIŞ FİYATI'] / (1 + vat_rate / 100)
-        retail_df['İNDİRİM SONRASI KÂR'] = revenue_after_discount - retail_df['ALIŞ FİYATI']
-        retail_df['İNDİRİM SONRASI KÂR ORANI (%)'] = np.divide(retail_df['İNDİRİM SONRASI KÂR'], retail_df['ALIŞ FİYATI'], out=np.zeros_like(retail_df['İNDİRİM SONRASI KÂR']), where=retail_df['ALIŞ FİYATI']!=0) * 100
+        final_prices = df['NIHAI_SATIS_FIYATI'].to_numpy(dtype=float)
+        costs = df['ALIŞ FİYATI'].to_numpy(dtype=float)
+        retail_df = df.assign(**discount_columns(final_prices, costs, retail_discount, vat_rate))
         st.session_state.retail_df = retail_df
         discount_df_display = retail_df[['MODEL KODU', 'ÜRÜN ADI', 'NIHAI_SATIS_FIYATI', 'İNDİRİM ORANI (%)', 'İNDİRİMLİ SATIŞ FİYATI', 'İNDİRİM SONRASI KÂR', 'İNDİRİM SONRASI KÂR ORANI (%)']]
         st.dataframe(discount_df_display.style.format({
@@ -515,15 +446,13 @@ if st.session_state.calculated_df is not None:
     
     with st.expander("Tablo 3: Toptan Satış Fiyat Analizi", expanded=True):
         wholesale_method = st.radio("Toptan Fiyat Yöntemi", ('Çarpanla', 'İndirimle'), horizontal=True, key="ws_method")
-        wholesale_df = df.copy()
         if wholesale_method == 'Çarpanla':
             ws_multiplier = st.number_input("Toptan Çarpanı", 1.0, 5.0, 1.8, 0.1)
-            wholesale_df["TOPTAN FİYAT (KDV'siz)"] = wholesale_df["ALIŞ FİYATI"] * ws_multiplier
+            ws_columns = wholesale_columns(final_prices, costs, 'multiplier', ws_multiplier, vat_rate)
         else:
             ws_discount = st.slider("Perakende Fiyatından İndirim (%)", 10, 70, 40, 5, key="ws_discount")
-            wholesale_df["TOPTAN FİYAT (KDV'siz)"] = (wholesale_df["NIHAI_SATIS_FIYATI"] / (1 + vat_rate / 100)) * (1 - ws_discount / 100)
-        wholesale_df["TOPTAN FİYAT (KDV'li)"] = wholesale_df["TOPTAN FİYAT (KDV'siz)"] * (1 + vat_rate / 100)
-        wholesale_df['TOPTAN KÂR'] = wholesale_df["TOPTAN FİYAT (KDV'siz)"] - wholesale_df["ALIŞ FİYATI"]
+            ws_columns = wholesale_columns(final_prices, costs, 'discount', ws_discount, vat_rate)
+        wholesale_df = df.assign(**ws_columns)
         wholesale_df_display = wholesale_df[['MODEL KODU', 'ÜRÜN ADI', 'NIHAI_SATIS_FIYATI', "TOPTAN FİYAT (KDV'siz)", "TOPTAN FİYAT (KDV'li)", 'TOPTAN KÂR']]
         st.dataframe(wholesale_df_display.style.format({
             'NIHAI_SATIS_FIYATI': '{:,.2f} ₺', "TOPTAN FİYAT (KDV'siz)": '{:,.2f} ₺', "TOPTAN FİYAT (KDV'li)": '{:,.2f} ₺', 'TOPTAN KÂR': '{:,.2f} ₺'
@@ -624,6 +553,11 @@ if st.session_state.calculated_df is not None:
         )
         
         update_choice = st.selectbox("Hangi Fiyat Listesini Göndermek İstersiniz?", ["Ana Fiyatlar", "İndirimli Fiyatlar"])
+        dry_run = st.checkbox(
+            "🧪 Deneme çalıştırması (Shopify'a yazma)",
+            value=False,
+            help="Yalnızca kaç varyantın değişeceğini ve kaç yazımın atlanacağını raporlar"
+        )
         
         if continue_from_last and 'last_update_results' in st.session_state and not st.session_state.update_in_progress:
             last_results = st.session_state.last_update_results
@@ -656,7 +590,9 @@ if st.session_state.calculated_df is not None:
                     "last_failed_skus": st.session_state.get('last_failed_skus', []),
                     "worker_count": worker_count,
                     "retry_count": retry_count,
-                    "queue": st.session_state.sync_progress_queue
+                    "dry_run": dry_run,
+                    # Ürün olayları ve istatistikler 250 ms'lik anlık görüntülerle kuyruğa düşer
+                    "queue": ProgressBus().subscribe(st.session_state.sync_progress_queue.put)
                 }
 
                 thread = threading.Thread(
@@ -701,9 +637,12 @@ if st.session_state.update_in_progress:
                 eta_metric.metric("Tahmini Süre", f"{stats.get('eta', 0):.1f} dakika")
                 status_metric.metric("İşlem", f"%{update_data.get('progress', 0)}")
                 
-            if "log_detail" in update_data:
-                st.session_state.sync_log_list.insert(0, f"<div>{update_data['log_detail']}</div>")
-                log_html = "".join(st.session_state.sync_log_list[:30])
+            if update_data.get("products"):
+                for event in update_data["products"]:
+                    icon = "✅" if event.get('status') == 'updated' else "❌"
+                    st.session_state.sync_log_list.insert(0, f"<div>{icon} {event.get('sku')}: {'; '.join(event.get('changes', []))}</div>")
+                del st.session_state.sync_log_list[30:]
+                log_html = "".join(st.session_state.sync_log_list)
                 log_placeholder.markdown(
                     f'''<div style="height:150px;overflow-y:auto;border:1px solid #444;background:#1e1e1e;padding:10px;border-radius:5px;font-family:monospace;font-size:12px;color:#00ff00;">{log_html}</div>''', 
                     unsafe_allow_html=True
@@ -746,6 +685,12 @@ if st.session_state.sync_results:
         success_rate = (all_results.get('success', 0) / total_variants * 100) if total_variants > 0 else 0
         st.metric("Başarı Oranı", f"{success_rate:.1f}%")
     
+    if all_results.get('dry_run'):
+        st.info(f"🧪 Deneme çalıştırması: {all_results.get('planned_writes', 0)} varyant yazılacaktı, "
+                f"{all_results.get('skipped_writes', 0)} varyantın fiyatı zaten güncel olduğu için atlanacaktı.")
+    elif all_results.get('skipped_writes'):
+        st.info(f"⏭️ {all_results['skipped_writes']} varyantın fiyatı zaten güncel olduğu için gönderilmedi.")
+
     if all_results.get('failed', 0) > 0:
         st.error(f"❌ {all_results.get('failed', 0)} varyant güncellenemedi.")
         col1, col2 = st.columns(2)
@@ -83,7 +83,8 @@ if st.button("🚀 Stokları Güncelle ve Sırala", type="primary", use_containe
         collection_id = collections_map[selected_collection_title]
         
         with st.spinner(f"**{selected_collection_title}** koleksiyonundaki ürünler alınıyor..."):
-            products = shopify_api.get_products_in_collection_with_inventory(collection_id)
+            # Büyük koleksiyonlar tek bir Shopify bulk işlemiyle okunur
+            products = shopify_api.get_products_in_collection_with_inventory(collection_id, use_bulk=True)
 
         if not products:
             st.warning(f"**{selected_collection_title}** koleksiyonunda hiç ürün bulunamadı.")
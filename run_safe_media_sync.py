@@ -6,6 +6,7 @@ import sys
 import logging
 import time
 from datetime import datetime
+from itertools import islice
 
 # Logging ayarla
 logging.basicConfig(
@@ -59,14 +60,13 @@ def main():
         def progress_callback(update):
             logging.info(f"İlerleme: {update.get('message', 'İşleniyor...')}")
         
-        all_products = sentos_api.get_all_products(progress_callback=progress_callback)
+        # Ürün sayısını sınırla - yalnızca gereken sayfalar çekilir
+        products_to_sync = list(islice(sentos_api.catalog.iter_products(progress_callback=progress_callback), max_products))
         
-        if not all_products:
+        if not products_to_sync:
             logging.error("Sentos'tan ürün alınamadı")
             sys.exit(1)
         
-        # Ürün sayısını sınırla
-        products_to_sync = all_products[:max_products]
         logging.info(f"İşlenecek ürün sayısı: {len(products_to_sync)}")
         
         # Stats
@@ -78,6 +78,10 @@ def main():
             'skipped': 0
         }
         
+        # Ürün eşleşmeleri kalıcı dizinden okunur (tek bulk/artımlı yenileme)
+        product_index = shopify_api.get_product_index()
+        product_index.refresh(shopify_api, progress_callback=progress_callback)
+        
         start_time = time.time()
         
         # Her ürün için medya sync
@@ -89,15 +93,14 @@ def main():
             
             try:
                 # Shopify'da ürünü bul
-                shopify_products = shopify_api.get_variant_ids_by_skus([product_sku], search_by_product_sku=True)
+                shopify_product = product_index.find_product(sentos_product)
                 
-                if not shopify_products:
+                if not shopify_product:
                     logging.warning(f"Ürün Shopify'da bulunamadı: {product_sku}")
                     stats['skipped'] += 1
                     continue
                 
-                # İlk eşleşen ürünün product_id'sini al
-                product_gid = list(shopify_products.values())[0]['product_id']
+                product_gid = shopify_product['gid']
                 
                 # Medya senkronizasyonu yap - GÜVENLİ MODDA
                 changes = sync_media(
@@ -12,6 +12,8 @@ project_path = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_path)
 
 from sync_runner import sync_products_from_sentos_api
+from operations.sync_checkpoint import SyncCheckpoint
+from operations.progress_bus import ProgressBus, CHANNEL_STATS, CHANNEL_PRODUCTS
 
 # GitHub Actions için gelişmiş loglama
 logging.basicConfig(
@@ -22,18 +24,34 @@ logging.basicConfig(
     ]
 )
 
+# CI günlüğüne istatistik ve ürün satırlarının yazılma aralıkları (saniye)
+STATS_PRINT_INTERVAL = 10
+PRODUCTS_PRINT_INTERVAL = 2
+
 def main():
     """
     10-worker sistemi ile zamanlanmış senkronizasyon
     """
     
-    sync_mode_to_run = os.getenv("SYNC_MODE", "Sadece Stok ve Varyantlar")
+    sync_mode_to_run = os.getenv("SYNC_MODE", "Sadece Stok (Katalog Geneli Hızlı)")
     max_workers = int(os.getenv("MAX_WORKERS", "8"))  # GitHub Actions için konservatif
+    # Değişmeyen ürünleri de göndermek için (delta filtresini kapatır)
+    force_full = os.getenv("FORCE_FULL_SYNC", "false").lower() in ("1", "true", "yes")
+    # İsteğe bağlı: son tam geçişin üzerinden bu kadar saat geçtiyse değişmeyenler de gönderilir (boş = kapalı)
+    full_pass_interval_hours = float(os.getenv("FULL_PASS_INTERVAL_HOURS", "0") or 0) or None
+    # Yarım kalan bir çalıştırmaya devam etmek için: çalıştırma kimliği veya 'auto'
+    resume_run_id = os.getenv("RESUME_RUN_ID", "").strip() or None
+    timeout = 5400  # 90 dakika timeout
+    # Gönderim bu bütçe dolmadan durur; kalan süre yoldaki işlerin bitmesine ve raporlamaya kalır
+    time_budget_minutes = float(os.getenv("SYNC_TIME_BUDGET_MINUTES", "80"))
     
     print(f"🚀 GitHub Actions 10-Worker Sync başlıyor...")
     print(f"📅 Timestamp: {datetime.now().isoformat()}")
     print(f"📋 Mode: {sync_mode_to_run}")
     print(f"👥 Workers: {max_workers}")
+    print(f"🔁 Force full pass: {force_full} (interval: {f'{full_pass_interval_hours:g} h' if full_pass_interval_hours else '-'})")
+    print(f"⏯️  Resume run: {resume_run_id or '-'}")
+    print(f"⏱️  Time budget: {time_budget_minutes:g} min (hard timeout {timeout // 60} min)")
 
     # GitHub Secrets'tan ayarları oku
     config = {
@@ -51,29 +69,51 @@ def main():
         logging.error(f"❌ Eksik GitHub Secrets: {', '.join(missing_keys)}")
         sys.exit(1)
 
+    # 'auto': aynı moddaki en son tamamlanmamış çalıştırma (yoksa yeni çalıştırma başlar)
+    if resume_run_id and resume_run_id.lower() == "auto":
+        incomplete = [r for r in SyncCheckpoint.list_runs(config["store_url"]) if r['sync_mode'] == sync_mode_to_run]
+        resume_run_id = incomplete[0]['run_id'] if incomplete else None
+        print(f"⏯️  Auto resume: {resume_run_id or 'devam edilecek çalıştırma yok, yeni çalıştırma başlıyor'}")
+
     try:
         # Progress tracking için queue ve event
         progress_queue = queue.Queue()
         stop_event = threading.Event()
         sync_completed = False
         sync_results = None
+        run_state = {'run_id': resume_run_id}
         
-        def sync_progress_callback(update):
-            progress_queue.put(update)
-            
-            # Console output için
-            if 'message' in update:
-                print(f"Progress: {update['message']}")
-            if 'log_detail' in update:
-                clean_log = re.sub('<[^<]+?>', '', update['log_detail'])
-                if clean_log.strip():
-                    print(f"Detail: {clean_log.strip()}")
-            if 'stats' in update:
-                stats = update['stats']
+        # Konsol çıktısı olay başına değil, aralıklı anlık görüntülerle yazılır
+        def print_stats(snapshot):
+            if snapshot.get('run_id'):
+                run_state['run_id'] = snapshot['run_id']
+            if 'message' in snapshot:
+                print(f"Progress: {snapshot['message']}")
+            if 'stats' in snapshot:
+                stats = snapshot['stats']
                 print(f"Stats: {stats.get('processed', 0)}/{stats.get('total', 0)} "
                       f"(✅{stats.get('created', 0)+stats.get('updated', 0)} "
                       f"❌{stats.get('failed', 0)})")
 
+        def print_products(snapshot):
+            events = snapshot.get('products', [])
+            # Başarılı ürünler yalnızca sayılır; hatalar ve bilgi satırları tek tek yazılır
+            for event in events:
+                if 'html' in event:
+                    clean_log = re.sub('<[^<]+?>', '', event['html']).strip()
+                    if clean_log:
+                        print(f"Detail: {clean_log}")
+                elif event.get('status') in ('failed', 'info'):
+                    print(f"Detail: {event.get('status')} {event.get('name')} (SKU: {event.get('sku')}) - {'; '.join(event.get('changes', []))}")
+            done = sum(1 for e in events if e.get('status') in ('created', 'updated', 'skipped'))
+            if done or snapshot.get('dropped_products'):
+                print(f"Detail: +{done + snapshot.get('dropped_products', 0)} ürün işlendi")
+
+        progress_bus = ProgressBus()
+        progress_bus.subscribe(progress_queue.put, channels=())
+        progress_bus.subscribe(print_stats, channels=(CHANNEL_STATS,), interval=STATS_PRINT_INTERVAL)
+        progress_bus.subscribe(print_products, channels=(CHANNEL_PRODUCTS,), interval=PRODUCTS_PRINT_INTERVAL)
+
         def sync_worker():
             nonlocal sync_completed, sync_results
             try:
@@ -85,10 +125,14 @@ def main():
                     sentos_api_secret=config["sentos_api_secret"],
                     sentos_cookie=config["sentos_cookie"],
                     test_mode=False,
-                    progress_callback=sync_progress_callback,
+                    progress_callback=progress_bus,
                     stop_event=stop_event,
                     sync_mode=sync_mode_to_run,
-                    max_workers=max_workers
+                    max_workers=max_workers,
+                    force_full=force_full,
+                    full_pass_interval_hours=full_pass_interval_hours,
+                    resume_run_id=resume_run_id,
+                    time_budget_seconds=time_budget_minutes * 60 if time_budget_minutes > 0 else None
                 )
             except Exception as e:
                 logging.error(f"Sync worker error: {e}")
@@ -100,7 +144,6 @@ def main():
         
         # Progress monitoring loop
         start_time = time.time()
-        timeout = 5400  # 90 dakika timeout
         
         while not sync_completed and time.time() - start_time < timeout:
             try:
@@ -124,6 +167,14 @@ def main():
         if not sync_completed:
             logging.error("❌ Sync timeout reached")
             stop_event.set()
+            # Çalışanların elindeki işi bitirip kontrol noktasını kapatması beklenir;
+            # bir sonraki çalıştırma RESUME_RUN_ID ile kaldığı yerden devam edebilir.
+            sync_thread.join(timeout=300)
+            if 'GITHUB_OUTPUT' in os.environ and run_state['run_id']:
+                with open(os.environ['GITHUB_OUTPUT'], 'a') as f:
+                    f.write(f"sync_status=stopped\n")
+                    f.write(f"run_id={run_state['run_id']}\n")
+            print(f"⏯️  Devam etmek için RESUME_RUN_ID={run_state['run_id']}")
             sys.exit(1)
         
         # Final sonuçları raporla
@@ -139,6 +190,11 @@ def main():
             print(f"   - Updated: {stats.get('updated', 0)}")
             print(f"   - Failed: {stats.get('failed', 0)}")
             print(f"   - Skipped: {stats.get('skipped', 0)}")
+            print(f"   - Unchanged (delta): {stats.get('unchanged', 0)}")
+            print(f"   - No-op stock writes skipped: {stats.get('noop_writes', 0)}")
+            print(f"   - Resumed (already done): {stats.get('resumed', 0)}")
+            print(f"   - Deferred (time budget): {stats.get('deferred', 0)}")
+            print(f"   - Run ID: {sync_results.get('run_id', '-')}")
             
             # GitHub Actions output
             if 'GITHUB_OUTPUT' in os.environ:
@@ -147,6 +203,10 @@ def main():
                     f.write(f"total_processed={stats.get('processed', 0)}\n")
                     f.write(f"total_updated={stats.get('updated', 0)}\n")
                     f.write(f"total_failed={stats.get('failed', 0)}\n")
+                    f.write(f"total_unchanged={stats.get('unchanged', 0)}\n")
+                    f.write(f"total_noop_writes={stats.get('noop_writes', 0)}\n")
+                    f.write(f"run_id={sync_results.get('run_id', '')}\n")
+                    f.write(f"total_deferred={stats.get('deferred', 0)}\n")
             
             # Hata varsa exit code 1
             if stats.get('failed', 0) > 0:
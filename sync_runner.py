@@ -5,12 +5,19 @@ import threading
 import time
 import json
 from datetime import timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import traceback
+from collections import OrderedDict
 
 from connectors.shopify_api import ShopifyAPI
 from connectors.sentos_api import SentosAPI
-from operations import core_sync, media_sync, stock_sync
+from connectors.shopify_batcher import DEFAULT_MAX_IN_FLIGHT as BATCHER_MAX_IN_FLIGHT
+from operations import core_sync, media_sync, stock_sync, delta_sync
+from operations.sync_pipeline import StagedPipeline, SyncJob, SyncChanges
+from operations.sync_checkpoint import SyncCheckpoint
+from operations.location_mapping import LocationMapping
+from operations.inventory_writer import InventoryWriteAggregator, DEFAULT_MAX_IN_FLIGHT as INVENTORY_WRITER_MAX_IN_FLIGHT
+from operations.sync_scheduler import DeadlineScheduler, PriorityBuffer
+from operations.progress_bus import ensure_bus, product_event
 from utils import get_apparel_sort_key, get_variant_color, get_variant_size
 
 logging.basicConfig(
@@ -19,7 +26,18 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+# Aşama kuyruklarının worker başına derinliği (Sentos çekimi plan kuyruğu dolunca durur)
+PENDING_PER_WORKER = 2
+# Tekil SKU güncellemesinde son bulunan Shopify ürünleri (SKU → ürün) bu kadar kayıtla tutulur
+SINGLE_SKU_CACHE_SIZE = 256
+
+_single_sku_cache = OrderedDict()
+_single_sku_cache_lock = threading.Lock()
+
 def _find_shopify_product(shopify_api, sentos_product):
+    # Kalıcı ürün dizini açıksa SKU/başlık eşleştirmesi oradan yapılır
+    if shopify_api.product_index is not None:
+        return shopify_api.product_index.find_product(sentos_product)
     if sku := sentos_product.get('sku', '').strip():
         if product := shopify_api.product_cache.get(f"sku:{sku}"): return product
     if name := sentos_product.get('name', '').strip():
@@ -30,16 +48,15 @@ def _update_product(shopify_api, sentos_api, sentos_product, existing_product, s
     product_name = sentos_product.get('name', 'Bilinmeyen Ürün') 
     shopify_gid = existing_product['gid']
     logging.info(f"Mevcut ürün güncelleniyor: '{product_name}' (GID: {shopify_gid}) | Mod: {sync_mode}")
-    all_changes = []
+    all_changes = SyncChanges()
     
     if sync_mode in ["Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", "Sadece Açıklamalar"]:
-         all_changes.extend(core_sync.sync_details(shopify_api, shopify_gid, sentos_product))
-         all_changes.extend(core_sync.sync_product_type(shopify_api, shopify_gid, sentos_product))
+         all_changes.merge(core_sync.sync_details(shopify_api, shopify_gid, sentos_product))
     if sync_mode in ["Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", "Sadece Stok ve Varyantlar"]:
-        all_changes.extend(stock_sync.sync_stock_and_variants(shopify_api, shopify_gid, sentos_product))
+        all_changes.merge(stock_sync.sync_stock_and_variants(shopify_api, shopify_gid, sentos_product))
     if sync_mode in ["Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", "Sadece Resimler", "SEO Alt Metinli Resimler"]:
         set_alt = sync_mode in ["Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", "SEO Alt Metinli Resimler"]
-        all_changes.extend(media_sync.sync_media(shopify_api, sentos_api, shopify_gid, sentos_product, set_alt_text=set_alt))
+        all_changes.merge(media_sync.sync_media(shopify_api, sentos_api, shopify_gid, sentos_product, set_alt_text=set_alt))
         
     logging.info(f"✅ Ürün '{product_name}' başarıyla güncellendi.")
     return all_changes
@@ -62,215 +79,660 @@ def _calculate_price(main_product):
     return "0.00"
 
 
-def _create_product(shopify_api, sentos_api, sentos_product):
-    product_name = sentos_product.get('name', 'Bilinmeyen Ürün').strip()
-    logging.info(f"Yeni ürün oluşturuluyor ('İki Adımlı Strateji' ile): {product_name}")
-    changes = []
-    try:
-        sentos_variants = sentos_product.get('variants', []) or [sentos_product]
-        
-        # Ana üründen fiyatı hesapla
-        product_price = _calculate_price(sentos_product)
-
-        has_color_option = any(get_variant_color(v) for v in sentos_variants)
-        has_size_option = any(get_variant_size(v) for v in sentos_variants)
-        
-        product_input = {
-            "title": product_name,
-            "descriptionHtml": sentos_product.get('description_detail') or sentos_product.get('description', ''),
-            "vendor": sentos_product.get('vendor', 'Vervegrand'),
-            "productType": str(sentos_product.get('category', '')),
-            "status": "DRAFT",
+# Ürün; seçenekleri, varyantları, SKU'ları, fiyatları, stokları ve görselleriyle tek çağrıda
+# oluşturulur. synchronous: false ile Shopify işi arka planda yürütür, sonuç productOperation
+# ile izlenir (senkron mod büyük varyant sayılarında zaman aşımına uğrayabilir).
+PRODUCT_SET_MUTATION = """
+mutation productSet($input: ProductSetInput!) {
+    productSet(input: $input, synchronous: false) {
+        productSetOperation { id status userErrors { field message code } }
+        userErrors { field message code }
+    }
+}"""
+
+PRODUCT_SET_OPERATION_QUERY = """
+query productSetOperation($id: ID!) {
+    productOperation(id: $id) {
+        ... on ProductSetOperation {
+            status
+            product {
+                id title descriptionHtml productType updatedAt
+                variants(first: 250) { edges { node { id sku inventoryItem { id sku } } } }
+            }
+            userErrors { field message code }
         }
+    }
+}"""
 
-        product_options = []
+# productOperation sorgulama aralığı (her denemede artar) ve toplam bekleme sınırı
+PRODUCT_SET_POLL_INTERVAL = 1.0
+PRODUCT_SET_MAX_POLL_INTERVAL = 5.0
+PRODUCT_SET_TIMEOUT = 300
+
+def _build_product_input(sentos_product, sentos_variants):
+    """Yeni ürün iskeleti için ProductInput ve seçenek bayraklarını (renk, beden) hazırlar."""
+    product_name = sentos_product.get('name', 'Bilinmeyen Ürün').strip()
+    has_color_option = any(get_variant_color(v) for v in sentos_variants)
+    has_size_option = any(get_variant_size(v) for v in sentos_variants)
+    
+    product_input = {
+        "title": product_name,
+        "descriptionHtml": sentos_product.get('description_detail') or sentos_product.get('description', ''),
+        "vendor": sentos_product.get('vendor', 'Vervegrand'),
+        "productType": str(sentos_product.get('category', '')),
+        "status": "DRAFT",
+    }
+
+    product_options = []
+    if has_color_option:
+        colors = sorted(list(set(get_variant_color(v) for v in sentos_variants if get_variant_color(v))))
+        product_options.append({"name": "Renk", "values": [{"name": c} for c in colors]})
+    if has_size_option:
+        sizes = sorted(list(set(get_variant_size(v) for v in sentos_variants if get_variant_size(v))), key=get_apparel_sort_key)
+        product_options.append({"name": "Beden", "values": [{"name": s} for s in sizes]})
+    if product_options:
+        product_input["productOptions"] = product_options
+    return product_input, has_color_option, has_size_option
+
+def _build_variants_input(sentos_variants, has_color_option, has_size_option, product_price):
+    variants_input = []
+    for v in sentos_variants:
+        option_values = []
         if has_color_option:
-            colors = sorted(list(set(get_variant_color(v) for v in sentos_variants if get_variant_color(v))))
-            product_options.append({"name": "Renk", "values": [{"name": c} for c in colors]})
+            option_values.append({"optionName": "Renk", "name": get_variant_color(v) or "Tek Renk"})
         if has_size_option:
-            sizes = sorted(list(set(get_variant_size(v) for v in sentos_variants if get_variant_size(v))), key=get_apparel_sort_key)
-            product_options.append({"name": "Beden", "values": [{"name": s} for s in sizes]})
-        if product_options:
-            product_input["productOptions"] = product_options
-
-        create_q = "mutation productCreate($input: ProductInput!) { productCreate(input: $input) { product { id } userErrors { field message } } }"
-        created_product_data = shopify_api.execute_graphql(create_q, {'input': product_input}).get('productCreate', {})
-        
-        if not created_product_data.get('product'):
-            errors = created_product_data.get('userErrors', [])
-            raise Exception(f"Ürün iskeleti oluşturulamadı: {errors}")
+            option_values.append({"optionName": "Beden", "name": get_variant_size(v) or "Tek Beden"})
         
-        product_gid = created_product_data['product']['id']
-        changes.append(f"Ana ürün '{product_name}' DRAFT olarak oluşturuldu.")
-        logging.info(f"Ürün iskeleti oluşturuldu (GID: {product_gid}).")
-
-        variants_input = []
-        for v in sentos_variants:
-            option_values = []
-            if has_color_option:
-                option_values.append({"optionName": "Renk", "name": get_variant_color(v) or "Tek Renk"})
-            if has_size_option:
-                option_values.append({"optionName": "Beden", "name": get_variant_size(v) or "Tek Beden"})
-            
-            variants_input.append({
-                "price": product_price,  # DÜZELTME: Fiyat artık dinamik olarak atanıyor.
-                "barcode": v.get('barcode'),
-                "optionValues": option_values,
-                "inventoryItem": {
-                    "tracked": True,
-                    "sku": v.get('sku', '')
-                }
-            })
-
-        bulk_q = """
-        mutation productVariantsBulkCreate($productId: ID!, $variants: [ProductVariantsBulkInput!]!) {
-            productVariantsBulkCreate(
-                productId: $productId, 
-                variants: $variants, 
-                strategy: REMOVE_STANDALONE_VARIANT
-            ) {
-                productVariants { id sku inventoryItem { id } }
-                userErrors { field message }
+        variants_input.append({
+            "price": product_price,  # DÜZELTME: Fiyat artık dinamik olarak atanıyor.
+            "barcode": v.get('barcode'),
+            "optionValues": option_values,
+            "inventoryItem": {
+                "tracked": True,
+                "sku": v.get('sku', '')
             }
-        }"""
-        created_vars_data = shopify_api.execute_graphql(bulk_q, {'productId': product_gid, 'variants': variants_input}).get('productVariantsBulkCreate', {})
-        
-        if errors := created_vars_data.get('userErrors', []):
-            raise Exception(f"Varyantlar oluşturulamadı: {errors}")
-
-        created_variants = created_vars_data.get('productVariants', [])
-        changes.append(f"{len(created_variants)} varyant eklendi.")
-        logging.info(f"{len(created_variants)} varyant 'REMOVE_STANDALONE_VARIANT' stratejisi ile oluşturuldu.")
-
-        if created_variants:
-            stock_sync._activate_variants_at_location(shopify_api, created_variants)
-            adjustments = stock_sync._prepare_inventory_adjustments(sentos_variants, created_variants)
-            if adjustments:
-                changes.append(f"{len(adjustments)} varyantın stoğu güncellendi.")
-                stock_sync._adjust_inventory_bulk(shopify_api, adjustments)
-        
-        changes.extend(media_sync.sync_media(shopify_api, sentos_api, product_gid, sentos_product, set_alt_text=True))
-        
-        activate_q = "mutation productUpdate($input: ProductUpdateInput!) { productUpdate(input: $input) { product { id status } userErrors { field message } } }"
-        activate_result = shopify_api.execute_graphql(activate_q, {"input": {"id": product_gid, "status": "ACTIVE"}})
+        })
+    return variants_input
+
+def _build_product_set_input(sentos_product, location_id, media_urls=None, set_alt_text=True, location_mapping=None):
+    """
+    productSet için ürün, seçenek, varyant (fiyat, SKU, stok) ve görsel girdisini hazırlar.
+    Depo-lokasyon eşleştirmesi verilirse stoklar eşlenen her lokasyona ayrı yazılır.
+    (ProductSetInput, stoğu ayarlanan varyant sayısı) döndürür.
+    """
+    sentos_variants = sentos_product.get('variants', []) or [sentos_product]
+    product_input, has_color_option, has_size_option = _build_product_input(sentos_product, sentos_variants)
+    # Görseller ve stoklar aynı çağrıda geldiği için ürün doğrudan aktif oluşturulur
+    product_input["status"] = "ACTIVE"
+    variants_input = _build_variants_input(sentos_variants, has_color_option, has_size_option, _calculate_price(sentos_product))
+    if "productOptions" not in product_input:
+        # productSet her varyantın bir seçenek değeri taşımasını ister; seçeneksiz ürün Shopify varsayılanıyla oluşturulur
+        product_input["productOptions"] = [{"name": "Title", "values": [{"name": "Default Title"}]}]
+        for variant_input in variants_input:
+            variant_input["optionValues"] = [{"optionName": "Title", "name": "Default Title"}]
+
+    stocked = 0
+    for variant_input, sentos_variant in zip(variants_input, sentos_variants):
+        quantities = [
+            {"locationId": adj.get("locationId") or location_id, "name": "available", "quantity": adj["availableQuantity"]}
+            for adj in stock_sync._variant_adjustments(None, sentos_variant, location_mapping)
+        ]
+        if quantities:
+            variant_input["inventoryQuantities"] = quantities
+            stocked += 1
+    product_input["variants"] = variants_input
+
+    if media_urls:
+        product_title = product_input["title"]
+        # Görseller Sentos sırasıyla gönderildiği için sonradan yeniden sıralama gerekmez
+        product_input["files"] = [
+            {"originalSource": url, "alt": product_title if set_alt_text else url, "contentType": "IMAGE"}
+            for url in media_urls
+        ]
+    return product_input, stocked
+
+def _product_set_result(operation_id, operation):
+    """Tamamlanan productOperation yanıtından ürünü döndürür; hata varsa Exception fırlatır."""
+    if errors := operation.get('userErrors'):
+        raise Exception(f"Ürün oluşturulamadı (productSet): {errors}")
+    if not operation.get('product'):
+        raise Exception(f"Ürün oluşturma işlemi ürün döndürmedi: {operation_id}")
+    return operation['product']
+
+def _wait_for_product_set(shopify_api, operation_id):
+    """Arka plandaki productSet işlemi bitene kadar productOperation sorgular ve oluşturulan ürünü döndürür."""
+    interval, waited = PRODUCT_SET_POLL_INTERVAL, 0.0
+    while waited < PRODUCT_SET_TIMEOUT:
+        time.sleep(interval)
+        waited += interval
+        operation = shopify_api.execute_graphql(PRODUCT_SET_OPERATION_QUERY, {'id': operation_id}).get('productOperation') or {}
+        if operation.get('status') == 'COMPLETE':
+            return _product_set_result(operation_id, operation)
+        interval = min(interval * 2, PRODUCT_SET_MAX_POLL_INTERVAL)
+    raise Exception(f"Ürün oluşturma işlemi {PRODUCT_SET_TIMEOUT} sn içinde tamamlanmadı: {operation_id}")
+
+def _product_set_changes(product_name, product, stocked, media_urls):
+    changes = SyncChanges([f"Ana ürün '{product_name}' tek productSet çağrısıyla oluşturuldu."])
+    changes.append(f"{len(product.get('variants', {}).get('edges', []))} varyant eklendi.")
+    if stocked:
+        changes.append(f"{stocked} varyantın stoğu güncellendi.")
+    if media_urls is None:
+        changes.fail("Medya senkronizasyonu atlandı (Cookie eksik).")
+    elif media_urls:
+        changes.append(f"{len(media_urls)} yeni görsel eklendi.")
+    changes.append("Ürün durumu 'Aktif' olarak ayarlandı.")
+    return changes
 
-        if activate_result.get('productUpdate', {}).get('userErrors', []):
-             logging.warning(f"Ürün aktive edilirken hata oluştu: {activate_result['productUpdate']['userErrors']}")
-             changes.append("Ürün aktive edilemedi, taslak olarak kaldı.")
-        else:
-            changes.append("Ürün durumu 'Aktif' olarak ayarlandı.")
-            logging.info(f"Ürün '{product_name}' başarıyla oluşturuldu ve aktive edildi.")
-
-        return changes
+def _create_product(shopify_api, sentos_api, sentos_product):
+    product_name = sentos_product.get('name', 'Bilinmeyen Ürün').strip()
+    logging.info(f"Yeni ürün oluşturuluyor (productSet ile): {product_name}")
+    try:
+        media_urls = sentos_api.get_ordered_image_urls(sentos_product.get('id'))
+        location_mapping = getattr(shopify_api, 'location_mapping', None)
+        location_id = None if location_mapping else shopify_api.get_default_location_id()
+        product_input, stocked = _build_product_set_input(sentos_product, location_id, media_urls, location_mapping=location_mapping)
+
+        result = shopify_api.execute_graphql(PRODUCT_SET_MUTATION, {'input': product_input}).get('productSet', {})
+        operation = result.get('productSetOperation')
+        errors = result.get('userErrors') or (operation or {}).get('userErrors')
+        if errors or not operation:
+            raise Exception(f"Ürün oluşturulamadı (productSet): {errors}")
+        logging.info(f"productSet işlemi başlatıldı ({operation['id']}): {product_name}")
+        product = _wait_for_product_set(shopify_api, operation['id'])
+
+        # Yeni ürünü dizine yaz ki aynı çalıştırmadaki sonraki aramalar onu bulsun
+        if shopify_api.product_index is not None:
+            shopify_api.product_index.upsert_product(product)
+        logging.info(f"Ürün '{product_name}' başarıyla oluşturuldu ve aktive edildi (GID: {product['id']}).")
+        return _product_set_changes(product_name, product, stocked, media_urls)
 
     except Exception as e:
         logging.error(f"Ürün oluşturma hatası: {e}\n{traceback.format_exc()}")
         raise
 
-def _process_single_product(shopify_api, sentos_api, sentos_product, sync_mode, progress_callback, stats, details, lock):
-    name = sentos_product.get('name', 'Bilinmeyen Ürün')
-    sku = sentos_product.get('sku', 'SKU Yok')
-    log_entry = {'name': name, 'sku': sku}
-    try:
-        if not name.strip():
-            with lock: stats['skipped'] += 1
-            return
-        
-        existing_product = _find_shopify_product(shopify_api, sentos_product)
-        changes_made = []
-
-        if existing_product:
-            if "Sadece Eksik" not in sync_mode:
-                changes_made = _update_product(shopify_api, sentos_api, sentos_product, existing_product, sync_mode)
-                status, status_icon = 'updated', "🔄"
-                with lock: stats['updated'] += 1
-            else:
-                status, status_icon = 'skipped', "⏭️"
-                with lock: stats['skipped'] += 1
-
-        elif "Tam Senkronizasyon" in sync_mode or "Sadece Eksik" in sync_mode:
-            changes_made = _create_product(shopify_api, sentos_api, sentos_product)
-            status, status_icon = 'created', "✅"
-            with lock: stats['created'] += 1
-        else:
-            with lock: stats['skipped'] += 1
-            return
-        
-        changes_html = "".join([f'<li><small>{change}</small></li>' for change in changes_made])
-        log_html = f"""
-        <div style='border-bottom: 1px solid #444; padding-bottom: 8px; margin-bottom: 8px;'>
-            <strong>{status_icon} {status.capitalize()}:</strong> {name} (SKU: {sku})
-            <ul style='margin-top: 5px; margin-bottom: 0; padding-left: 20px;'>
-                {changes_html if changes_made else "<li><small>Değişiklik bulunamadı.</small></li>"}
-            </ul>
-        </div>
-        """
-        progress_callback({'log_detail': log_html})
-        with lock: details.append(log_entry)
+def _pipeline_branches(sync_mode):
+    """Mevcut bir ürün için moda göre çalışacak dal aşamaları (_update_product ile aynı kurallar)."""
+    branches = []
+    if sync_mode in ["Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", "Sadece Açıklamalar"]:
+        branches.append('details')
+    if sync_mode in ["Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", "Sadece Stok ve Varyantlar"]:
+        branches.append('inventory')
+    if sync_mode in ["Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", "Sadece Resimler", "SEO Alt Metinli Resimler"]:
+        branches.append('media')
+    return branches
+
+def _pipeline_workers(sync_mode, max_workers):
+    """Moda göre çalışacak aşamaların çalışan sayıları; kullanılmayan aşamalar için thread açılmaz."""
+    stages = _pipeline_branches(sync_mode)
+    if "Tam Senkronizasyon" in sync_mode or "Sadece Eksik" in sync_mode:
+        stages.append('create')
+    workers = {'plan': 2}
+    workers.update({stage: max_workers for stage in stages})
+    return workers
+
+def _http_pool_size(sync_mode, max_workers):
+    """
+    Aynı anda HTTP isteği yapabilecek thread sayısı: aşama çalışanları (plan yalnızca dizini
+    okur), yazım birleştiricisi ve stok yazıcısının eşzamanlı istekleri. Havuz bundan küçükse
+    çalışanlar bağlantı beklerken bloklanır.
+    """
+    if sync_mode == delta_sync.STOCK_FAST_MODE:
+        sync_mode = "Sadece Stok ve Varyantlar"
+    stage_threads = sum(count for stage, count in _pipeline_workers(sync_mode, max_workers).items() if stage != 'plan')
+    return max(max_workers, stage_threads) + BATCHER_MAX_IN_FLIGHT + INVENTORY_WRITER_MAX_IN_FLIGHT
+
+def _build_sync_pipeline(shopify_api, sentos_api, sync_mode, max_workers, stop_event, on_complete, stage_workers=None, checkpoint=None, force_update=False):
+    """
+    Ürün başına işleri aşamalara böler: plan (eşleştirme ve karar) → oluşturma / detaylar /
+    stok / medya. Her aşamanın kendi çalışan sayısı ve sınırlı kuyruğu vardır; yavaş medya
+    çağrıları stok yazan çalışanları meşgul etmez. Kontrol noktası verilirse hatasız biten
+    aşamalar kaydedilir ve devam edilen çalıştırmada tekrar çalıştırılmaz. force_update
+    verilirse detaylar Shopify'daki değerlerle karşılaştırılmadan yazılır.
+    """
+    set_alt = sync_mode in ["Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", "SEO Alt Metinli Resimler"]
+    branches = _pipeline_branches(sync_mode)
+
+    def plan(job):
+        if not job.name.strip():
+            job.action = 'empty'
+            return ()
+        done = checkpoint.completed_stages(delta_sync.product_key(job.product)) if checkpoint is not None else set()
+        if 'create' in done:
+            job.action = 'resumed'
+            return ()
+        job.existing = _find_shopify_product(shopify_api, job.product)
+        if job.existing:
+            if "Sadece Eksik" in sync_mode:
+                job.action = 'skipped'
+                return ()
+            remaining = [b for b in branches if b not in done]
+            if branches and not remaining:
+                job.action = 'resumed'
+                return ()
+            job.action = 'updated'
+            logging.info(f"Mevcut ürün güncelleniyor: '{job.name}' (GID: {job.existing['gid']}) | Mod: {sync_mode}")
+            return remaining
+        if "Tam Senkronizasyon" in sync_mode or "Sadece Eksik" in sync_mode:
+            job.action = 'created'
+            return ('create',)
+        job.action = 'ignored'
+        return ()
+
+    def create(job):
+        return _create_product(shopify_api, sentos_api, job.product)
+
+    def details(job):
+        return core_sync.sync_details(shopify_api, job.existing['gid'], job.product, force_update=force_update)
+
+    def inventory(job):
+        return stock_sync.sync_stock_and_variants(shopify_api, job.existing['gid'], job.product)
+
+    def media(job):
+        return media_sync.sync_media(shopify_api, sentos_api, job.existing['gid'], job.product, set_alt_text=set_alt)
+
+    def checkpointed(stage, handler):
+        if checkpoint is None:
+            return handler
+        def run(job):
+            changes = handler(job)
+            if delta_sync.push_succeeded(changes):
+                checkpoint.mark_stage(delta_sync.product_key(job.product), stage)
+            return changes
+        return run
+
+    workers = _pipeline_workers(sync_mode, max_workers)
+    handlers = {name: handler for name, handler in
+                {'create': create, 'details': details, 'inventory': inventory, 'media': media}.items() if name in workers}
+    workers.update(stage_workers or {})
+    return StagedPipeline(
+        plan, {name: checkpointed(name, handler) for name, handler in handlers.items()},
+        on_complete, stop_event, workers, queue_size=max_workers * PENDING_PER_WORKER
+    )
+
+def _finalize_job(job, delta, progress_callback, stats, details, lock):
+    """Tüm aşamaları biten ürünün sonucunu istatistiklere, rapora ve delta kaydına işler."""
+    log_entry = {'name': job.name, 'sku': job.sku}
+    if job.action in ('empty', 'ignored', 'resumed'):
+        with lock:
+            stats['resumed' if job.action == 'resumed' else 'skipped'] += 1
+            stats['processed'] += 1
+        return
+
+    if job.cancelled:
+        # Durdurma isteğiyle aşamaları çalıştırılmayan ürün atlanmış sayılır; parmak izi kaydedilmez
+        log_entry.update({'status': 'skipped', 'reason': "Senkronizasyon durdurulduğu için işlenmedi."})
+        with lock:
+            stats['skipped'] += 1
+            stats['processed'] += 1
+            details.append(log_entry)
+        return
 
-    except Exception as e:
-        error_message = f"❌ Hata: {name} (SKU: {sku}) - {e}"
-        progress_callback({'log_detail': f"<div style='color: #f48a94;'>{error_message}</div>"})
-        with lock: 
+    if job.errors:
+        reason = "; ".join(str(e) for e in job.errors)
+        progress_callback({'product': product_event('failed', job.name, job.sku, [reason])})
+        log_entry.update({'status': 'failed', 'reason': reason})
+        with lock:
             stats['failed'] += 1
-            log_entry.update({'status': 'failed', 'reason': str(e)})
+            stats['processed'] += 1
             details.append(log_entry)
+        return
+
+    # Parmak izi yalnızca gönderim hatasız tamamlandıysa kaydedilir; aksi hâlde ürün sonraki çalıştırmada tekrar denenir
+    if delta is not None and job.action != 'skipped' and not job.failed:
+        delta.record_success(job.product, job.fingerprints)
+    if job.action == 'updated':
+        logging.info(f"✅ Ürün '{job.name}' başarıyla güncellendi.")
+
+    progress_callback({'product': product_event(job.action, job.name, job.sku, job.changes)})
+    with lock:
+        stats[job.action] += 1
+        stats['processed'] += 1
+        details.append(log_entry)
+
+def _iter_products_to_process(shopify_api, sentos_api, test_mode, find_missing_only, progress_state, delta, sync_mode):
+    """
+    Sentos sayfaları geldikçe işlenecek (ürün, parmak izleri) çiftlerini yield eder;
+    beklenen toplamı ve değişmediği için atlanan ürün sayısını progress_state'e yazar.
+    """
+    limit = 20 if test_mode else None
+    yielded = 0
+    for products_on_page, total_elements in sentos_api.catalog.iter_product_pages():
+        if progress_state['expected'] is None and isinstance(total_elements, int):
+            progress_state['expected'] = min(total_elements, limit) if limit else total_elements
+        progress_state['fetched'] += len(products_on_page)
+        changed, unchanged = delta.split_page(products_on_page)
+        if sync_mode in delta_sync.CREATING_MODES:
+            # Değişmemiş ama Shopify'da artık bulunmayan ürün yeniden oluşturulmalı
+            changed.extend(item for item in unchanged if not _find_shopify_product(shopify_api, item[0]))
+        progress_state['unchanged'] += len(products_on_page) - len(changed)
+        for product, fingerprints in changed:
+            if limit and yielded >= limit:
+                return
+            if find_missing_only and _find_shopify_product(shopify_api, product):
+                continue
+            yielded += 1
+            yield product, fingerprints
+
+def _run_stock_fast_path(shopify_api, sentos_api, test_mode, progress_callback, stop_event, delta, stats, details, lock, max_workers, stage_metrics, checkpoint, scheduler):
+    """
+    Sadece stok için katalog geneli hızlı yol: SKU→inventoryItem eşlemesi dizinden bir kez
+    okunur, değişen tüm Sentos varyantlarının miktarı hesaplanır ve setQuantities ürün
+    sınırlarını aşan en büyük partilerle yazılır. Yeni varyantı olan ürünler ürün bazlı
+    stok/varyant yoluna düşer. Süre bütçesi dolduğunda gönderilmeyen ürünler
+    stats['deferred'] olarak sayılır. Katalog sonuna kadar işlendiyse True döndürür.
+    """
+    inventory_item_map = shopify_api.get_product_index().get_inventory_item_map()
+    limit = 20 if test_mode else None
+    selected = []
+    for products_on_page, _ in sentos_api.catalog.iter_product_pages():
+        if stop_event.is_set():
+            return False
+        changed, unchanged = delta.split_page(products_on_page)
+        stats['unchanged'] += len(unchanged)
+        for product, fingerprints in changed:
+            if not product.get('name', '').strip():
+                continue
+            # Devam edilen çalıştırmada stoğu zaten yazılmış ürünler atlanır
+            if 'inventory' in checkpoint.completed_stages(delta_sync.product_key(product)):
+                stats['resumed'] += 1
+                continue
+            selected.append((product, fingerprints))
+        if limit and len(selected) >= limit:
+            selected = selected[:limit]
+            break
+    fingerprints_by_product = {id(product): fingerprints for product, fingerprints in selected}
+    products = [product for product, _ in selected]
+
+    writes, needs_variant_sync, not_found = stock_sync.plan_catalog_stock(
+        products, inventory_item_map, lambda p: _find_shopify_product(shopify_api, p), shopify_api.location_mapping
+    )
+    stats['total'] = len(products)
+    stats['skipped'] += len(not_found)
+    stats['processed'] += len(not_found)
+    scheduler.begin_dispatch()
+    # Katalog okuması bütçeyi tükettiyse toplu yazım da başlatılmaz
+    if not scheduler.can_dispatch(0):
+        stats['deferred'] = len(writes) + len(needs_variant_sync)
+        stats['total'] -= stats['deferred']
+        return False
+    progress_callback({'message': f"{len(writes)} ürünün stoğu toplu yazılacak, {len(needs_variant_sync)} ürüne varyant eklenecek.", 'progress': 55, 'stats': stats.copy()})
+
+    planned = [adj for _, product_adjustments in writes for adj in product_adjustments]
+    # Shopify'daki mevcut miktarla aynı olan satırlar hiç gönderilmez
+    adjustments, noop_count = stock_sync.drop_noop_adjustments(shopify_api, planned, max_workers=max_workers)
+    # Her parti gönderilmeden önce bütçe kontrol edilir; bir parti isteği bir ürün maliyetinde sayılır
+    failed_items, deferred_items = stock_sync.set_on_hand_catalog_wide(
+        shopify_api, adjustments, max_workers=max_workers, progress_callback=progress_callback, can_dispatch=scheduler.can_dispatch
+    )
+    written_products = 0
+    for product, product_adjustments in writes:
+        # Partisi gönderilmeyen ürünün 'inventory' aşaması işaretlenmez; devam edilen çalıştırmada yeniden planlanır
+        if any(a['inventoryItemId'] in deferred_items for a in product_adjustments):
+            stats['deferred'] += 1
+            stats['total'] -= 1
+            continue
+        written_products += 1
+        log_entry = {'name': product.get('name', 'Bilinmeyen Ürün'), 'sku': product.get('sku', 'SKU Yok')}
+        if failed := [a for a in product_adjustments if a['inventoryItemId'] in failed_items]:
+            stats['failed'] += 1
+            log_entry.update({'status': 'failed', 'reason': f"{len(failed)} varyantın stoğu yazılamadı."})
+        else:
+            stats['updated'] += 1
+            delta.record_success(product, fingerprints_by_product[id(product)])
+            checkpoint.mark_stage(delta_sync.product_key(product), 'inventory')
+        stats['processed'] += 1
+        details.append(log_entry)
+    scheduler.record_done(written_products)
+    sent_count = len(adjustments) - len([a for a in adjustments if a['inventoryItemId'] in deferred_items])
+    progress_callback({'product': product_event('updated', f"{written_products} ürün", "Katalog geneli", [
+        f"{sent_count} varyantın stoğu {-(-sent_count // stock_sync.INVENTORY_SET_BATCH_MAX)} toplu istekle gönderildi.",
+        f"{noop_count} varyantın stoğu Shopify'da zaten güncel olduğu için yazılmadı.",
+        f"{len(failed_items)} varyant yazılamadı." if failed_items else "Tüm stoklar yazıldı."
+    ])})
+    if deferred_items:
+        # Bütçe toplu yazım sırasında doldu; varyant eklenecek ürünler de sonraki çalıştırmaya kalır
+        stats['deferred'] += len(needs_variant_sync)
+        stats['total'] -= len(needs_variant_sync)
+        return False
+
+    # Yeni varyant gerektiren ürünler aşamalı hattın stok/varyant dalından geçer
+    def on_complete(job):
+        _finalize_job(job, delta, progress_callback, stats, details, lock)
+        with lock:
+            scheduler.record_done()
+            snapshot = stats.copy()
+        progress_callback({'message': f"İşlenen: {snapshot['processed']}/{snapshot['total']}", 'stats': snapshot})
+
+    pipeline = _build_sync_pipeline(shopify_api, sentos_api, "Sadece Stok ve Varyantlar", max_workers, stop_event, on_complete, checkpoint=checkpoint)
+    pipeline.start()
+    with lock: processed_before = stats['processed']
+    try:
+        for submitted, product in enumerate(needs_variant_sync):
+            if stop_event.is_set():
+                return False
+            with lock: in_flight = submitted - (stats['processed'] - processed_before)
+            if not scheduler.can_dispatch(in_flight):
+                with lock:
+                    stats['deferred'] = len(needs_variant_sync) - submitted
+                    stats['total'] -= stats['deferred']
+                return False
+            pipeline.submit(SyncJob(product, fingerprints_by_product[id(product)]))
     finally:
-        with lock: stats['processed'] += 1
+        pipeline.close()
+        stage_metrics.update(pipeline.get_metrics())
+    return not test_mode
 
-def _run_core_sync_logic(shopify_config, sentos_config, sync_mode, max_workers, test_mode, progress_callback, stop_event, find_missing_only=False):
+def _run_core_sync_logic(shopify_config, sentos_config, sync_mode, max_workers, test_mode, progress_callback, stop_event, find_missing_only=False, force_full=False, resume_run_id=None, time_budget_seconds=None, full_pass_interval_hours=None, catalog_ttl=None):
     start_time = time.monotonic()
-    stats = {'total': 0, 'created': 0, 'updated': 0, 'failed': 0, 'skipped': 0, 'processed': 0}
+    stats = {'total': 0, 'created': 0, 'updated': 0, 'failed': 0, 'skipped': 0, 'unchanged': 0, 'resumed': 0, 'deferred': 0, 'noop_writes': 0, 'processed': 0}
     details = []
     lock = threading.Lock()
+    checkpoint = None
+    inventory_writer = None
+    # Ürün ve istatistik olayları abonelere kısa aralıklı anlık görüntüler olarak iletilir
+    progress_callback, owns_bus = ensure_bus(progress_callback)
 
     try:
-        shopify_api = ShopifyAPI(shopify_config['store_url'], shopify_config['access_token'])
-        sentos_api = SentosAPI(sentos_config['api_url'], sentos_config['api_key'], sentos_config['api_secret'], sentos_config.get('cookie'))
-        
-        shopify_api.load_all_products_for_cache(progress_callback)
-        sentos_products = sentos_api.get_all_products(progress_callback)
+        # Her çalıştırmanın tamamlanan aşamaları ve stok yazımları kalıcı olarak kaydedilir;
+        # resume_run_id verilirse yarım kalan çalıştırma kaldığı yerden sürer.
+        if resume_run_id:
+            checkpoint = SyncCheckpoint.resume(shopify_config['store_url'], resume_run_id)
+            if checkpoint.sync_mode != sync_mode:
+                logging.warning(f"Devam edilen çalıştırmanın modu kullanılıyor: '{checkpoint.sync_mode}' (istenen: '{sync_mode}').")
+            sync_mode = checkpoint.sync_mode
+            test_mode = checkpoint.params.get('test_mode', test_mode)
+            find_missing_only = checkpoint.params.get('find_missing_only', find_missing_only)
+            force_full = checkpoint.params.get('force_full', force_full)
+            full_pass_interval_hours = checkpoint.params.get('full_pass_interval_hours', full_pass_interval_hours)
+        else:
+            checkpoint = SyncCheckpoint.start(shopify_config['store_url'], sync_mode, {
+                'test_mode': test_mode, 'find_missing_only': find_missing_only, 'force_full': force_full,
+                'full_pass_interval_hours': full_pass_interval_hours
+            })
+        progress_callback({'message': f"Çalıştırma kimliği: {checkpoint.run_id}", 'run_id': checkpoint.run_id})
+        # Süre bütçesi çalıştırmanın başından itibaren sayılır
+        scheduler = DeadlineScheduler(time_budget_seconds, max_workers, SyncCheckpoint.recent_product_cost(shopify_config['store_url'], sync_mode))
+
+        # Bağlantı havuzları aşamaların toplam eşzamanlı istek sayısına göre boyutlanır
+        pool_size = _http_pool_size(sync_mode, max_workers)
+        shopify_api = ShopifyAPI(shopify_config['store_url'], shopify_config['access_token'], pool_size=pool_size)
+        sentos_api = SentosAPI(sentos_config['api_url'], sentos_config['api_key'], sentos_config['api_secret'], sentos_config.get('cookie'), pool_size=pool_size,
+                               catalog_ttl=delta_sync.catalog_ttl_for_mode(sync_mode, catalog_ttl))
+        shopify_api.checkpoint = checkpoint
+        shopify_api.location_mapping = LocationMapping.load(shopify_config['store_url'])
+        # Ürün worker'larının stok satırları tek yazıcıda toplanıp tam boy partilerle gönderilir
+        inventory_writer = shopify_api.inventory_writer = InventoryWriteAggregator(shopify_api)
         
-        if test_mode: sentos_products = sentos_products[:20]
+        # Kalıcı ürün dizini: ilk çalıştırmada bulk ile kurulur, sonra yalnızca değişenler okunur
+        shopify_api.get_product_index().refresh(shopify_api, progress_callback)
+
+        # Önceki denemede yanıtı alınamayan stok yazımları tekrar uygulanmadan kapatılır
+        if resume_run_id:
+            stock_sync.reconcile_pending_writes(shopify_api, checkpoint, max_workers=max_workers)
+
+        # Sentos'tan çekme ile Shopify'a yazma üst üste biner: ürünler sayfa geldikçe
+        # aşamalı hattın plan kuyruğuna alınır. Kuyruklar sınırlı olduğu için aşamalar
+        # geride kalırsa yeni sayfa çekilmez (backpressure).
+        progress_state = {'expected': None, 'fetched': 0, 'unchanged': 0}
+        # Delta senkronizasyon: son başarılı gönderimden beri içeriği değişmeyen ürünler kuyruğa alınmaz
+        delta = delta_sync.DeltaPlanner(shopify_config['store_url'], sync_mode, force_full=force_full,
+                                        location_mapping=shopify_api.location_mapping,
+                                        full_pass_interval_hours=full_pass_interval_hours)
+        stage_metrics = {}
+
+        def on_complete(job):
+            _finalize_job(job, delta, progress_callback, stats, details, lock)
+            with lock:
+                scheduler.record_done()
+                stats['unchanged'] = progress_state['unchanged']
+                processed, submitted = stats['processed'], stats['total']
+                snapshot = stats.copy()
+            total = max((progress_state['expected'] or 0) - progress_state['unchanged'], submitted)
+            progress = 55 + int((processed / total) * 45) if total > 0 else 100
+            progress_callback({'progress': progress, 'message': f"İşlenen: {processed}/{total} (Sentos'tan çekilen: {progress_state['fetched']})", 'stats': snapshot})
+
+        if sync_mode == delta_sync.STOCK_FAST_MODE:
+            completed = _run_stock_fast_path(shopify_api, sentos_api, test_mode, progress_callback, stop_event, delta, stats, details, lock, max_workers, stage_metrics, checkpoint, scheduler)
+            progress_state['unchanged'] = stats['unchanged']
+        else:
+            source = _iter_products_to_process(shopify_api, sentos_api, test_mode, find_missing_only, progress_state, delta, sync_mode)
+            buffer = None
+            products = source
+            if scheduler.deadline is not None:
+                # Süre bütçeli çalıştırmada akış sınırlı bir tamponda öncelik sırasına konur:
+                # stoğu değişenler, stoğu sıfır olanlar, sonra detay/medya yenilemeleri
+                buffer = PriorityBuffer(source, delta)
+                products = iter(buffer)
+            completed = False
+            pipeline = _build_sync_pipeline(shopify_api, sentos_api, sync_mode, max_workers, stop_event, on_complete, checkpoint=checkpoint, force_update=force_full)
+            pipeline.start()
+            scheduler.begin_dispatch()
+            try:
+                for product, fingerprints in products:
+                    if stop_event.is_set():
+                        break
+                    with lock: in_flight = stats['total'] - stats['processed']
+                    if not scheduler.can_dispatch(in_flight):
+                        # Kalan katalog yalnızca saymak için indirilmez; tampondakiler ertelenmiş sayılır
+                        stats['deferred'] = 1 + (buffer.buffered() if buffer is not None else 0)
+                        break
+                    with lock: stats['total'] += 1
+                    pipeline.submit(SyncJob(product, fingerprints))
+                else:
+                    completed = not test_mode
+            finally:
+                # Erken çıkışta bekleyen Sentos sayfa istekleri iptal edilir
+                source.close()
+                pipeline.close()
+            stage_metrics.update(pipeline.get_metrics())
+        if stats['deferred']:
+            unread = max(0, (progress_state['expected'] or 0) - progress_state['fetched'])
+            progress_callback({'product': product_event('info', "Süre bütçesi doldu", "-", [
+                f"{stats['deferred']} ürün bu çalıştırmada gönderilmedi; çalıştırma kimliğiyle devam ettirilebilir."
+            ] + ([f"Sentos'tan henüz okunmamış {unread} ürün de sonraki çalıştırmaya kaldı."] if unread else []))})
+        logging.info(f"Aşama metrikleri: {stage_metrics}")
+        delta.close(completed and not stop_event.is_set())
+        stats['unchanged'] = progress_state['unchanged']
+        if stats['unchanged']:
+            logging.info(f"Delta senkronizasyon: {stats['unchanged']} ürün değişmediği için atlandı.")
 
-        products_to_process = sentos_products
         if find_missing_only:
-            products_to_process = [p for p in sentos_products if not _find_shopify_product(shopify_api, p)]
-            logging.info(f"{len(products_to_process)} adet eksik ürün bulundu.")
-        
-        stats['total'] = len(products_to_process)
-
-        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="SyncWorker") as executor:
-            futures = [executor.submit(_process_single_product, shopify_api, sentos_api, p, sync_mode, progress_callback, stats, details, lock) for p in products_to_process]
-            for future in as_completed(futures):
-                if stop_event.is_set(): 
-                    executor.shutdown(wait=False, cancel_futures=True)
-                    break
-                processed, total = stats['processed'], stats['total']
-                progress = 55 + int((processed / total) * 45) if total > 0 else 100
-                progress_callback({'progress': progress, 'message': f"İşlenen: {processed}/{total}", 'stats': stats.copy()})
+            logging.info(f"{stats['total']} adet eksik ürün bulundu.")
+
+        inventory_stats = shopify_api.get_inventory_write_stats()
+        stats['noop_writes'] = inventory_stats['noop_skipped']
+        logging.info(f"Stok yazımı: {inventory_stats['written']} satır yazıldı, {inventory_stats['noop_skipped']} satır zaten günceldi.")
 
         duration = time.monotonic() - start_time
-        results = {'stats': stats, 'details': details, 'duration': str(timedelta(seconds=duration))}
+        connection_stats = {'shopify': shopify_api.get_connection_stats(), 'sentos': sentos_api.get_connection_stats()}
+        logging.info(f"HTTP bağlantı istatistikleri: {connection_stats}")
+        write_stats = shopify_api.get_write_batcher_stats()
+        logging.info(f"Yazım birleştirici: {write_stats['mutations']} mutation {write_stats['requests']} istekte gönderildi.")
+        checkpoint.record_cost(stats['processed'], scheduler.worker_seconds_spent())
+        # Durdurulan, süresi dolan veya test modunda kesilen çalıştırma 'stopped' kalır ve devam ettirilebilir
+        checkpoint.finish('completed' if completed and not stop_event.is_set() else 'stopped')
+        results = {'stats': stats, 'details': details, 'duration': str(timedelta(seconds=duration)), 'connections': connection_stats, 'inventory': inventory_stats, 'stages': stage_metrics, 'run_id': checkpoint.run_id}
         progress_callback({'status': 'done', 'results': results})
 
     except Exception as e:
         logging.critical(f"Senkronizasyon görevi kritik bir hata oluştu: {e}\n{traceback.format_exc()}")
-        progress_callback({'status': 'error', 'message': str(e)})
-
-def sync_products_from_sentos_api(store_url, access_token, sentos_api_url, sentos_api_key, sentos_api_secret, sentos_cookie, test_mode, progress_callback, stop_event, max_workers=2, sync_mode="Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)"):
+        if checkpoint is not None:
+            try:
+                checkpoint.finish('failed')
+            except Exception as finish_error:
+                logging.error(f"Kontrol noktası kapatılamadı: {finish_error}")
+        progress_callback({'status': 'error', 'message': str(e), 'run_id': checkpoint.run_id if checkpoint else None})
+    finally:
+        if inventory_writer is not None:
+            inventory_writer.close()
+        if owns_bus:
+            progress_callback.close()
+
+def sync_products_from_sentos_api(store_url, access_token, sentos_api_url, sentos_api_key, sentos_api_secret, sentos_cookie, test_mode, progress_callback, stop_event, max_workers=2, sync_mode="Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", force_full=False, resume_run_id=None, time_budget_seconds=None, full_pass_interval_hours=None, catalog_ttl=None):
+    """
+    force_full=True, içeriği değişmemiş ürünleri de Shopify'a gönderir (delta filtresi devre dışı).
+    full_pass_interval_hours verilirse son tam geçişin üzerinden bu kadar saat geçtiğinde tam geçiş yapılır.
+    catalog_ttl: Sentos katalog anlık görüntüsünün kabul edilen yaşı (sn); verilmezse stok modlarında 0.
+    resume_run_id verilirse o çalıştırmanın modu ve parametreleriyle kaldığı yerden devam edilir.
+    time_budget_seconds verilirse ürünler öncelik sırasıyla gönderilir ve süre dolmadan gönderim durur.
+    """
     shopify_config = {'store_url': store_url, 'access_token': access_token}
     sentos_config = {'api_url': sentos_api_url, 'api_key': sentos_api_key, 'api_secret': sentos_api_secret, 'cookie': sentos_cookie}
-    _run_core_sync_logic(shopify_config, sentos_config, sync_mode, max_workers, test_mode, progress_callback, stop_event)
+    _run_core_sync_logic(shopify_config, sentos_config, sync_mode, max_workers, test_mode, progress_callback, stop_event, force_full=force_full, resume_run_id=resume_run_id, time_budget_seconds=time_budget_seconds, full_pass_interval_hours=full_pass_interval_hours, catalog_ttl=catalog_ttl)
 
 def sync_missing_products_only(store_url, access_token, sentos_api_url, sentos_api_key, sentos_api_secret, sentos_cookie, test_mode, progress_callback, stop_event, max_workers=2):
     shopify_config = {'store_url': store_url, 'access_token': access_token}
     sentos_config = {'api_url': sentos_api_url, 'api_key': sentos_api_key, 'api_secret': sentos_api_secret, 'cookie': sentos_cookie}
     _run_core_sync_logic(shopify_config, sentos_config, "Sadece Eksikleri Oluştur", max_workers, test_mode, progress_callback, stop_event, find_missing_only=True)
 
+def _lookup_single_product(shopify_api, sentos_product):
+    """
+    Tekil güncelleme için Shopify ürününü katalog yüklemeden bulur: son sonuçlar LRU'dan,
+    kurulu bir ürün dizini varsa artımlı güncellenmiş dizinden, yoksa doğrudan SKU ve
+    başlık aramasıyla. Dizin kurulu değilse bulk yükleme başlatılmaz.
+    """
+    sku = (sentos_product.get('sku') or '').strip()
+    name = (sentos_product.get('name') or '').strip()
+    cache_key = (shopify_api.store_url, sku or f"title:{name}")
+    with _single_sku_cache_lock:
+        if cache_key in _single_sku_cache:
+            _single_sku_cache.move_to_end(cache_key)
+            return _single_sku_cache[cache_key]
+
+    index = shopify_api.get_product_index()
+    if index.is_ready():
+        index.refresh(shopify_api)
+        product = index.find_product(sentos_product)
+    else:
+        # Stok ve detay adımları da dizin yerine doğrudan okuma yapar
+        shopify_api.product_index = None
+        product = None
+        # Shopify'da SKU varyant düzeyindedir; önce ilk varyantların, sonra ana ürünün SKU'su denenir
+        variant_skus = [str(v.get('sku') or '').strip() for v in (sentos_product.get('variants') or [])[:2]] + [sku]
+        for candidate in dict.fromkeys(s for s in variant_skus if s):
+            if product := shopify_api.find_product_by_sku(candidate):
+                break
+        if not product and name:
+            product = shopify_api.find_product_by_title(name)
+
+    if product:
+        with _single_sku_cache_lock:
+            _single_sku_cache[cache_key] = product
+            _single_sku_cache.move_to_end(cache_key)
+            while len(_single_sku_cache) > SINGLE_SKU_CACHE_SIZE:
+                _single_sku_cache.popitem(last=False)
+    return product
+
+def _forget_single_product(shopify_api, sentos_product):
+    sku = (sentos_product.get('sku') or '').strip()
+    cache_key = (shopify_api.store_url, sku or f"title:{(sentos_product.get('name') or '').strip()}")
+    with _single_sku_cache_lock:
+        _single_sku_cache.pop(cache_key, None)
+
 def sync_single_product_by_sku(store_url, access_token, sentos_api_url, sentos_api_key, sentos_api_secret, sentos_cookie, sku):
     try:
         shopify_api = ShopifyAPI(store_url, access_token)
+        shopify_api.location_mapping = LocationMapping.load(store_url)
         sentos_api = SentosAPI(sentos_api_url, sentos_api_key, sentos_api_secret, sentos_cookie)
         
         # HATA DÜZELTME: Fonksiyonu ait olduğu modül (media_sync) üzerinden çağır.
@@ -296,14 +758,16 @@ def sync_single_product_by_sku(store_url, access_token, sentos_api_url, sentos_a
         
         # --- YENİ EKLENEN/DEĞİŞTİRİLEN KISIM SONU ---
 
-        shopify_api.load_all_products_for_cache()
-        existing_product = _find_shopify_product(shopify_api, sentos_product)
+        existing_product = _lookup_single_product(shopify_api, sentos_product)
         
         if not existing_product:
             # Sentos'ta ürün var ama Shopify'da yoksa, bu daha bilgilendirici bir mesajdır.
             return {'success': False, 'message': f"Ürün Sentos'ta bulundu ancak '{sentos_product.get('name', sku)}' adıyla Shopify'da eşleşen bir ürün bulunamadı. Lütfen önce tam senkronizasyon çalıştırın."}
         
         changes_made = _update_product(shopify_api, sentos_api, sentos_product, existing_product, "Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)")
+        if not delta_sync.push_succeeded(changes_made):
+            # Ürün Shopify'da silinmiş veya değişmiş olabilir; bir sonraki denemede yeniden aranır
+            _forget_single_product(shopify_api, sentos_product)
         product_name = sentos_product.get('name', sku)
         return {'success': True, 'product_name': product_name, 'changes': changes_made}
         
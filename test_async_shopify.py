@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Asenkron Shopify İstemcisi Testi
+Eşzamanlı coroutine isteklerinin paylaşılan maliyet bütçesiyle çalışmasını ve yazılamayan
+stokların asenkron senkronizasyonda başarısız olarak bildirilmesini test eder
+"""
+
+import asyncio
+from aiohttp import web
+from connectors.async_shopify_api import AsyncShopifyAPI
+from operations import async_sync, delta_sync
+
+
+async def _start_fake_shopify(state):
+    async def graphql(request):
+        state['in_flight'] += 1
+        state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+        await asyncio.sleep(0.05)
+        state['in_flight'] -= 1
+        body = await request.json()
+        state['requests'] += 1
+        if state['requests'] == 1:
+            return web.json_response({"errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}],
+                                      "extensions": {"cost": {"requestedQueryCost": 10, "throttleStatus": {
+                                          "maximumAvailable": 1000.0, "currentlyAvailable": 1000.0, "restoreRate": 50.0}}}})
+        return web.json_response({"data": {"echo": body["variables"].get("n")},
+                                  "extensions": {"cost": {"requestedQueryCost": 10, "actualQueryCost": 1, "throttleStatus": {
+                                      "maximumAvailable": 1000.0, "currentlyAvailable": 1000.0, "restoreRate": 50.0}}}})
+
+    app = web.Application()
+    app.router.add_post("/admin/api/2024-10/graphql.json", graphql)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_concurrent_requests_share_budget():
+    """50 eşzamanlı istek thread açmadan tamamlanmalı, THROTTLED yanıtı tekrar denenmeli"""
+    async def scenario():
+        state = {'requests': 0, 'in_flight': 0, 'max_in_flight': 0}
+        runner, url = await _start_fake_shopify(state)
+        try:
+            async with AsyncShopifyAPI(url, "token") as shopify_api:
+                results = await asyncio.gather(*(shopify_api.execute_graphql("query q($n: Int) { echo }", {"n": i}) for i in range(50)))
+                stats = shopify_api.get_throttle_stats()
+        finally:
+            await runner.cleanup()
+        return results, state, stats
+
+    results, state, stats = asyncio.run(scenario())
+    assert [r["echo"] for r in results] == list(range(50))
+    assert state['requests'] == 51
+    assert state['max_in_flight'] > 10
+    assert stats['throttled'] >= 1 and stats['in_flight'] == 0
+
+
+class FakeAsyncShopifyAPI:
+    """inventorySetOnHandQuantities'e userError döndüren sahte asenkron istemci"""
+    product_index = None
+    location_mapping = None
+
+    async def get_product_variants(self, product_gid):
+        return [{'id': "gid://shopify/ProductVariant/1", 'inventoryItem': {'id': "gid://shopify/InventoryItem/1", 'sku': "A1-S"}}]
+
+    async def get_default_location_id(self):
+        return "gid://shopify/Location/1"
+
+    async def execute_graphql(self, query, variables):
+        return {'inventorySetOnHandQuantities': {'userErrors': [{'field': ['input'], 'message': 'not stocked'}]}}
+
+
+def test_failed_stock_write_is_reported():
+    """userError dönen stok yazımı SyncChanges üzerinden başarısız bildirilmeli"""
+    api = FakeAsyncShopifyAPI()
+    api.set_on_hand_quantities = AsyncShopifyAPI.set_on_hand_quantities.__get__(api)
+    product = {'name': "Ürün", 'sku': "A1", 'variants': [{'sku': "A1-S", 'stocks': [{'stock': 3}]}]}
+    changes = asyncio.run(async_sync.sync_stock_and_variants(api, "gid://shopify/Product/1", product))
+    assert not delta_sync.push_succeeded(changes)
+    assert any("stoğu yazılamadı" in c for c in changes)
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_share_budget()
+    test_failed_stock_write_is_reported()
+    print("✅ Asenkron istemci testleri başarılı")
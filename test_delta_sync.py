@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Delta Senkronizasyon Testi
+Parmak izi değişmeyen ürünlerin atlanmasını ve tam geçişi test eder
+"""
+
+import os
+import tempfile
+from operations.delta_sync import DeltaPlanner, FingerprintStore, compute_fingerprints
+
+STOCK_MODE = "Sadece Stok ve Varyantlar"
+
+
+def _product(i, stock=5):
+    return {'id': i, 'sku': f"P{i}", 'name': f"Ürün {i}", 'description': "açıklama",
+            'variants': [{'sku': f"P{i}-{size}", 'stocks': [{'stock': stock}, {'stock': 1}]} for size in ("S", "M")]}
+
+
+def _planner(db_path, **kwargs):
+    return DeltaPlanner("test.myshopify.com", STOCK_MODE, store=FingerprintStore("test", db_path=db_path), **kwargs)
+
+
+def test_fingerprint_is_stable_per_component():
+    """Varyant sırası parmak izini değiştirmemeli; stok değişimi yalnızca stok parçasını değiştirmeli"""
+    product = _product(1)
+    reordered = dict(product, variants=list(reversed(product['variants'])))
+    components = ('stock', 'details')
+    assert compute_fingerprints(product, components) == compute_fingerprints(reordered, components)
+    changed = compute_fingerprints(_product(1, stock=6), components)
+    assert changed['stock'] != compute_fingerprints(product, components)['stock']
+    assert changed['details'] == compute_fingerprints(product, components)['details']
+
+
+def test_stock_fingerprint_tracks_warehouses_and_mapping():
+    """Depolar arası taşıma ve eşleştirme değişikliği stok parmak izini değiştirmeli"""
+    def product(first, second):
+        return {'id': 1, 'variants': [{'sku': "A", 'stocks': [{'warehouse_id': 1, 'stock': first}, {'warehouse_id': 2, 'stock': second}]}]}
+    base = compute_fingerprints(product(5, 0), ('stock',))['stock']
+    assert compute_fingerprints(product(0, 5), ('stock',))['stock'] != base
+    mapped = compute_fingerprints(product(5, 0), ('stock',), {'1': "gid://shopify/Location/1"})['stock']
+    assert mapped != base
+    assert compute_fingerprints(product(5, 0), ('stock',), {'1': "gid://shopify/Location/2"})['stock'] != mapped
+
+
+def test_only_changed_products_are_dispatched():
+    """Kaydedilen ürünler bir sonraki çalıştırmada atlanmalı, değişen ürün gönderilmeli"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "fp.db")
+        first = _planner(db_path)
+        changed, unchanged = first.split_page([_product(i) for i in range(10)])
+        assert len(changed) == 10 and not unchanged
+        for product, fingerprints in changed:
+            if product['id'] != 3:  # 3 numaralı ürünün gönderimi başarısız
+                first.record_success(product, fingerprints)
+        first.close(completed=True)
+
+        second = _planner(db_path)
+        assert not second.full_pass
+        page = [_product(i, stock=9 if i == 7 else 5) for i in range(10)]
+        changed, unchanged = second.split_page(page)
+        assert sorted(p['id'] for p, _ in changed) == [3, 7]
+        assert len(unchanged) == 8
+
+        forced = _planner(db_path, force_full=True)
+        changed, _ = forced.split_page(page)
+        assert len(changed) == 10
+
+
+def test_interval_full_pass_is_opt_in():
+    """Aralık verilmezse otomatik tam geçiş yapılmamalı; verilirse süresi dolunca yapılmalı"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "fp.db")
+        first = _planner(db_path, force_full=True)
+        for product, fingerprints in first.split_page([_product(1)])[0]:
+            first.record_success(product, fingerprints)
+        first.close(completed=True)
+
+        assert not _planner(db_path).full_pass
+        assert not _planner(db_path, full_pass_interval_hours=24).full_pass
+        store = FingerprintStore("test", db_path=db_path)
+        with store._connect() as conn:
+            conn.execute("UPDATE meta SET value = ? WHERE key LIKE 'full_pass:%'", ("2000-01-01T00:00:00+00:00",))
+        assert not _planner(db_path).full_pass
+        assert _planner(db_path, full_pass_interval_hours=24).full_pass
+
+
+if __name__ == "__main__":
+    test_fingerprint_is_stable_per_component()
+    test_stock_fingerprint_tracks_warehouses_and_mapping()
+    test_only_changed_products_are_dispatched()
+    test_interval_full_pass_is_opt_in()
+    print("✅ Tüm delta senkronizasyon testleri başarılı")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+GraphQL Okuma Birleştirici Testi
+Takma adlı belge oluşturmayı, maliyet tavanını ve sonuçların yönlendirilmesini test eder
+"""
+
+import re
+import threading
+from connectors.shopify_api import ShopifyAPI, SKU_LOOKUP_PRODUCTS
+from connectors.shopify_batcher import GraphQLLookup, GraphQLReadBatcher, build_batched_document
+
+
+class FakeShopifyAPI:
+    """Her takma ad için değişken değerini geri döndüren sahte API"""
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.cost_hints = []
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def execute_graphql(self, query, variables=None, cost_hint=None):
+        with self.lock:
+            self.calls.append(query)
+            self.cost_hints.append(cost_hint)
+        if self.fail_on and self.fail_on in (variables or {}).values() and len(variables) > 1:
+            raise Exception("GraphQL hatası")
+        aliases = re.findall(r'^\s+(l\d+):', query, re.MULTILINE)
+        return {alias: {'echo': variables[f"{alias}_q"]} for alias in aliases}
+
+
+def _lookup(value, cost=3):
+    return GraphQLLookup("productVariants(first: 1, query: $q) { edges { node { id } } }",
+                         {'q': ('String!', value)}, cost=cost, extract=lambda data: data['echo'])
+
+
+def test_document_renames_variables_per_alias():
+    """Her takma adın değişkeni ayrı isimle tanımlanmalı"""
+    query, variables = build_batched_document([_lookup("sku:A"), _lookup("sku:B")])
+    assert "$l0_q: String!" in query and "$l1_q: String!" in query
+    assert "l1: productVariants(first: 1, query: $l1_q)" in query
+    assert variables == {"l0_q": "sku:A", "l1_q": "sku:B"}
+
+
+def test_run_many_respects_cost_ceiling():
+    """Toplam maliyet tavanı aşılmamalı ve sonuçlar sırayla dönmeli"""
+    api = FakeShopifyAPI()
+    batcher = GraphQLReadBatcher(api, max_query_cost=300)
+    results = batcher.run_many([_lookup(f"sku:{i}", cost=105) for i in range(5)])
+    assert results == [f"sku:{i}" for i in range(5)]
+    assert len(api.calls) == 3
+    # Belgenin bilinen maliyeti ilk gönderimde bütçeden ayrılsın diye iletilir
+    assert api.cost_hints == [210, 210, 105]
+
+
+def test_concurrent_lookups_are_coalesced():
+    """Farklı thread'lerden gelen aramalar az sayıda istekte birleşmeli ve doğru çağırana dönmeli"""
+    api = FakeShopifyAPI()
+    batcher = GraphQLReadBatcher(api, linger=0.05)
+    results = {}
+
+    def worker(i):
+        results[i] = batcher.lookup(_lookup(f"sku:{i}"))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {i: f"sku:{i}" for i in range(20)}
+    assert len(api.calls) < 20
+
+
+def test_failed_batch_falls_back_to_single_lookups():
+    """Toplu belge hata verirse okumalar tek tek denenmeli"""
+    api = FakeShopifyAPI(fail_on="sku:B")
+    batcher = GraphQLReadBatcher(api)
+    assert batcher.run_many([_lookup("sku:A"), _lookup("sku:B")]) == ["sku:A", "sku:B"]
+    assert batcher.get_stats()['fallbacks'] == 1
+
+
+class FakeCatalogAPI:
+    """SKU araması için sorgudaki SKU'ları taşıyan ürünleri döndüren sahte katalog"""
+    def __init__(self, products):
+        self.products = products
+        self.queries = []
+
+    def execute_graphql(self, query, variables=None, cost_hint=None):
+        data = {}
+        for alias in re.findall(r'^\s+(l\d+):', query, re.MULTILINE):
+            value = variables[f"{alias}_q"]
+            self.queries.append(value)
+            skus = set(re.findall(r'sku:"([^"]+)"', value))
+            matches = [(pid, vs) for pid, vs in self.products.items() if skus & {sku for _, sku in vs}]
+            data[alias] = {
+                'pageInfo': {'hasNextPage': len(matches) > SKU_LOOKUP_PRODUCTS},
+                'edges': [{'node': {'id': pid, 'variants': {'edges': [{'node': {'id': vid, 'sku': sku}} for vid, sku in vs]}}}
+                          for pid, vs in matches[:SKU_LOOKUP_PRODUCTS]],
+            }
+        return data
+
+
+class FakeSkuShopify:
+    _products_by_skus_lookup = staticmethod(ShopifyAPI._products_by_skus_lookup)
+
+    def __init__(self, catalog):
+        self.read_batcher = GraphQLReadBatcher(catalog)
+
+
+def test_sku_lookup_merges_all_matching_products():
+    """Aynı ürünü paylaşan SKU'lar tek okumada aranmalı ve eşleşen tüm ürünler birleştirilmeli"""
+    catalog = FakeCatalogAPI({
+        "P1": [("V1", "A"), ("V2", "B")],
+        "P2": [("V3", "C")],
+        "P3": [("V4", "D")],
+    })
+    sku_map = ShopifyAPI.get_variant_ids_by_skus(FakeSkuShopify(catalog), ["A", "B", "C"])
+    assert sku_map == {
+        "A": {"variant_id": "V1", "product_id": "P1"},
+        "B": {"variant_id": "V2", "product_id": "P1"},
+        "C": {"variant_id": "V3", "product_id": "P2"},
+    }
+    assert len(catalog.queries) == 1
+
+
+def test_truncated_sku_group_is_split():
+    """Ürün sınırına takılan SKU grubu SKU başına tekrar aranmalı"""
+    # 5 SKU × 3 ürün: grup sorgusu sınırı aşar, SKU başına sorgular aşmaz
+    products = {f"P{s}{p}": [(f"V{s}{p}", f"X{s}")] for s in range(5) for p in range(3)}
+    catalog = FakeCatalogAPI(products)
+    sku_map = ShopifyAPI.get_variant_ids_by_skus(FakeSkuShopify(catalog), [f"X{s}" for s in range(5)])
+    assert set(sku_map) == {f"X{s}" for s in range(5)}
+    assert len(catalog.queries) == 1 + 5
+
+
+if __name__ == "__main__":
+    test_document_renames_variables_per_alias()
+    test_run_many_respects_cost_ceiling()
+    test_concurrent_lookups_are_coalesced()
+    test_failed_batch_falls_back_to_single_lookups()
+    test_sku_lookup_merges_all_matching_products()
+    test_truncated_sku_group_is_split()
+    print("✅ Tüm okuma birleştirici testleri başarılı")
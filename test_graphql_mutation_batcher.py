@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+GraphQL Yazım Birleştirici Testi
+Farklı ürünlerin mutation'larının takma adlı tek belgede gönderilmesini, her takma adın
+userErrors'ının yalnızca kendi çağıranına dönmesini ve hatalı belgede tek tek gönderimi test eder
+"""
+
+import re
+import threading
+from connectors.shopify_batcher import GraphQLMutation, GraphQLWriteBatcher, build_batched_document
+
+FIELD = "productUpdate(input: $input) { product { id } userErrors { field message } }"
+
+
+class FakeShopifyAPI:
+    """Her productUpdate için yük döndüren; 'BAD' ürününde userError, 'BROKEN' ürününde belge hatası veren sahte API"""
+    def __init__(self):
+        self.calls = []
+        self.cost_hints = []
+        self.lock = threading.Lock()
+
+    def _payload(self, product_input):
+        if product_input['id'] == "BAD":
+            return {'product': None, 'userErrors': [{'field': ['id'], 'message': 'Product does not exist'}]}
+        return {'product': {'id': product_input['id']}, 'userErrors': []}
+
+    def execute_graphql(self, query, variables=None, cost_hint=None):
+        with self.lock:
+            self.calls.append(query)
+            self.cost_hints.append(cost_hint)
+        aliases = re.findall(r'^\s+(l\d+):', query, re.MULTILINE)
+        if not aliases:
+            if variables['input']['id'] == "BROKEN":
+                raise Exception("GraphQL Error: Invalid id")
+            return {'productUpdate': self._payload(variables['input'])}
+        if any(variables[f"{alias}_input"]['id'] == "BROKEN" for alias in aliases):
+            raise Exception("GraphQL Error: Invalid id")
+        return {alias: self._payload(variables[f"{alias}_input"]) for alias in aliases}
+
+
+def _mutation(product_id):
+    return GraphQLMutation(FIELD, {'input': ('ProductUpdateInput!', {'id': product_id, 'title': "Yeni"})})
+
+
+def test_document_is_a_mutation_with_aliases():
+    """Birleştirilmiş belge mutation olmalı, tek yazım ise takma adsız gönderilmeli"""
+    query, variables = build_batched_document([_mutation("A"), _mutation("B")], operation='mutation', operation_name='batchedMutations')
+    assert query.startswith("mutation batchedMutations($l0_input: ProductUpdateInput!, $l1_input: ProductUpdateInput!)")
+    assert "l1: productUpdate(input: $l1_input)" in query
+    assert variables['l1_input']['id'] == "B"
+
+    single_query, single_variables = _mutation("A").as_document()
+    assert single_query.startswith("mutation productUpdate($input: ProductUpdateInput!)")
+    assert single_variables == {'input': {'id': "A", 'title': "Yeni"}}
+
+
+def test_concurrent_mutations_share_requests_and_get_own_errors():
+    """Eşzamanlı yazımlar az istekte birleşmeli; userErrors yalnızca ilgili çağırana dönmeli"""
+    api = FakeShopifyAPI()
+    batcher = GraphQLWriteBatcher(api, linger=0.05)
+    product_ids = [f"P{i}" for i in range(19)] + ["BAD"]
+    results = {}
+
+    def worker(product_id):
+        results[product_id] = batcher.mutate(_mutation(product_id))
+
+    threads = [threading.Thread(target=worker, args=(p,)) for p in product_ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(api.calls) < len(product_ids)
+    assert results["BAD"]['productUpdate']['userErrors'][0]['message'] == 'Product does not exist'
+    for product_id in product_ids[:-1]:
+        assert results[product_id] == {'productUpdate': {'product': {'id': product_id}, 'userErrors': []}}
+    assert batcher.get_stats()['mutations'] == len(product_ids)
+
+
+def test_failed_document_falls_back_to_single_mutations():
+    """Belge hata verirse yazımlar tek tek gönderilmeli; yalnızca hatalı yazımın çağıranı hata almalı"""
+    api = FakeShopifyAPI()
+    batcher = GraphQLWriteBatcher(api, linger=0.05)
+    results, errors = {}, {}
+
+    def worker(product_id):
+        try:
+            results[product_id] = batcher.mutate(_mutation(product_id))
+        except Exception as e:
+            errors[product_id] = str(e)
+
+    threads = [threading.Thread(target=worker, args=(p,)) for p in ("A", "BROKEN", "C")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert set(results) == {"A", "C"} and set(errors) == {"BROKEN"}
+    assert results["A"]['productUpdate']['product']['id'] == "A"
+
+
+if __name__ == "__main__":
+    test_document_is_a_mutation_with_aliases()
+    test_concurrent_mutations_share_requests_and_get_own_errors()
+    test_failed_document_falls_back_to_single_mutations()
+    print("✅ Tüm yazım birleştirici testleri başarılı")
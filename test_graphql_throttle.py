@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+GraphQL Maliyet Sınırlayıcı Testi
+Paylaşılan bütçenin throttleStatus ile eşitlenmesini test eder
+"""
+
+import time
+from connectors.shopify_throttle import GraphQLCostThrottle, get_store_throttle
+
+
+def _cost_info(requested, actual, available, maximum=1000.0, restore=50.0):
+    return {
+        "requestedQueryCost": requested,
+        "actualQueryCost": actual,
+        "throttleStatus": {"maximumAvailable": maximum, "currentlyAvailable": available, "restoreRate": restore},
+    }
+
+
+def test_settle_syncs_with_server_status():
+    """Yanıt sonrası kova seviyesi sunucunun bildirdiği değere eşitlenmeli"""
+    throttle = GraphQLCostThrottle()
+    reserved = throttle.reserve(10)
+    throttle.settle(reserved, _cost_info(52, 12, 400.0, maximum=2000.0, restore=100.0), query="q")
+
+    stats = throttle.get_stats()
+    assert stats["maximum_available"] == 2000.0
+    assert stats["restore_rate"] == 100.0
+    assert 400.0 <= stats["currently_available"] < 410.0
+    # Bir sonraki istek için sorgunun istediği maliyet ayrılır; ilk gönderimde cost_hint kullanılır
+    assert throttle.estimate_cost("q") == 52.0
+    assert throttle.estimate_cost("q", cost_hint=900) == 52.0
+    assert throttle.estimate_cost("yeni", cost_hint=900) == 900.0
+
+
+def test_in_flight_reservations_are_subtracted():
+    """Henüz yanıtı gelmemiş rezervasyonlar sunucu seviyesinden düşülmeli"""
+    throttle = GraphQLCostThrottle()
+    first = throttle.reserve(100)
+    throttle.reserve(100)
+    throttle.settle(first, _cost_info(100, 90, 900.0), query="q")
+
+    assert throttle.get_stats()["in_flight"] == 100.0
+    assert throttle.get_stats()["currently_available"] < 802.0
+
+
+def test_reserve_waits_for_restore_rate():
+    """Bütçe yetersizse reserve, yenilenme hızına göre beklemeli"""
+    throttle = GraphQLCostThrottle(maximum_available=100, restore_rate=1000)
+    throttle.reserve(100)
+    start = time.monotonic()
+    throttle.reserve(50)
+    elapsed = time.monotonic() - start
+    assert 0.03 <= elapsed < 1.0
+
+
+def test_store_throttle_is_shared():
+    """Aynı mağaza için tek sınırlayıcı kullanılmalı"""
+    assert get_store_throttle("https://demo.myshopify.com") is get_store_throttle("demo.myshopify.com/")
+    assert get_store_throttle("demo.myshopify.com") is not get_store_throttle("other.myshopify.com")
+
+
+if __name__ == "__main__":
+    test_settle_syncs_with_server_status()
+    test_in_flight_reservations_are_subtracted()
+    test_reserve_waits_for_restore_rate()
+    test_store_throttle_is_shared()
+    print("✅ Tüm throttle testleri başarılı")
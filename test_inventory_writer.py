@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Ortak Stok Yazıcısı Testi
+Farklı worker'ların stok satırlarının az sayıda tam boy partide yazılmasını ve her
+satırın sonucunun (yazıldı / zaten güncel / hata) gönderen ürüne dönmesini test eder
+"""
+
+import threading
+from operations.inventory_writer import InventoryWriteAggregator
+
+
+class FakeShopifyAPI:
+    """setQuantities partilerini kaydeden, 'BAD' satırında userError döndüren sahte istemci"""
+    def __init__(self, on_hand=None):
+        self.on_hand = on_hand or {}
+        self.write_calls = []
+        self.lock = threading.Lock()
+
+    def record_inventory_writes(self, written, noop_skipped):
+        pass
+
+    def get_default_location_id(self):
+        return "gid://shopify/Location/1"
+
+    def execute_graphql(self, query, variables):
+        if 'ids' in variables:
+            return {'nodes': [
+                {'id': i, 'inventoryLevel': {'quantities': [{'name': 'on_hand', 'quantity': self.on_hand[i]}]}}
+                for i in variables['ids'] if i in self.on_hand
+            ]}
+        rows = variables['input']['setQuantities']
+        with self.lock:
+            self.write_calls.append(len(rows))
+        if any(r['inventoryItemId'] == "BAD" or r['locationId'] == "gid://shopify/Location/BAD" for r in rows):
+            return {'inventorySetOnHandQuantities': {'userErrors': [{'field': ['input'], 'message': 'not stocked'}]}}
+        return {'inventorySetOnHandQuantities': {'inventoryAdjustmentGroup': {'id': 'g'}, 'userErrors': []}}
+
+
+def _rows(product, count):
+    return [{"inventoryItemId": f"I{product}-{v}", "availableQuantity": v} for v in range(count)]
+
+
+def test_workers_share_full_batches():
+    """20 ürünün satırları tek tek değil, birkaç partide yazılmalı"""
+    api = FakeShopifyAPI()
+    writer = InventoryWriteAggregator(api, batch_size=50, linger=0.1)
+    results = {}
+
+    def worker(product):
+        results[product] = writer.write(_rows(product, 3))
+
+    threads = [threading.Thread(target=worker, args=(p,)) for p in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.close()
+
+    assert all(statuses == ['written'] * 3 for statuses in results.values())
+    assert sum(api.write_calls) == 60 and len(api.write_calls) <= 3
+    assert writer.get_stats()['rows'] == 60
+
+
+def test_statuses_return_per_row():
+    """Zaten güncel satır 'noop', hatalı satır 'failed' olmalı; diğer ürünün satırları etkilenmemeli"""
+    api = FakeShopifyAPI(on_hand={"SAME": 4})
+    writer = InventoryWriteAggregator(api, linger=0.05)
+    first = writer.submit([{"inventoryItemId": "SAME", "availableQuantity": 4}, {"inventoryItemId": "BAD", "availableQuantity": 1}])
+    second = writer.submit([{"inventoryItemId": "OK", "availableQuantity": 2}])
+    assert first.result() == ['noop', 'failed']
+    assert second.result() == ['written']
+    writer.close()
+
+
+def test_failure_is_per_location():
+    """Bir lokasyondaki hata aynı kalemin diğer lokasyondaki satırını 'failed' yapmamalı"""
+    api = FakeShopifyAPI()
+    writer = InventoryWriteAggregator(api, linger=0.05)
+    statuses = writer.write([
+        {"inventoryItemId": "MULTI", "availableQuantity": 3, "locationId": "gid://shopify/Location/2"},
+        {"inventoryItemId": "MULTI", "availableQuantity": 1, "locationId": "gid://shopify/Location/BAD"},
+        {"inventoryItemId": "MULTI", "availableQuantity": 5},
+    ])
+    writer.close()
+    assert statuses == ['written', 'failed', 'written']
+
+
+if __name__ == "__main__":
+    test_workers_share_full_batches()
+    test_statuses_return_per_row()
+    test_failure_is_per_location()
+    print("✅ Tüm ortak stok yazıcısı testleri başarılı")
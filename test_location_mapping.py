@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Depo-Lokasyon Eşleştirmesi Testi
+Eşleştirmenin kalıcı olarak saklanmasını ve stokların eşlenen her lokasyona
+aynı setQuantities partisinde, yalnızca değişen satırlar olarak yazılmasını test eder
+"""
+
+import os
+import tempfile
+import threading
+from operations import stock_sync
+from operations.location_mapping import LocationMapping
+
+STORE = "test-store.myshopify.com"
+DEPOT = "gid://shopify/Location/1"
+SHOWROOM = "gid://shopify/Location/2"
+
+
+class FakeShopifyAPI:
+    """Lokasyon bazlı on_hand okuyan ve setQuantities partilerini kaydeden sahte istemci"""
+    def __init__(self, location_mapping, on_hand=None):
+        self.location_mapping = location_mapping
+        self.on_hand = on_hand or {}
+        self.writes = []
+        self.lock = threading.Lock()
+
+    def record_inventory_writes(self, written, noop_skipped):
+        pass
+
+    def get_default_location_id(self):
+        return DEPOT
+
+    def execute_graphql(self, query, variables):
+        if 'ids' in variables:
+            location_id = variables['locationId']
+            return {'nodes': [
+                {'id': i, 'inventoryLevel': {'quantities': [{'name': 'on_hand', 'quantity': self.on_hand[(i, location_id)]}]}}
+                for i in variables['ids'] if (i, location_id) in self.on_hand
+            ]}
+        with self.lock:
+            self.writes.append(variables['input']['setQuantities'])
+        return {'inventorySetOnHandQuantities': {'inventoryAdjustmentGroup': {'id': 'g'}, 'userErrors': []}}
+
+
+def _mapping(tmp):
+    mapping = LocationMapping(STORE, path=os.path.join(tmp, "map.json"))
+    mapping.set_location(DEPOT, [1, 2])
+    mapping.set_location(SHOWROOM, [3])
+    return mapping
+
+
+def test_mapping_round_trip_and_quantities():
+    """Eşleştirme kaydedilip okunabilmeli; lokasyon stoğu eşlenen depoların toplamı olmalı"""
+    with tempfile.TemporaryDirectory() as tmp:
+        _mapping(tmp).save()
+        mapping = LocationMapping.load(STORE, path=os.path.join(tmp, "map.json"))
+        assert mapping.warehouses_for(DEPOT) == ["1", "2"]
+
+        variant = {'sku': "A", 'stocks': [
+            {'warehouse_id': 1, 'stock': 4}, {'warehouse': {'id': 2}, 'stock': 1}, {'warehouse_id': 9, 'stock': 50}
+        ]}
+        # Eşlenmemiş depo (9) yazılmaz; stoğu olmayan eşlenmiş lokasyon 0 alır
+        assert mapping.location_quantities(variant) == {DEPOT: 5, SHOWROOM: 0}
+
+        mapping.set_location(SHOWROOM, [])
+        assert mapping.locations() == [DEPOT]
+
+
+def test_all_locations_written_in_one_payload():
+    """Her varyantın eşlenen lokasyonları aynı setQuantities partisinde, yalnızca değişenler yazılmalı"""
+    with tempfile.TemporaryDirectory() as tmp:
+        api = FakeShopifyAPI(_mapping(tmp), on_hand={("I1", DEPOT): 5, ("I1", SHOWROOM): 0})
+        sentos_variants = [{'sku': "A", 'stocks': [{'warehouse_id': 1, 'stock': 5}, {'warehouse_id': 3, 'stock': 2}]}]
+        shopify_variants = [{'id': "V1", 'inventoryItem': {'id': "I1", 'sku': "A"}}]
+
+        adjustments = stock_sync._prepare_inventory_adjustments(sentos_variants, shopify_variants, api.location_mapping)
+        assert {(a['locationId'], a['availableQuantity']) for a in adjustments} == {(DEPOT, 5), (SHOWROOM, 2)}
+
+        changed, skipped = stock_sync.drop_noop_adjustments(api, adjustments, max_workers=1)
+        assert skipped == 1 and [a['locationId'] for a in changed] == [SHOWROOM]
+
+        assert stock_sync._adjust_inventory_bulk(api, adjustments)
+        assert len(api.writes) == 1
+        assert {row['locationId'] for row in api.writes[0]} == {DEPOT, SHOWROOM}
+
+
+if __name__ == "__main__":
+    test_mapping_round_trip_and_quantities()
+    test_all_locations_written_in_one_payload()
+    print("✅ Tüm depo-lokasyon eşleştirmesi testleri başarılı")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Fiyat Defteri ve Değişmeyen Fiyat Eleme Testi
+Shopify'daki güncel fiyatı (okunamazsa defterdeki son gönderilen fiyatı) aynı olan varyantların
+gönderilmemesini, deneme çalıştırmasında atlanan yazımların raporlanmasını test eder
+"""
+
+import os
+import tempfile
+import threading
+import pandas as pd
+from connectors.product_index import ProductIndex
+from operations import price_sync
+from operations.price_ledger import PriceLedger
+
+
+def _product(product_id, variants):
+    return {
+        "id": f"gid://shopify/Product/{product_id}",
+        "title": f"Ürün {product_id}",
+        "updatedAt": "2024-01-01T00:00:00Z",
+        "variants": {"edges": [
+            {"node": {"id": f"gid://shopify/ProductVariant/{vid}", "sku": sku,
+                      "inventoryItem": {"id": f"gid://shopify/InventoryItem/{vid}"}}}
+            for vid, sku in variants
+        ]},
+    }
+
+
+class FakeShopifyAPI:
+    """Varyant fiyatlarını tutan; okunamaz olarak işaretlenen varyantları döndürmeyen sahte istemci"""
+    def __init__(self, prices, unreadable=()):
+        self.product_index = ProductIndex("demo.myshopify.com", db_path=os.path.join(tempfile.mkdtemp(), "index.db"))
+        self.product_index.upsert_product(_product(1, [(11, "EL1-S"), (12, "EL1-M")]))
+        self.product_index.upsert_product(_product(2, [(21, "GM2-S")]))
+        self.prices = prices
+        self.unreadable = set(unreadable)
+        self.mutations = []
+        self.lock = threading.Lock()
+
+    def get_product_index(self):
+        return self.product_index
+
+    def execute_graphql(self, query, variables):
+        if 'nodes(' in query:
+            return {'nodes': [
+                {'id': i, 'price': self.prices[i][0], 'compareAtPrice': self.prices[i][1]}
+                for i in variables['ids'] if i in self.prices and i not in self.unreadable
+            ]}
+        with self.lock:
+            self.mutations.append(variables['productId'])
+            for v in variables['variants']:
+                self.prices[v['id']] = (v['price'], v.get('compareAtPrice'))
+        return {'productVariantsBulkUpdate': {
+            'productVariants': [{'id': v['id']} for v in variables['variants']], 'userErrors': []
+        }}
+
+
+class NoWaitLimiter:
+    def wait(self):
+        pass
+
+    def handle_throttle_error(self):
+        pass
+
+
+def _push(api, ledger, prices, dry_run=False):
+    df = pd.DataFrame({'MODEL KODU': ["EL1", "GM2"], 'NIHAI_SATIS_FIYATI': prices})
+    return dict(price_sync.iter_price_pushes(
+        api, df, 'NIHAI_SATIS_FIYATI', None, ["EL1", "GM2"], NoWaitLimiter(), max_workers=2, ledger=ledger, dry_run=dry_run
+    ))
+
+
+def test_only_changed_products_are_pushed():
+    """Güncel fiyatı aynı olan ürün gönderilmemeli; küçük bir değişiklik yalnızca ilgili ürünü yazmalı"""
+    api = FakeShopifyAPI({
+        "gid://shopify/ProductVariant/11": ("499.90", None),
+        "gid://shopify/ProductVariant/12": ("100.00", None),
+        "gid://shopify/ProductVariant/21": ("250.00", "300.00"),
+    })
+    ledger = PriceLedger("demo.myshopify.com", db_path=os.path.join(tempfile.mkdtemp(), "ledger.db"))
+
+    dry = _push(api, ledger, [499.9, 250.0], dry_run=True)
+    assert api.mutations == []
+    assert dry["EL1"]["would_update"] == 1 and dry["EL1"]["skipped_count"] == 1
+    assert dry["GM2"] == {"status": "success", "updated_count": 0, "skipped_count": 1}
+
+    results = _push(api, ledger, [499.9, 250.0])
+    assert api.mutations == ["gid://shopify/Product/1"]
+    assert results["EL1"]["updated_count"] == 1
+    assert ledger.get_prices(["gid://shopify/ProductVariant/12"]) == {"gid://shopify/ProductVariant/12": ("499.90", None)}
+
+    # Yalnızca GM2'nin fiyatı değişti
+    api.mutations.clear()
+    _push(api, ledger, [499.9, 260.0])
+    assert api.mutations == ["gid://shopify/Product/2"]
+
+
+def test_ledger_used_when_prices_cannot_be_read():
+    """Fiyatı okunamayan varyant, defterdeki son gönderilen fiyatla aynıysa yazılmamalı"""
+    variant = "gid://shopify/ProductVariant/21"
+    api = FakeShopifyAPI({
+        "gid://shopify/ProductVariant/11": ("499.90", None),
+        "gid://shopify/ProductVariant/12": ("499.90", None),
+        variant: ("250.00", None),
+    }, unreadable=[variant])
+    ledger = PriceLedger("demo.myshopify.com", db_path=os.path.join(tempfile.mkdtemp(), "ledger.db"))
+
+    _push(api, ledger, [499.9, 250.0])
+    assert api.mutations == ["gid://shopify/Product/2"]
+
+    api.mutations.clear()
+    results = _push(api, ledger, [499.9, 250.0])
+    assert api.mutations == [] and results["GM2"]["skipped_count"] == 1
+
+
+if __name__ == "__main__":
+    test_only_changed_products_are_pushed()
+    test_ledger_used_when_prices_cannot_be_read()
+    print("✅ Tüm fiyat defteri testleri başarılı")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Dizin Tabanlı Fiyat Gönderimi Testi
+Fiyatların ana model kodu hash indeksinden, varyant ID'lerinin ürün dizininden tek okumayla
+eşlenmesini ve Shopify'a yalnızca productVariantsBulkUpdate gönderilmesini test eder
+"""
+
+import os
+import tempfile
+import threading
+import pandas as pd
+from connectors.product_index import ProductIndex
+from operations import price_sync
+
+
+def _product(product_id, variants):
+    return {
+        "id": f"gid://shopify/Product/{product_id}",
+        "title": f"Ürün {product_id}",
+        "updatedAt": "2024-01-01T00:00:00Z",
+        "variants": {"edges": [
+            {"node": {"id": f"gid://shopify/ProductVariant/{vid}", "sku": sku,
+                      "inventoryItem": {"id": f"gid://shopify/InventoryItem/{vid}"}}}
+            for vid, sku in variants
+        ]},
+    }
+
+
+class FakeShopifyAPI:
+    """Gönderilen her GraphQL belgesini kaydeden sahte istemci"""
+    def __init__(self):
+        self.product_index = ProductIndex("demo.myshopify.com", db_path=os.path.join(tempfile.mkdtemp(), "index.db"))
+        self.queries = []
+        self.lock = threading.Lock()
+
+    def get_product_index(self):
+        return self.product_index
+
+    def execute_graphql(self, query, variables):
+        if 'nodes(' in query:
+            return {'nodes': []}
+        with self.lock:
+            self.queries.append((query, variables))
+        return {'productVariantsBulkUpdate': {
+            'productVariants': [{'id': v['id']} for v in variables['variants']], 'userErrors': []
+        }}
+
+
+class NoWaitLimiter:
+    def wait(self):
+        pass
+
+    def handle_throttle_error(self):
+        pass
+
+
+def test_price_index_and_prefix_matching():
+    """İlk satır kazanmalı; varyant en uzun eşleşen ana model koduna atanmalı"""
+    df = pd.DataFrame({'MODEL KODU': ["A1", "A1", "A12"], 'FIYAT': [10.0, 99.0, 20.0], 'LISTE': [15.0, None, float('nan')]})
+    index = price_sync.build_price_index(df, 'FIYAT', 'LISTE')
+    assert index == {"A1": (10.0, 15.0), "A12": (20.0, None)}
+
+    rows = [("P1", "V1", "A1-S"), ("P2", "V2", "A12-M"), ("P3", "V3", "B1"), ("P4", "V4", "A10-S"), ("P5", "V5", "A1XL")]
+    targets = price_sync.match_variants_to_base_skus(rows, ["A1", "A12"])
+    assert targets == {"A1": {"P1": [{'id': "V1", 'sku': "A1-S"}]}, "A12": {"P2": [{'id': "V2", 'sku': "A12-M"}]}}
+
+    # Sentos varyant eşlemesindeki SKU ayraçsız da olsa kesin eşleşir
+    targets = price_sync.match_variants_to_base_skus(rows, ["A1", "A12"], {"A1XL": "A1"})
+    assert targets["A1"] == {"P1": [{'id': "V1", 'sku': "A1-S"}], "P5": [{'id': "V5", 'sku': "A1XL"}]}
+
+
+def test_push_sends_only_bulk_updates():
+    """Arama sorgusu olmadan her ürün için yalnızca productVariantsBulkUpdate gönderilmeli"""
+    api = FakeShopifyAPI()
+    api.product_index.upsert_product(_product(1, [(11, "EL1-S"), (12, "EL1-M")]))
+    api.product_index.upsert_product(_product(2, [(21, "GM2-S")]))
+
+    df = pd.DataFrame({'MODEL KODU': ["EL1", "GM2", "YOK"], 'NIHAI_SATIS_FIYATI': [499.9, 250.0, 100.0],
+                       'İNDİRİMLİ SATIŞ FİYATI': [399.9, 200.0, 80.0]})
+    results = dict(price_sync.iter_price_pushes(
+        api, df, 'İNDİRİMLİ SATIŞ FİYATI', 'NIHAI_SATIS_FIYATI', ["EL1", "GM2", "YOK", "FIYATSIZ"], NoWaitLimiter(), max_workers=2
+    ))
+
+    assert results["EL1"]["status"] == "success" and results["EL1"]["updated_count"] == 2
+    assert results["GM2"]["status"] == "success"
+    assert results["YOK"]["status"] == "failed" and results["FIYATSIZ"]["status"] == "skipped"
+
+    assert len(api.queries) == 2
+    assert all('productVariantsBulkUpdate' in q and 'products(' not in q for q, _ in api.queries)
+    sent = {v['id']: v for _, variables in api.queries for v in variables['variants']}
+    assert sent["gid://shopify/ProductVariant/11"] == {
+        'id': "gid://shopify/ProductVariant/11", 'price': "399.90", 'compareAtPrice': "499.90"
+    }
+
+
+if __name__ == "__main__":
+    test_price_index_and_prefix_matching()
+    test_push_sends_only_bulk_updates()
+    print("✅ Tüm dizin tabanlı fiyat gönderimi testleri başarılı")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Fiyat Kuralı Motoru Testi
+Sıralı kural tablosunun (kâr marjı, kategori çarpanı, KDV, X9.99 yuvarlama, indirim, toptan)
+tüm katalog üzerinde vektörel hesaplanmasını ve 100 bin varyantlık hesaplama süresini test eder
+"""
+
+import math
+import time
+import numpy as np
+import pandas as pd
+from operations.pricing_engine import PricingEngine, round_prices, ROUNDING_UP, ROUNDING_DOWN
+
+
+def _scalar_rounding(price, method):
+    """Sayfadaki eski satır satır yuvarlama (karşılaştırma için)"""
+    if method == ROUNDING_UP:
+        if price % 10 != 9.99 and price % 10 != 9:
+            return math.floor(price / 10) * 10 + 9.99
+        elif price % 1 == 0:
+            return price - 0.01
+        return price
+    elif method == ROUNDING_DOWN:
+        return math.floor(price / 10) * 10 - 0.01 if price > 10 else 9.99
+    return price
+
+
+def test_rounding_matches_row_by_row():
+    """Vektörel yuvarlama eski satır satır sonuçla aynı olmalı"""
+    prices = np.concatenate([np.random.default_rng(1).uniform(0, 2000, 5000), [9.0, 19.0, 29.0, 5.0, 10.0, 123.45]])
+    for method in (ROUNDING_UP, ROUNDING_DOWN):
+        expected = [_scalar_rounding(p, method) for p in prices]
+        assert np.allclose(round_prices(prices, method), expected)
+
+
+def test_rules_applied_in_order():
+    """Kâr marjı → kategori çarpanı → KDV → yuvarlama; indirim ve toptan nihai fiyattan türetilmeli"""
+    df = pd.DataFrame({'MODEL KODU': ["A", "B", "C"], 'ALIŞ FİYATI': [100.0, 100.0, 0.0], 'KATEGORİ': ["Gömlek", "Elbise", ""]})
+    engine = PricingEngine([
+        {'type': 'markup', 'mode': 'percent', 'value': 100},
+        {'type': 'category_multiplier', 'multipliers': {'Gömlek': 1.5}},
+        {'type': 'vat', 'rate': 10},
+        {'type': 'rounding', 'method': ROUNDING_UP},
+        {'type': 'discount', 'rate': 10},
+        {'type': 'wholesale', 'mode': 'multiplier', 'value': 1.8},
+    ])
+    result = engine.evaluate(df)
+
+    assert np.allclose(result['SATIS_FIYATI_KDVSIZ'], [300.0, 200.0, 0.0])
+    assert np.allclose(result['NIHAI_SATIS_FIYATI'], [339.99, 229.99, 9.99])
+    assert np.allclose(result['KÂR'], result['NIHAI_SATIS_FIYATI'] / 1.1 - df['ALIŞ FİYATI'])
+    assert result['KÂR ORANI (%)'].iloc[2] == 0
+    assert np.allclose(result['İNDİRİMLİ SATIŞ FİYATI'], result['NIHAI_SATIS_FIYATI'] * 0.9)
+    assert np.allclose(result["TOPTAN FİYAT (KDV'siz)"], [180.0, 180.0, 0.0])
+    assert 'KÂR' not in df.columns
+
+
+def test_100k_variants_under_a_second():
+    """100 bin varyantlık katalog tüm kurallarla bir saniyenin çok altında hesaplanmalı"""
+    rng = np.random.default_rng(7)
+    count = 100_000
+    df = pd.DataFrame({
+        'MODEL KODU': [f"SKU{i}" for i in range(count)],
+        'ALIŞ FİYATI': rng.uniform(10, 1500, count).round(2),
+        'KATEGORİ': rng.choice(["Gömlek", "Elbise", "Pantolon", "Ceket", ""], count),
+    })
+    engine = PricingEngine.from_settings('percent', 120, True, 10, ROUNDING_UP, {'Ceket': 1.2, 'Elbise': 1.1})
+    engine.rules += [{'type': 'discount', 'rate': 15}, {'type': 'wholesale', 'mode': 'discount', 'value': 40}]
+
+    start = time.perf_counter()
+    result = engine.evaluate(df)
+    elapsed = time.perf_counter() - start
+
+    print(f"100.000 varyant {elapsed * 1000:.1f} ms içinde hesaplandı")
+    assert len(result) == count
+    assert elapsed < 0.5
+
+
+if __name__ == "__main__":
+    test_rounding_matches_row_by_row()
+    test_rules_applied_in_order()
+    test_100k_variants_under_a_second()
+    print("✅ Tüm fiyat kuralı motoru testleri başarılı")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Ürün Detayı Alan Farkı Testi
+Başlık, açıklama ve kategorinin tek productUpdate ile ve yalnızca değişen alanlarla
+gönderilmesini, hiçbir alan değişmediyse istek atılmamasını test eder
+"""
+
+import os
+import tempfile
+from connectors.product_index import ProductIndex, description_hash
+from connectors.shopify_api import ShopifyAPI
+from operations import core_sync
+
+GID = "gid://shopify/Product/1"
+
+
+class FakeShopifyAPI:
+    """Detayları dizinden okuyan ve productUpdate girdilerini kaydeden sahte istemci"""
+    def __init__(self):
+        self.product_index = ProductIndex("demo.myshopify.com", db_path=os.path.join(tempfile.mkdtemp(), "index.db"))
+        self.updates = []
+
+    def get_product_details(self, product_gid):
+        return self.product_index.get_details(product_gid)
+
+    def execute_graphql(self, query, variables):
+        self.updates.append(variables['input'])
+        return {'productUpdate': {'product': {'id': GID}, 'userErrors': []}}
+
+
+def _sentos(description="<p>Pamuklu  elbise</p>", category="Elbise"):
+    return {'name': "Yazlık Elbise", 'description_detail': description, 'category': category}
+
+
+def test_unchanged_details_send_nothing():
+    """Shopify'daki değerler aynıysa (boşluk farkı dahil) mutation gönderilmemeli"""
+    api = FakeShopifyAPI()
+    api.product_index.upsert_product({'id': GID, 'title': "Yazlık Elbise", 'updatedAt': "2024-01-01T00:00:00Z",
+                                      'descriptionHtml': "<p>Pamuklu elbise</p>\n", 'productType': "Elbise"})
+    changes = core_sync.sync_details(api, GID, _sentos())
+    assert api.updates == []
+    assert changes == ["Başlık, açıklama ve kategori zaten güncel."]
+
+
+def test_only_changed_fields_in_one_update():
+    """Yalnızca açıklama ve kategori değiştiyse tek istekte yalnızca bu alanlar gitmeli; dizin güncellenmeli"""
+    api = FakeShopifyAPI()
+    api.product_index.upsert_product({'id': GID, 'title': "Yazlık Elbise", 'updatedAt': "2024-01-01T00:00:00Z",
+                                      'descriptionHtml': "<p>Eski</p>", 'productType': "Etek"})
+    core_sync.sync_details(api, GID, _sentos())
+    assert len(api.updates) == 1
+    assert set(api.updates[0]) == {'id', 'descriptionHtml', 'productType'}
+
+    core_sync.sync_details(api, GID, _sentos())
+    assert len(api.updates) == 1
+
+
+def test_unknown_current_values_send_all_fields():
+    """Mevcut değerler okunamazsa tüm alanlar tek istekte gönderilmeli"""
+    update_input, changes = core_sync.plan_details_update(GID, _sentos(), None)
+    assert set(update_input) == {'id', 'title', 'descriptionHtml', 'productType'}
+    assert len(changes) == 2
+
+
+def test_force_update_skips_comparison():
+    """force_update verilirse dizin güncel dese de tüm alanlar yazılmalı"""
+    api = FakeShopifyAPI()
+    api.product_index.upsert_product({'id': GID, 'title': "Yazlık Elbise", 'updatedAt': "2024-01-01T00:00:00Z",
+                                      'descriptionHtml': "<p>Pamuklu elbise</p>", 'productType': "Elbise"})
+    core_sync.sync_details(api, GID, _sentos(), force_update=True)
+    assert len(api.updates) == 1
+    assert set(api.updates[0]) == {'id', 'title', 'descriptionHtml', 'productType'}
+
+
+class FakeReadBatcher:
+    """Shopify'daki (adminde elle değiştirilmiş) detayları döndüren sahte okuma birleştiricisi"""
+    def __init__(self, details):
+        self.details = details
+        self.lookups = 0
+
+    def lookup(self, lookup):
+        self.lookups += 1
+        return self.details
+
+
+class FakeDetailsShopify:
+    _product_details_lookup = staticmethod(ShopifyAPI._product_details_lookup)
+
+    def __init__(self, product_index, live_details):
+        self.product_index = product_index
+        self.read_batcher = FakeReadBatcher(live_details)
+
+
+def test_unrefreshed_index_reads_live_details():
+    """Dizin bu çalıştırmada yenilenmediyse detaylar Shopify'dan okunmalı; yenilendiyse dizin kullanılmalı"""
+    api = FakeShopifyAPI()
+    api.product_index.upsert_product({'id': GID, 'title': "Yazlık Elbise", 'updatedAt': "2024-01-01T00:00:00Z",
+                                      'descriptionHtml': "<p>Pamuklu elbise</p>", 'productType': "Elbise"})
+    live = {'title': "Elle Değişen Başlık", 'description_hash': description_hash("<p>Pamuklu elbise</p>"), 'product_type': "Elbise"}
+    shopify = FakeDetailsShopify(api.product_index, live)
+    assert ShopifyAPI.get_product_details(shopify, GID) == live
+    assert shopify.read_batcher.lookups == 1
+
+    api.product_index.refreshed_at = "2024-01-02T00:00:00+00:00"
+    assert ShopifyAPI.get_product_details(shopify, GID)['title'] == "Elle Değişen Başlık"
+    assert shopify.read_batcher.lookups == 1
+
+
+if __name__ == "__main__":
+    test_unchanged_details_send_nothing()
+    test_only_changed_fields_in_one_update()
+    test_unknown_current_values_send_all_fields()
+    test_force_update_skips_comparison()
+    test_unrefreshed_index_reads_live_details()
+    print("✅ Tüm ürün detayı alan farkı testleri başarılı")
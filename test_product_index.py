@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Kalıcı Ürün Dizini Testi
+SQLite dizininin SKU/başlık aramalarını ve artımlı filigranı test eder
+"""
+
+import os
+import tempfile
+from connectors.product_index import ProductIndex
+
+
+def _product(product_id, title, updated_at, variants):
+    return {
+        "id": f"gid://shopify/Product/{product_id}",
+        "title": title,
+        "updatedAt": updated_at,
+        "variants": {"edges": [
+            {"node": {"id": f"gid://shopify/ProductVariant/{vid}", "sku": sku,
+                      "inventoryItem": {"id": f"gid://shopify/InventoryItem/{vid}"}}}
+            for vid, sku in variants
+        ]},
+    }
+
+
+def _new_index():
+    tmp_dir = tempfile.mkdtemp()
+    return ProductIndex("demo.myshopify.com", db_path=os.path.join(tmp_dir, "index.db"))
+
+
+def test_lookups_by_sku_and_title():
+    """SKU önce, başlık sonra eşleşmeli; varyant bilgisi stok biçiminde dönmeli"""
+    index = _new_index()
+    index.upsert_product(_product(1, "Elbise", "2024-01-01T00:00:00Z", [(11, "ELB-S"), (12, "ELB-M")]))
+
+    assert index.find_product({"sku": "ELB-M"}) == {"id": 1, "gid": "gid://shopify/Product/1"}
+    assert index.find_product({"sku": "YOK", "name": "Elbise"})["id"] == 1
+    assert index.get_variant("ELB-S")["inventory_item_id"] == "gid://shopify/InventoryItem/11"
+    assert len(index.get_product_variants("gid://shopify/Product/1")) == 2
+    assert list(index.find_variants_by_sku_prefix("ELB")) == ["gid://shopify/Product/1"]
+    assert index.find_variants_by_sku_prefix("elb") == {}
+
+
+def test_upsert_replaces_variants_and_advances_watermark():
+    """Tekrar yazılan ürünün eski varyantları silinmeli, filigran ilerlemeli"""
+    index = _new_index()
+    index.upsert_product(_product(1, "Elbise", "2024-01-01T00:00:00Z", [(11, "ELB-S")]))
+    index.upsert_product(_product(1, "Elbise", "2024-02-01T00:00:00Z", [(13, "ELB-L")]))
+
+    assert index.get_variant("ELB-S") is None
+    assert index.get_variant("ELB-L")["variant_id"] == "gid://shopify/ProductVariant/13"
+    assert index.get_watermark() == "2024-02-01T00:00:00Z"
+    assert index.count() == 1
+
+
+class FakeBulk:
+    def run_tree(self, query, child_keys, progress_callback=None):
+        raise Exception("A bulk query operation for this app and shop is already in progress")
+        yield
+
+
+class FakeShopifyAPI:
+    """Bulk işlemi başarısız olan; ürün sayfalarını ve silme olaylarını döndüren sahte istemci"""
+    def __init__(self, products, deleted=(), fail_pages=False):
+        self.bulk = FakeBulk()
+        self.products = products
+        self.deleted = list(deleted)
+        self.fail_pages = fail_pages
+
+    def execute_graphql(self, query, variables):
+        if 'deletionEvents' in query:
+            return {'deletionEvents': {'pageInfo': {'hasNextPage': False},
+                                       'edges': [{'node': {'subjectId': gid}} for gid in self.deleted]}}
+        if self.fail_pages:
+            raise Exception("bağlantı hatası")
+        if 'product(id:' in query:
+            product = next(p for p in self.products if p['id'] == variables['id'])
+            return {'product': {'variants': {'pageInfo': {'hasNextPage': False}, 'edges': product['variants']['edges'][100:]}}}
+        if any(len(p['variants']['edges']) > 100 for p in self.products):
+            # Sayfalı sorgu ürün başına ilk 100 varyantı döndürür
+            return {'products': {'pageInfo': {'hasNextPage': False}, 'edges': [{'node': {
+                **p, 'variants': {'pageInfo': {'hasNextPage': len(p['variants']['edges']) > 100, 'endCursor': "c100"},
+                                  'edges': p['variants']['edges'][:100]}
+            }} for p in self.products]}}
+        return {'products': {'pageInfo': {'hasNextPage': False}, 'edges': [{'node': p} for p in self.products]}}
+
+
+def test_full_refresh_falls_back_to_pages():
+    """Bulk başarısızsa dizin sayfalı okumayla kurulmalı; o da başarısızsa mevcut dizin korunmalı"""
+    index = _new_index()
+    api = FakeShopifyAPI([_product(1, "Elbise", "2024-01-01T00:00:00Z", [(11, "ELB-S")])])
+    assert index.refresh(api) == 1
+    assert index.get_variant("ELB-S") is not None and index.is_ready()
+
+    api.fail_pages = True
+    index.refresh(api, full=True)
+    assert index.get_variant("ELB-S") is not None
+
+
+def test_deleted_products_removed_on_incremental_refresh():
+    """Shopify'da silinen ürün artımlı güncellemede dizinden çıkmalı"""
+    index = _new_index()
+    api = FakeShopifyAPI([_product(1, "Elbise", "2024-01-01T00:00:00Z", [(11, "ELB-S")]),
+                          _product(2, "Gömlek", "2024-01-01T00:00:00Z", [(21, "GOM-S")])])
+    index.refresh(api)
+
+    api.products, api.deleted = [], ["gid://shopify/Product/2"]
+    index.refresh(api)
+    assert index.find_by_sku("GOM-S") is None
+    assert index.find_by_sku("ELB-S") is not None
+
+
+def test_incremental_refresh_keeps_all_variants():
+    """100'den fazla varyantı olan ürünün artımlı güncellemesi kalan varyantları da okumalı"""
+    index = _new_index()
+    variants = [(1000 + i, f"BIG-{i}") for i in range(130)]
+    api = FakeShopifyAPI([_product(1, "Büyük", "2024-01-01T00:00:00Z", variants)])
+    index.refresh(api)
+    api.products = [_product(1, "Büyük", "2024-02-01T00:00:00Z", variants)]
+    index.refresh(api)
+    assert len(index.get_product_variants("gid://shopify/Product/1")) == 130
+    assert index.find_by_sku("BIG-129") is not None
+
+
+if __name__ == "__main__":
+    test_lookups_by_sku_and_title()
+    test_upsert_replaces_variants_and_advances_watermark()
+    test_full_refresh_falls_back_to_pages()
+    test_deleted_products_removed_on_incremental_refresh()
+    test_incremental_refresh_keeps_all_variants()
+    print("✅ Tüm ürün dizini testleri başarılı")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+productSet ile Ürün Oluşturma Testi
+Yeni ürünün seçenek, varyant, fiyat, stok ve görselleriyle tek mutation'da oluşturulmasını
+ve arka plan işleminin productOperation ile izlenmesini test eder
+"""
+
+import os
+import tempfile
+import sync_runner
+from connectors.product_index import ProductIndex
+
+LOCATION = "gid://shopify/Location/1"
+PRODUCT_GID = "gid://shopify/Product/9"
+
+
+class FakeShopifyAPI:
+    """productSet girdisini kaydeden, işlemi ikinci sorgulamada tamamlanmış gösteren sahte istemci"""
+    def __init__(self):
+        self.product_index = ProductIndex("demo.myshopify.com", db_path=os.path.join(tempfile.mkdtemp(), "index.db"))
+        self.calls = []
+        self.polls = 0
+
+    def get_default_location_id(self):
+        return LOCATION
+
+    def execute_graphql(self, query, variables):
+        self.calls.append(query)
+        if 'productSet(' in query:
+            self.product_input = variables['input']
+            return {'productSet': {'productSetOperation': {'id': "gid://shopify/ProductSetOperation/1", 'status': 'CREATED', 'userErrors': []}, 'userErrors': []}}
+        self.polls += 1
+        if self.polls < 2:
+            return {'productOperation': {'status': 'ACTIVE', 'product': None, 'userErrors': []}}
+        variants = [{'node': {'id': f"gid://shopify/ProductVariant/{i}", 'sku': v['inventoryItem']['sku'],
+                              'inventoryItem': {'id': f"gid://shopify/InventoryItem/{i}"}}}
+                    for i, v in enumerate(self.product_input['variants'])]
+        return {'productOperation': {'status': 'COMPLETE', 'userErrors': [], 'product': {
+            'id': PRODUCT_GID, 'title': self.product_input['title'], 'variants': {'edges': variants}}}}
+
+
+class FakeSentosAPI:
+    def get_ordered_image_urls(self, product_id):
+        return ["https://cdn/1.jpg", "https://cdn/2.jpg"]
+
+
+def _sentos_product():
+    return {
+        'id': 7, 'name': "Keten Gömlek", 'sku': "KG1", 'category': "Gömlek", 'sale_price': "499,90",
+        'variants': [
+            {'sku': "KG1-S", 'color': "Beyaz", 'model': {'value': "S"}, 'stocks': [{'stock': 3}, {'stock': 2}]},
+            {'sku': "KG1-M", 'color': "Beyaz", 'model': {'value': "M"}, 'stocks': [{'stock': 0}]},
+        ],
+    }
+
+
+def test_product_created_with_single_mutation():
+    """Ürün tek productSet ile oluşturulmalı; varyant, stok ve görseller aynı girdide olmalı"""
+    sync_runner.PRODUCT_SET_POLL_INTERVAL = 0.01
+    api = FakeShopifyAPI()
+    changes = sync_runner._create_product(api, FakeSentosAPI(), _sentos_product())
+
+    mutations = [q for q in api.calls if q.lstrip().startswith('mutation')]
+    assert len(mutations) == 1 and api.polls == 2
+    product_input = api.product_input
+    assert product_input['status'] == "ACTIVE"
+    assert [v['inventoryItem']['sku'] for v in product_input['variants']] == ["KG1-S", "KG1-M"]
+    assert product_input['variants'][0]['price'] == "499.90"
+    assert product_input['variants'][0]['inventoryQuantities'] == [{'locationId': LOCATION, 'name': 'available', 'quantity': 5}]
+    assert [f['originalSource'] for f in product_input['files']] == ["https://cdn/1.jpg", "https://cdn/2.jpg"]
+    assert "2 varyant eklendi." in changes and "2 yeni görsel eklendi." in changes
+
+    # Oluşturulan ürün aynı çalıştırmadaki aramalar için dizine yazılmalı
+    assert api.product_index.find_product({'sku': "KG1-M", 'name': "Keten Gömlek"})['gid'] == PRODUCT_GID
+
+
+def test_product_without_options_gets_default_option():
+    """Seçeneksiz ürün varsayılan 'Title' seçeneğiyle gönderilmeli"""
+    product_input, stocked = sync_runner._build_product_set_input({'name': "Kemer", 'sku': "K1", 'stocks': [{'stock': 4}]}, LOCATION)
+    assert product_input['productOptions'] == [{"name": "Title", "values": [{"name": "Default Title"}]}]
+    assert product_input['variants'][0]['optionValues'] == [{"optionName": "Title", "name": "Default Title"}]
+    assert stocked == 1 and 'files' not in product_input
+
+
+if __name__ == "__main__":
+    test_product_created_with_single_mutation()
+    test_product_without_options_gets_default_option()
+    print("✅ Tüm productSet oluşturma testleri başarılı")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+İlerleme Olay Yolu Testi
+Çok sayıda olayın aralıklı anlık görüntülerde birleştirilmesini, kanal ayrımını ve
+son durum olayının bekleyen veriden sonra gecikmeden iletilmesini test eder
+"""
+
+from operations.progress_bus import ProgressBus, product_event, render_event_html, CHANNEL_STATS
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_events_are_coalesced_per_subscriber():
+    """1000 olay tek anlık görüntüye inmeli; istatistik abonesi ürün olayı almamalı"""
+    clock = FakeClock()
+    bus = ProgressBus(tick=60, clock=clock)
+    ui, stats_only = [], []
+    bus.subscribe(ui.append)
+    bus.subscribe(stats_only.append, channels=(CHANNEL_STATS,), interval=5)
+
+    for i in range(1000):
+        bus.publish({'product': product_event('updated', f"Ürün {i}", f"S{i}", ["stok"])})
+        bus.publish({'progress': i // 10, 'stats': {'processed': i + 1}})
+    bus.flush(only_due=True)
+
+    assert len(ui) == 1
+    assert len(ui[0]['products']) + ui[0]['dropped_products'] == 1000
+    assert ui[0]['stats'] == {'processed': 1000} and ui[0]['progress'] == 99
+    assert stats_only == [{'progress': 99, 'stats': {'processed': 1000}}]
+
+    # Aralığı dolmayan abone bekler, dolan abone yeni görüntüyü alır
+    bus.publish({'stats': {'processed': 1001}})
+    clock.now += 1
+    bus.flush(only_due=True)
+    assert len(ui) == 2 and len(stats_only) == 1
+    bus.close()
+
+
+def test_status_flushes_pending_first():
+    """done olayı bekleyen ürün olaylarından sonra ve hemen iletilmeli"""
+    bus = ProgressBus(tick=60)
+    received = []
+    bus.subscribe(received.append)
+    bus.publish({'product': product_event('failed', "Elbise", "ELB", ["zaman aşımı"])})
+    bus.publish({'status': 'done', 'results': {'ok': True}})
+    assert [list(r) for r in received] == [['products', 'dropped_products'], ['status', 'results']]
+    assert "zaman aşımı" in render_event_html(received[0]['products'][0])
+    bus.close()
+
+
+if __name__ == "__main__":
+    test_events_are_coalesced_per_subscriber()
+    test_status_flushes_pending_first()
+    print("✅ Tüm ilerleme olay yolu testleri başarılı")
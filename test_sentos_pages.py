@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Sentos Sayfa Fan-out Testi
+Eşzamanlı çekilen sayfaların sırayla birleştirilmesini ve hatalı sayfanın tekrar denenmesini test eder
+(senkron ve asenkron istemci)
+"""
+
+import re
+import asyncio
+import threading
+from connectors.sentos_api import SentosAPI
+from connectors.async_sentos_api import AsyncSentosAPI, PAGE_WINDOW
+
+TOTAL = 1050
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class FakeSentosAPI(SentosAPI):
+    """/products?page=N&size=M isteklerini bellekteki katalogdan yanıtlayan Sentos"""
+    def __init__(self, fail_pages=()):
+        super().__init__("https://sentos.example/api", "key", "secret")
+        self.fail_pages = set(fail_pages)
+        self.total = TOTAL
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def _make_request(self, method, endpoint, **kwargs):
+        page, size = map(int, re.search(r'page=(\d+)&size=(\d+)', endpoint).groups())
+        with self.lock:
+            self.requests.append((page, size))
+            if (page, size) in self.fail_pages:
+                self.fail_pages.discard((page, size))
+                raise Exception("Sentos API Hatası: 502")
+        start = (page - 1) * size
+        data = [{'id': i, 'sku': f"SKU-{i}"} for i in range(start, min(start + size, self.total))]
+        return _FakeResponse({'data': data, 'total_elements': self.total})
+
+
+def test_pages_are_reassembled_in_order():
+    """Tüm ürünler bir kez ve sırayla gelmeli; sayfa boyutu hızlı yanıtta büyümeli"""
+    api = FakeSentosAPI()
+    products = api.get_all_products(page_size=100)
+    assert [p['id'] for p in products] == list(range(TOTAL))
+    # İlk sayfa hızlı döndüğü için sonraki sayfalar 200'lük çekilir
+    assert {size for page, size in api.requests[1:]} == {200}
+
+
+def test_only_failed_page_is_retried():
+    """Hata veren sayfa tek başına tekrar denenmeli"""
+    api = FakeSentosAPI(fail_pages=[(3, 200)])
+    products = api.get_all_products(page_size=100)
+    assert [p['id'] for p in products] == list(range(TOTAL))
+    assert api.requests.count((3, 200)) == 2
+    assert all(api.requests.count(r) == 1 for r in api.requests if r != (3, 200))
+
+
+def test_iter_products_streams_with_backpressure():
+    """Tüketici durursa önden çekilen sayfa sayısı pencereyle sınırlı kalmalı"""
+    api = FakeSentosAPI()
+    api.total = 10000
+    products = api.iter_products(page_size=100)
+    first = [next(products) for _ in range(150)]
+    products.close()
+    assert [p['id'] for p in first] == list(range(150))
+    # İlk sayfa + en fazla pencere kadar önden istenen sayfa
+    assert len(api.requests) <= 1 + api.max_concurrent_pages * 2
+
+
+class FakeAsyncSentosAPI(AsyncSentosAPI):
+    """Sayfaları bellekten yanıtlayan, eşzamanlı istek sayısını ölçen asenkron Sentos"""
+    def __init__(self, fail_pages=()):
+        super().__init__("https://sentos.example/api", "key", "secret")
+        self.fail_pages = set(fail_pages)
+        self.in_flight = self.max_in_flight = 0
+
+    async def get_products_page(self, page, page_size=100):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            if page in self.fail_pages:
+                self.fail_pages.discard(page)
+                raise Exception("Sentos API Hatası: 502")
+            start = (page - 1) * page_size
+            return {'data': [{'id': i} for i in range(start, min(start + page_size, TOTAL))], 'total_elements': TOTAL}
+        finally:
+            self.in_flight -= 1
+
+
+def test_async_pages_are_bounded_and_retried():
+    """Asenkron istemci en fazla PAGE_WINDOW sayfayı aynı anda istemeli, hatalı sayfayı tekrar denemeli"""
+    api = FakeAsyncSentosAPI(fail_pages={4})
+    products = asyncio.run(api.get_all_products())
+    assert [p['id'] for p in products] == list(range(TOTAL))
+    assert 1 < api.max_in_flight <= PAGE_WINDOW
+
+
+if __name__ == "__main__":
+    test_pages_are_reassembled_in_order()
+    test_only_failed_page_is_retried()
+    test_iter_products_streams_with_backpressure()
+    test_async_pages_are_bounded_and_retried()
+    print("✅ Tüm Sentos sayfa testleri başarılı")
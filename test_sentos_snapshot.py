@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Sentos Katalog Anlık Görüntüsü Testi
+TTL içinde kataloğun yalnızca bir kez indirilmesini ve SKU dizinini test eder
+"""
+
+import tempfile
+import threading
+from connectors import sentos_snapshot
+from connectors.sentos_snapshot import SentosCatalogSnapshot, DEFAULT_SNAPSHOT_TTL
+from operations.delta_sync import catalog_ttl_for_mode, STOCK_FAST_MODE, FULL_SYNC_MODE
+
+
+class FakeSentosAPI:
+    api_url = "https://sentos.example/api"
+
+    def __init__(self):
+        self.downloads = 0
+        self.lock = threading.Lock()
+
+    def get_all_products(self, progress_callback=None):
+        with self.lock:
+            self.downloads += 1
+        return [{'id': 1, 'sku': 'ABC', 'variants': [{'sku': 'ABC-S'}, {'sku': 'ABC-M'}]},
+                {'id': 2, 'sku': 'XYZ', 'variants': [{'sku': 'XYZ-S'}]}]
+
+    def iter_product_pages(self):
+        yield self.get_all_products(), 2
+
+
+def test_snapshot_downloaded_once_within_ttl():
+    """Aynı anda çağıran iş parçacıkları tek indirme paylaşmalı"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        api = FakeSentosAPI()
+        snapshots = [SentosCatalogSnapshot(api, ttl_seconds=60, cache_dir=cache_dir) for _ in range(5)]
+        threads = [threading.Thread(target=s.get_products) for s in snapshots]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        assert api.downloads == 1
+        assert [p['id'] for p in snapshots[0].iter_products()] == [1, 2]
+        assert api.downloads == 1
+
+
+def test_find_by_sku_uses_index():
+    """Ana ve varyant SKU'ları aynı ürüne çözülmeli"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        api = FakeSentosAPI()
+        snapshot = SentosCatalogSnapshot(api, ttl_seconds=60, cache_dir=cache_dir)
+        assert snapshot.find_by_sku('ABC')['id'] == 1
+        assert snapshot.find_by_sku(' ABC-M ')['id'] == 1
+        assert snapshot.find_by_sku('XYZ-S')['id'] == 2
+        assert snapshot.find_by_sku('YOK') is None
+        assert api.downloads == 1
+
+
+def test_expired_snapshot_is_refreshed_from_stream():
+    """TTL dolduysa akış API'den okunmalı ve anlık görüntü yenilenmeli"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        api = FakeSentosAPI()
+        snapshot = SentosCatalogSnapshot(api, ttl_seconds=0, cache_dir=cache_dir)
+        list(snapshot.iter_products())
+        list(snapshot.iter_products())
+        assert api.downloads == 2
+
+
+def test_load_fresh_never_downloads():
+    """load_fresh taze değilse None döndürmeli, Sentos'a istek atmamalı"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        api = FakeSentosAPI()
+        assert SentosCatalogSnapshot(api, ttl_seconds=60, cache_dir=cache_dir).load_fresh() is None
+        SentosCatalogSnapshot(api, ttl_seconds=60, cache_dir=cache_dir).get_products()
+        assert [p['id'] for p in SentosCatalogSnapshot(api, ttl_seconds=60, cache_dir=cache_dir).load_fresh()] == [1, 2]
+        assert SentosCatalogSnapshot(api, ttl_seconds=0, cache_dir=cache_dir).load_fresh() is None
+        assert api.downloads == 1
+
+
+def test_memory_cache_keeps_only_current_snapshot():
+    """Bellekte yalnızca son okunan kataloğun kopyası kalmalı"""
+    with tempfile.TemporaryDirectory() as first_dir, tempfile.TemporaryDirectory() as second_dir:
+        api = FakeSentosAPI()
+        first = SentosCatalogSnapshot(api, ttl_seconds=60, cache_dir=first_dir)
+        second = SentosCatalogSnapshot(api, ttl_seconds=60, cache_dir=second_dir)
+        first.get_products()
+        first.load_fresh()
+        second.get_products()
+        second.load_fresh()
+        assert list(sentos_snapshot._memory_cache) == [second.path]
+
+
+def test_stock_modes_refetch_catalog_by_default():
+    """Stok modları verilmedikçe anlık görüntüyü kullanmamalı; açıkça verilen TTL geçerli olmalı"""
+    assert catalog_ttl_for_mode(STOCK_FAST_MODE) == 0
+    assert catalog_ttl_for_mode("Sadece Stok ve Varyantlar") == 0
+    assert catalog_ttl_for_mode(FULL_SYNC_MODE) == DEFAULT_SNAPSHOT_TTL
+    assert catalog_ttl_for_mode(STOCK_FAST_MODE, catalog_ttl=300) == 300
+
+
+if __name__ == "__main__":
+    test_snapshot_downloaded_once_within_ttl()
+    test_find_by_sku_uses_index()
+    test_expired_snapshot_is_refreshed_from_stream()
+    test_load_fresh_never_downloads()
+    test_memory_cache_keeps_only_current_snapshot()
+    test_stock_modes_refetch_catalog_by_default()
+    print("✅ Tüm katalog anlık görüntüsü testleri başarılı")
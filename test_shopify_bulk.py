@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Bulk Operations JSONL Testi
+__parentId ile düzleştirilmiş satırların ağaç yapısına çevrilmesini test eder
+"""
+
+import json
+from connectors.shopify_bulk import iter_bulk_tree, gid_type
+
+SAMPLE_JSONL = """
+{"id":"gid://shopify/Product/1","title":"Elbise"}
+{"id":"gid://shopify/Collection/9","title":"Yaz","__parentId":"gid://shopify/Product/1"}
+{"id":"gid://shopify/ProductVariant/11","sku":"ELB-S","inventoryItem":{"id":"gid://shopify/InventoryItem/111"},"__parentId":"gid://shopify/Product/1"}
+{"id":"gid://shopify/ProductVariant/12","sku":"ELB-M","inventoryItem":{"id":"gid://shopify/InventoryItem/112"},"__parentId":"gid://shopify/Product/1"}
+{"id":"gid://shopify/InventoryLevel/5","available":3,"__parentId":"gid://shopify/ProductVariant/12"}
+{"id":"gid://shopify/Product/2","title":"Gömlek"}
+{"id":"gid://shopify/ProductVariant/21","sku":"GOM-L","__parentId":"gid://shopify/Product/2"}
+"""
+
+
+def _objects():
+    return (json.loads(line) for line in SAMPLE_JSONL.strip().splitlines())
+
+
+def test_gid_type():
+    """GID'den nesne tipi çıkarılmalı"""
+    assert gid_type("gid://shopify/ProductVariant/11") == "ProductVariant"
+    assert gid_type(None) is None
+
+
+def test_tree_rebuilds_product_variant_inventory():
+    """Ürün -> varyant -> envanter ilişkisi bağlantı biçiminde kurulmalı"""
+    child_keys = {"ProductVariant": "variants", "Collection": "collections", "InventoryLevel": "inventoryLevels"}
+    products = list(iter_bulk_tree(_objects(), child_keys))
+
+    assert [p["title"] for p in products] == ["Elbise", "Gömlek"]
+    first = products[0]
+    assert [e["node"]["sku"] for e in first["variants"]["edges"]] == ["ELB-S", "ELB-M"]
+    assert first["collections"]["edges"][0]["node"]["title"] == "Yaz"
+    medium = first["variants"]["edges"][1]["node"]
+    assert medium["inventoryLevels"]["edges"][0]["node"]["available"] == 3
+    assert "__parentId" not in medium
+
+
+def test_tree_is_streamed():
+    """İlk kök, ikinci kökün satırları okunmadan önce yield edilmeli"""
+    consumed = []
+
+    def tracking():
+        for obj in _objects():
+            consumed.append(obj["id"])
+            yield obj
+
+    first = next(iter_bulk_tree(tracking(), {"ProductVariant": "variants"}))
+    assert first["id"] == "gid://shopify/Product/1"
+    assert "gid://shopify/ProductVariant/21" not in consumed
+
+
+if __name__ == "__main__":
+    test_gid_type()
+    test_tree_rebuilds_product_variant_inventory()
+    test_tree_is_streamed()
+    print("✅ Tüm bulk testleri başarılı")
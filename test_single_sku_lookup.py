@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tekil SKU Arama Testi
+Tekil ürün güncellemesinde Shopify ürününün katalog yüklemeden doğrudan SKU aramasıyla
+bulunmasını ve tekrar eden aramaların LRU'dan karşılanmasını test eder
+"""
+
+import sync_runner
+
+
+class FakeIndex:
+    def is_ready(self):
+        return False
+
+
+class FakeShopifyAPI:
+    """Dizini kurulu olmayan, SKU/başlık aramalarını sayan sahte istemci"""
+    store_url = "https://demo.myshopify.com"
+
+    def __init__(self):
+        self.product_index = None
+        self.sku_lookups = []
+        self.title_lookups = 0
+
+    def get_product_index(self):
+        self.product_index = FakeIndex()
+        return self.product_index
+
+    def find_product_by_sku(self, sku):
+        self.sku_lookups.append(sku)
+        return {'id': 7, 'gid': "gid://shopify/Product/7"} if sku == "ELB-S" else None
+
+    def find_product_by_title(self, title):
+        self.title_lookups += 1
+        return None
+
+
+def test_direct_lookup_and_lru():
+    """Varyant SKU'su ile bulunmalı, dizin kullanılmamalı, ikinci arama istek atmamalı"""
+    sync_runner._single_sku_cache.clear()
+    api = FakeShopifyAPI()
+    product = {'sku': "ELB", 'name': "Elbise", 'variants': [{'sku': "ELB-S"}, {'sku': "ELB-M"}]}
+
+    assert sync_runner._lookup_single_product(api, product)['gid'] == "gid://shopify/Product/7"
+    assert api.sku_lookups == ["ELB-S"] and api.product_index is None
+
+    again = FakeShopifyAPI()
+    assert sync_runner._lookup_single_product(again, product)['id'] == 7
+    assert again.sku_lookups == [] and again.title_lookups == 0
+
+
+def test_lru_is_bounded():
+    """LRU en eski kaydı atmalı"""
+    sync_runner._single_sku_cache.clear()
+    api = FakeShopifyAPI()
+    api.find_product_by_sku = lambda sku: {'id': 1, 'gid': f"gid://shopify/Product/{sku}"}
+    for i in range(sync_runner.SINGLE_SKU_CACHE_SIZE + 5):
+        sync_runner._lookup_single_product(api, {'sku': f"S{i}", 'name': ""})
+    assert len(sync_runner._single_sku_cache) == sync_runner.SINGLE_SKU_CACHE_SIZE
+    assert (api.store_url, "S0") not in sync_runner._single_sku_cache
+
+
+if __name__ == "__main__":
+    test_direct_lookup_and_lru()
+    test_lru_is_bounded()
+    print("✅ Tüm tekil SKU arama testleri başarılı")
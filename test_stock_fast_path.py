@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Katalog Geneli Stok Yazımı Testi
+Stok satırlarının ürün sınırlarını aşan partilerle yazılmasını, hatalı satırın ayıklanmasını
+ve Shopify'da zaten güncel olan satırların atlanmasını, süre bütçesi dolunca gönderimin ertelenmesini test eder
+"""
+
+import threading
+import sync_runner
+from operations import stock_sync
+from operations.sync_scheduler import DeadlineScheduler
+
+
+class FakeShopifyAPI:
+    """inventorySetOnHandQuantities çağrılarını kaydeden, 'BAD' öğesinde userError döndüren sahte istemci"""
+    def __init__(self, on_hand=None):
+        self.calls = []
+        self.reads = 0
+        self.on_hand = on_hand or {}
+        self.lock = threading.Lock()
+        self.inventory_write_stats = {'written': 0, 'noop_skipped': 0}
+
+    def record_inventory_writes(self, written, noop_skipped):
+        self.inventory_write_stats['written'] += written
+        self.inventory_write_stats['noop_skipped'] += noop_skipped
+
+    def get_default_location_id(self):
+        return "gid://shopify/Location/1"
+
+    def execute_graphql(self, query, variables):
+        if 'ids' in variables:
+            with self.lock:
+                self.reads += 1
+            return {'nodes': [
+                {'id': i, 'inventoryLevel': {'quantities': [{'name': 'on_hand', 'quantity': self.on_hand[i]}]}} if i in self.on_hand else None
+                for i in variables['ids']
+            ]}
+        rows = variables['input']['setQuantities']
+        with self.lock:
+            self.calls.append(len(rows))
+        if any(r['inventoryItemId'] == "BAD" for r in rows):
+            return {'inventorySetOnHandQuantities': {'userErrors': [{'field': ['input'], 'message': 'not stocked'}]}}
+        return {'inventorySetOnHandQuantities': {'inventoryAdjustmentGroup': {'id': 'g'}, 'userErrors': []}}
+
+
+def _catalog(product_count, variants_per_product):
+    products, item_map = [], {}
+    for p in range(product_count):
+        variants = []
+        for v in range(variants_per_product):
+            sku = f"P{p}-{v}"
+            variants.append({'sku': sku, 'stocks': [{'stock': v}]})
+            item_map[sku] = (f"gid://shopify/InventoryItem/{p}{v}", f"gid://shopify/Product/{p}")
+        products.append({'name': f"Ürün {p}", 'sku': f"P{p}", 'variants': variants})
+    return products, item_map
+
+
+def test_plan_splits_products():
+    """Yeni varyantı olan ürün ürün bazlı yola, Shopify'da olmayan ürün atlananlara düşmeli"""
+    products, item_map = _catalog(3, 2)
+    products[1]['variants'].append({'sku': 'P1-NEW', 'stocks': [{'stock': 1}]})
+    products.append({'name': 'Yok', 'sku': 'X', 'variants': [{'sku': 'X-1'}]})
+    writes, needs_variant_sync, not_found = stock_sync.plan_catalog_stock(products, item_map, lambda p: p['sku'] != 'X')
+    assert [p['sku'] for p, _ in writes] == ['P0', 'P2']
+    assert [p['sku'] for p in needs_variant_sync] == ['P1']
+    assert [p['sku'] for p in not_found] == ['X']
+    assert [a['availableQuantity'] for a in writes[0][1]] == [0, 1]
+
+
+def test_negative_stock_not_written():
+    """Negatif stoklu varyant, ürün bazlı yolda olduğu gibi katalog geneli yolda da yazılmamalı"""
+    products, item_map = _catalog(1, 2)
+    products[0]['variants'][1]['stocks'] = [{'stock': -3}]
+    writes, _, _ = stock_sync.plan_catalog_stock(products, item_map, lambda p: True)
+    assert [a['availableQuantity'] for a in writes[0][1]] == [0]
+
+
+def test_writes_cross_product_batches():
+    """60 ürünün 600 varyantı 3 istekte yazılmalı; hatalı satır bölünerek ayıklanmalı"""
+    products, item_map = _catalog(60, 10)
+    writes, _, _ = stock_sync.plan_catalog_stock(products, item_map, lambda p: True)
+    adjustments = [a for _, product_adjustments in writes for a in product_adjustments]
+    api = FakeShopifyAPI()
+    assert stock_sync.set_on_hand_catalog_wide(api, adjustments) == (set(), set())
+    assert sorted(api.calls) == [100, 250, 250]
+
+    adjustments[10]['inventoryItemId'] = "BAD"
+    api = FakeShopifyAPI()
+    assert stock_sync.set_on_hand_catalog_wide(api, adjustments) == ({"BAD"}, set())
+    # Hatalı parti ikiye bölünerek tekrar denenir; diğer partiler tek istekte kalır
+    assert api.calls.count(250) == 2 and 1 in api.calls
+
+
+def test_writer_stops_between_batches():
+    """Bütçe kontrolü her partiden önce yapılmalı; gönderilmeyen satırlar ertelenmiş dönmeli"""
+    products, item_map = _catalog(60, 10)
+    writes, _, _ = stock_sync.plan_catalog_stock(products, item_map, lambda p: True)
+    adjustments = [a for _, product_adjustments in writes for a in product_adjustments]
+    api = FakeShopifyAPI()
+    checks = []
+
+    def can_dispatch(in_flight):
+        checks.append(in_flight)
+        return len(checks) <= 1
+
+    failed, deferred = stock_sync.set_on_hand_catalog_wide(api, adjustments, max_workers=1, can_dispatch=can_dispatch)
+    assert failed == set() and api.calls == [250]
+    assert deferred == {a['inventoryItemId'] for a in adjustments[250:]}
+
+
+def test_noop_adjustments_are_dropped():
+    """Shopify'daki miktarla aynı olan satırlar yazılmamalı, okunamayanlar yazılmalı"""
+    products, item_map = _catalog(30, 10)
+    writes, _, _ = stock_sync.plan_catalog_stock(products, item_map, lambda p: True)
+    adjustments = [a for _, product_adjustments in writes for a in product_adjustments]
+    # İlk 250 satır Shopify'da aynı, 10 satır farklı, geri kalanı lokasyonda okunamıyor
+    on_hand = {a['inventoryItemId']: a['availableQuantity'] for a in adjustments[:250]}
+    on_hand.update({a['inventoryItemId']: a['availableQuantity'] + 1 for a in adjustments[250:260]})
+    api = FakeShopifyAPI(on_hand)
+    changed, skipped = stock_sync.drop_noop_adjustments(api, adjustments)
+    assert skipped == 250 and len(changed) == 50
+    assert api.reads == 3
+    assert api.inventory_write_stats == {'written': 50, 'noop_skipped': 250}
+
+
+class FakeIndex:
+    def __init__(self, item_map):
+        self.item_map = item_map
+
+    def get_inventory_item_map(self):
+        return self.item_map
+
+    def find_product(self, product):
+        return {'gid': f"gid://shopify/Product/{product['sku']}"}
+
+
+class FakeCatalog:
+    def __init__(self, products):
+        self.products = products
+
+    def iter_product_pages(self):
+        yield self.products, len(self.products)
+
+
+class FakeSentosAPI:
+    def __init__(self, products):
+        self.catalog = FakeCatalog(products)
+
+
+class FakeDelta:
+    """Tüm ürünleri değişmiş sayan sahte delta planlayıcı"""
+    def split_page(self, products):
+        return [(p, {}) for p in products], []
+
+
+class FakeCheckpoint:
+    def completed_stages(self, key):
+        return set()
+
+
+def test_fast_path_defers_when_budget_spent():
+    """Katalog okuması bütçeyi tükettiyse hiçbir stok yazılmamalı, ürünler ertelenmiş sayılmalı"""
+    products, item_map = _catalog(3, 2)
+    products[2]['variants'].append({'sku': 'P2-NEW', 'stocks': [{'stock': 1}]})
+    api = FakeShopifyAPI()
+    api.product_index = FakeIndex(item_map)
+    api.get_product_index = lambda: api.product_index
+    api.location_mapping = None
+
+    clock = [0.0]
+    scheduler = DeadlineScheduler(60, max_workers=2, clock=lambda: clock[0])
+    clock[0] = 30
+    stats = {'total': 0, 'updated': 0, 'failed': 0, 'skipped': 0, 'unchanged': 0, 'resumed': 0, 'deferred': 0, 'processed': 0}
+    completed = sync_runner._run_stock_fast_path(
+        api, FakeSentosAPI(products), False, lambda update: None, threading.Event(), FakeDelta(),
+        stats, [], threading.Lock(), 2, {}, FakeCheckpoint(), scheduler
+    )
+    assert completed is False
+    assert api.calls == [] and api.reads == 0
+    assert stats['deferred'] == 3 and stats['total'] == 0
+
+
+if __name__ == "__main__":
+    test_plan_splits_products()
+    test_negative_stock_not_written()
+    test_writes_cross_product_batches()
+    test_writer_stops_between_batches()
+    test_noop_adjustments_are_dropped()
+    test_fast_path_defers_when_budget_spent()
+    print("✅ Tüm katalog geneli stok testleri başarılı")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Senkronizasyon Kontrol Noktası Testi
+Yarım kalan çalıştırmanın tamamlanan aşamalarıyla devam ettirilmesini ve yanıtı alınamayan
+stok yazımlarının tekrar uygulanmadan mutabakatla kapatılmasını test eder
+"""
+
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from operations import stock_sync
+from operations.sync_checkpoint import SyncCheckpoint
+
+STORE = "test-store.myshopify.com"
+
+
+class FakeShopifyAPI:
+    """Stok okuma/yazma çağrılarını kaydeden; fail_writes açıkken yazım isteğini yarıda kesen sahte istemci"""
+    def __init__(self, on_hand):
+        self.on_hand = on_hand
+        self.written = []
+        self.fail_writes = False
+        self.checkpoint = None
+        self.lock = threading.Lock()
+
+    def record_inventory_writes(self, written, noop_skipped):
+        pass
+
+    def get_default_location_id(self):
+        return "gid://shopify/Location/1"
+
+    def execute_graphql(self, query, variables):
+        if 'ids' in variables:
+            return {'nodes': [
+                {'id': i, 'inventoryLevel': {'quantities': [{'name': 'on_hand', 'quantity': self.on_hand[i]}]}}
+                for i in variables['ids']
+            ]}
+        rows = variables['input']['setQuantities']
+        if self.fail_writes:
+            # İstek Shopify'a ulaştı ve ilk satır uygulandı ama yanıt alınamadı
+            self.on_hand[rows[0]['inventoryItemId']] = rows[0]['quantity']
+            raise Exception("bağlantı koptu")
+        with self.lock:
+            self.written.extend(rows)
+            for row in rows:
+                self.on_hand[row['inventoryItemId']] = row['quantity']
+        return {'inventorySetOnHandQuantities': {'inventoryAdjustmentGroup': {'id': 'g'}, 'userErrors': []}}
+
+
+def test_resume_restores_completed_stages():
+    """Devam edilen çalıştırma modu, parametreleri ve tamamlanan aşamaları geri yüklemeli"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "runs.db")
+        run = SyncCheckpoint.start(STORE, "Sadece Stok ve Varyantlar", {'test_mode': False}, db_path=db_path)
+        run.mark_stage("P1", "inventory")
+        run.mark_stage("P2", "create")
+        run.finish('stopped')
+
+        incomplete = SyncCheckpoint.list_runs(STORE, db_path=db_path)
+        assert [r['run_id'] for r in incomplete] == [run.run_id] and incomplete[0]['products'] == 2
+
+        resumed = SyncCheckpoint.resume(STORE, run.run_id, db_path=db_path)
+        assert resumed.sync_mode == "Sadece Stok ve Varyantlar" and resumed.params == {'test_mode': False}
+        assert resumed.completed_stages("P1") == {"inventory"}
+        assert resumed.completed_stages("P3") == set()
+        resumed.finish('completed')
+        assert SyncCheckpoint.list_runs(STORE, db_path=db_path) == []
+
+
+def test_pending_write_is_not_applied_twice():
+    """Yanıtı alınamayan yazımda yalnızca uygulanmamış satır tekrar gönderilmeli"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "runs.db")
+        api = FakeShopifyAPI({"A": 1, "B": 1})
+        api.checkpoint = SyncCheckpoint.start(STORE, "Sadece Stok ve Varyantlar", db_path=db_path)
+        api.fail_writes = True
+        try:
+            stock_sync._send_set_quantities(api, [
+                {"inventoryItemId": "A", "locationId": "L", "quantity": 5},
+                {"inventoryItemId": "B", "locationId": "L", "quantity": 7},
+            ])
+        except Exception:
+            pass
+        assert len(api.checkpoint.pending_writes()) == 1
+
+        api.fail_writes = False
+        api.checkpoint = SyncCheckpoint.resume(STORE, api.checkpoint.run_id, db_path=db_path)
+        resent = stock_sync.reconcile_pending_writes(api, api.checkpoint, max_workers=1)
+        assert resent == 1
+        assert [row['inventoryItemId'] for row in api.written] == ["B"]
+        assert api.on_hand == {"A": 5, "B": 7}
+        assert api.checkpoint.pending_writes() == []
+
+
+def test_old_runs_are_pruned():
+    """Saklama süresi dolan tamamlanmış çalıştırma ve kapanmış WAL kayıtları silinmeli; yarım kalan çalıştırma kalmalı"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "runs.db")
+        done = SyncCheckpoint.start(STORE, "Sadece Stok ve Varyantlar", db_path=db_path)
+        done.mark_stage("P1", "inventory")
+        done.wal_end(done.wal_begin([{'inventoryItemId': "I1", 'quantity': 1}]), applied=True)
+        done.finish('completed')
+        stopped = SyncCheckpoint.start(STORE, "Sadece Stok ve Varyantlar", db_path=db_path)
+        pending_id = stopped.wal_begin([{'inventoryItemId': "I2", 'quantity': 2}])
+        stopped.finish('stopped')
+
+        assert stopped.prune(now=datetime.now(timezone.utc) + timedelta(days=8)) == 1
+        assert [r['run_id'] for r in SyncCheckpoint.list_runs(STORE, only_incomplete=False, db_path=db_path)] == [stopped.run_id]
+        assert [entry_id for entry_id, _ in stopped.pending_writes()] == [pending_id]
+
+
+if __name__ == "__main__":
+    test_resume_restores_completed_stages()
+    test_pending_write_is_not_applied_twice()
+    test_old_runs_are_pruned()
+    print("✅ Tüm kontrol noktası testleri başarılı")
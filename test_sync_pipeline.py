@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Aşamalı Senkronizasyon Hattı Testi
+Yavaş medya aşamasının hızlı stok aşamasını bekletmemesini, dal hatalarının toplanmasını ve
+başarısız adımların mesaj metninden bağımsız olarak işaretlenmesini test eder
+"""
+
+import time
+import threading
+from operations.sync_pipeline import StagedPipeline, SyncJob, SyncChanges
+from operations import delta_sync
+import sync_runner
+
+
+def _run(jobs, media_delay, workers):
+    done, timeline = [], {}
+    stop_event = threading.Event()
+    started = time.monotonic()
+
+    def inventory(job):
+        if job.product['sku'] == 'BAD':
+            raise Exception("stok yazılamadı")
+        timeline.setdefault('inventory', []).append(time.monotonic() - started)
+        return ["stok"]
+
+    def media(job):
+        time.sleep(media_delay)
+        timeline.setdefault('media', []).append(time.monotonic() - started)
+        return ["medya"]
+
+    pipeline = StagedPipeline(lambda job: ('inventory', 'media'), {'inventory': inventory, 'media': media},
+                              done.append, stop_event, workers, queue_size=len(jobs))
+    pipeline.start()
+    for job in jobs:
+        pipeline.submit(job)
+    pipeline.close()
+    return done, timeline, pipeline.get_metrics()
+
+
+def test_slow_media_does_not_hold_stock_stage():
+    """Medya aşaması yavaşken stok dalı tüm ürünleri medyadan önce bitirmeli"""
+    jobs = [SyncJob({'name': f"Ürün {i}", 'sku': f"P{i}"}) for i in range(8)]
+    done, timeline, metrics = _run(jobs, 0.05, {'plan': 1, 'inventory': 2, 'media': 1})
+    assert len(done) == 8
+    assert max(timeline['inventory']) < max(timeline['media']) / 2
+    assert all(sorted(job.changes) == ["medya", "stok"] for job in done)
+    assert metrics['media']['processed'] == 8 and metrics['inventory']['workers'] == 2
+
+
+def test_branch_error_is_collected():
+    """Bir dalın hatası ürünü hatalı işaretlemeli, diğer dal yine çalışmalı"""
+    jobs = [SyncJob({'name': "Bozuk", 'sku': 'BAD'})]
+    done, _, metrics = _run(jobs, 0, {})
+    assert len(done) == 1 and len(done[0].errors) == 1
+    assert done[0].changes == ["medya"]
+    assert metrics['inventory']['failed'] == 1
+
+
+def test_failure_is_reported_explicitly():
+    """Başarı mesajında 'hata' geçse de adım başarılı; fail() ile işaretlenen adım başarısız sayılmalı"""
+    ok = SyncChanges(["Kategori 'Hata Payı' olarak ayarlandı."])
+    assert delta_sync.push_succeeded(ok)
+
+    failed = SyncChanges(["2 varyantın stok seviyesi güncellendi."])
+    failed.fail("Stok güncelleme hatası: A1-S SKU'larının stoğu yazılamadı.")
+    assert not delta_sync.push_succeeded(failed)
+
+    merged = SyncChanges()
+    merged.merge(ok)
+    merged.merge(failed)
+    assert len(merged) == 3 and merged.failed
+
+    job = SyncJob({'name': "Ürün", 'sku': "P1"})
+    pipeline = StagedPipeline(lambda job: ('details', 'media'), {'details': lambda job: ok, 'media': lambda job: failed},
+                              lambda job: None, threading.Event(), {}, queue_size=1)
+    pipeline.start()
+    pipeline.submit(job)
+    pipeline.close()
+    assert job.failed and not job.errors
+
+
+def test_cancelled_jobs_still_complete():
+    """Durdurma isteğinden sonra kuyruktaki işler çalıştırılmadan ama sonuçlanarak on_complete'e ulaşmalı"""
+    done, ran = [], []
+    stop_event = threading.Event()
+    pipeline = StagedPipeline(lambda job: ('inventory',), {'inventory': lambda job: ran.append(job) or ["stok"]},
+                              done.append, stop_event, {}, queue_size=4)
+    stop_event.set()
+    pipeline.start()
+    for i in range(3):
+        pipeline.submit(SyncJob({'name': f"Ürün {i}", 'sku': f"P{i}"}))
+    pipeline.close()
+    assert len(done) == 3 and all(job.cancelled for job in done)
+    assert ran == [] and pipeline.get_metrics()['plan']['cancelled'] == 3
+
+
+def test_pool_covers_all_stage_workers():
+    """Yalnızca moddaki aşamalar için çalışan açılmalı; HTTP havuzu tüm aşama çalışanlarını karşılamalı"""
+    full = sync_runner._pipeline_workers("Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", 5)
+    assert full == {'plan': 2, 'details': 5, 'inventory': 5, 'media': 5, 'create': 5}
+    assert sync_runner._pipeline_workers("Sadece Resimler", 5) == {'plan': 2, 'media': 5}
+    assert sync_runner._http_pool_size("Tam Senkronizasyon (Tümünü Oluştur ve Güncelle)", 5) >= 20
+    assert sync_runner._http_pool_size(delta_sync.STOCK_FAST_MODE, 5) >= 5
+
+
+if __name__ == "__main__":
+    test_slow_media_does_not_hold_stock_stage()
+    test_branch_error_is_collected()
+    test_failure_is_reported_explicitly()
+    test_cancelled_jobs_still_complete()
+    test_pool_covers_all_stage_workers()
+    print("✅ Tüm aşamalı hat testleri başarılı")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Süre Bütçeli Zamanlayıcı Testi
+Ürünlerin öncelik sırasına konmasını (akışı belleğe almadan) ve süre dolmadan gönderimin durmasını test eder
+"""
+
+from operations.sync_scheduler import DeadlineScheduler, PriorityBuffer, DRAIN_MARGIN_SECONDS
+
+
+class FakeDelta:
+    """Ürünün 'changed' alanındaki parçaları değişmiş sayan sahte delta planlayıcı"""
+    def changed_components(self, product, fingerprints):
+        return set(product.get('changed', ()))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _product(sku, stock, changed=()):
+    return {'sku': sku, 'changed': changed, 'variants': [{'sku': f"{sku}-1", 'stocks': [{'stock': stock}]}]}
+
+
+def test_priority_order():
+    """Stoğu değişenler önce, stoğu sıfır olanlar sonra, detay/medya yenilemeleri en son gelmeli"""
+    items = [
+        (_product("DETAY", 3, ('details',)), {}),
+        (_product("SIFIR", 0, ('images',)), {}),
+        (_product("STOK-1", 5, ('stock', 'details')), {}),
+        (_product("STOK-2", 0, ('stock',)), {}),
+    ]
+    ordered = DeadlineScheduler.order(items, FakeDelta())
+    assert [p['sku'] for p, _ in ordered] == ["STOK-1", "STOK-2", "SIFIR", "DETAY"]
+
+
+def test_buffer_orders_stream_without_reading_it_all():
+    """Tampon dolunca ilk ürün verilmeli; sıralama yalnızca tampon içinde yapılmalı"""
+    pulled = []
+
+    def stream():
+        for item in [(_product("DETAY", 3, ('details',)), {}), (_product("STOK-1", 5, ('stock',)), {}),
+                     (_product("SIFIR", 0, ('images',)), {}), (_product("STOK-2", 1, ('stock',)), {})]:
+            pulled.append(item[0]['sku'])
+            yield item
+
+    buffer = PriorityBuffer(stream(), FakeDelta(), lookahead=2)
+    products = iter(buffer)
+    assert next(products)[0]['sku'] == "STOK-1"
+    assert pulled == ["DETAY", "STOK-1"] and buffer.buffered() == 1
+    assert [p['sku'] for p, _ in products] == ["SIFIR", "STOK-2", "DETAY"]
+
+
+def test_dispatch_stops_before_deadline():
+    """Kalan süre yoldaki işlere yetmeyecekse gönderim durmalı ve bir daha açılmamalı"""
+    clock = FakeClock()
+    scheduler = DeadlineScheduler(600, max_workers=2, history_cost=10.0, clock=clock)
+    assert scheduler.can_dispatch(in_flight=4)
+    # Kalan süre: 4 iş + 1 yeni iş (5 * 10 / 2 = 25 sn) + pay
+    clock.now = 600 - DRAIN_MARGIN_SECONDS - 20
+    assert not scheduler.can_dispatch(in_flight=4)
+    clock.now = 0
+    assert not scheduler.can_dispatch(in_flight=0)
+
+
+def test_live_rate_replaces_history():
+    """Yeterli ürün bittikten sonra maliyet bu çalıştırmanın ölçülen hızından hesaplanmalı"""
+    clock = FakeClock()
+    scheduler = DeadlineScheduler(3600, max_workers=4, history_cost=100.0, clock=clock)
+    scheduler.begin_dispatch()
+    clock.now = 20
+    scheduler.record_done(40)
+    assert scheduler.worker_seconds_per_product() == 2.0
+    assert DeadlineScheduler(None, max_workers=1, clock=clock).can_dispatch(in_flight=10**6)
+
+
+if __name__ == "__main__":
+    test_priority_order()
+    test_buffer_orders_stream_without_reading_it_all()
+    test_dispatch_stops_before_deadline()
+    test_live_rate_replaces_history()
+    print("✅ Tüm zamanlayıcı testleri başarılı")